@@ -227,6 +227,15 @@ export const apiService = {
     }
   },
 
+  // Pushed status updates instead of polling getTransferStatus; returns an unsubscribe function
+  subscribeTransferStatus(transferId: string, onStatus: (status: any) => void) {
+    const source = new EventSource(`${TRANSFER_SERVICE_URL}/status/${transferId}/events`);
+    source.addEventListener('status', (event) => onStatus(JSON.parse((event as MessageEvent).data)));
+    // Sent once the transfer reaches a final state; stops EventSource from reconnecting
+    source.addEventListener('end', () => source.close());
+    return () => source.close();
+  },
+
   async acceptTransfer(transferId: string) {
     try {
       const response = await api.post(`${TRANSFER_SERVICE_URL}/${transferId}/accept`);
@@ -0,0 +1,163 @@
+"""
+Long-lived native-async Azure Blob client.
+
+The synchronous ``azure.storage.blob.BlobServiceClient`` blocks the event loop
+for the whole network round trip when called from ``async def`` handlers.
+``AsyncBlobStorage`` owns one ``azure.storage.blob.aio.BlobServiceClient`` per
+process, backed by an aiohttp connection pool sized for the pod, so blob calls
+are awaited and connections (TLS sessions) are reused across requests.
+
+Usage:
+    storage = AsyncBlobStorage(
+        account_url="https://mystorage.blob.core.windows.net",
+        use_managed_identity=True,
+        pool_size=100,
+    )
+    await storage.start()  # optional: otherwise created on first use
+
+    container = await storage.get_container_client("documents")
+    props = await container.get_blob_client("a/b.pdf").get_blob_properties()
+
+    await storage.close()
+"""
+
+import asyncio
+import logging
+from typing import Any, Optional
+
+try:
+    import aiohttp
+    from azure.core.pipeline.transport import AioHttpTransport
+    from azure.storage.blob.aio import BlobServiceClient as AsyncBlobServiceClient
+    AZURE_AIO_AVAILABLE = True
+except ImportError:
+    AZURE_AIO_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncBlobStorageError(Exception):
+    """Raised when the async blob client cannot be created"""
+    pass
+
+
+class AsyncBlobStorage:
+    """
+    Process-wide async BlobServiceClient with a tuned connection pool.
+
+    Features:
+    - One client and one aiohttp connection pool per process (created lazily, inside the loop)
+    - Pool size, per-host limit, DNS cache and keep-alive tuned for Blob endpoints
+    - Account key, connection string or Managed Identity (async credential)
+    - Explicit ``close()`` for the FastAPI lifespan
+    """
+
+    def __init__(
+        self,
+        account_url: Optional[str] = None,
+        connection_string: Optional[str] = None,
+        account_key: Optional[str] = None,
+        use_managed_identity: bool = False,
+        pool_size: int = 100,
+        connection_timeout: int = 10,
+        read_timeout: int = 60,
+        keepalive_timeout: int = 60,
+    ):
+        """
+        Initialize async blob storage (no network or loop access here).
+
+        Args:
+            account_url: Blob endpoint (required unless connection_string is given)
+            connection_string: Storage connection string
+            account_key: Storage account key
+            use_managed_identity: Authenticate with azure.identity.aio.DefaultAzureCredential
+            pool_size: Max pooled connections to the Blob endpoint
+            connection_timeout: Connect timeout in seconds
+            read_timeout: Per-read timeout in seconds
+            keepalive_timeout: Idle seconds before a pooled connection is closed
+        """
+        if not account_url and not connection_string:
+            raise AsyncBlobStorageError("account_url or connection_string is required")
+
+        self.account_url = account_url
+        self.connection_string = connection_string
+        self.account_key = account_key
+        self.use_managed_identity = use_managed_identity
+        self.pool_size = pool_size
+        self.connection_timeout = connection_timeout
+        self.read_timeout = read_timeout
+        self.keepalive_timeout = keepalive_timeout
+
+        self._client: Optional[Any] = None
+        self._credential: Optional[Any] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    def _build_transport(self) -> "AioHttpTransport":
+        """aiohttp transport whose pool is shared by every call of this client."""
+        connector = aiohttp.TCPConnector(
+            limit=self.pool_size,
+            limit_per_host=self.pool_size,  # everything goes to one account endpoint
+            ttl_dns_cache=300,
+            keepalive_timeout=self.keepalive_timeout,
+        )
+        session = aiohttp.ClientSession(connector=connector, trust_env=True)
+        return AioHttpTransport(session=session, session_owner=True)
+
+    def _create_client(self) -> Any:
+        if not AZURE_AIO_AVAILABLE:
+            raise AsyncBlobStorageError("azure-storage-blob and aiohttp are required for AsyncBlobStorage")
+
+        options = {
+            "transport": self._build_transport(),
+            "connection_timeout": self.connection_timeout,
+            "read_timeout": self.read_timeout,
+        }
+
+        if self.connection_string:
+            return AsyncBlobServiceClient.from_connection_string(self.connection_string, **options)
+
+        if self.use_managed_identity:
+            from azure.identity.aio import DefaultAzureCredential
+            self._credential = DefaultAzureCredential()
+            credential = self._credential
+        else:
+            credential = self.account_key
+
+        return AsyncBlobServiceClient(account_url=self.account_url, credential=credential, **options)
+
+    async def start(self) -> None:
+        """Create the client (and its connection pool) if not created yet."""
+        await self.get_client()
+
+    async def get_client(self) -> Any:
+        """Get the shared async BlobServiceClient."""
+        if self._client is not None:
+            return self._client
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            if self._client is None:
+                self._client = self._create_client()
+                logger.info(f"Async Blob client created (pool size {self.pool_size})")
+        return self._client
+
+    async def get_container_client(self, container_name: str) -> Any:
+        """Get an async ContainerClient sharing the process-wide pipeline."""
+        client = await self.get_client()
+        return client.get_container_client(container_name)
+
+    async def get_blob_client(self, container_name: str, blob_name: str) -> Any:
+        """Get an async BlobClient sharing the process-wide pipeline."""
+        client = await self.get_client()
+        return client.get_blob_client(container=container_name, blob=blob_name)
+
+    async def close(self) -> None:
+        """Close the client, its connection pool and credential."""
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+        if self._credential is not None:
+            await self._credential.close()
+            self._credential = None
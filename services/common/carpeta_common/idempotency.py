@@ -0,0 +1,336 @@
+"""
+Response-replaying idempotency store.
+
+The first request with a key claims it with an in-progress marker
+(``SET NX EX``, one round trip) and stores its response (status and body)
+when done. Duplicates get that response back instead of an error or a second
+execution; duplicates that arrive while the first request is still running
+can wait for it to finish. Hot completed keys are also answered from a small
+in-process LRU tier, and the store degrades to process memory when Redis is
+unreachable.
+
+Usage:
+    store = IdempotencyStore(namespace="transfer:citizen")
+
+    response = await store.run(key, handler, wait_seconds=5)
+    # handler() -> IdempotentResponse; response.replayed tells duplicates apart
+"""
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+from carpeta_common.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+IN_PROGRESS = "in_progress"
+COMPLETED = "completed"
+
+
+class IdempotencyError(Exception):
+    """Base exception for idempotency errors"""
+    pass
+
+
+class IdempotencyInProgress(IdempotencyError):
+    """Raised when the original request is still running after the wait"""
+    pass
+
+
+class IdempotencyKeyReused(IdempotencyError):
+    """Raised when a key is reused for a request with a different fingerprint"""
+    pass
+
+
+@dataclass
+class IdempotentResponse:
+    """Response stored for replay (``body`` must be JSON-serializable)."""
+    status_code: int
+    body: Any
+    replayed: bool = False
+
+
+class _LocalLRU:
+    """Bounded in-process map with per-entry expiry."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+
+class IdempotencyStore:
+    """
+    Idempotency keys with stored responses.
+
+    Features:
+    - Atomic claim with an in-progress marker (SET NX EX)
+    - Completed status and body replayed to duplicates
+    - Optional wait for an in-progress duplicate to complete
+    - Request fingerprints reject a key reused for a different request
+    - Local LRU tier for hot duplicates
+    - Process-memory fallback when Redis is unavailable
+    """
+
+    # Delete the in-progress marker only if this process still owns it
+    ABORT_SCRIPT = """
+    local value = redis.call("get", KEYS[1])
+    if value and cjson.decode(value)["token"] == ARGV[1] then
+        return redis.call("del", KEYS[1])
+    end
+    return 0
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        ttl_seconds: int = 86400,
+        in_progress_ttl_seconds: int = 60,
+        local_size: int = 1024,
+        local_ttl_seconds: float = 60.0,
+        poll_interval: float = 0.05,
+        client_factory: Callable[[], Awaitable[Any]] = get_redis_client,
+    ):
+        """
+        Initialize idempotency store.
+
+        Args:
+            namespace: Key prefix of this use (e.g. "transfer:citizen")
+            ttl_seconds: How long completed responses are replayed
+            in_progress_ttl_seconds: Marker TTL; a crashed request frees its key after this
+            local_size: Completed responses kept in the local LRU tier
+            local_ttl_seconds: How long the local tier may answer without Redis
+            poll_interval: Initial poll interval while waiting for an in-progress request
+            client_factory: Async Redis client factory
+        """
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.in_progress_ttl_seconds = in_progress_ttl_seconds
+        self.local_ttl_seconds = min(local_ttl_seconds, ttl_seconds)
+        self.poll_interval = poll_interval
+        self.client_factory = client_factory
+
+        self._hot = _LocalLRU(local_size)
+        self._fallback = _LocalLRU(local_size * 10)
+        self._tokens: dict[str, str] = {}
+        self._fallback_logged = False
+
+    def _key(self, key: str) -> str:
+        return f"idem:{self.namespace}:{key}"
+
+    async def _client(self) -> Optional[Any]:
+        try:
+            client = await self.client_factory()
+            self._fallback_logged = False
+            return client
+        except Exception as e:
+            if not self._fallback_logged:
+                logger.warning(f"Idempotency store using local fallback: {e}")
+                self._fallback_logged = True
+            return None
+
+    # -- record storage (Redis, or process memory as fallback) ----------------
+
+    async def _get_record(self, key: str) -> Optional[dict]:
+        client = await self._client()
+        if client is not None:
+            try:
+                value = await client.get(self._key(key))
+                return json.loads(value) if value else None
+            except Exception as e:
+                logger.warning(f"Idempotency lookup failed, using local fallback: {e}")
+        return self._fallback.get(key)
+
+    async def _claim(self, key: str, record: dict) -> bool:
+        client = await self._client()
+        if client is not None:
+            try:
+                return bool(
+                    await client.set(
+                        self._key(key), json.dumps(record), ex=self.in_progress_ttl_seconds, nx=True
+                    )
+                )
+            except Exception as e:
+                logger.warning(f"Idempotency claim failed, using local fallback: {e}")
+        if self._fallback.get(key) is not None:
+            return False
+        self._fallback.set(key, record, self.in_progress_ttl_seconds)
+        return True
+
+    async def _store(self, key: str, record: dict, ttl: int) -> None:
+        client = await self._client()
+        if client is not None:
+            try:
+                await client.set(self._key(key), json.dumps(record), ex=ttl)
+                return
+            except Exception as e:
+                logger.warning(f"Idempotency store failed, using local fallback: {e}")
+        self._fallback.set(key, record, ttl)
+
+    async def _release(self, key: str, token: str) -> None:
+        client = await self._client()
+        if client is not None:
+            try:
+                await client.eval(self.ABORT_SCRIPT, 1, self._key(key), token)
+                return
+            except Exception as e:
+                logger.warning(f"Idempotency release failed: {e}")
+        record = self._fallback.get(key)
+        if record is not None and record.get("token") == token:
+            self._fallback.delete(key)
+
+    # -- public API --------------------------------------------------------
+
+    async def begin(
+        self,
+        key: str,
+        fingerprint: Optional[str] = None,
+        wait_seconds: float = 0.0,
+    ) -> Optional[IdempotentResponse]:
+        """
+        Claim a key, or get the response of the request that claimed it.
+
+        Args:
+            key: Idempotency key
+            fingerprint: Request fingerprint (e.g. hash of the body)
+            wait_seconds: How long to wait for an in-progress duplicate
+
+        Returns:
+            None if the caller claimed the key (it must call ``complete`` or
+            ``abort``), otherwise the stored response (``replayed=True``)
+
+        Raises:
+            IdempotencyInProgress: If the original request is still running
+            IdempotencyKeyReused: If the key belongs to a different request
+        """
+        hot = self._hot.get(key)
+        if hot is not None:
+            return self._replay(key, hot, fingerprint)
+
+        deadline = time.monotonic() + wait_seconds
+        interval = self.poll_interval
+        token = str(uuid.uuid4())
+
+        while True:
+            if await self._claim(key, {"state": IN_PROGRESS, "token": token, "fingerprint": fingerprint}):
+                self._tokens[key] = token
+                return None
+
+            # None: released or expired in between, claimed again on the next pass
+            record = await self._get_record(key)
+            if record is not None:
+                if record.get("state") == COMPLETED:
+                    self._hot.set(key, record, self.local_ttl_seconds)
+                    return self._replay(key, record, fingerprint)
+                self._check_fingerprint(key, record, fingerprint)
+
+            if time.monotonic() >= deadline:
+                raise IdempotencyInProgress(f"Request with key {key} is still being processed")
+
+            await asyncio.sleep(min(interval, max(deadline - time.monotonic(), 0)))
+            interval = min(interval * 2, 0.5)
+
+    async def complete(
+        self,
+        key: str,
+        status_code: int,
+        body: Any,
+        fingerprint: Optional[str] = None,
+        ttl_seconds: Optional[int] = None,
+    ) -> None:
+        """
+        Store the response of a claimed key for replay.
+
+        Args:
+            key: Idempotency key
+            status_code: Response status code
+            body: JSON-serializable response body
+            fingerprint: Request fingerprint given to ``begin``
+            ttl_seconds: Replay window (defaults to the store's)
+        """
+        self._tokens.pop(key, None)
+        record = {
+            "state": COMPLETED,
+            "status_code": status_code,
+            "body": body,
+            "fingerprint": fingerprint,
+        }
+        ttl = ttl_seconds or self.ttl_seconds
+        await self._store(key, record, ttl)
+        self._hot.set(key, record, min(self.local_ttl_seconds, ttl))
+
+    async def abort(self, key: str) -> None:
+        """Release a claimed key without a response, so a retry runs again."""
+        token = self._tokens.pop(key, None)
+        if token is not None:
+            await self._release(key, token)
+
+    async def run(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[IdempotentResponse]],
+        fingerprint: Optional[str] = None,
+        wait_seconds: float = 0.0,
+        ttl_seconds: Optional[int] = None,
+        should_store: Optional[Callable[[IdempotentResponse], bool]] = None,
+    ) -> IdempotentResponse:
+        """
+        Execute ``fn`` once per key and replay its response to duplicates.
+
+        Responses rejected by ``should_store`` (e.g. retryable errors) and
+        exceptions release the key instead of being stored.
+
+        Raises:
+            IdempotencyInProgress: If the original request is still running
+            IdempotencyKeyReused: If the key belongs to a different request
+        """
+        cached = await self.begin(key, fingerprint=fingerprint, wait_seconds=wait_seconds)
+        if cached is not None:
+            return cached
+
+        try:
+            response = await fn()
+        except BaseException:
+            await self.abort(key)
+            raise
+
+        if should_store is None or should_store(response):
+            await self.complete(key, response.status_code, response.body, fingerprint, ttl_seconds)
+        else:
+            await self.abort(key)
+        return response
+
+    def _check_fingerprint(self, key: str, record: dict, fingerprint: Optional[str]) -> None:
+        stored = record.get("fingerprint")
+        if fingerprint and stored and stored != fingerprint:
+            raise IdempotencyKeyReused(f"Idempotency key {key} was used for a different request")
+
+    def _replay(self, key: str, record: dict, fingerprint: Optional[str]) -> IdempotentResponse:
+        self._check_fingerprint(key, record, fingerprint)
+        logger.info(f"🔁 Idempotency: replaying stored response for {key}")
+        return IdempotentResponse(record["status_code"], record["body"], replayed=True)
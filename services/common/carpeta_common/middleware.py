@@ -10,7 +10,8 @@ def setup_cors(
     allow_origins: list = None,
     allow_credentials: bool = True,
     allow_methods: list = None,
-    allow_headers: list = None
+    allow_headers: list = None,
+    expose_headers: list = None
 ):
     """Add CORS middleware to FastAPI app.
     
@@ -20,11 +21,14 @@ def setup_cors(
         allow_credentials: Allow credentials
         allow_methods: Allowed HTTP methods (default: ["*"])
         allow_headers: Allowed headers (default: ["*"])
+        expose_headers: Response headers readable by the browser
+            (default: pagination cursor)
     """
     # Default to localhost if not provided (secure default)
     default_origins = ["http://localhost:3000", "http://localhost:8000"]
     default_methods = ["GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS"]
     default_headers = ["Content-Type", "Authorization", "X-Request-ID", "X-Trace-ID"]
+    default_expose_headers = ["X-Next-Cursor"]
     
     app.add_middleware(
         CORSMiddleware,
@@ -32,6 +36,7 @@ def setup_cors(
         allow_credentials=allow_credentials,
         allow_methods=allow_methods or default_methods,
         allow_headers=allow_headers or default_headers,
+        expose_headers=expose_headers or default_expose_headers,
     )
 
 
@@ -0,0 +1,359 @@
+"""
+Azure Blob SAS issuer with cached user delegation keys.
+
+Minting a SAS is an HMAC over a string-to-sign, so once a signing key is in
+memory no network call is needed. This module keeps the user delegation key
+cached until shortly before it expires (refreshing it in the background) and
+reuses identical read-SAS URLs for a fraction of their TTL, so the hot path of
+``generate_read_url`` / ``generate_upload_url`` is purely in-memory.
+
+Usage:
+    issuer = SasIssuer(
+        account_name="mystorage",
+        container_name="documents",
+        blob_service_client=blob_service_client,  # Managed Identity
+    )
+    await issuer.start()  # optional: background key refresh
+
+    url = issuer.generate_read_url("citizens/1/documents/x/file.pdf")
+    url = issuer.generate_upload_url(blob_name, content_type="application/pdf")
+
+    await issuer.stop()
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+from urllib.parse import quote
+
+try:
+    from azure.storage.blob import BlobSasPermissions, generate_blob_sas
+    AZURE_STORAGE_AVAILABLE = True
+except ImportError:
+    AZURE_STORAGE_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class SasIssuerError(Exception):
+    """Raised when no signing key is available to mint a SAS"""
+    pass
+
+
+class SasIssuer:
+    """
+    Mint blob SAS URLs from an in-memory signing key.
+
+    Features:
+    - User Delegation SAS with the key cached until ``refresh_margin`` before expiry
+    - Background refresh so the hot path never waits on Azure AD / Storage;
+      on an event loop a missing or stale key is fetched in a worker thread
+    - Account Key SAS when no Managed Identity client is given, and while
+      delegation keys cannot be fetched (failures cached for ``failure_backoff``)
+    - Reuse of identical read-SAS URLs within ``url_reuse_fraction`` of their TTL
+    """
+
+    def __init__(
+        self,
+        account_name: str,
+        container_name: str = "documents",
+        account_key: Optional[str] = None,
+        blob_service_client: Optional[Any] = None,
+        account_url: Optional[str] = None,
+        key_lifetime: timedelta = timedelta(days=1),
+        refresh_margin: timedelta = timedelta(hours=1),
+        url_reuse_fraction: float = 0.5,
+        max_cached_urls: int = 10000,
+        failure_backoff: timedelta = timedelta(minutes=1),
+    ):
+        """
+        Initialize SAS issuer.
+
+        Args:
+            account_name: Storage account name
+            container_name: Default container
+            account_key: Account key (used when no delegation client is given)
+            blob_service_client: Sync BlobServiceClient authenticated with Azure AD
+            account_url: Blob endpoint (default: https://{account}.blob.core.windows.net)
+            key_lifetime: Validity requested for user delegation keys (max 7 days)
+            refresh_margin: Refresh the key this long before it expires
+            url_reuse_fraction: Reuse read URLs while less than this fraction of TTL elapsed
+            max_cached_urls: Max read URLs kept for reuse (LRU)
+            failure_backoff: After a failed key fetch, how long minting skips
+                the delegation path instead of calling Azure AD again
+        """
+        if not AZURE_STORAGE_AVAILABLE:
+            raise SasIssuerError("azure-storage-blob is required for SasIssuer")
+
+        self.account_name = account_name
+        self.container_name = container_name
+        self.account_key = account_key
+        self.blob_service_client = blob_service_client
+        self.account_url = (account_url or f"https://{account_name}.blob.core.windows.net").rstrip("/")
+        self.key_lifetime = key_lifetime
+        self.refresh_margin = refresh_margin
+        self.url_reuse_fraction = url_reuse_fraction
+        self.max_cached_urls = max_cached_urls
+        self.failure_backoff = failure_backoff
+
+        self._delegation_key: Optional[Any] = None
+        self._delegation_key_expiry: Optional[datetime] = None
+        self._delegation_retry_at: Optional[datetime] = None
+        self._key_lock = threading.RLock()
+        self._url_cache: OrderedDict[tuple, tuple[str, float]] = OrderedDict()
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._pending_refresh: Optional[asyncio.Task] = None
+
+    @property
+    def uses_delegation_key(self) -> bool:
+        """True if SAS are signed with a user delegation key."""
+        return self.blob_service_client is not None
+
+    # ------------------------------------------------------------------
+    # Signing key management
+    # ------------------------------------------------------------------
+
+    def _key_is_fresh(self, now: datetime) -> bool:
+        return (
+            self._delegation_key is not None
+            and self._delegation_key_expiry is not None
+            and now < self._delegation_key_expiry - self.refresh_margin
+        )
+
+    def _key_is_valid(self, now: datetime) -> bool:
+        return self._delegation_key is not None and now < self._delegation_key_expiry
+
+    def refresh_delegation_key(self) -> None:
+        """Fetch a new user delegation key (network call, blocking)."""
+        start_time = datetime.now(timezone.utc) - timedelta(minutes=5)  # clock skew
+        expiry_time = start_time + self.key_lifetime
+
+        key = self.blob_service_client.get_user_delegation_key(
+            key_start_time=start_time,
+            key_expiry_time=expiry_time
+        )
+
+        with self._key_lock:
+            self._delegation_key = key
+            self._delegation_key_expiry = expiry_time
+            self._delegation_retry_at = None
+            # URLs signed with the previous key stay valid until their own expiry
+
+        logger.info(f"User delegation key refreshed (expires {expiry_time.isoformat()})")
+
+    def _get_delegation_key(self) -> tuple[Any, datetime]:
+        """Return the cached delegation key, fetching it only if missing/expiring.
+
+        Called on an event loop, the fetch never happens inline: it is
+        scheduled in a worker thread and ``SasIssuerError`` is raised while no
+        valid key is cached (minting then falls back to the account key).
+        """
+        now = datetime.now(timezone.utc)
+        if self._key_is_fresh(now):
+            return self._delegation_key, self._delegation_key_expiry
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        with self._key_lock:
+            if not self._key_is_fresh(now) and loop is not None:
+                # Never block the event loop on Azure AD: fetch in a worker thread
+                # and sign with the current key (or fail fast) meanwhile
+                self._schedule_refresh(loop, now)
+                if self._key_is_valid(now):
+                    return self._delegation_key, self._delegation_key_expiry
+                raise SasIssuerError("User delegation key not loaded yet")
+
+            # Outside an event loop: one caller fetches
+            if not self._key_is_fresh(now):
+                if self._delegation_retry_at is not None and now < self._delegation_retry_at:
+                    if self._key_is_valid(now):
+                        return self._delegation_key, self._delegation_key_expiry
+                    raise SasIssuerError("User delegation key unavailable (recent fetch failed)")
+                try:
+                    self.refresh_delegation_key()
+                except Exception:
+                    # Do not call Azure AD on every mint while Managed Identity is down
+                    self._delegation_retry_at = now + self.failure_backoff
+                    if self._key_is_valid(now):
+                        logger.warning("User delegation key refresh failed, using current key until it expires")
+                        return self._delegation_key, self._delegation_key_expiry
+                    raise
+            return self._delegation_key, self._delegation_key_expiry
+
+    def _schedule_refresh(self, loop: asyncio.AbstractEventLoop, now: datetime) -> None:
+        """Start a one-off key fetch off the event loop unless one is running or backing off."""
+        if self._pending_refresh is not None and not self._pending_refresh.done():
+            return
+        if self._delegation_retry_at is not None and now < self._delegation_retry_at:
+            return
+        self._pending_refresh = loop.create_task(self._refresh_once())
+
+    async def _refresh_once(self) -> None:
+        try:
+            await asyncio.to_thread(self.refresh_delegation_key)
+        except Exception as e:
+            # Do not call Azure AD on every mint while Managed Identity is down
+            with self._key_lock:
+                self._delegation_retry_at = datetime.now(timezone.utc) + self.failure_backoff
+            logger.warning(f"User delegation key refresh failed: {e}")
+
+    async def start(self) -> None:
+        """Warm the delegation key and start background refresh.
+
+        The refresh loop is started even if warming fails, so the key is
+        fetched as soon as Azure AD is reachable again.
+        """
+        if not self.uses_delegation_key or self._refresh_task is not None:
+            return
+
+        try:
+            await asyncio.to_thread(self.refresh_delegation_key)
+        finally:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        """Stop background refresh."""
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+        if self._pending_refresh is not None:
+            self._pending_refresh.cancel()
+            self._pending_refresh = None
+
+    async def _refresh_loop(self) -> None:
+        """Refresh the delegation key before the hot path considers it stale."""
+        while True:
+            expiry = self._delegation_key_expiry or datetime.now(timezone.utc)
+            refresh_at = expiry - 2 * self.refresh_margin
+            delay = (refresh_at - datetime.now(timezone.utc)).total_seconds()
+            await asyncio.sleep(max(delay, 0))
+
+            try:
+                await asyncio.to_thread(self.refresh_delegation_key)
+            except Exception as e:
+                logger.error(f"Failed to refresh user delegation key: {e}")
+                await asyncio.sleep(30)
+
+    # ------------------------------------------------------------------
+    # SAS minting (hot path, in-memory)
+    # ------------------------------------------------------------------
+
+    def blob_url(self, blob_name: str, container_name: Optional[str] = None) -> str:
+        """Build the (unsigned) URL of a blob."""
+        container = container_name or self.container_name
+        return f"{self.account_url}/{container}/{quote(blob_name, safe='/~')}"
+
+    def _sign(
+        self,
+        blob_name: str,
+        container: str,
+        permission: "BlobSasPermissions",
+        expires_in: int,
+        content_type: Optional[str] = None,
+    ) -> tuple[str, datetime]:
+        """Mint a SAS token for a blob.
+
+        Returns:
+            (sas_token, expiry)
+        """
+        now = datetime.now(timezone.utc)
+        start = now - timedelta(minutes=5)  # clock skew between us and Storage
+        expiry = now + timedelta(seconds=expires_in)
+
+        if self.uses_delegation_key:
+            try:
+                key, key_expiry = self._get_delegation_key()
+                # A delegation SAS cannot outlive its signing key
+                expiry = min(expiry, key_expiry)
+                sas_token = generate_blob_sas(
+                    account_name=self.account_name,
+                    container_name=container,
+                    blob_name=blob_name,
+                    user_delegation_key=key,
+                    permission=permission,
+                    expiry=expiry,
+                    start=start,
+                    content_type=content_type,
+                )
+                return sas_token, expiry
+            except Exception as e:
+                if not self.account_key:
+                    raise
+                logger.warning(f"User Delegation SAS failed, falling back to Account Key: {e}")
+
+        if not self.account_key:
+            raise SasIssuerError("No account key available for SAS generation")
+
+        sas_token = generate_blob_sas(
+            account_name=self.account_name,
+            container_name=container,
+            blob_name=blob_name,
+            account_key=self.account_key,
+            permission=permission,
+            expiry=expiry,
+            start=start,
+            content_type=content_type,
+        )
+        return sas_token, expiry
+
+    def generate_read_url(
+        self,
+        blob_name: str,
+        expires_in: int = 900,
+        container_name: Optional[str] = None,
+    ) -> str:
+        """
+        Get a read-only SAS URL for a blob.
+
+        Identical requests within ``url_reuse_fraction`` of the TTL return the
+        same URL, so the remaining validity is always at least
+        ``(1 - url_reuse_fraction) * expires_in``.
+        """
+        container = container_name or self.container_name
+        cache_key = (container, blob_name, expires_in)
+        now = time.monotonic()
+
+        cached = self._url_cache.get(cache_key)
+        if cached is not None and cached[1] > now:
+            self._url_cache.move_to_end(cache_key)
+            return cached[0]
+
+        sas_token, expiry = self._sign(blob_name, container, BlobSasPermissions(read=True), expires_in)
+        url = f"{self.blob_url(blob_name, container)}?{sas_token}"
+
+        validity = (expiry - datetime.now(timezone.utc)).total_seconds()
+        self._url_cache[cache_key] = (url, now + validity * self.url_reuse_fraction)
+        self._url_cache.move_to_end(cache_key)
+        while len(self._url_cache) > self.max_cached_urls:
+            self._url_cache.popitem(last=False)
+
+        return url
+
+    def generate_upload_url(
+        self,
+        blob_name: str,
+        content_type: Optional[str] = None,
+        expires_in: int = 900,
+        container_name: Optional[str] = None,
+    ) -> str:
+        """Get a write/create SAS URL for a blob (never reused)."""
+        container = container_name or self.container_name
+        sas_token, _ = self._sign(
+            blob_name,
+            container,
+            BlobSasPermissions(write=True, create=True, add=True),
+            expires_in,
+            content_type=content_type,
+        )
+        return f"{self.blob_url(blob_name, container)}?{sas_token}"
@@ -18,10 +18,11 @@ logger = logging.getLogger(__name__)
 try:
     from azure.servicebus.aio import ServiceBusClient, ServiceBusReceiver
     from azure.servicebus import ServiceBusReceiveMode, ServiceBusReceivedMessage
-    from azure.core.exceptions import ServiceBusError, ServiceBusConnectionError
+    from azure.servicebus.exceptions import ServiceBusError, ServiceBusConnectionError
     AZURE_SB_AVAILABLE = True
 except ImportError:
     AZURE_SB_AVAILABLE = False
+    ServiceBusConnectionError = ConnectionError
     logger.warning("⚠️  azure-servicebus not installed")
 
 # Metrics
@@ -0,0 +1,42 @@
+"""
+Unit tests for the long-lived async Blob client
+"""
+
+import asyncio
+import base64
+
+import pytest
+
+from carpeta_common.blob_storage import AsyncBlobStorage, AsyncBlobStorageError
+
+
+ACCOUNT_KEY = base64.b64encode(b"0" * 32).decode()
+
+
+def test_requires_endpoint():
+    """Either an account URL or a connection string is needed."""
+    with pytest.raises(AsyncBlobStorageError):
+        AsyncBlobStorage()
+
+
+@pytest.mark.asyncio
+async def test_single_client_with_pooled_transport():
+    """Concurrent first uses share one client and one tuned connection pool."""
+    storage = AsyncBlobStorage(
+        account_url="https://acct.blob.core.windows.net",
+        account_key=ACCOUNT_KEY,
+        pool_size=32,
+    )
+
+    clients = await asyncio.gather(*[storage.get_client() for _ in range(10)])
+    assert all(client is clients[0] for client in clients)
+
+    blob = await storage.get_blob_client("documents", "a/b.pdf")
+    assert blob.url == "https://acct.blob.core.windows.net/documents/a/b.pdf"
+
+    connector = clients[0]._pipeline._transport.session.connector
+    assert connector.limit == 32
+    assert connector.limit_per_host == 32
+
+    await storage.close()
+    assert connector.closed
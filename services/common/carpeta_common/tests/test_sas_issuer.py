@@ -0,0 +1,184 @@
+"""
+Unit tests for SAS issuer
+"""
+
+import asyncio
+import base64
+import threading
+from datetime import timedelta
+from unittest.mock import Mock
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from azure.storage.blob import UserDelegationKey
+
+from carpeta_common.sas_issuer import SasIssuer
+
+
+ACCOUNT_KEY = base64.b64encode(b"0" * 32).decode()
+
+
+def make_delegation_key() -> UserDelegationKey:
+    key = UserDelegationKey()
+    key.signed_oid = "oid"
+    key.signed_tid = "tid"
+    key.signed_start = "2026-01-01T00:00:00Z"
+    key.signed_expiry = "2026-01-02T00:00:00Z"
+    key.signed_service = "b"
+    key.signed_version = "2022-11-02"
+    key.value = ACCOUNT_KEY
+    return key
+
+
+@pytest.fixture
+def delegation_client():
+    """Mock BlobServiceClient returning a user delegation key."""
+    client = Mock()
+    client.get_user_delegation_key = Mock(return_value=make_delegation_key())
+    return client
+
+
+def test_account_key_upload_url():
+    """Upload URLs carry write/create permissions and the content type."""
+    issuer = SasIssuer("acct", account_key=ACCOUNT_KEY)
+
+    url = issuer.generate_upload_url("citizens/1/doc a.pdf", content_type="application/pdf")
+    parsed = urlparse(url)
+    query = parse_qs(parsed.query)
+
+    assert parsed.path == "/documents/citizens/1/doc%20a.pdf"
+    assert "w" in query["sp"][0] and "c" in query["sp"][0]
+    assert query["rsct"] == ["application/pdf"]
+    assert "sig" in query
+
+
+def test_read_urls_are_reused_within_ttl_fraction():
+    """Identical read requests return the cached URL."""
+    issuer = SasIssuer("acct", account_key=ACCOUNT_KEY)
+
+    first = issuer.generate_read_url("a.pdf", expires_in=600)
+    second = issuer.generate_read_url("a.pdf", expires_in=600)
+    other = issuer.generate_read_url("b.pdf", expires_in=600)
+
+    assert first == second
+    assert first != other
+
+
+def test_delegation_key_fetched_once(delegation_client):
+    """The delegation key is cached across many SAS mints."""
+    issuer = SasIssuer("acct", blob_service_client=delegation_client)
+
+    for i in range(20):
+        issuer.generate_upload_url(f"doc-{i}.pdf")
+        issuer.generate_read_url(f"doc-{i}.pdf")
+
+    delegation_client.get_user_delegation_key.assert_called_once()
+
+
+def test_delegation_key_refreshed_near_expiry(delegation_client):
+    """A key inside the refresh margin is replaced."""
+    issuer = SasIssuer(
+        "acct",
+        blob_service_client=delegation_client,
+        key_lifetime=timedelta(minutes=30),
+        refresh_margin=timedelta(hours=1),
+    )
+
+    issuer.generate_upload_url("a.pdf")
+    issuer.generate_upload_url("b.pdf")
+
+    assert delegation_client.get_user_delegation_key.call_count == 2
+
+
+def test_delegation_failure_falls_back_to_account_key(delegation_client):
+    """Account key SAS is used when the delegation key cannot be obtained."""
+    delegation_client.get_user_delegation_key.side_effect = RuntimeError("no MI")
+    issuer = SasIssuer("acct", account_key=ACCOUNT_KEY, blob_service_client=delegation_client)
+
+    url = issuer.generate_read_url("a.pdf")
+
+    assert "skoid" not in parse_qs(urlparse(url).query)
+    assert "sig=" in url
+
+
+def test_delegation_failure_is_cached(delegation_client):
+    """While Managed Identity is down, minting does not call Azure AD every time."""
+    delegation_client.get_user_delegation_key.side_effect = RuntimeError("no MI")
+    issuer = SasIssuer("acct", account_key=ACCOUNT_KEY, blob_service_client=delegation_client)
+
+    for i in range(10):
+        issuer.generate_upload_url(f"doc-{i}.pdf")
+
+    delegation_client.get_user_delegation_key.assert_called_once()
+
+    # Retried once the backoff has passed
+    issuer._delegation_retry_at -= timedelta(minutes=5)
+    issuer.generate_upload_url("doc.pdf")
+    assert delegation_client.get_user_delegation_key.call_count == 2
+
+
+def test_failed_refresh_keeps_using_unexpired_key(delegation_client):
+    """A key inside the refresh margin still signs while its refresh fails."""
+    issuer = SasIssuer(
+        "acct",
+        blob_service_client=delegation_client,
+        key_lifetime=timedelta(hours=2),
+        refresh_margin=timedelta(hours=3),
+    )
+    issuer.generate_read_url("a.pdf")
+    delegation_client.get_user_delegation_key.side_effect = RuntimeError("no MI")
+
+    url = issuer.generate_upload_url("b.pdf")
+    issuer.generate_upload_url("c.pdf")
+
+    assert "skoid" in parse_qs(urlparse(url).query)
+    assert delegation_client.get_user_delegation_key.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_start_warms_key_and_stop(delegation_client):
+    """start() fetches the key off the event loop; stop() cancels refresh."""
+    issuer = SasIssuer("acct", blob_service_client=delegation_client)
+
+    await issuer.start()
+    issuer.generate_read_url("a.pdf")
+    await issuer.stop()
+
+    delegation_client.get_user_delegation_key.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_cold_key_is_fetched_off_the_event_loop(delegation_client):
+    """Minting on the event loop never waits on Azure AD; it falls back until the key arrives."""
+    release = threading.Event()
+    key = make_delegation_key()
+    delegation_client.get_user_delegation_key.side_effect = lambda **kwargs: release.wait(5) and key
+    issuer = SasIssuer("acct", account_key=ACCOUNT_KEY, blob_service_client=delegation_client)
+
+    url = issuer.generate_upload_url("a.pdf")  # Returns while the fetch is still blocked
+    issuer.generate_upload_url("b.pdf")
+
+    assert "skoid" not in parse_qs(urlparse(url).query)
+    release.set()
+    await issuer._pending_refresh
+
+    url = issuer.generate_upload_url("c.pdf")
+    assert "skoid" in parse_qs(urlparse(url).query)
+    delegation_client.get_user_delegation_key.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_failed_start_still_refreshes_in_background(delegation_client):
+    """A failed warm-up leaves the refresh loop running instead of fetching on the hot path."""
+    delegation_client.get_user_delegation_key.side_effect = [RuntimeError("no MI"), make_delegation_key()]
+    issuer = SasIssuer("acct", blob_service_client=delegation_client)
+
+    with pytest.raises(RuntimeError):
+        await issuer.start()
+    for _ in range(100):
+        if issuer._delegation_key is not None:
+            break
+        await asyncio.sleep(0.01)
+
+    assert "skoid" in parse_qs(urlparse(issuer.generate_read_url("a.pdf")).query)
+    await issuer.stop()
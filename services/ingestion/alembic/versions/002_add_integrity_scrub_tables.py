@@ -0,0 +1,74 @@
+"""Add integrity scrubbing jobs and results tables
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Create integrity scrubbing tables."""
+    
+    op.create_table(
+        'integrity_scrub_jobs',
+        sa.Column('id', sa.String(255), primary_key=True),
+        sa.Column('status', sa.String(20), nullable=False, server_default='running'),
+        sa.Column('citizen_id', sa.String(20), nullable=True),
+        sa.Column('created_from', sa.DateTime(), nullable=True),
+        sa.Column('created_to', sa.DateTime(), nullable=True),
+        sa.Column('worm_only', sa.Boolean(), nullable=False, server_default='false'),
+        sa.Column('last_created_at', sa.DateTime(), nullable=True),
+        sa.Column('last_document_id', sa.String(255), nullable=True),
+        sa.Column('documents_checked', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('mismatches_found', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('bytes_verified', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('owner', sa.String(255), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index('ix_integrity_scrub_jobs_status', 'integrity_scrub_jobs', ['status'])
+    
+    op.create_table(
+        'integrity_scrub_results',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('job_id', sa.String(255), nullable=False),
+        sa.Column('document_id', sa.String(255), nullable=False),
+        sa.Column('citizen_id', sa.String(20), nullable=False),
+        sa.Column('blob_name', sa.String(500), nullable=False),
+        sa.Column('expected_hash', sa.String(64), nullable=True),
+        sa.Column('actual_hash', sa.String(64), nullable=True),
+        sa.Column('expected_size', sa.BigInteger(), nullable=True),
+        sa.Column('actual_size', sa.BigInteger(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('checked_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_index('ix_integrity_scrub_results_job_id', 'integrity_scrub_results', ['job_id'])
+    op.create_index('ix_integrity_scrub_results_document_id', 'integrity_scrub_results', ['document_id'])
+    
+    # Keyset pagination order used by scrubbing jobs
+    op.create_index('idx_document_created_id', 'document_metadata', ['created_at', 'id'])
+
+
+def downgrade() -> None:
+    """Drop integrity scrubbing tables."""
+    
+    op.drop_index('idx_document_created_id', 'document_metadata')
+    
+    op.drop_index('ix_integrity_scrub_results_document_id', 'integrity_scrub_results')
+    op.drop_index('ix_integrity_scrub_results_job_id', 'integrity_scrub_results')
+    op.drop_table('integrity_scrub_results')
+    
+    op.drop_index('ix_integrity_scrub_jobs_status', 'integrity_scrub_jobs')
+    op.drop_table('integrity_scrub_jobs')
@@ -0,0 +1,36 @@
+"""Add partial index for citizen document listing
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Create index backing keyset pagination of GET /api/documents/."""
+    
+    # (citizen_id, created_at DESC, id DESC) matches the listing ORDER BY and keyset
+    # predicate, so each page is a bounded index range scan. Title/filename are not
+    # INCLUDEd: up to 500 chars each they could exceed the btree row size limit.
+    op.create_index(
+        'idx_document_citizen_created',
+        'document_metadata',
+        ['citizen_id', sa.text('created_at DESC'), sa.text('id DESC')],
+        postgresql_where=sa.text('is_deleted = false'),
+    )
+
+
+def downgrade() -> None:
+    """Drop citizen listing index."""
+    
+    op.drop_index('idx_document_citizen_created', 'document_metadata')
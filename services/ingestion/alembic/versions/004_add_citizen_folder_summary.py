@@ -0,0 +1,68 @@
+"""Add citizen folder summary read model
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Create citizen_folder_summary and its applied-events dedupe table."""
+    
+    op.create_table(
+        'citizen_folder_summary',
+        sa.Column('citizen_id', sa.String(20), primary_key=True),
+        sa.Column('total_documents', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('signed_documents', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('worm_locked_documents', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_bytes', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('pending_transfers', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+    )
+    
+    op.create_table(
+        'citizen_folder_summary_events',
+        sa.Column('event_key', sa.String(300), primary_key=True),
+        sa.Column('citizen_id', sa.String(20), nullable=False),
+        sa.Column('applied_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_index(
+        'ix_citizen_folder_summary_events_applied_at',
+        'citizen_folder_summary_events',
+        ['applied_at'],
+    )
+    
+    # Seed the read model from existing documents (the periodic reconcile keeps it honest)
+    op.execute(
+        """
+        INSERT INTO citizen_folder_summary
+            (citizen_id, total_documents, signed_documents, worm_locked_documents, total_bytes, updated_at)
+        SELECT citizen_id,
+               count(*),
+               count(*) FILTER (WHERE state = 'SIGNED'),
+               count(*) FILTER (WHERE worm_locked),
+               coalesce(sum(size_bytes), 0),
+               now()
+        FROM document_metadata
+        WHERE is_deleted = false
+        GROUP BY citizen_id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Drop citizen folder summary tables."""
+    
+    op.drop_index('ix_citizen_folder_summary_events_applied_at', 'citizen_folder_summary_events')
+    op.drop_table('citizen_folder_summary_events')
+    op.drop_table('citizen_folder_summary')
@@ -0,0 +1,52 @@
+"""Add content-addressed blob registry for deduplication
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Create content_blobs and register existing hashed blobs."""
+    
+    op.create_table(
+        'content_blobs',
+        sa.Column('citizen_id', sa.String(20), primary_key=True),
+        sa.Column('sha256_hash', sa.String(64), primary_key=True),
+        sa.Column('blob_name', sa.String(500), nullable=False, unique=True),
+        sa.Column('size_bytes', sa.BigInteger(), nullable=True),
+        sa.Column('content_type', sa.String(100), nullable=True),
+        sa.Column('ref_count', sa.Integer(), nullable=False, server_default='1'),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+    )
+    
+    # Oldest copy of each (citizen, hash) becomes the canonical blob. Existing
+    # duplicates keep their own blobs and stay untracked (released as before).
+    op.execute(
+        """
+        INSERT INTO content_blobs (citizen_id, sha256_hash, blob_name, size_bytes, content_type, ref_count)
+        SELECT DISTINCT ON (citizen_id, sha256_hash)
+               citizen_id, sha256_hash, blob_name, size_bytes, content_type, 1
+        FROM document_metadata
+        WHERE sha256_hash IS NOT NULL AND is_deleted = false
+        ORDER BY citizen_id, sha256_hash, created_at
+        ON CONFLICT DO NOTHING
+        """
+    )
+
+
+def downgrade() -> None:
+    """Drop content_blobs."""
+    
+    op.drop_table('content_blobs')
@@ -0,0 +1,46 @@
+"""Add lifecycle sweeper support (WORM tag tracking, blob_name index)
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Track applied WORM blob tags and index blob_name for shared-blob checks."""
+    
+    op.add_column('document_metadata',
+        sa.Column('worm_tags_applied', sa.Boolean(), nullable=False, server_default='false'))
+    
+    # Small partial index: only signed documents still waiting for their tags
+    op.create_index(
+        'idx_document_worm_tags_pending',
+        'document_metadata',
+        ['created_at', 'id'],
+        postgresql_where=sa.text('worm_locked = true AND worm_tags_applied = false'),
+    )
+    
+    # Deduplicated documents share blobs: tiering/purge check other references
+    op.create_index('idx_document_blob_name', 'document_metadata', ['blob_name'])
+    
+    # Keyset order for the retention_until purge pass
+    op.create_index('idx_document_retention_id', 'document_metadata', ['retention_until', 'id'])
+
+
+def downgrade() -> None:
+    """Drop lifecycle sweeper support."""
+    
+    op.drop_index('idx_document_retention_id', 'document_metadata')
+    op.drop_index('idx_document_blob_name', 'document_metadata')
+    op.drop_index('idx_document_worm_tags_pending', 'document_metadata')
+    op.drop_column('document_metadata', 'worm_tags_applied')
@@ -0,0 +1,53 @@
+"""Add transactional outbox for document events
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Create outbox table drained by the Service Bus relay."""
+    
+    op.create_table(
+        'outbox',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('event_type', sa.String(length=100), nullable=False),
+        sa.Column('document_id', sa.String(length=255), nullable=False),
+        sa.Column('citizen_id', sa.String(length=20), nullable=False),
+        sa.Column('payload', postgresql.JSONB(), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.text('now()')),
+        sa.Column('sent_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    
+    # The relay only scans unsent rows, in insertion order
+    op.create_index(
+        'idx_outbox_unsent',
+        'outbox',
+        ['id'],
+        postgresql_where=sa.text('sent_at IS NULL'),
+    )
+    
+    # Purge of delivered rows
+    op.create_index('idx_outbox_sent_at', 'outbox', ['sent_at'])
+
+
+def downgrade() -> None:
+    """Drop outbox table."""
+    op.drop_index('idx_outbox_sent_at', table_name='outbox')
+    op.drop_index('idx_outbox_unsent', table_name='outbox')
+    op.drop_table('outbox')
@@ -0,0 +1,42 @@
+"""Park outbox events that keep failing to publish
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Add dead_at and keep parked rows out of the relay's scan."""
+    
+    op.add_column('outbox', sa.Column('dead_at', sa.DateTime(), nullable=True))
+    
+    op.drop_index('idx_outbox_unsent', table_name='outbox')
+    op.create_index(
+        'idx_outbox_unsent',
+        'outbox',
+        ['id'],
+        postgresql_where=sa.text('sent_at IS NULL AND dead_at IS NULL'),
+    )
+
+
+def downgrade() -> None:
+    """Drop dead_at (parked rows become pending again)."""
+    op.drop_index('idx_outbox_unsent', table_name='outbox')
+    op.create_index(
+        'idx_outbox_unsent',
+        'outbox',
+        ['id'],
+        postgresql_where=sa.text('sent_at IS NULL'),
+    )
+    op.drop_column('outbox', 'dead_at')
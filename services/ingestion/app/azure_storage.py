@@ -2,17 +2,13 @@
 
 import hashlib
 import logging
-from datetime import datetime, timedelta, timezone
 from uuid import uuid4
 
-from azure.core.exceptions import AzureError
 from azure.identity import DefaultAzureCredential
-from azure.storage.blob import (
-    BlobServiceClient,
-    BlobSasPermissions,
-    generate_blob_sas,
-    UserDelegationKey,
-)
+from azure.storage.blob import BlobServiceClient
+from azure.core.exceptions import ResourceNotFoundError
+from carpeta_common.blob_storage import AsyncBlobStorage
+from carpeta_common.sas_issuer import SasIssuer
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +17,10 @@ class AzureBlobDocumentClient:
     """Azure Blob Storage client for document storage with presigned URLs.
     
     Preferencia por User Delegation SAS (más seguro), con fallback a Account Key SAS.
+    SAS generation is delegated to ``carpeta_common.sas_issuer.SasIssuer``.
+    Blob operations go through one process-wide native-async client
+    (``carpeta_common.blob_storage.AsyncBlobStorage``) so they never block
+    the event loop; the sync client is only used to fetch delegation keys.
     """
 
     def __init__(
@@ -30,6 +30,7 @@ class AzureBlobDocumentClient:
         container_name: str = "documents",
         connection_string: str | None = None,
         sas_ttl_minutes: int = 15,
+        pool_size: int = 100,
     ) -> None:
         """Initialize Azure Blob client.
         
@@ -39,6 +40,7 @@ class AzureBlobDocumentClient:
             container_name: Container name
             connection_string: Connection string (optional, for fallback)
             sas_ttl_minutes: SAS token TTL in minutes (default: 15)
+            pool_size: Max pooled connections of the async Blob client
         """
         self.account_name = account_name
         self.account_key = account_key
@@ -75,29 +77,35 @@ class AzureBlobDocumentClient:
             except Exception as e:
                 logger.error(f"All authentication methods failed: {e}")
                 raise ValueError("No valid authentication method provided for Azure Blob Storage")
-    
-    def _get_user_delegation_key(self) -> UserDelegationKey | None:
-        """Get User Delegation Key for generating User Delegation SAS.
         
-        Returns None if Managed Identity is not available.
-        """
-        if not self.use_managed_identity:
-            return None
+        # Shared SAS issuer: signing key cached in memory, SAS minted without network calls
+        self.sas_issuer = SasIssuer(
+            account_name=self.blob_service_client.account_name or account_name,
+            container_name=container_name,
+            account_key=account_key or getattr(self.blob_service_client.credential, "account_key", None),
+            blob_service_client=self.blob_service_client if self.use_managed_identity else None,
+            account_url=self.blob_service_client.url,
+        )
         
-        try:
-            # User delegation key is valid for 7 days maximum
-            start_time = datetime.now(timezone.utc)
-            expiry_time = start_time + timedelta(days=1)
-            
-            user_delegation_key = self.blob_service_client.get_user_delegation_key(
-                key_start_time=start_time,
-                key_expiry_time=expiry_time
-            )
-            return user_delegation_key
-        except AzureError as e:
-            logger.error(f"Failed to get user delegation key: {e}")
-            return None
-
+        # Native-async client for blob operations (created inside the event loop)
+        self.async_storage = AsyncBlobStorage(
+            account_url=self.blob_service_client.url,
+            connection_string=None if account_key else connection_string,
+            account_key=account_key,
+            use_managed_identity=self.use_managed_identity,
+            pool_size=pool_size,
+        )
+    
+    async def start(self) -> None:
+        """Open the async Blob client pool and warm the SAS signing key."""
+        await self.async_storage.start()
+        await self.sas_issuer.start()
+    
+    async def close(self) -> None:
+        """Stop key refresh and close the async Blob client pool."""
+        await self.sas_issuer.stop()
+        await self.async_storage.close()
+    
     def generate_presigned_put(
         self,
         citizen_id: int,
@@ -107,7 +115,8 @@ class AzureBlobDocumentClient:
     ) -> dict[str, str]:
         """Generate presigned URL for uploading a document.
         
-        Tries User Delegation SAS first, falls back to Account Key SAS.
+        Signed in memory by the shared SasIssuer (User Delegation SAS with a
+        cached key, or Account Key SAS).
 
         Returns:
         {
@@ -121,44 +130,14 @@ class AzureBlobDocumentClient:
             
         doc_id = str(uuid4())
         blob_name = f"citizens/{citizen_id}/documents/{doc_id}/{filename}"
-        blob_client = self.blob_service_client.get_blob_client(
-            container=self.container_name,
-            blob=blob_name
-        )
 
         try:
-            # Try User Delegation SAS first (more secure)
-            user_delegation_key = self._get_user_delegation_key()
-            
-            if user_delegation_key:
-                start_time = datetime.now(timezone.utc)
-                expiry_time = start_time + timedelta(seconds=expires_in)
-                
-                sas_token = blob_client.generate_sas(
-                    user_delegation_key=user_delegation_key,
-                    permission=BlobSasPermissions(write=True, create=True, add=True),
-                    expiry=expiry_time,
-                    start=start_time,
-                    content_type=content_type,
-                )
-                logger.info(f"Generated User Delegation SAS for PUT: {blob_name}")
-            else:
-                # Fallback to Account Key SAS
-                if not self.account_key:
-                    raise ValueError("No account key available for fallback SAS generation")
-                    
-                sas_token = generate_blob_sas(
-                    account_name=self.account_name,
-                    container_name=self.container_name,
-                    blob_name=blob_name,
-                    account_key=self.account_key,
-                    permission=BlobSasPermissions(write=True, create=True, add=True),
-                    expiry=datetime.now(timezone.utc) + timedelta(seconds=expires_in),
-                    content_type=content_type,
-                )
-                logger.info(f"Generated Account Key SAS for PUT: {blob_name}")
-            
-            url = f"{blob_client.url}?{sas_token}"
+            url = self.sas_issuer.generate_upload_url(
+                blob_name,
+                content_type=content_type,
+                expires_in=expires_in,
+            )
+            logger.info(f"Generated SAS for PUT: {blob_name}")
 
             return {
                 "upload_url": url,
@@ -169,6 +148,21 @@ class AzureBlobDocumentClient:
             logger.error(f"Error generating presigned PUT URL: {e}")
             raise
 
+    def generate_blob_put_url(
+        self,
+        blob_name: str,
+        content_type: str | None = None,
+        expires_in: int | None = None,
+    ) -> str:
+        """Generate a write SAS URL for an existing blob name (e.g. resumable sessions)."""
+        if expires_in is None:
+            expires_in = self.sas_ttl_minutes * 60
+        return self.sas_issuer.generate_upload_url(
+            blob_name,
+            content_type=content_type,
+            expires_in=expires_in,
+        )
+
     def generate_presigned_get(
         self,
         blob_name: str,
@@ -176,60 +170,24 @@ class AzureBlobDocumentClient:
     ) -> str:
         """Generate presigned URL for downloading a document.
         
-        Tries User Delegation SAS first, falls back to Account Key SAS.
+        Identical read URLs are reused for part of their TTL by the SasIssuer.
         """
         if expires_in is None:
             expires_in = self.sas_ttl_minutes * 60
-            
-        blob_client = self.blob_service_client.get_blob_client(
-            container=self.container_name,
-            blob=blob_name
-        )
         
         try:
-            # Try User Delegation SAS first (more secure)
-            user_delegation_key = self._get_user_delegation_key()
-            
-            if user_delegation_key:
-                start_time = datetime.now(timezone.utc)
-                expiry_time = start_time + timedelta(seconds=expires_in)
-                
-                sas_token = blob_client.generate_sas(
-                    user_delegation_key=user_delegation_key,
-                    permission=BlobSasPermissions(read=True),
-                    expiry=expiry_time,
-                    start=start_time,
-                )
-                logger.info(f"Generated User Delegation SAS for GET: {blob_name}")
-            else:
-                # Fallback to Account Key SAS
-                if not self.account_key:
-                    raise ValueError("No account key available for fallback SAS generation")
-                    
-                sas_token = generate_blob_sas(
-                    account_name=self.account_name,
-                    container_name=self.container_name,
-                    blob_name=blob_name,
-                    account_key=self.account_key,
-                    permission=BlobSasPermissions(read=True),
-                    expiry=datetime.now(timezone.utc) + timedelta(seconds=expires_in),
-                )
-                logger.info(f"Generated Account Key SAS for GET: {blob_name}")
-            
-            url = f"{blob_client.url}?{sas_token}"
+            url = self.sas_issuer.generate_read_url(blob_name, expires_in=expires_in)
+            logger.debug(f"Generated SAS for GET: {blob_name}")
             return url
         except Exception as e:
             logger.error(f"Error generating presigned GET URL: {e}")
             raise
 
-    def get_blob_metadata(self, blob_name: str) -> dict[str, any]:
+    async def get_blob_metadata(self, blob_name: str) -> dict[str, any]:
         """Get blob metadata."""
         try:
-            blob_client = self.blob_service_client.get_blob_client(
-                container=self.container_name,
-                blob=blob_name
-            )
-            properties = blob_client.get_blob_properties()
+            blob_client = await self.async_storage.get_blob_client(self.container_name, blob_name)
+            properties = await blob_client.get_blob_properties()
             
             return {
                 "size": properties.size,
@@ -241,14 +199,11 @@ class AzureBlobDocumentClient:
             logger.error(f"Error getting metadata for {blob_name}: {e}")
             raise
 
-    def get_blob_properties(self, blob_name: str) -> dict[str, any] | None:
+    async def get_blob_properties(self, blob_name: str) -> dict[str, any] | None:
         """Get blob properties for hash verification."""
         try:
-            blob_client = self.blob_service_client.get_blob_client(
-                container=self.container_name,
-                blob=blob_name
-            )
-            properties = blob_client.get_blob_properties()
+            blob_client = await self.async_storage.get_blob_client(self.container_name, blob_name)
+            properties = await blob_client.get_blob_properties()
             
             return {
                 "size": properties.size,
@@ -256,23 +211,68 @@ class AzureBlobDocumentClient:
                 "etag": properties.etag,
                 "last_modified": properties.last_modified,
             }
+        except ResourceNotFoundError:
+            logger.warning(f"Blob not found: {blob_name}")
+            return None
         except Exception as e:
             logger.error(f"Error getting properties for {blob_name}: {e}")
             return None
 
-    def delete_blob(self, blob_name: str) -> None:
+    async def delete_blob(self, blob_name: str) -> None:
         """Delete blob from storage."""
         try:
-            blob_client = self.blob_service_client.get_blob_client(
-                container=self.container_name,
-                blob=blob_name
-            )
-            blob_client.delete_blob()
+            blob_client = await self.async_storage.get_blob_client(self.container_name, blob_name)
+            await blob_client.delete_blob()
             logger.info(f"Deleted blob: {blob_name}")
         except Exception as e:
             logger.error(f"Error deleting blob {blob_name}: {e}")
             raise
 
+    async def set_blob_tier_batch(self, blob_names: list[str], tier: str) -> list[str]:
+        """Set the access tier of up to 256 blobs with one Blob Batch request.
+
+        Returns:
+            Names of the blobs whose tier was changed
+        """
+        container = await self.async_storage.get_container_client(self.container_name)
+        responses = await container.set_standard_blob_tier_blobs(
+            tier, *blob_names, raise_on_any_failure=False
+        )
+        succeeded = []
+        index = 0
+        async for response in responses:
+            if response.status_code in (200, 202):
+                succeeded.append(blob_names[index])
+            else:
+                logger.warning(f"Set tier {tier} failed for {blob_names[index]}: HTTP {response.status_code}")
+            index += 1
+        return succeeded
+
+    async def delete_blobs_batch(self, blob_names: list[str]) -> list[str]:
+        """Delete up to 256 blobs with one Blob Batch request.
+
+        Returns:
+            Names of the blobs that are gone (deleted now or already missing)
+        """
+        container = await self.async_storage.get_container_client(self.container_name)
+        responses = await container.delete_blobs(
+            *blob_names, delete_snapshots="include", raise_on_any_failure=False
+        )
+        deleted = []
+        index = 0
+        async for response in responses:
+            if response.status_code in (202, 404):
+                deleted.append(blob_names[index])
+            else:
+                logger.warning(f"Delete failed for {blob_names[index]}: HTTP {response.status_code}")
+            index += 1
+        return deleted
+
+    async def set_blob_tags(self, blob_name: str, tags: dict[str, str]) -> None:
+        """Replace the index tags of a blob (not supported by Blob Batch)."""
+        blob_client = await self.async_storage.get_blob_client(self.container_name, blob_name)
+        await blob_client.set_blob_tags(tags)
+
     @staticmethod
     def calculate_sha256(data: bytes) -> str:
         """Calculate SHA-256 hash."""
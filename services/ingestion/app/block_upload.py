@@ -0,0 +1,212 @@
+"""Streaming block blob uploads for Azure Blob Storage.
+
+Documents are staged as uncommitted blocks (Put Block) against a SAS URL and
+committed with a single Put Block List, so peak memory per upload is bounded by
+``chunk_size * max_concurrency`` instead of the size of the file.
+"""
+
+import asyncio
+import base64
+import hashlib
+import logging
+from typing import Any, Optional, Protocol
+from urllib.parse import quote
+from xml.sax.saxutils import escape
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Shared HTTP client for block uploads (one connection pool per process)
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+class AsyncReadable(Protocol):
+    """Anything exposing ``async read(size)`` (e.g. FastAPI ``UploadFile``)."""
+
+    async def read(self, size: int = -1) -> bytes: ...
+
+
+class UploadTooLargeError(Exception):
+    """Raised when a streamed upload exceeds the configured size limit."""
+
+    def __init__(self, max_size: int):
+        super().__init__(f"File exceeds maximum allowed size of {max_size} bytes")
+        self.max_size = max_size
+
+
+def get_http_client(max_connections: int = 100) -> httpx.AsyncClient:
+    """Get or create the shared HTTP client used for block uploads."""
+    global _http_client
+
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(60.0, connect=10.0),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections // 2,
+            ),
+        )
+
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """Close the shared HTTP client."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+        logger.info("Block upload HTTP client closed")
+
+
+def make_block_id(index: int) -> str:
+    """Build a fixed-length, base64-encoded block ID for a block index.
+
+    Azure requires every block ID of a blob to have the same length.
+    """
+    return base64.b64encode(f"block-{index:08d}".encode("ascii")).decode("ascii")
+
+
+def with_query(url: str, params: str) -> str:
+    """Append extra query parameters to a (SAS) URL."""
+    separator = "&" if "?" in url else "?"
+    return f"{url}{separator}{params}"
+
+
+class BlockBlobStreamUploader:
+    """Upload a stream to a block blob through a SAS URL.
+
+    Chunks are read sequentially, fed into an incremental SHA-256 and staged
+    as blocks with at most ``max_concurrency`` Put Block requests in flight.
+    """
+
+    def __init__(
+        self,
+        http_client: httpx.AsyncClient,
+        chunk_size: int = 4 * 1024 * 1024,
+        max_concurrency: int = 4,
+    ) -> None:
+        """Initialize uploader.
+
+        Args:
+            http_client: Shared async HTTP client
+            chunk_size: Block size in bytes
+            max_concurrency: Max number of blocks staged concurrently
+        """
+        self.http_client = http_client
+        self.chunk_size = chunk_size
+        self.max_concurrency = max_concurrency
+
+    async def stage_block(self, sas_url: str, block_id: str, data: bytes) -> None:
+        """Stage a single uncommitted block (Put Block)."""
+        url = with_query(sas_url, f"comp=block&blockid={quote(block_id, safe='')}")
+        response = await self.http_client.put(
+            url,
+            content=data,
+            headers={"Content-Length": str(len(data))},
+        )
+        if response.status_code >= 400:
+            raise RuntimeError(
+                f"Azure Put Block failed: {response.status_code} {response.text}"
+            )
+
+    async def commit_block_list(
+        self,
+        sas_url: str,
+        block_ids: list[str],
+        content_type: Optional[str] = None,
+    ) -> None:
+        """Commit staged blocks in order (Put Block List)."""
+        body = "".join(f"<Latest>{escape(block_id)}</Latest>" for block_id in block_ids)
+        xml = f'<?xml version="1.0" encoding="utf-8"?><BlockList>{body}</BlockList>'
+
+        headers = {"Content-Type": "application/xml"}
+        if content_type:
+            headers["x-ms-blob-content-type"] = content_type
+
+        response = await self.http_client.put(
+            with_query(sas_url, "comp=blocklist"),
+            content=xml.encode("utf-8"),
+            headers=headers,
+        )
+        if response.status_code >= 400:
+            raise RuntimeError(
+                f"Azure Put Block List failed: {response.status_code} {response.text}"
+            )
+
+    async def upload(
+        self,
+        sas_url: str,
+        stream: AsyncReadable,
+        content_type: Optional[str] = None,
+        max_size: Optional[int] = None,
+    ) -> dict[str, Any]:
+        """Stream ``stream`` into the blob behind ``sas_url``.
+
+        Args:
+            sas_url: SAS URL with write/create permissions on the blob
+            stream: Source to read chunks from
+            content_type: Content type stored on the committed blob
+            max_size: Abort with UploadTooLargeError past this many bytes
+
+        Returns:
+            Dict with ``size_bytes``, ``sha256_hash`` and ``block_count``
+
+        Raises:
+            UploadTooLargeError: If the stream exceeds ``max_size``
+        """
+        hasher = hashlib.sha256()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        block_ids: list[str] = []
+        tasks: list[asyncio.Task] = []
+        size = 0
+
+        async def _stage(block_id: str, data: bytes) -> None:
+            try:
+                await self.stage_block(sas_url, block_id, data)
+            finally:
+                semaphore.release()
+
+        try:
+            while True:
+                # Wait for a free slot before reading so buffered chunks stay bounded
+                await semaphore.acquire()
+                chunk = await stream.read(self.chunk_size)
+                if not chunk:
+                    semaphore.release()
+                    break
+
+                size += len(chunk)
+                if max_size is not None and size > max_size:
+                    semaphore.release()
+                    raise UploadTooLargeError(max_size)
+
+                # Surface staging failures early instead of reading the whole stream
+                for task in tasks:
+                    if task.done() and task.exception() is not None:
+                        semaphore.release()
+                        raise task.exception()
+
+                # hashlib releases the GIL for large buffers
+                await asyncio.to_thread(hasher.update, chunk)
+
+                block_id = make_block_id(len(block_ids))
+                block_ids.append(block_id)
+                tasks.append(asyncio.create_task(_stage(block_id, chunk)))
+
+            await asyncio.gather(*tasks)
+            await self.commit_block_list(sas_url, block_ids, content_type)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+        logger.info(f"Streamed {size} bytes in {len(block_ids)} blocks")
+
+        return {
+            "size_bytes": size,
+            "sha256_hash": hasher.hexdigest(),
+            "block_count": len(block_ids),
+        }
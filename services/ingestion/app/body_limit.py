@@ -0,0 +1,40 @@
+"""Reject oversized request bodies before they are read.
+
+FastAPI parses a multipart form (spooling every file to disk) before the
+endpoint or its dependencies run, so a size check inside the endpoint only
+fires after the whole upload was received. This ASGI middleware looks at the
+declared ``Content-Length`` first and answers 413 without reading the body.
+Bodies without a declared length are left to the endpoint's own limit.
+"""
+
+from typing import Any
+
+from starlette.responses import JSONResponse
+
+
+class ContentLengthLimitMiddleware:
+    """Answer 413 for requests to limited paths that declare a larger body."""
+
+    def __init__(self, app: Any, limits: dict[str, int]):
+        """Initialize middleware.
+
+        Args:
+            app: Wrapped ASGI application
+            limits: Maximum Content-Length per exact request path
+        """
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope: dict, receive: Any, send: Any) -> None:
+        limit = self.limits.get(scope["path"]) if scope["type"] == "http" else None
+        if limit is not None:
+            content_length = dict(scope["headers"]).get(b"content-length", b"")
+            if content_length.isdigit() and int(content_length) > limit:
+                response = JSONResponse(
+                    {"detail": f"Request body exceeds maximum allowed size of {limit} bytes"},
+                    status_code=413,
+                )
+                await response(scope, receive, send)
+                return
+
+        await self.app(scope, receive, send)
@@ -41,6 +41,7 @@ class Settings(BaseSettings):
     azure_storage_container_name: str = Field(default="documents", alias="AZURE_STORAGE_CONTAINER_NAME", description="Azure Storage container name")
     azure_storage_connection_string: Optional[str] = Field(default=None, alias="AZURE_STORAGE_CONNECTION_STRING", description="Azure Storage connection string")
     azure_storage_sas_ttl_minutes: int = Field(default=15, alias="AZURE_STORAGE_SAS_TTL_MINUTES", description="SAS token TTL in minutes")
+    azure_storage_pool_size: int = Field(default=100, alias="AZURE_STORAGE_POOL_SIZE", description="Max pooled connections of the async Blob client")
     
     # Azure Service Bus configuration
     servicebus_connection_string: Optional[str] = Field(default=None, alias="SERVICEBUS_CONNECTION_STRING", description="Service Bus connection string")
@@ -49,6 +50,38 @@ class Settings(BaseSettings):
     
     # Service-specific settings
     max_file_size: int = Field(default=100 * 1024 * 1024, alias="MAX_FILE_SIZE", description="Maximum file size in bytes (100MB)")
+    upload_chunk_size: int = Field(default=4 * 1024 * 1024, alias="UPLOAD_CHUNK_SIZE", description="Block size in bytes for streaming uploads (4MB)")
+    upload_max_concurrency: int = Field(default=4, alias="UPLOAD_MAX_CONCURRENCY", description="Max blocks staged in parallel per streaming upload")
+    upload_session_ttl_seconds: int = Field(default=24 * 3600, alias="UPLOAD_SESSION_TTL_SECONDS", description="Idle lifetime of a resumable upload session")
+    verify_chunk_size: int = Field(default=4 * 1024 * 1024, alias="VERIFY_CHUNK_SIZE", description="Range size in bytes for streaming hash verification (4MB)")
+    
+    # Transactional outbox relay
+    outbox_relay_batch_size: int = Field(default=100, alias="OUTBOX_RELAY_BATCH_SIZE", description="Outbox events published per Service Bus batch")
+    outbox_relay_poll_interval_seconds: float = Field(default=1.0, alias="OUTBOX_RELAY_POLL_INTERVAL_SECONDS", description="Outbox scan interval when no commit woke the relay")
+    outbox_sent_retention_hours: int = Field(default=24, alias="OUTBOX_SENT_RETENTION_HOURS", description="How long delivered outbox events are kept")
+    outbox_relay_max_attempts: int = Field(default=20, alias="OUTBOX_RELAY_MAX_ATTEMPTS", description="Failed publishes before an outbox event is parked as dead")
+    
+    # Integrity scrubbing
+    scrub_workers: int = Field(default=4, alias="SCRUB_WORKERS", description="Blobs verified concurrently by scrubbing jobs")
+    scrub_bytes_per_second: int = Field(default=20 * 1024 * 1024, alias="SCRUB_BYTES_PER_SECOND", description="Bandwidth cap for scrubbing jobs (0 = unlimited)")
+    scrub_page_size: int = Field(default=100, alias="SCRUB_PAGE_SIZE", description="Documents per keyset page (checkpoint granularity)")
+    scrub_stale_after_seconds: int = Field(default=600, alias="SCRUB_STALE_AFTER_SECONDS", description="Resume running jobs without progress for this long")
+    worm_scrub_enabled: bool = Field(default=False, alias="WORM_SCRUB_ENABLED", description="Continuously re-verify WORM-locked documents")
+    worm_scrub_interval_seconds: int = Field(default=86400, alias="WORM_SCRUB_INTERVAL_SECONDS", description="Interval between WORM scrub passes")
+    
+    # Citizen folder summary (dashboard stats read model)
+    folder_summary_consumers_enabled: bool = Field(default=True, alias="FOLDER_SUMMARY_CONSUMERS_ENABLED", description="Maintain folder summaries from Service Bus events")
+    folder_summary_reconcile_interval_seconds: int = Field(default=3600, alias="FOLDER_SUMMARY_RECONCILE_INTERVAL_SECONDS", description="Interval between full folder summary reconciles (0 = disabled)")
+    folder_summary_cache_enabled: bool = Field(default=False, alias="FOLDER_SUMMARY_CACHE_ENABLED", description="Serve dashboard stats from Redis")
+    folder_summary_cache_ttl_seconds: int = Field(default=30, alias="FOLDER_SUMMARY_CACHE_TTL_SECONDS", description="TTL of cached dashboard stats")
+    
+    # Retention and lifecycle tiering
+    lifecycle_sweep_enabled: bool = Field(default=False, alias="LIFECYCLE_SWEEP_ENABLED", description="Run the retention/lifecycle-tier sweeper")
+    lifecycle_sweep_interval_seconds: int = Field(default=6 * 3600, alias="LIFECYCLE_SWEEP_INTERVAL_SECONDS", description="Interval between lifecycle sweeps")
+    lifecycle_batch_size: int = Field(default=256, alias="LIFECYCLE_BATCH_SIZE", description="Rows per sweep chunk (max 256, the Blob Batch limit)")
+    lifecycle_cool_after_days: int = Field(default=90, alias="LIFECYCLE_COOL_AFTER_DAYS", description="Move blobs from Hot to Cool after this many days")
+    lifecycle_archive_after_days: int = Field(default=365, alias="LIFECYCLE_ARCHIVE_AFTER_DAYS", description="Move blobs from Cool to Archive after this many days")
+    unsigned_retention_days: int = Field(default=30, alias="UNSIGNED_RETENTION_DAYS", description="Purge UNSIGNED documents after this many days")
     allowed_extensions: str = Field(
         default=".pdf,.doc,.docx,.txt,.jpg,.jpeg,.png",
         alias="ALLOWED_EXTENSIONS",
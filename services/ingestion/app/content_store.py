@@ -0,0 +1,188 @@
+"""Content-addressed deduplication of a citizen's documents.
+
+Each distinct (citizen_id, sha256) is stored once; every document_metadata
+row with that content points its ``blob_name`` at the canonical blob, which
+is reference-counted in ``content_blobs``. Deduplication is scoped to the
+citizen so a hash can never be used to reference another citizen's content.
+
+All functions run inside the caller's transaction.
+"""
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import case, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import ContentBlob, DocumentMetadata
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ContentRef:
+    """A reference taken on a canonical content blob."""
+
+    blob_name: str
+    size_bytes: Optional[int]
+    content_type: Optional[str]
+    ref_count: int
+    # Unreferenced earlier copy this registration replaced (delete after commit)
+    replaced_blob_name: Optional[str] = None
+
+
+async def acquire_existing(
+    db: AsyncSession,
+    citizen_id: str,
+    sha256_hash: str,
+    size_bytes: Optional[int] = None,
+) -> Optional[ContentRef]:
+    """Take a reference on already-stored content, if any.
+
+    Args:
+        db: Database session
+        citizen_id: Owner of the content
+        sha256_hash: Client-computed SHA-256 (hex)
+        size_bytes: Client-declared size; must match the stored size if given
+
+    Returns:
+        The canonical blob, or None if this content has not been stored yet
+    """
+    stmt = (
+        update(ContentBlob)
+        .where(ContentBlob.citizen_id == citizen_id)
+        .where(ContentBlob.sha256_hash == sha256_hash)
+        .where(ContentBlob.ref_count > 0)
+        # Archived blobs are offline until rehydrated: new documents get a fresh copy
+        .where(
+            ~select(DocumentMetadata.id)
+            .where(DocumentMetadata.blob_name == ContentBlob.blob_name)
+            .where(DocumentMetadata.lifecycle_tier == "Archive")
+            .exists()
+        )
+        .values(ref_count=ContentBlob.ref_count + 1, updated_at=datetime.utcnow())
+        .returning(
+            ContentBlob.blob_name,
+            ContentBlob.size_bytes,
+            ContentBlob.content_type,
+            ContentBlob.ref_count,
+        )
+    )
+    if size_bytes is not None:
+        stmt = stmt.where(ContentBlob.size_bytes == size_bytes)
+
+    row = (await db.execute(stmt)).first()
+    if row is None:
+        return None
+    return ContentRef(row.blob_name, row.size_bytes, row.content_type, row.ref_count)
+
+
+async def register(
+    db: AsyncSession,
+    citizen_id: str,
+    sha256_hash: str,
+    blob_name: str,
+    size_bytes: Optional[int],
+    content_type: Optional[str],
+) -> ContentRef:
+    """Register a freshly uploaded, hash-verified blob and take a reference.
+
+    If the same content was stored meanwhile (concurrent upload, or a client
+    that did not send its hash), the existing canonical blob wins: the caller
+    should point its document at the returned ``blob_name`` and discard its own
+    upload when the names differ.
+
+    An unreferenced row (ref_count 0) is taken over by the new upload. Its old
+    blob is returned as ``replaced_blob_name`` when no document row points at
+    it anymore; otherwise the lifecycle sweeper deletes it with those rows.
+    """
+    now = datetime.utcnow()
+    previous = (
+        await db.execute(
+            select(ContentBlob.blob_name)
+            .where(ContentBlob.citizen_id == citizen_id)
+            .where(ContentBlob.sha256_hash == sha256_hash)
+            .where(ContentBlob.ref_count == 0)
+            .with_for_update()
+        )
+    ).scalar_one_or_none()
+
+    stmt = pg_insert(ContentBlob).values(
+        citizen_id=citizen_id,
+        sha256_hash=sha256_hash,
+        blob_name=blob_name,
+        size_bytes=size_bytes,
+        content_type=content_type,
+        ref_count=1,
+        created_at=now,
+        updated_at=now,
+    )
+    row = (
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[ContentBlob.citizen_id, ContentBlob.sha256_hash],
+                set_={
+                    # An unreferenced blob may already be purged: the new upload replaces it
+                    "blob_name": case(
+                        (ContentBlob.ref_count == 0, stmt.excluded.blob_name),
+                        else_=ContentBlob.blob_name,
+                    ),
+                    "size_bytes": case(
+                        (ContentBlob.ref_count == 0, stmt.excluded.size_bytes),
+                        else_=ContentBlob.size_bytes,
+                    ),
+                    "ref_count": ContentBlob.ref_count + 1,
+                    "updated_at": now,
+                },
+            ).returning(
+                ContentBlob.blob_name,
+                ContentBlob.size_bytes,
+                ContentBlob.content_type,
+                ContentBlob.ref_count,
+            )
+        )
+    ).first()
+
+    replaced = None
+    if previous is not None and previous != row.blob_name:
+        still_used = (
+            await db.execute(
+                select(DocumentMetadata.id).where(DocumentMetadata.blob_name == previous).limit(1)
+            )
+        ).first()
+        if still_used is None:
+            replaced = previous
+
+    return ContentRef(row.blob_name, row.size_bytes, row.content_type, row.ref_count, replaced)
+
+
+async def release(
+    db: AsyncSession,
+    citizen_id: str,
+    sha256_hash: Optional[str],
+    blob_name: str,
+) -> Optional[int]:
+    """Drop a document's reference on its content blob.
+
+    Returns:
+        Remaining references (0 = the blob is no longer used and may be purged),
+        or None if the document's blob is not content-tracked
+    """
+    if not sha256_hash:
+        return None
+
+    row = (
+        await db.execute(
+            update(ContentBlob)
+            .where(ContentBlob.citizen_id == citizen_id)
+            .where(ContentBlob.sha256_hash == sha256_hash)
+            .where(ContentBlob.blob_name == blob_name)
+            .where(ContentBlob.ref_count > 0)
+            .values(ref_count=ContentBlob.ref_count - 1, updated_at=datetime.utcnow())
+            .returning(ContentBlob.ref_count)
+        )
+    ).first()
+    return row.ref_count if row else None
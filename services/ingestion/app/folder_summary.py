@@ -0,0 +1,443 @@
+"""Per-citizen folder summary read model.
+
+``citizen_folder_summary`` holds one row per citizen with the dashboard
+counters, so ``GET /api/documents/stats`` is a primary-key lookup instead of
+COUNT(*) scans. Rows are updated incrementally from ``document.*`` events
+(queue ``document-events``) and transfer notifications (queue
+``transfer-notifications``), and a periodic reconcile recomputes them from
+``document_metadata`` and ``transfers`` to repair any drift.
+
+Service Bus delivers at least once, so every applied event is recorded in
+``citizen_folder_summary_events`` in the same transaction as its delta;
+redeliveries are no-ops.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from sqlalchemy import DateTime, String, cast, column, delete, func, literal, select, table, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.models import CitizenFolderSummary, DocumentMetadata, FolderSummaryEvent
+
+try:
+    from carpeta_common.redis_client import get_json, get_redis_client, set_json
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+try:
+    from carpeta_common.service_bus_consumer import ServiceBusConsumer
+    CONSUMER_AVAILABLE = True
+except ImportError:
+    CONSUMER_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DOCUMENT_EVENTS_QUEUE = "document-events"
+TRANSFER_NOTIFICATIONS_QUEUE = "transfer-notifications"
+
+# Transfer statuses after which a transfer no longer counts as pending
+TRANSFER_TERMINAL_STATUSES = {"confirmed", "success", "failed", "cancelled"}
+
+# Owned by the transfer service (same database); only the columns we read
+transfers_table = table(
+    "transfers",
+    column("citizen_id"),
+    column("status"),
+)
+
+SUMMARY_COUNTERS = (
+    "total_documents",
+    "signed_documents",
+    "worm_locked_documents",
+    "total_bytes",
+    "pending_transfers",
+)
+
+
+def summary_to_stats(summary: Optional[CitizenFolderSummary]) -> dict[str, int]:
+    """Map a summary row (or no row) to the dashboard stats payload."""
+    return {
+        "totalDocuments": summary.total_documents if summary else 0,
+        "signedDocuments": summary.signed_documents if summary else 0,
+        "wormLockedDocuments": summary.worm_locked_documents if summary else 0,
+        "totalBytes": summary.total_bytes if summary else 0,
+        "pendingTransfers": summary.pending_transfers if summary else 0,
+    }
+
+
+class FolderSummaryProjector:
+    """Maintain citizen_folder_summary from events and periodic reconciles."""
+
+    def __init__(
+        self,
+        session_factory: sessionmaker,
+        cache_enabled: bool = False,
+        cache_ttl_seconds: int = 30,
+        applied_events_retention: timedelta = timedelta(days=7),
+    ):
+        """Initialize projector.
+
+        Args:
+            session_factory: Async session factory
+            cache_enabled: Serve stats from Redis (invalidated on every applied event)
+            cache_ttl_seconds: TTL of cached stats
+            applied_events_retention: How long applied event keys are kept for dedupe
+        """
+        self.session_factory = session_factory
+        self.cache_enabled = cache_enabled and REDIS_AVAILABLE
+        self.cache_ttl_seconds = cache_ttl_seconds
+        self.applied_events_retention = applied_events_retention
+
+        self._consumers: list[Any] = []
+        self._tasks: list[asyncio.Task] = []
+
+    # ------------------------------------------------------------------
+    # Read path
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _cache_key(citizen_id: str) -> str:
+        return f"folder-summary:{citizen_id}"
+
+    async def get_stats(self, db: AsyncSession, citizen_id: str) -> dict[str, int]:
+        """Get dashboard stats for a citizen (cache, then primary-key lookup)."""
+        if self.cache_enabled:
+            try:
+                cached = await get_json(self._cache_key(citizen_id))
+                if cached is not None:
+                    return cached
+            except Exception as e:
+                logger.warning(f"Folder summary cache read failed: {e}")
+
+        stats = summary_to_stats(await db.get(CitizenFolderSummary, citizen_id))
+
+        if self.cache_enabled:
+            try:
+                await set_json(self._cache_key(citizen_id), stats, ttl=self.cache_ttl_seconds)
+            except Exception as e:
+                logger.warning(f"Folder summary cache write failed: {e}")
+
+        return stats
+
+    async def _invalidate(self, citizen_ids: list[str]) -> None:
+        if not self.cache_enabled or not citizen_ids:
+            return
+        try:
+            client = await get_redis_client()
+            await client.delete(*[self._cache_key(c) for c in citizen_ids])
+        except Exception as e:
+            logger.warning(f"Folder summary cache invalidation failed: {e}")
+
+    # ------------------------------------------------------------------
+    # Incremental updates
+    # ------------------------------------------------------------------
+
+    async def _mark_applied(self, db: AsyncSession, event_key: str, citizen_id: str) -> bool:
+        """Record an event key; False if it was already applied."""
+        result = await db.execute(
+            pg_insert(FolderSummaryEvent)
+            .values(event_key=event_key, citizen_id=citizen_id, applied_at=datetime.utcnow())
+            .on_conflict_do_nothing(index_elements=[FolderSummaryEvent.event_key])
+            .returning(FolderSummaryEvent.event_key)
+        )
+        return result.first() is not None
+
+    async def _is_applied(self, db: AsyncSession, event_key: str) -> bool:
+        return await db.get(FolderSummaryEvent, event_key) is not None
+
+    @staticmethod
+    async def _apply_delta(db: AsyncSession, citizen_id: str, **deltas: int) -> None:
+        """Add deltas to a citizen's counters (creating the row if needed)."""
+        values = {name: deltas.get(name, 0) for name in SUMMARY_COUNTERS}
+        stmt = pg_insert(CitizenFolderSummary).values(
+            citizen_id=citizen_id,
+            updated_at=datetime.utcnow(),
+            **values,
+        )
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[CitizenFolderSummary.citizen_id],
+                set_={
+                    **{
+                        name: getattr(CitizenFolderSummary, name) + getattr(stmt.excluded, name)
+                        for name in SUMMARY_COUNTERS
+                        if name in deltas
+                    },
+                    "updated_at": stmt.excluded.updated_at,
+                },
+            )
+        )
+
+    async def apply_event(self, event: dict[str, Any]) -> bool:
+        """Apply one document event or transfer notification.
+
+        Args:
+            event: Message body (``{"event_type", "data"}`` or a transfer notification)
+
+        Returns:
+            True if the summary changed, False for duplicates and unrelated events
+        """
+        async with self.session_factory() as db:
+            async with db.begin():
+                if "transfer_id" in event:
+                    citizen_id = str(event["citizen_id"])
+                    changed = await self._apply_transfer(db, citizen_id, event)
+                else:
+                    data = event.get("data") or {}
+                    if "citizen_id" not in data or "document_id" not in data:
+                        return False
+                    citizen_id = str(data["citizen_id"])
+                    changed = await self._apply_document(
+                        db, citizen_id, event.get("event_type"), data
+                    )
+
+        if changed:
+            await self._invalidate([citizen_id])
+        return changed
+
+    async def _apply_document(
+        self,
+        db: AsyncSession,
+        citizen_id: str,
+        event_type: Optional[str],
+        data: dict[str, Any],
+    ) -> bool:
+        document_id = data["document_id"]
+
+        if event_type == "document.uploaded":
+            # Presigned uploads publish twice: at URL issue (no size) and on confirm (size)
+            deltas = {}
+            if await self._mark_applied(db, f"{event_type}:{document_id}", citizen_id):
+                deltas["total_documents"] = 1
+            size_bytes = data.get("size_bytes")
+            if size_bytes and await self._mark_applied(db, f"document.sized:{document_id}", citizen_id):
+                deltas["total_bytes"] = int(size_bytes)
+            if not deltas:
+                return False
+            await self._apply_delta(db, citizen_id, **deltas)
+            return True
+
+        if event_type == "document.signed":
+            if not await self._mark_applied(db, f"{event_type}:{document_id}", citizen_id):
+                return False
+            # Signing always activates WORM together with state=SIGNED
+            await self._apply_delta(db, citizen_id, signed_documents=1, worm_locked_documents=1)
+            return True
+
+        if event_type == "document.deleted":
+            if not await self._mark_applied(db, f"{event_type}:{document_id}", citizen_id):
+                return False
+            document = (
+                await db.execute(
+                    select(
+                        DocumentMetadata.state,
+                        DocumentMetadata.worm_locked,
+                        DocumentMetadata.size_bytes,
+                    ).where(DocumentMetadata.id == document_id)
+                )
+            ).first()
+            await self._apply_delta(
+                db,
+                citizen_id,
+                total_documents=-1,
+                signed_documents=-1 if document and document.state == "SIGNED" else 0,
+                worm_locked_documents=-1 if document and document.worm_locked else 0,
+                total_bytes=-(document.size_bytes or 0) if document else 0,
+            )
+            return True
+
+        return False
+
+    async def _apply_transfer(self, db: AsyncSession, citizen_id: str, event: dict[str, Any]) -> bool:
+        transfer_id = event["transfer_id"]
+        transfer_status = str(event.get("status", "")).lower()
+        pending_key = f"transfer.pending:{transfer_id}"
+        done_key = f"transfer.done:{transfer_id}"
+
+        if transfer_status == "pending":
+            # A terminal notification may overtake the pending one
+            if await self._is_applied(db, done_key):
+                return False
+            if not await self._mark_applied(db, pending_key, citizen_id):
+                return False
+            await self._apply_delta(db, citizen_id, pending_transfers=1)
+            return True
+
+        if transfer_status in TRANSFER_TERMINAL_STATUSES:
+            if not await self._mark_applied(db, done_key, citizen_id):
+                return False
+            if not await self._is_applied(db, pending_key):
+                return False
+            await self._apply_delta(db, citizen_id, pending_transfers=-1)
+            return True
+
+        return False
+
+    # ------------------------------------------------------------------
+    # Reconcile
+    # ------------------------------------------------------------------
+
+    async def reconcile(self) -> bool:
+        """Recompute every summary row from the source tables.
+
+        Set-based (one INSERT ... SELECT per source), guarded by an advisory
+        lock so only one pod reconciles at a time. Events applied while the
+        reconcile runs may be overwritten; the next pass corrects them.
+
+        Returns:
+            False if another pod holds the reconcile lock
+        """
+        async with self.session_factory() as db:
+            async with db.begin():
+                locked = (
+                    await db.execute(
+                        text("SELECT pg_try_advisory_xact_lock(hashtext('citizen_folder_summary'))")
+                    )
+                ).scalar()
+                if not locked:
+                    return False
+
+                now = datetime.utcnow()
+                await self._reconcile_documents(db, now)
+                try:
+                    async with db.begin_nested():
+                        await self._reconcile_transfers(db, now)
+                except Exception as e:
+                    logger.warning(f"Skipping pending transfer reconcile: {e}")
+
+                await db.execute(
+                    delete(FolderSummaryEvent)
+                    .where(FolderSummaryEvent.applied_at < now - self.applied_events_retention)
+                )
+
+        logger.info("Citizen folder summaries reconciled")
+        return True
+
+    async def _reconcile_documents(self, db: AsyncSession, now: datetime) -> None:
+        active = select(
+            DocumentMetadata.citizen_id,
+            func.count().label("total_documents"),
+            func.count().filter(DocumentMetadata.state == "SIGNED").label("signed_documents"),
+            func.count().filter(DocumentMetadata.worm_locked.is_(True)).label("worm_locked_documents"),
+            func.coalesce(func.sum(DocumentMetadata.size_bytes), 0).label("total_bytes"),
+            literal(now, DateTime).label("updated_at"),
+        ).where(DocumentMetadata.is_deleted.is_(False)).group_by(DocumentMetadata.citizen_id)
+
+        columns = [
+            "citizen_id",
+            "total_documents",
+            "signed_documents",
+            "worm_locked_documents",
+            "total_bytes",
+            "updated_at",
+        ]
+        stmt = pg_insert(CitizenFolderSummary).from_select(columns, active)
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[CitizenFolderSummary.citizen_id],
+                set_={name: getattr(stmt.excluded, name) for name in columns[1:]},
+            )
+        )
+
+        # Citizens whose documents are all gone
+        await db.execute(
+            update(CitizenFolderSummary)
+            .where(CitizenFolderSummary.total_documents != 0)
+            .where(
+                ~select(DocumentMetadata.id)
+                .where(DocumentMetadata.citizen_id == CitizenFolderSummary.citizen_id)
+                .where(DocumentMetadata.is_deleted.is_(False))
+                .exists()
+            )
+            .values(
+                total_documents=0,
+                signed_documents=0,
+                worm_locked_documents=0,
+                total_bytes=0,
+                updated_at=now,
+            )
+        )
+
+    async def _reconcile_transfers(self, db: AsyncSession, now: datetime) -> None:
+        transfer_citizen = cast(transfers_table.c.citizen_id, String)
+        pending = (
+            select(
+                transfer_citizen.label("citizen_id"),
+                func.count().label("pending_transfers"),
+                literal(now, DateTime).label("updated_at"),
+            )
+            .where(func.lower(cast(transfers_table.c.status, String)) == "pending")
+            .group_by(transfer_citizen)
+        )
+
+        stmt = pg_insert(CitizenFolderSummary).from_select(
+            ["citizen_id", "pending_transfers", "updated_at"], pending
+        )
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[CitizenFolderSummary.citizen_id],
+                set_={
+                    "pending_transfers": stmt.excluded.pending_transfers,
+                    "updated_at": stmt.excluded.updated_at,
+                },
+            )
+        )
+
+        await db.execute(
+            update(CitizenFolderSummary)
+            .where(CitizenFolderSummary.pending_transfers != 0)
+            .where(CitizenFolderSummary.citizen_id.not_in(pending.with_only_columns(transfer_citizen)))
+            .values(pending_transfers=0, updated_at=now)
+        )
+
+    async def run_reconcile_forever(self, interval_seconds: int) -> None:
+        """Reconcile periodically until cancelled."""
+        while True:
+            try:
+                await self.reconcile()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Folder summary reconcile failed: {e}")
+            await asyncio.sleep(interval_seconds)
+
+    # ------------------------------------------------------------------
+    # Consumers
+    # ------------------------------------------------------------------
+
+    async def start_consumers(self, connection_string: str) -> None:
+        """Consume document events and transfer notifications in the background."""
+        if not CONSUMER_AVAILABLE:
+            logger.warning("carpeta_common consumer not available, folder summary relies on reconcile")
+            return
+
+        async def handler(event: dict[str, Any]) -> None:
+            await self.apply_event(event)
+
+        for queue_name in (DOCUMENT_EVENTS_QUEUE, TRANSFER_NOTIFICATIONS_QUEUE):
+            consumer = ServiceBusConsumer(connection_string, queue_name)
+            await consumer.start()
+            self._consumers.append(consumer)
+            self._tasks.append(
+                asyncio.create_task(consumer.consume(handler, max_messages=50, max_wait_time=5.0))
+            )
+
+    async def shutdown(self) -> None:
+        """Stop consumers."""
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        for consumer in self._consumers:
+            await consumer.stop()
+        self._tasks.clear()
+        self._consumers.clear()
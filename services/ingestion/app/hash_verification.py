@@ -1,34 +1,146 @@
 """Hash verification service for document integrity."""
 
+import asyncio
 import hashlib
 import logging
+import time
 from typing import Optional, Dict, Any
 
+import httpx
+
 from app.azure_storage import AzureBlobDocumentClient
+from app.block_upload import get_http_client
 
 logger = logging.getLogger(__name__)
 
 
 class HashVerificationService:
-    """Service for verifying document hash integrity."""
+    """Service for verifying document hash integrity.
+
+    Blobs are read with ranged GETs into two reusable buffers: one range is
+    downloaded while the previous one is hashed in a worker thread, so memory
+    stays at ``2 * chunk_size`` and the event loop is never blocked by hashing.
+    """
     
-    def __init__(self, storage_client: AzureBlobDocumentClient):
-        """Initialize hash verification service."""
+    def __init__(
+        self,
+        storage_client: AzureBlobDocumentClient,
+        http_client: Optional[httpx.AsyncClient] = None,
+        chunk_size: int = 4 * 1024 * 1024,
+        rate_limiter: Optional[Any] = None,
+    ):
+        """Initialize hash verification service.
+
+        Args:
+            storage_client: Azure Blob client (properties and read SAS)
+            http_client: Async HTTP client for ranged GETs (shared client by default)
+            chunk_size: Range size in bytes read per request
+            rate_limiter: Optional bandwidth limiter with ``async acquire(nbytes)``
+        """
         self.storage_client = storage_client
+        self.http_client = http_client or get_http_client()
+        self.chunk_size = chunk_size
+        self.rate_limiter = rate_limiter
     
     def calculate_sha256(self, data: bytes) -> str:
         """Calculate SHA-256 hash of data."""
         return hashlib.sha256(data).hexdigest()
+
+    async def _read_range(
+        self,
+        url: str,
+        start: int,
+        end: int,
+        buffer: memoryview
+    ) -> int:
+        """Read bytes ``start..end`` (inclusive) of a blob into ``buffer``.
+
+        Returns:
+            Number of bytes written into the buffer
+        """
+        filled = 0
+        headers = {"Range": f"bytes={start}-{end}"}
+
+        async with self.http_client.stream("GET", url, headers=headers) as response:
+            if response.status_code not in (200, 206):
+                await response.aread()
+                raise RuntimeError(
+                    f"Ranged GET failed: {response.status_code} {response.text}"
+                )
+
+            async for part in response.aiter_raw():
+                if filled + len(part) > len(buffer):
+                    raise RuntimeError("Blob storage returned more bytes than requested")
+                buffer[filled:filled + len(part)] = part
+                filled += len(part)
+
+        return filled
+
+    async def stream_sha256(self, blob_name: str, blob_size: int) -> Dict[str, Any]:
+        """Compute SHA-256 of a blob without loading it into memory.
+
+        Returns:
+            Dict with ``sha256``, ``bytes_read`` and throughput ``stats``
+        """
+        url = self.storage_client.generate_presigned_get(blob_name)
+        chunk_size = max(1, min(self.chunk_size, blob_size or 1))
+        buffers = [memoryview(bytearray(chunk_size)), memoryview(bytearray(chunk_size))]
+        hasher = hashlib.sha256()
+
+        started = time.perf_counter()
+        offset = 0
+        requests = 0
+        pending_hash: Optional[asyncio.Future] = None
+
+        try:
+            while offset < blob_size:
+                buffer = buffers[requests % 2]
+                end = min(offset + chunk_size, blob_size) - 1
+                if self.rate_limiter is not None:
+                    await self.rate_limiter.acquire(end - offset + 1)
+                filled = await self._read_range(url, offset, end, buffer)
+                requests += 1
+                if filled == 0:
+                    break
+
+                # Previous buffer must be fully hashed before queueing the next one
+                if pending_hash is not None:
+                    await pending_hash
+                pending_hash = asyncio.ensure_future(
+                    asyncio.to_thread(hasher.update, buffer[:filled])
+                )
+                offset += filled
+
+            if pending_hash is not None:
+                await pending_hash
+        except BaseException:
+            if pending_hash is not None and not pending_hash.done():
+                pending_hash.cancel()
+            raise
+
+        elapsed = time.perf_counter() - started
+
+        return {
+            "sha256": hasher.hexdigest(),
+            "bytes_read": offset,
+            "stats": {
+                "bytes_read": offset,
+                "range_requests": requests,
+                "chunk_size": chunk_size,
+                "elapsed_seconds": round(elapsed, 4),
+                "throughput_mb_per_s": round(offset / elapsed / (1024 * 1024), 2) if elapsed > 0 else None,
+            }
+        }
     
     async def verify_document_hash(
         self,
         blob_name: str,
         expected_hash: str
     ) -> Dict[str, Any]:
-        """Verify document hash against stored blob."""
+        """Verify document hash against stored blob (streaming, bounded memory)."""
         try:
-            # Get blob metadata and content
-            blob_properties = self.storage_client.get_blob_properties(blob_name)
+            # Get blob metadata (size drives the ranged reads)
+            blob_properties = await self.storage_client.get_blob_properties(blob_name)
             
             if not blob_properties:
                 return {
@@ -38,19 +150,9 @@ class HashVerificationService:
                     "expected_hash": expected_hash
                 }
             
-            # Get blob content for hash calculation
-            blob_content = await self.storage_client.download_blob_content(blob_name)
-            
-            if not blob_content:
-                return {
-                    "verified": False,
-                    "error": "Failed to download blob content",
-                    "actual_hash": None,
-                    "expected_hash": expected_hash
-                }
-            
-            # Calculate actual hash
-            actual_hash = self.calculate_sha256(blob_content)
+            # Calculate actual hash from ranged reads
+            digest = await self.stream_sha256(blob_name, blob_properties["size"])
+            actual_hash = digest["sha256"]
             
             # Compare hashes
             verified = actual_hash.lower() == expected_hash.lower()
@@ -59,16 +161,20 @@ class HashVerificationService:
                 "verified": verified,
                 "actual_hash": actual_hash,
                 "expected_hash": expected_hash,
-                "blob_size": len(blob_content),
+                "blob_size": digest["bytes_read"],
                 "blob_properties": {
                     "content_type": blob_properties.get("content_type"),
                     "last_modified": blob_properties.get("last_modified"),
                     "etag": blob_properties.get("etag")
-                }
+                },
+                "stats": digest["stats"]
             }
             
             if verified:
-                logger.info(f"Hash verification successful for blob {blob_name}")
+                logger.info(
+                    f"Hash verification successful for blob {blob_name} "
+                    f"({digest['stats']['throughput_mb_per_s']} MB/s)"
+                )
             else:
                 logger.warning(f"Hash verification failed for blob {blob_name}: expected {expected_hash}, got {actual_hash}")
             
@@ -107,7 +213,8 @@ class HashVerificationService:
                         "error": f"Size mismatch: expected {expected_size}, got {actual_size}",
                         "actual_size": actual_size,
                         "expected_size": expected_size,
-                        "hash_verified": True
+                        "hash_verified": True,
+                        "stats": hash_result["stats"]
                     }
             
             return {
@@ -117,7 +224,8 @@ class HashVerificationService:
                 "actual_hash": hash_result["actual_hash"],
                 "expected_hash": expected_hash,
                 "blob_size": hash_result["blob_size"],
-                "blob_properties": hash_result["blob_properties"]
+                "blob_properties": hash_result["blob_properties"],
+                "stats": hash_result["stats"]
             }
             
         except Exception as e:
@@ -0,0 +1,405 @@
+"""Bulk integrity scrubbing over document_metadata.
+
+Walks ``document_metadata`` with keyset pagination on ``(created_at, id)``,
+verifies each blob with the streaming HashVerificationService through a
+bounded worker pool under a global bytes-per-second cap, and checkpoints
+progress after every page so a job resumes where it stopped after a restart.
+Checkpoints are fenced on the job's owner, so a pod whose job was reclaimed
+while it stalled stops instead of writing over the new owner's progress.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+from uuid import uuid4
+
+from sqlalchemy import or_, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.azure_storage import AzureBlobDocumentClient
+from app.hash_verification import HashVerificationService
+from app.models import DocumentMetadata, IntegrityScrubJob, IntegrityScrubResult
+
+logger = logging.getLogger(__name__)
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Convert an aware datetime to naive UTC (``created_at`` is stored naive UTC)."""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class JobOwnershipLost(Exception):
+    """A fenced write matched no row: the job was cancelled, finished or reclaimed."""
+
+
+class ByteRateLimiter:
+    """Token bucket limiting total throughput in bytes per second.
+
+    Shared by every worker of the scrubber so the cap applies to the pod,
+    not to each verification. A rate of 0 disables limiting.
+    """
+
+    def __init__(self, bytes_per_second: int):
+        self.rate = bytes_per_second
+        self.capacity = bytes_per_second
+        self._tokens = float(bytes_per_second)
+        self._last = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, nbytes: int) -> None:
+        """Wait until ``nbytes`` may be transferred."""
+        if self.rate <= 0:
+            return
+
+        async with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= nbytes
+
+            # Waiting while holding the lock keeps waiters FIFO
+            if self._tokens < 0:
+                await asyncio.sleep(-self._tokens / self.rate)
+
+
+class IntegrityScrubber:
+    """Run and resume bulk integrity scrubbing jobs."""
+
+    def __init__(
+        self,
+        session_factory: sessionmaker,
+        storage_client: AzureBlobDocumentClient,
+        owner: str,
+        workers: int = 4,
+        bytes_per_second: int = 20 * 1024 * 1024,
+        page_size: int = 100,
+        chunk_size: int = 4 * 1024 * 1024,
+        stale_after_seconds: int = 600,
+    ):
+        """Initialize scrubber.
+
+        Args:
+            session_factory: Async session factory
+            storage_client: Azure Blob client
+            owner: Identifier of this pod (used to claim jobs)
+            workers: Max blobs verified concurrently
+            bytes_per_second: Bandwidth cap across all workers (0 = unlimited)
+            page_size: Documents fetched per keyset page
+            chunk_size: Range size for streaming verification
+            stale_after_seconds: Running jobs without progress for this long are resumed
+        """
+        self.session_factory = session_factory
+        self.owner = owner
+        self.workers = workers
+        self.page_size = page_size
+        self.stale_after_seconds = stale_after_seconds
+        self.rate_limiter = ByteRateLimiter(bytes_per_second)
+        self.verifier = HashVerificationService(
+            storage_client,
+            chunk_size=chunk_size,
+            rate_limiter=self.rate_limiter,
+        )
+        self._tasks: dict[str, asyncio.Task] = {}
+
+    # ------------------------------------------------------------------
+    # Job lifecycle
+    # ------------------------------------------------------------------
+
+    async def create_job(
+        self,
+        citizen_id: Optional[str] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        worm_only: bool = False,
+        job_id: Optional[str] = None,
+    ) -> Optional[IntegrityScrubJob]:
+        """Persist a new job and start it in the background.
+
+        Returns None if a job with ``job_id`` already exists.
+        """
+        job_id = job_id or str(uuid4())
+
+        async with self.session_factory() as db:
+            result = await db.execute(
+                pg_insert(IntegrityScrubJob)
+                .values(
+                    id=job_id,
+                    status="running",
+                    citizen_id=citizen_id,
+                    created_from=_naive_utc(created_from),
+                    created_to=_naive_utc(created_to),
+                    worm_only=worm_only,
+                    documents_checked=0,
+                    mismatches_found=0,
+                    bytes_verified=0,
+                    owner=self.owner,
+                    created_at=datetime.utcnow(),
+                    updated_at=datetime.utcnow(),
+                )
+                .on_conflict_do_nothing(index_elements=[IntegrityScrubJob.id])
+                .returning(IntegrityScrubJob.id)
+            )
+            inserted = result.scalar_one_or_none()
+            await db.commit()
+
+            if inserted is None:
+                return None
+
+            job = await db.get(IntegrityScrubJob, job_id)
+
+        logger.info(f"Created integrity scrub job {job_id}")
+        self.start(job_id)
+        return job
+
+    def start(self, job_id: str) -> None:
+        """Run a job in the background on this pod."""
+        if job_id in self._tasks:
+            return
+
+        task = asyncio.create_task(self.run_job(job_id))
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+
+    async def cancel_job(self, job_id: str) -> bool:
+        """Mark a job as cancelled; its runner stops after the current page."""
+        async with self.session_factory() as db:
+            result = await db.execute(
+                update(IntegrityScrubJob)
+                .where(IntegrityScrubJob.id == job_id)
+                .where(IntegrityScrubJob.status == "running")
+                .values(status="cancelled", completed_at=datetime.utcnow())
+            )
+            await db.commit()
+        return result.rowcount > 0
+
+    async def resume_stale_jobs(self) -> list[str]:
+        """Claim and resume running jobs that lost their owner."""
+        threshold = datetime.utcnow() - timedelta(seconds=self.stale_after_seconds)
+
+        async with self.session_factory() as db:
+            result = await db.execute(
+                update(IntegrityScrubJob)
+                .where(IntegrityScrubJob.status == "running")
+                .where(
+                    or_(
+                        IntegrityScrubJob.owner.is_(None),
+                        IntegrityScrubJob.owner == self.owner,
+                        IntegrityScrubJob.updated_at < threshold,
+                    )
+                )
+                .values(owner=self.owner, updated_at=datetime.utcnow())
+                .returning(IntegrityScrubJob.id)
+            )
+            job_ids = list(result.scalars().all())
+            await db.commit()
+
+        for job_id in job_ids:
+            logger.info(f"Resuming integrity scrub job {job_id}")
+            self.start(job_id)
+
+        return job_ids
+
+    async def shutdown(self) -> None:
+        """Stop local runners and release job ownership for other pods."""
+        job_ids = list(self._tasks)
+        for task in list(self._tasks.values()):
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+        if not job_ids:
+            return
+
+        try:
+            async with self.session_factory() as db:
+                await db.execute(
+                    update(IntegrityScrubJob)
+                    .where(IntegrityScrubJob.id.in_(job_ids))
+                    .where(IntegrityScrubJob.owner == self.owner)
+                    .values(owner=None)
+                )
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Failed to release integrity scrub jobs: {e}")
+
+    async def run_worm_scrub_forever(self, interval_seconds: int) -> None:
+        """Continuously re-verify WORM-locked documents, one pass per interval.
+
+        The pass ID is derived from the interval so that only one pod creates
+        each pass; the others pick it up through ``resume_stale_jobs``.
+        """
+        while True:
+            try:
+                pass_id = f"worm-{int(time.time() // interval_seconds)}"
+                job = await self.create_job(worm_only=True, job_id=pass_id)
+                if job is not None:
+                    task = self._tasks.get(pass_id)
+                    if task is not None:
+                        await asyncio.wait({task})
+                else:
+                    await self.resume_stale_jobs()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"WORM integrity scrub pass failed: {e}")
+
+            await asyncio.sleep(interval_seconds - (time.time() % interval_seconds))
+
+    # ------------------------------------------------------------------
+    # Execution
+    # ------------------------------------------------------------------
+
+    async def run_job(self, job_id: str) -> None:
+        """Process a job page by page until done, cancelled or failed."""
+        try:
+            while True:
+                async with self.session_factory() as db:
+                    job = await db.get(IntegrityScrubJob, job_id)
+                    if job is None or job.status != "running" or job.owner != self.owner:
+                        return
+                    page = await self._fetch_page(db, job)
+
+                if not page:
+                    await self._finish(job_id, "completed")
+                    logger.info(f"Integrity scrub job {job_id} completed")
+                    return
+
+                outcomes = await self._verify_page(page)
+                await self._checkpoint(job_id, page[-1], outcomes)
+        except asyncio.CancelledError:
+            raise
+        except JobOwnershipLost:
+            logger.warning(f"Integrity scrub job {job_id} no longer owned by {self.owner}, stopping")
+        except Exception as e:
+            logger.error(f"Integrity scrub job {job_id} failed: {e}")
+            await self._finish(job_id, "failed", error=str(e))
+
+    def _owned(self, job_id: str):
+        """UPDATE of a job, fenced on it still running under this owner."""
+        return (
+            update(IntegrityScrubJob)
+            .where(IntegrityScrubJob.id == job_id)
+            .where(IntegrityScrubJob.status == "running")
+            .where(IntegrityScrubJob.owner == self.owner)
+        )
+
+    async def _fetch_page(self, db: AsyncSession, job: IntegrityScrubJob) -> list[Any]:
+        """Fetch the next keyset page of documents for a job."""
+        query = (
+            select(
+                DocumentMetadata.id,
+                DocumentMetadata.citizen_id,
+                DocumentMetadata.blob_name,
+                DocumentMetadata.sha256_hash,
+                DocumentMetadata.size_bytes,
+                DocumentMetadata.created_at,
+            )
+            .where(DocumentMetadata.is_deleted == False)
+            .where(DocumentMetadata.sha256_hash.isnot(None))
+            # Archive-tier blobs are offline until rehydrated; reading them fails
+            .where(DocumentMetadata.lifecycle_tier != "Archive")
+        )
+
+        if job.citizen_id:
+            query = query.where(DocumentMetadata.citizen_id == job.citizen_id)
+        if job.created_from:
+            query = query.where(DocumentMetadata.created_at >= job.created_from)
+        if job.created_to:
+            query = query.where(DocumentMetadata.created_at < job.created_to)
+        if job.worm_only:
+            query = query.where(DocumentMetadata.worm_locked == True)
+        if job.last_created_at is not None:
+            query = query.where(
+                tuple_(DocumentMetadata.created_at, DocumentMetadata.id)
+                > tuple_(job.last_created_at, job.last_document_id)
+            )
+
+        query = query.order_by(
+            DocumentMetadata.created_at, DocumentMetadata.id
+        ).limit(self.page_size)
+
+        result = await db.execute(query)
+        return list(result.all())
+
+    async def _verify_page(self, page: list[Any]) -> list[tuple[Any, dict[str, Any]]]:
+        """Verify a page of documents with at most ``workers`` in flight."""
+        semaphore = asyncio.Semaphore(self.workers)
+
+        async def verify(doc: Any) -> tuple[Any, dict[str, Any]]:
+            async with semaphore:
+                result = await self.verifier.verify_document_integrity(
+                    document_id=doc.id,
+                    blob_name=doc.blob_name,
+                    expected_hash=doc.sha256_hash,
+                    expected_size=doc.size_bytes,
+                )
+                return doc, result
+
+        return await asyncio.gather(*(verify(doc) for doc in page))
+
+    async def _checkpoint(
+        self,
+        job_id: str,
+        last_doc: Any,
+        outcomes: list[tuple[Any, dict[str, Any]]],
+    ) -> None:
+        """Store mismatches and advance the checkpoint in one transaction."""
+        mismatches = [
+            IntegrityScrubResult(
+                job_id=job_id,
+                document_id=doc.id,
+                citizen_id=doc.citizen_id,
+                blob_name=doc.blob_name,
+                expected_hash=doc.sha256_hash,
+                actual_hash=result.get("actual_hash"),
+                expected_size=doc.size_bytes,
+                actual_size=result.get("blob_size", result.get("actual_size")),
+                error=result.get("error") or "Hash mismatch",
+            )
+            for doc, result in outcomes
+            if not result.get("verified")
+        ]
+        bytes_verified = sum(
+            result.get("blob_size") or result.get("actual_size") or 0
+            for _, result in outcomes
+        )
+
+        async with self.session_factory() as db:
+            if mismatches:
+                db.add_all(mismatches)
+            result = await db.execute(
+                self._owned(job_id)
+                .values(
+                    last_created_at=last_doc.created_at,
+                    last_document_id=last_doc.id,
+                    documents_checked=IntegrityScrubJob.documents_checked + len(outcomes),
+                    mismatches_found=IntegrityScrubJob.mismatches_found + len(mismatches),
+                    bytes_verified=IntegrityScrubJob.bytes_verified + bytes_verified,
+                    updated_at=datetime.utcnow(),
+                )
+                .returning(IntegrityScrubJob.id)
+            )
+            if result.scalar_one_or_none() is None:
+                # Drops the mismatch rows with the checkpoint; the new owner redoes the page
+                await db.rollback()
+                raise JobOwnershipLost(job_id)
+            await db.commit()
+
+        for mismatch in mismatches:
+            logger.warning(
+                f"Integrity mismatch in job {job_id} for document "
+                f"{mismatch.document_id}: {mismatch.error}"
+            )
+
+    async def _finish(self, job_id: str, status: str, error: Optional[str] = None) -> None:
+        """Mark a job as finished."""
+        async with self.session_factory() as db:
+            await db.execute(
+                self._owned(job_id).values(status=status, error=error, completed_at=datetime.utcnow())
+            )
+            await db.commit()
@@ -0,0 +1,404 @@
+"""Retention and lifecycle-tier sweeper for document blobs.
+
+Walks indexed ranges of ``document_metadata`` in keyset chunks of at most
+256 rows (the Blob Batch sub-request limit) and, per chunk, makes one Blob
+Batch call plus one bulk UPDATE/DELETE:
+
+- Tiering: Hot -> Cool after ``cool_after_days``, Cool -> Archive after
+  ``archive_after_days`` (by ``created_at``). A blob shared by deduplicated
+  documents only moves once its newest live reference is old enough.
+- Purge: expired UNSIGNED, non-WORM documents without legal hold (by
+  ``retention_until``, or ``created_at`` + ``unsigned_retention_days`` when no
+  retention date was set). Rows are hard-deleted, content references are
+  released and blobs no longer referenced by any row are batch-deleted. Rows
+  whose blob could not be deleted are kept and retried on the next sweep.
+- WORM tags: sets the ``state/worm/retentionUntil/hubRef`` index tags on
+  blobs of signed documents. Blob Batch does not support Set Blob Tags, so
+  these are individual calls with bounded concurrency.
+
+Each pass runs even if an earlier one failed. Only one pod sweeps at a time
+(PostgreSQL advisory lock).
+"""
+
+import asyncio
+import logging
+import re
+from datetime import date, datetime, timedelta
+from typing import Any, Awaitable, Optional
+
+from sqlalchemy import Integer, String, column, delete, func, select, text, tuple_, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased, sessionmaker
+
+from app.azure_storage import AzureBlobDocumentClient
+from app.models import ContentBlob, DocumentMetadata
+
+logger = logging.getLogger(__name__)
+
+# Blob Batch API limit
+MAX_BATCH_SIZE = 256
+
+SWEEP_LOCK_KEY = "document_lifecycle_sweeper"
+
+# Characters allowed in blob index tag values
+_TAG_VALUE_INVALID = re.compile(r"[^A-Za-z0-9 +\-./:=_]")
+
+
+class LifecycleSweeper:
+    """Tier, purge and tag document blobs in batched passes."""
+
+    def __init__(
+        self,
+        session_factory: sessionmaker,
+        storage_client: AzureBlobDocumentClient,
+        batch_size: int = MAX_BATCH_SIZE,
+        cool_after_days: int = 90,
+        archive_after_days: int = 365,
+        unsigned_retention_days: int = 30,
+        tag_concurrency: int = 16,
+    ):
+        """Initialize sweeper.
+
+        Args:
+            session_factory: Async session factory
+            storage_client: Azure Blob client
+            batch_size: Rows per chunk (capped at the Blob Batch limit of 256)
+            cool_after_days: Age at which Hot blobs move to Cool
+            archive_after_days: Age at which Cool blobs move to Archive
+            unsigned_retention_days: TTL of UNSIGNED documents without retention_until
+            tag_concurrency: Max concurrent Set Blob Tags calls
+        """
+        self.session_factory = session_factory
+        self.storage_client = storage_client
+        self.batch_size = min(batch_size, MAX_BATCH_SIZE)
+        self.cool_after_days = cool_after_days
+        self.archive_after_days = archive_after_days
+        self.unsigned_retention_days = unsigned_retention_days
+        self.tag_concurrency = tag_concurrency
+
+    # ------------------------------------------------------------------
+    # Orchestration
+    # ------------------------------------------------------------------
+
+    async def sweep(self) -> Optional[dict[str, int]]:
+        """Run one full sweep.
+
+        Returns:
+            Per-pass counters, or None if another pod is sweeping
+        """
+        async with self.session_factory() as lock_db:
+            # Session-level lock on an autocommit connection: no transaction stays open
+            lock_conn = await lock_db.connection(execution_options={"isolation_level": "AUTOCOMMIT"})
+            locked = (
+                await lock_conn.execute(
+                    text("SELECT pg_try_advisory_lock(hashtext(:key))"), {"key": SWEEP_LOCK_KEY}
+                )
+            ).scalar()
+            if not locked:
+                logger.info("Lifecycle sweep already running on another pod")
+                return None
+
+            try:
+                now = datetime.utcnow()
+                stats = {
+                    "worm_tagged": await self._run_pass("WORM tagging", self.apply_worm_tags()),
+                    "purged": await self._run_pass("purge", self.purge_expired_unsigned(now)),
+                    "moved_to_cool": await self._run_pass(
+                        "Hot -> Cool tiering",
+                        self.move_tier("Hot", "Cool", now - timedelta(days=self.cool_after_days)),
+                    ),
+                    "moved_to_archive": await self._run_pass(
+                        "Cool -> Archive tiering",
+                        self.move_tier("Cool", "Archive", now - timedelta(days=self.archive_after_days)),
+                    ),
+                }
+            finally:
+                await lock_conn.execute(
+                    text("SELECT pg_advisory_unlock(hashtext(:key))"), {"key": SWEEP_LOCK_KEY}
+                )
+
+        logger.info(f"Lifecycle sweep finished: {stats}")
+        return stats
+
+    @staticmethod
+    async def _run_pass(name: str, pass_: Awaitable[int]) -> int:
+        """Run one pass; a failure is logged and does not stop the other passes."""
+        try:
+            return await pass_
+        except Exception as e:
+            logger.error(f"Lifecycle {name} pass failed: {e}")
+            return 0
+
+    async def run_forever(self, interval_seconds: int) -> None:
+        """Sweep periodically until cancelled."""
+        while True:
+            try:
+                await self.sweep()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Lifecycle sweep failed: {e}")
+            await asyncio.sleep(interval_seconds)
+
+    # ------------------------------------------------------------------
+    # Tiering
+    # ------------------------------------------------------------------
+
+    async def move_tier(self, from_tier: str, to_tier: str, created_before: datetime) -> int:
+        """Move blobs of documents created before ``created_before`` to ``to_tier``.
+
+        Returns:
+            Number of blobs moved
+        """
+        newer = aliased(DocumentMetadata)
+        moved = 0
+        cursor: Optional[tuple[datetime, str]] = None
+
+        while True:
+            query = (
+                select(DocumentMetadata.id, DocumentMetadata.created_at, DocumentMetadata.blob_name)
+                .where(DocumentMetadata.lifecycle_tier == from_tier)
+                .where(DocumentMetadata.created_at < created_before)
+                .where(
+                    ~select(newer.id)
+                    .where(newer.blob_name == DocumentMetadata.blob_name)
+                    .where(newer.is_deleted == False)
+                    .where(newer.created_at >= created_before)
+                    .exists()
+                )
+                .order_by(DocumentMetadata.created_at, DocumentMetadata.id)
+                .limit(self.batch_size)
+            )
+            if cursor is not None:
+                query = query.where(
+                    tuple_(DocumentMetadata.created_at, DocumentMetadata.id) > tuple_(*cursor)
+                )
+
+            async with self.session_factory() as db:
+                chunk = list((await db.execute(query)).all())
+                if not chunk:
+                    return moved
+                cursor = (chunk[-1].created_at, chunk[-1].id)
+
+                blob_names = list(dict.fromkeys(row.blob_name for row in chunk))
+                succeeded = await self.storage_client.set_blob_tier_batch(blob_names, to_tier)
+                if succeeded:
+                    # Every document sharing a moved blob changes tier with it
+                    await db.execute(
+                        update(DocumentMetadata)
+                        .where(DocumentMetadata.blob_name.in_(succeeded))
+                        .where(DocumentMetadata.lifecycle_tier == from_tier)
+                        .values(lifecycle_tier=to_tier)
+                    )
+                    await db.commit()
+                moved += len(succeeded)
+
+    # ------------------------------------------------------------------
+    # Purge
+    # ------------------------------------------------------------------
+
+    def _expired_unsigned(self):
+        return (
+            select(
+                DocumentMetadata.id,
+                DocumentMetadata.citizen_id,
+                DocumentMetadata.blob_name,
+                DocumentMetadata.sha256_hash,
+                DocumentMetadata.is_deleted,
+                DocumentMetadata.created_at,
+                DocumentMetadata.retention_until,
+            )
+            .where(DocumentMetadata.state == "UNSIGNED")
+            .where(DocumentMetadata.worm_locked == False)
+            .where(DocumentMetadata.legal_hold == False)
+        )
+
+    async def purge_expired_unsigned(self, now: datetime) -> int:
+        """Purge expired UNSIGNED documents in two indexed passes.
+
+        Returns:
+            Number of documents purged
+        """
+        today = now.date()
+        created_cutoff = now - timedelta(days=self.unsigned_retention_days)
+
+        by_retention = self._expired_unsigned().where(DocumentMetadata.retention_until < today)
+        by_age = (
+            self._expired_unsigned()
+            .where(DocumentMetadata.retention_until.is_(None))
+            .where(DocumentMetadata.created_at < created_cutoff)
+        )
+
+        purged = 0
+        for base, order in (
+            (by_retention, (DocumentMetadata.retention_until, DocumentMetadata.id)),
+            (by_age, (DocumentMetadata.created_at, DocumentMetadata.id)),
+        ):
+            cursor: Optional[tuple[Any, str]] = None
+            while True:
+                query = (
+                    base.order_by(*order)
+                    .limit(self.batch_size)
+                    .with_for_update(skip_locked=True)
+                )
+                # Rows kept after a failed blob delete stay in the range; move past them
+                if cursor is not None:
+                    query = query.where(tuple_(*order) > tuple_(*cursor))
+
+                async with self.session_factory() as db:
+                    chunk = list((await db.execute(query)).all())
+                    if not chunk:
+                        break
+                    cursor = tuple(getattr(chunk[-1], col.key) for col in order)
+                    purged += await self._purge_chunk(db, chunk)
+                    await db.commit()
+
+                if len(chunk) < self.batch_size:
+                    break
+
+        return purged
+
+    async def _purge_chunk(self, db: AsyncSession, chunk: list[Any]) -> int:
+        """Delete a locked chunk of documents and their unreferenced blobs.
+
+        Blobs are deleted before the rows: rows whose blob delete failed are
+        kept (and retried on the next sweep, 404 counts as deleted), so a
+        committed purge never leaves orphaned blobs behind.
+
+        Returns:
+            Number of documents deleted
+        """
+        ids = [row.id for row in chunk]
+        blob_names = list(dict.fromkeys(row.blob_name for row in chunk))
+
+        # Blobs still referenced by rows outside the chunk (deduplicated copies) stay
+        still_referenced = set(
+            (
+                await db.execute(
+                    select(DocumentMetadata.blob_name)
+                    .where(DocumentMetadata.blob_name.in_(blob_names))
+                    .where(DocumentMetadata.id.notin_(ids))
+                    .distinct()
+                )
+            ).scalars().all()
+        )
+        orphaned = [name for name in blob_names if name not in still_referenced]
+
+        failed: set[str] = set()
+        if orphaned:
+            deleted = await self.storage_client.delete_blobs_batch(orphaned)
+            failed = set(orphaned) - set(deleted)
+            if failed:
+                logger.warning(
+                    f"{len(failed)} of {len(orphaned)} blob deletes failed, keeping their documents"
+                )
+            orphaned = [name for name in orphaned if name not in failed]
+
+        rows = [row for row in chunk if row.blob_name not in failed]
+        if not rows:
+            return 0
+
+        # Release content references still held by live documents
+        releases: dict[tuple[str, str, str], int] = {}
+        for row in rows:
+            if not row.is_deleted and row.sha256_hash:
+                key = (row.citizen_id, row.sha256_hash, row.blob_name)
+                releases[key] = releases.get(key, 0) + 1
+        if releases:
+            released = values(
+                column("citizen_id", String),
+                column("sha256_hash", String),
+                column("blob_name", String),
+                column("n", Integer),
+                name="released",
+            ).data([(*key, n) for key, n in releases.items()])
+            await db.execute(
+                update(ContentBlob)
+                .where(ContentBlob.citizen_id == released.c.citizen_id)
+                .where(ContentBlob.sha256_hash == released.c.sha256_hash)
+                .where(ContentBlob.blob_name == released.c.blob_name)
+                .values(ref_count=func.greatest(ContentBlob.ref_count - released.c.n, 0))
+            )
+
+        await db.execute(delete(DocumentMetadata).where(DocumentMetadata.id.in_([row.id for row in rows])))
+
+        if orphaned:
+            await db.execute(
+                delete(ContentBlob)
+                .where(ContentBlob.blob_name.in_(orphaned))
+                .where(ContentBlob.ref_count == 0)
+            )
+        return len(rows)
+
+    # ------------------------------------------------------------------
+    # WORM tags
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def worm_tags(state: str, retention_until: Optional[date], hub_signature_ref: Optional[str]) -> dict[str, str]:
+        """Blob index tags recorded for a WORM-locked document."""
+        tags = {
+            "state": state,
+            "worm": "true",
+            "retentionUntil": retention_until.isoformat() if retention_until else "",
+            "hubRef": hub_signature_ref or "",
+        }
+        return {key: _TAG_VALUE_INVALID.sub("_", value)[:256] for key, value in tags.items()}
+
+    async def apply_worm_tags(self) -> int:
+        """Tag blobs of WORM-locked documents whose tags are still pending.
+
+        Returns:
+            Number of documents tagged
+        """
+        tagged = 0
+        semaphore = asyncio.Semaphore(self.tag_concurrency)
+        cursor: Optional[tuple[datetime, str]] = None
+
+        async def tag(row: Any) -> Optional[str]:
+            async with semaphore:
+                try:
+                    await self.storage_client.set_blob_tags(
+                        row.blob_name,
+                        self.worm_tags(row.state, row.retention_until, row.hub_signature_ref),
+                    )
+                    return row.id
+                except Exception as e:
+                    logger.warning(f"Failed to tag WORM blob {row.blob_name}: {e}")
+                    return None
+
+        while True:
+            query = (
+                select(
+                    DocumentMetadata.id,
+                    DocumentMetadata.created_at,
+                    DocumentMetadata.blob_name,
+                    DocumentMetadata.state,
+                    DocumentMetadata.retention_until,
+                    DocumentMetadata.hub_signature_ref,
+                )
+                .where(DocumentMetadata.worm_locked == True)
+                .where(DocumentMetadata.worm_tags_applied == False)
+                .order_by(DocumentMetadata.created_at, DocumentMetadata.id)
+                .limit(self.batch_size)
+            )
+            if cursor is not None:
+                query = query.where(
+                    tuple_(DocumentMetadata.created_at, DocumentMetadata.id) > tuple_(*cursor)
+                )
+
+            async with self.session_factory() as db:
+                chunk = list((await db.execute(query)).all())
+                if not chunk:
+                    return tagged
+                cursor = (chunk[-1].created_at, chunk[-1].id)
+
+                done = [doc_id for doc_id in await asyncio.gather(*(tag(row) for row in chunk)) if doc_id]
+                if done:
+                    await db.execute(
+                        update(DocumentMetadata)
+                        .where(DocumentMetadata.id.in_(done))
+                        .values(worm_tags_applied=True)
+                    )
+                    await db.commit()
+                tagged += len(done)
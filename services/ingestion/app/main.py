@@ -1,5 +1,6 @@
 """Ingestion Service - Main application."""
 
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 from typing import AsyncIterator
@@ -7,8 +8,11 @@ from typing import AsyncIterator
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.database import engine, init_db, test_connection, get_database_info
-from app.routers import documents
+from app.database import AsyncSessionLocal, engine, init_db, test_connection, get_database_info
+from app.block_upload import close_http_client
+from app.body_limit import ContentLengthLimitMiddleware
+from app.lifecycle_sweeper import LifecycleSweeper
+from app.routers import documents, integrity, upload_sessions
 from app.config import get_config
 
 # Get configuration
@@ -42,9 +46,72 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     # Initialize database
     await init_db()
     
+    # Open the async Blob client pool, warm the SAS signing key and keep it refreshed
+    try:
+        await documents.storage_client.start()
+    except Exception as e:
+        logger.warning(f"Could not start Azure Blob client: {e}")
+    
+    # Resume integrity scrubbing jobs interrupted by a restart
+    scrubber = integrity.integrity_scrubber
+    worm_scrub_task = None
+    try:
+        await scrubber.resume_stale_jobs()
+        if config.worm_scrub_enabled:
+            worm_scrub_task = asyncio.create_task(
+                scrubber.run_worm_scrub_forever(config.worm_scrub_interval_seconds)
+            )
+    except Exception as e:
+        logger.warning(f"Integrity scrubber not started: {e}")
+    
+    # Keep the dashboard folder summaries up to date
+    folder_summary = documents.folder_summary
+    reconcile_task = None
+    if config.folder_summary_consumers_enabled and config.servicebus_enabled and config.servicebus_connection_string:
+        try:
+            await folder_summary.start_consumers(config.servicebus_connection_string)
+        except Exception as e:
+            logger.warning(f"Folder summary consumers not started: {e}")
+    if config.folder_summary_reconcile_interval_seconds > 0:
+        reconcile_task = asyncio.create_task(
+            folder_summary.run_reconcile_forever(config.folder_summary_reconcile_interval_seconds)
+        )
+    
+    # Publish committed outbox events to Service Bus
+    outbox_task = None
+    if documents.service_bus_publisher.enabled:
+        outbox_task = asyncio.create_task(documents.outbox_relay.run_forever())
+    
+    # Retention purge, lifecycle tiering and WORM blob tags
+    lifecycle_task = None
+    if config.lifecycle_sweep_enabled:
+        sweeper = LifecycleSweeper(
+            session_factory=AsyncSessionLocal,
+            storage_client=documents.storage_client,
+            batch_size=config.lifecycle_batch_size,
+            cool_after_days=config.lifecycle_cool_after_days,
+            archive_after_days=config.lifecycle_archive_after_days,
+            unsigned_retention_days=config.unsigned_retention_days,
+        )
+        lifecycle_task = asyncio.create_task(
+            sweeper.run_forever(config.lifecycle_sweep_interval_seconds)
+        )
+    
     yield
     
     # Cleanup
+    if outbox_task:
+        outbox_task.cancel()
+    if lifecycle_task:
+        lifecycle_task.cancel()
+    if reconcile_task:
+        reconcile_task.cancel()
+    await folder_summary.shutdown()
+    if worm_scrub_task:
+        worm_scrub_task.cancel()
+    await scrubber.shutdown()
+    await documents.storage_client.close()
+    await close_http_client()
     await engine.dispose()
     logger.info("Shutting down Ingestion Service...")
 
@@ -59,6 +126,13 @@ def create_app() -> FastAPI:
         debug=config.debug,
     )
 
+    # Refuse oversized direct uploads before the multipart form is parsed
+    # (added first so CORS headers still wrap the 413)
+    app.add_middleware(
+        ContentLengthLimitMiddleware,
+        limits={"/api/documents/upload-direct": config.max_file_size + documents.MULTIPART_OVERHEAD_BYTES},
+    )
+
     # CORS configuration
     if COMMON_AVAILABLE:
         setup_cors(app)
@@ -70,10 +144,15 @@ def create_app() -> FastAPI:
             allow_credentials=True,
             allow_methods=["GET", "POST", "PUT", "DELETE", "PATCH"],
             allow_headers=["Content-Type", "Authorization", "X-Request-ID", "X-Trace-ID"],
+            expose_headers=["X-Next-Cursor"],
         )
 
     # Routers
+    app.include_router(
+        upload_sessions.router, prefix="/api/documents/upload-sessions", tags=["upload-sessions"]
+    )
     app.include_router(documents.router, prefix="/api/documents", tags=["documents"])
+    app.include_router(integrity.router, prefix="/api/integrity", tags=["integrity"])
 
     @app.get("/health")
     async def health() -> dict[str, str]:
@@ -2,7 +2,8 @@
 
 from datetime import date, datetime
 
-from sqlalchemy import Boolean, Date, DateTime, Integer, String, Text
+from sqlalchemy import BigInteger, Boolean, Date, DateTime, Integer, String, Text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 
@@ -77,6 +78,11 @@ class DocumentMetadata(Base):
         default="Hot",  # Hot (0-90d) | Cool (90-365d) | Archive (365d+)
         index=True
     )
+    worm_tags_applied: Mapped[bool] = mapped_column(
+        Boolean,
+        nullable=False,
+        default=False  # True once the WORM index tags are set on the blob
+    )
     
     # Metadata
     description: Mapped[str] = mapped_column(Text, nullable=True)
@@ -96,3 +102,163 @@ class DocumentMetadata(Base):
     )
     is_deleted: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
 
+
+
+class IntegrityScrubJob(Base):
+    """Bulk integrity scrubbing job with resumable keyset checkpoint."""
+
+    __tablename__ = "integrity_scrub_jobs"
+
+    id: Mapped[str] = mapped_column(String(255), primary_key=True)
+    status: Mapped[str] = mapped_column(
+        String(20),
+        nullable=False,
+        default="running",  # running | completed | failed | cancelled
+        index=True
+    )
+
+    # Scope (all optional: no filter = whole table)
+    citizen_id: Mapped[str | None] = mapped_column(String(20), nullable=True)
+    created_from: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    created_to: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    worm_only: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+
+    # Keyset checkpoint: last (created_at, id) fully verified
+    last_created_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    last_document_id: Mapped[str | None] = mapped_column(String(255), nullable=True)
+
+    # Progress counters
+    documents_checked: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    mismatches_found: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    bytes_verified: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    # Pod currently running the job (used to resume stale jobs after restart)
+    owner: Mapped[str | None] = mapped_column(String(255), nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        nullable=False,
+        default=datetime.utcnow
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        nullable=False,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow
+    )
+    completed_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+
+class IntegrityScrubResult(Base):
+    """Integrity mismatch (or verification error) found by a scrubbing job."""
+
+    __tablename__ = "integrity_scrub_results"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    job_id: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
+    document_id: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
+    citizen_id: Mapped[str] = mapped_column(String(20), nullable=False)
+    blob_name: Mapped[str] = mapped_column(String(500), nullable=False)
+    expected_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    actual_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    expected_size: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    actual_size: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    checked_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        nullable=False,
+        default=datetime.utcnow
+    )
+
+
+class CitizenFolderSummary(Base):
+    """Per-citizen folder counters (read model for the dashboard).
+
+    Maintained incrementally from document/transfer events and periodically
+    reconciled against document_metadata and transfers.
+    """
+
+    __tablename__ = "citizen_folder_summary"
+
+    citizen_id: Mapped[str] = mapped_column(String(20), primary_key=True)
+    total_documents: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    signed_documents: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    worm_locked_documents: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    total_bytes: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    pending_transfers: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        nullable=False,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow
+    )
+
+
+class FolderSummaryEvent(Base):
+    """Event already applied to citizen_folder_summary (at-least-once dedupe)."""
+
+    __tablename__ = "citizen_folder_summary_events"
+
+    event_key: Mapped[str] = mapped_column(String(300), primary_key=True)
+    citizen_id: Mapped[str] = mapped_column(String(20), nullable=False)
+    applied_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        nullable=False,
+        default=datetime.utcnow,
+        index=True
+    )
+
+
+class ContentBlob(Base):
+    """Content-addressed blob shared by a citizen's identical documents.
+
+    Keyed on (citizen_id, sha256_hash); ``ref_count`` counts the live
+    document_metadata rows whose blob_name points at ``blob_name``.
+    """
+
+    __tablename__ = "content_blobs"
+
+    citizen_id: Mapped[str] = mapped_column(String(20), primary_key=True)
+    sha256_hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    blob_name: Mapped[str] = mapped_column(String(500), nullable=False, unique=True)
+    size_bytes: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    content_type: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    ref_count: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        nullable=False,
+        default=datetime.utcnow
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        nullable=False,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow
+    )
+
+
+class OutboxEvent(Base):
+    """Domain event written in the same transaction as the change it describes.
+
+    Drained by ``OutboxRelay`` and published to Service Bus; ``sent_at`` is set
+    once the broker accepted the message, ``dead_at`` once it gave up on it.
+    """
+
+    __tablename__ = "outbox"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    event_type: Mapped[str] = mapped_column(String(100), nullable=False)
+    document_id: Mapped[str] = mapped_column(String(255), nullable=False)
+    citizen_id: Mapped[str] = mapped_column(String(20), nullable=False)
+    payload: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        nullable=False,
+        default=datetime.utcnow
+    )
+    sent_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    # Set when the row ran out of publish attempts; the relay skips it
+    dead_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
@@ -0,0 +1,270 @@
+"""Transactional outbox for document events.
+
+Write paths add an ``outbox`` row in the same transaction as their
+``document_metadata`` change instead of awaiting Service Bus after the
+commit. ``OutboxRelay`` drains unsent rows in batches (``FOR UPDATE SKIP
+LOCKED``, so every pod can run a relay), publishes them as Service Bus message
+batches and marks them sent. Delivery is at-least-once: a relay that dies
+after publishing but before committing ``sent_at`` republishes the batch, with
+the same message IDs (``outbox-{id}``) so duplicate detection can drop them;
+consumers are idempotent (see ``folder_summary``).
+
+A batch the broker rejects is retried row by row over one connection, so one
+bad event does not hold back the rest. Only rows rejected while others of the
+same batch go through count an attempt; if nothing goes through the broker is
+treated as unavailable and the relay backs off without touching the rows. A
+row rejected ``max_attempts`` times is parked (``dead_at``) for an operator to
+inspect and replay (``replay_dead``).
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from sqlalchemy import case, delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.models import OutboxEvent
+from app.service_bus import ServiceBusEventPublisher, service_bus_publisher
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxPublishError(Exception):
+    """Raised when a relayed batch could not be published."""
+    pass
+
+
+def add_event(db: AsyncSession, event: dict[str, Any], document_id: str, citizen_id: str) -> None:
+    """Stage an event in the caller's transaction (no-op without Service Bus)."""
+    if not service_bus_publisher.enabled:
+        return
+    db.add(
+        OutboxEvent(
+            event_type=event["event_type"],
+            document_id=document_id,
+            citizen_id=citizen_id,
+            payload=event,
+        )
+    )
+
+
+def add_document_uploaded(
+    db: AsyncSession,
+    document_id: str,
+    citizen_id: str,
+    filename: str,
+    content_type: str,
+    blob_name: str,
+    size_bytes: Optional[int] = None,
+) -> None:
+    """Stage a document.uploaded event in the caller's transaction."""
+    event = ServiceBusEventPublisher.document_uploaded_event(
+        document_id, citizen_id, filename, content_type, blob_name, size_bytes
+    )
+    add_event(db, event, document_id, citizen_id)
+
+
+def add_document_deleted(db: AsyncSession, document_id: str, citizen_id: str) -> None:
+    """Stage a document.deleted event in the caller's transaction."""
+    add_event(db, ServiceBusEventPublisher.document_deleted_event(document_id, citizen_id), document_id, citizen_id)
+
+
+class OutboxRelay:
+    """Publish outbox rows to Service Bus.
+
+    Features:
+    - Batches of ``batch_size`` rows claimed with FOR UPDATE SKIP LOCKED
+    - One Service Bus message batch per claimed batch
+    - Woken right after a commit (``notify``), polls otherwise
+    - Exponential backoff while the broker is unavailable (no attempts counted)
+    - Rejected batches retried row by row; rows parked after ``max_attempts``
+      rejections, replayable with ``replay_dead``
+    - Delivered rows purged after ``sent_retention_hours``
+    """
+
+    def __init__(
+        self,
+        session_factory: sessionmaker,
+        publisher: ServiceBusEventPublisher,
+        batch_size: int = 100,
+        poll_interval_seconds: float = 1.0,
+        max_backoff_seconds: float = 60.0,
+        sent_retention_hours: int = 24,
+        max_attempts: int = 20,
+    ):
+        """Initialize relay.
+
+        Args:
+            session_factory: Async session factory
+            publisher: Service Bus publisher
+            batch_size: Rows claimed and published per batch
+            poll_interval_seconds: Idle wait between scans when not notified
+            max_backoff_seconds: Longest wait after consecutive publish failures
+            sent_retention_hours: How long delivered rows are kept
+            max_attempts: Rejected publishes before a row is parked as dead
+        """
+        self.session_factory = session_factory
+        self.publisher = publisher
+        self.batch_size = batch_size
+        self.poll_interval_seconds = poll_interval_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.sent_retention_hours = sent_retention_hours
+        self.max_attempts = max_attempts
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def notify(self) -> None:
+        """Wake the relay after committing outbox rows."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def relay_once(self) -> int:
+        """Claim, publish and mark one batch.
+
+        Returns:
+            Number of events published (0 if the outbox is empty)
+
+        Raises:
+            OutboxPublishError: If some rows could not be published. Rows
+                the broker rejected while others went through have their
+                attempt counters updated (parked once out of attempts); if
+                nothing went through, no row is touched.
+        """
+        async with self.session_factory() as db:
+            async with db.begin():
+                rows = (
+                    await db.execute(
+                        select(OutboxEvent)
+                        .where(OutboxEvent.sent_at.is_(None))
+                        .where(OutboxEvent.dead_at.is_(None))
+                        .order_by(OutboxEvent.id)
+                        .limit(self.batch_size)
+                        .with_for_update(skip_locked=True)
+                    )
+                ).scalars().all()
+                if not rows:
+                    return 0
+
+                messages = [self._message(row) for row in rows]
+                if await self.publisher.publish_outbox_events(messages):
+                    sent, failed = [row.id for row in rows], []
+                else:
+                    # Isolate the row(s) the broker rejects from the rest of the batch
+                    results = await self.publisher.publish_outbox_events_each(messages) if len(rows) > 1 else [False]
+                    sent = [row.id for row, published in zip(rows, results) if published]
+                    failed = [row.id for row, published in zip(rows, results) if not published]
+                    if not sent:
+                        # Broker unavailable (or every row rejected): not the rows' fault
+                        raise OutboxPublishError(f"Could not publish any of {len(rows)} outbox events")
+
+                if sent:
+                    await db.execute(
+                        update(OutboxEvent)
+                        .where(OutboxEvent.id.in_(sent))
+                        .values(sent_at=datetime.utcnow())
+                    )
+                if failed:
+                    dead = (
+                        await db.execute(
+                            update(OutboxEvent)
+                            .where(OutboxEvent.id.in_(failed))
+                            .values(
+                                attempts=OutboxEvent.attempts + 1,
+                                last_error="publish failed",
+                                dead_at=case(
+                                    (OutboxEvent.attempts + 1 >= self.max_attempts, datetime.utcnow()),
+                                    else_=None,
+                                ),
+                            )
+                            .returning(OutboxEvent.id, OutboxEvent.dead_at)
+                        )
+                    ).all()
+
+        if sent:
+            logger.info(f"Relayed {len(sent)} outbox events")
+        if failed:
+            parked = [row.id for row in dead if row.dead_at is not None]
+            if parked:
+                logger.error(f"Parked outbox events {parked} after {self.max_attempts} failed publishes")
+            raise OutboxPublishError(f"Could not publish {len(failed)} outbox events")
+
+        return len(sent)
+
+    @staticmethod
+    def _message(row: OutboxEvent) -> tuple[dict[str, Any], str, str, str]:
+        return row.payload, row.document_id, row.citizen_id, f"outbox-{row.id}"
+
+    async def replay_dead(self, event_ids: Optional[list[int]] = None) -> int:
+        """Return parked rows (all, or ``event_ids``) to the relay with fresh attempts.
+
+        Returns:
+            Number of rows requeued
+        """
+        query = (
+            update(OutboxEvent)
+            .where(OutboxEvent.dead_at.is_not(None))
+            .where(OutboxEvent.sent_at.is_(None))
+            .values(dead_at=None, attempts=0)
+            .returning(OutboxEvent.id)
+        )
+        if event_ids is not None:
+            query = query.where(OutboxEvent.id.in_(event_ids))
+
+        async with self.session_factory() as db:
+            async with db.begin():
+                replayed = (await db.execute(query)).scalars().all()
+
+        if replayed:
+            logger.info(f"Replaying {len(replayed)} parked outbox events")
+            self.notify()
+        return len(replayed)
+
+    async def purge_sent(self) -> int:
+        """Delete delivered rows older than the retention window."""
+        cutoff = datetime.utcnow() - timedelta(hours=self.sent_retention_hours)
+        async with self.session_factory() as db:
+            async with db.begin():
+                result = await db.execute(
+                    delete(OutboxEvent)
+                    .where(OutboxEvent.sent_at.is_not(None))
+                    .where(OutboxEvent.sent_at < cutoff)
+                )
+        return result.rowcount or 0
+
+    async def run_forever(self, purge_interval_seconds: int = 3600) -> None:
+        """Drain the outbox until cancelled."""
+        self._wakeup = asyncio.Event()
+        backoff = self.poll_interval_seconds
+        last_purge = datetime.utcnow()
+        logger.info(f"Outbox relay started (batch size {self.batch_size})")
+
+        while True:
+            # Cleared before scanning so a commit during the scan still wakes us
+            self._wakeup.clear()
+            try:
+                published = await self.relay_once()
+                backoff = self.poll_interval_seconds
+                if published == self.batch_size:
+                    continue  # more rows are probably waiting
+
+                if (datetime.utcnow() - last_purge).total_seconds() >= purge_interval_seconds:
+                    purged = await self.purge_sent()
+                    last_purge = datetime.utcnow()
+                    if purged:
+                        logger.info(f"Purged {purged} delivered outbox events")
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Outbox relay error: {e}")
+                # Broker or database down: back off instead of reacting to notify()
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.max_backoff_seconds)
+                continue
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
@@ -1,21 +1,33 @@
 """Documents API router - Updated for Azure."""
 
+import base64
+import json
 import logging
+from datetime import datetime
 from typing import Annotated
+from uuid import uuid4
 
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status, UploadFile, File, Form
+from sqlalchemy import insert, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.database import AsyncSessionLocal, get_db
 from app.models import DocumentMetadata
 from app.schemas import (
+    BatchUploadURLRequest,
+    BatchUploadURLResponse,
     DownloadURLRequest,
     DownloadURLResponse,
+    OutboxReplayRequest,
     UploadURLRequest,
     UploadURLResponse,
 )
 from app.service_bus import service_bus_publisher
 from app.hash_verification import HashVerificationService
+from app.block_upload import BlockBlobStreamUploader, UploadTooLargeError, get_http_client
+from app.folder_summary import FolderSummaryProjector
+from app.outbox import OutboxRelay
+from app import content_store, outbox
 from app.config import get_config
 
 logger = logging.getLogger(__name__)
@@ -24,6 +36,10 @@ router = APIRouter()
 # Get configuration
 config = get_config()
 
+# Allowance for everything but the file in an /upload-direct multipart body
+# (boundaries, part headers, form fields), used by the Content-Length pre-check
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
 # Azure Blob Storage client
 from app.azure_storage import AzureBlobDocumentClient
 
@@ -33,6 +49,24 @@ storage_client = AzureBlobDocumentClient(
     container_name=config.azure_storage_container_name,
     connection_string=config.azure_storage_connection_string,
     sas_ttl_minutes=config.azure_storage_sas_ttl_minutes,
+    pool_size=config.azure_storage_pool_size,
+)
+
+# Relays document events committed to the outbox to Service Bus
+outbox_relay = OutboxRelay(
+    session_factory=AsyncSessionLocal,
+    publisher=service_bus_publisher,
+    batch_size=config.outbox_relay_batch_size,
+    poll_interval_seconds=config.outbox_relay_poll_interval_seconds,
+    sent_retention_hours=config.outbox_sent_retention_hours,
+    max_attempts=config.outbox_relay_max_attempts,
+)
+
+# Dashboard stats read model
+folder_summary = FolderSummaryProjector(
+    session_factory=AsyncSessionLocal,
+    cache_enabled=config.folder_summary_cache_enabled,
+    cache_ttl_seconds=config.folder_summary_cache_ttl_seconds,
 )
 
 
@@ -44,6 +78,9 @@ async def get_upload_url(
     """Get presigned URL for uploading a document.
 
     The frontend will use this URL to upload directly to Azure Blob Storage using PUT.
+    If the request carries the file's SHA-256 and the citizen already stored that
+    content, no URL is issued: a new document referencing the existing blob is
+    created and ``already_present`` is returned.
     """
     logger.info(
         f"Generating upload URL for citizen {request.citizen_id}, "
@@ -51,6 +88,13 @@ async def get_upload_url(
     )
 
     try:
+        if request.sha256:
+            existing = await content_store.acquire_existing(
+                db, request.citizen_id, request.sha256, request.size_bytes
+            )
+            if existing:
+                return await _create_deduplicated_document(db, request, existing)
+
         # Use default TTL from storage_client (SAS_TTL_MINUTES from ConfigMap)
         result = storage_client.generate_presigned_put(
             citizen_id=request.citizen_id,
@@ -75,13 +119,10 @@ async def get_upload_url(
         )
         
         db.add(metadata)
-        await db.commit()
-        await db.refresh(metadata)
         
-        logger.info(f"Document metadata stored: {metadata.id}")
-        
-        # Publish event to Service Bus for async processing
-        await service_bus_publisher.publish_document_uploaded(
+        # Event for async processing, committed atomically with the metadata
+        outbox.add_document_uploaded(
+            db,
             document_id=result["document_id"],
             citizen_id=str(request.citizen_id),
             filename=request.filename,
@@ -89,6 +130,11 @@ async def get_upload_url(
             blob_name=key,
             size_bytes=None  # Size will be available after upload
         )
+        await db.commit()
+        await db.refresh(metadata)
+        outbox_relay.notify()
+        
+        logger.info(f"Document metadata stored: {metadata.id}")
 
         # Return TTL in seconds (SAS_TTL_MINUTES * 60)
         sas_ttl_minutes = config.azure_storage_sas_ttl_minutes
@@ -108,6 +154,176 @@ async def get_upload_url(
         )
 
 
+async def _create_deduplicated_document(
+    db: AsyncSession,
+    request: UploadURLRequest,
+    content: content_store.ContentRef,
+) -> UploadURLResponse:
+    """Create a document that references already-stored content."""
+    document_id = str(uuid4())
+
+    metadata = DocumentMetadata(
+        id=document_id,
+        citizen_id=request.citizen_id,
+        title=request.title,
+        filename=request.filename,
+        content_type=request.content_type,
+        blob_name=content.blob_name,
+        storage_provider="azure",
+        status="uploaded",
+        is_uploaded=True,
+        sha256_hash=request.sha256,
+        size_bytes=content.size_bytes,
+        description=request.description,
+    )
+
+    db.add(metadata)
+    outbox.add_document_uploaded(
+        db,
+        document_id=document_id,
+        citizen_id=str(request.citizen_id),
+        filename=request.filename,
+        content_type=request.content_type,
+        blob_name=content.blob_name,
+        size_bytes=content.size_bytes
+    )
+    await db.commit()
+    outbox_relay.notify()
+
+    logger.info(
+        f"Document {document_id} deduplicated onto {content.blob_name} "
+        f"({content.ref_count} references)"
+    )
+
+    return UploadURLResponse(
+        upload_url=None,
+        document_id=document_id,
+        blob_name=content.blob_name,
+        expires_in=0,
+        already_present=True,
+    )
+
+
+async def _adopt_content_blob(
+    db: AsyncSession,
+    metadata: DocumentMetadata,
+) -> str | None:
+    """Register a verified upload as content; point duplicates at the canonical blob.
+
+    Returns:
+        The now-redundant blob to delete after commit, if any
+    """
+    content = await content_store.register(
+        db,
+        metadata.citizen_id,
+        metadata.sha256_hash,
+        metadata.blob_name,
+        metadata.size_bytes,
+        metadata.content_type,
+    )
+    if content.blob_name == metadata.blob_name:
+        # Our upload took over an unreferenced row: its old copy is redundant
+        return content.replaced_blob_name
+
+    duplicate_blob = metadata.blob_name
+    metadata.blob_name = content.blob_name
+    logger.info(f"Document {metadata.id} deduplicated onto {content.blob_name}")
+    return duplicate_blob
+
+
+async def _discard_blob(blob_name: str | None) -> None:
+    """Best-effort delete of a redundant duplicate (or replaced) content blob."""
+    if not blob_name:
+        return
+    try:
+        await storage_client.delete_blob(blob_name)
+    except Exception as e:
+        logger.warning(f"Could not delete duplicate blob {blob_name}: {e}")
+
+
+@router.post("/upload-urls", response_model=BatchUploadURLResponse)
+async def get_upload_urls(
+    request: BatchUploadURLRequest,
+    db: Annotated[AsyncSession, Depends(get_db)],
+) -> BatchUploadURLResponse:
+    """Get presigned URLs for uploading many documents at once.
+
+    All SAS URLs are minted in memory, the metadata rows are inserted with a
+    single statement in one transaction, and the document.uploaded events are
+    published as Service Bus message batches.
+    """
+    logger.info(
+        f"Generating {len(request.files)} upload URLs for citizen {request.citizen_id}"
+    )
+
+    try:
+        sas_results = [
+            storage_client.generate_presigned_put(
+                citizen_id=request.citizen_id,
+                filename=file.filename,
+                content_type=file.content_type,
+            )
+            for file in request.files
+        ]
+
+        now = datetime.utcnow()
+        rows = [
+            {
+                "id": result["document_id"],
+                "citizen_id": request.citizen_id,
+                "title": file.title,
+                "filename": file.filename,
+                "content_type": file.content_type,
+                "blob_name": result["blob_name"],
+                "storage_provider": "azure",
+                "status": "pending",
+                "description": file.description,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for file, result in zip(request.files, sas_results)
+        ]
+
+        # One multi-row INSERT, one transaction
+        await db.execute(insert(DocumentMetadata), rows)
+        for row in rows:
+            outbox.add_document_uploaded(
+                db,
+                document_id=row["id"],
+                citizen_id=str(request.citizen_id),
+                filename=row["filename"],
+                content_type=row["content_type"],
+                blob_name=row["blob_name"],
+                size_bytes=None,  # Size will be available after upload
+            )
+        await db.commit()
+        outbox_relay.notify()
+
+        logger.info(f"Stored {len(rows)} document metadata rows for citizen {request.citizen_id}")
+
+        expires_in = config.azure_storage_sas_ttl_minutes * 60
+
+        return BatchUploadURLResponse(
+            items=[
+                UploadURLResponse(
+                    upload_url=result["upload_url"],
+                    document_id=result["document_id"],
+                    blob_name=result["blob_name"],
+                    expires_in=expires_in,
+                )
+                for result in sas_results
+            ]
+        )
+
+    except Exception as e:
+        logger.error(f"Error generating batch upload URLs: {e}")
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to generate upload URLs",
+        )
+
+
 @router.post("/upload-direct")
 async def upload_document_direct(
     db: Annotated[AsyncSession, Depends(get_db)],
@@ -116,14 +332,16 @@ async def upload_document_direct(
     title: str = Form(...),
     description: str = Form(""),
 ) -> dict:
-    """Upload document directly through backend to avoid CORS issues."""
+    """Upload document directly through backend to avoid CORS issues.
+
+    The file is streamed to Azure in fixed-size blocks (Put Block / Put Block List)
+    and hashed incrementally, so memory usage does not grow with the file size.
+    Clearly oversized bodies are refused by ``ContentLengthLimitMiddleware``
+    before the form is parsed; the exact file limit is enforced while streaming.
+    """
     logger.info(f"Direct upload for citizen {citizen_id}, file: {file.filename}")
-    
+
     try:
-        # Read file content
-        content = await file.read()
-        file_size = len(content)
-        
         # Generate a SAS PUT URL for this blob and upload server-side to avoid CORS and Auth issues
         sas_result = storage_client.generate_presigned_put(
             citizen_id=int(citizen_id) if isinstance(citizen_id, str) and citizen_id.isdigit() else citizen_id,  # handle str/int
@@ -135,20 +353,20 @@ async def upload_document_direct(
         doc_id = sas_result["document_id"]
         blob_name = sas_result["blob_name"]
 
-        # Perform HTTP PUT to Azure Blob Storage with required headers
-        import httpx
-        headers = {
-            "Content-Type": file.content_type or "application/octet-stream",
-            "x-ms-blob-type": "BlockBlob",
-        }
-        async with httpx.AsyncClient(timeout=None) as client:
-            put_resp = await client.put(upload_url, content=content, headers=headers)
-            if put_resp.status_code >= 400:
-                raise RuntimeError(f"Azure PUT failed: {put_resp.status_code} {put_resp.text}")
-        
-        # Calculate SHA-256 hash
-        import hashlib
-        sha256_hash = hashlib.sha256(content).hexdigest()
+        # Stream file to Azure Blob Storage as blocks, hashing each chunk
+        uploader = BlockBlobStreamUploader(
+            get_http_client(),
+            chunk_size=config.upload_chunk_size,
+            max_concurrency=config.upload_max_concurrency,
+        )
+        upload_result = await uploader.upload(
+            upload_url,
+            file,
+            content_type=file.content_type or "application/octet-stream",
+            max_size=config.max_file_size,
+        )
+        sha256_hash = upload_result["sha256_hash"]
+        file_size = upload_result["size_bytes"]
         
         # Store metadata in database
         metadata = DocumentMetadata(
@@ -166,20 +384,22 @@ async def upload_document_direct(
         )
         
         db.add(metadata)
-        await db.commit()
-        await db.refresh(metadata)
-        
-        logger.info(f"Document uploaded directly: {doc_id}")
-        
-        # Publish event to Service Bus
-        await service_bus_publisher.publish_document_uploaded(
+        duplicate_blob = await _adopt_content_blob(db, metadata)
+        outbox.add_document_uploaded(
+            db,
             document_id=doc_id,
             citizen_id=citizen_id,
             filename=file.filename,
             content_type=file.content_type,
-            blob_name=blob_name,
+            blob_name=metadata.blob_name,
             size_bytes=file_size
         )
+        await db.commit()
+        await db.refresh(metadata)
+        outbox_relay.notify()
+        await _discard_blob(duplicate_blob)
+        
+        logger.info(f"Document uploaded directly: {doc_id}")
         
         return {
             "message": "Document uploaded successfully",
@@ -189,6 +409,12 @@ async def upload_document_direct(
             "sha256_hash": sha256_hash
         }
         
+    except UploadTooLargeError as e:
+        logger.warning(f"Direct upload rejected for citizen {citizen_id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e)
+        )
     except Exception as e:
         logger.error(f"Error in direct upload: {e}")
         raise HTTPException(
@@ -284,7 +510,7 @@ async def confirm_upload(
             )
         
         # Verify document integrity
-        hash_verifier = HashVerificationService(storage_client)
+        hash_verifier = HashVerificationService(storage_client, chunk_size=config.verify_chunk_size)
         integrity_result = await hash_verifier.verify_document_integrity(
             document_id=document_id,
             blob_name=metadata.blob_name,
@@ -300,18 +526,18 @@ async def confirm_upload(
             )
         
         # Update document status and hash
+        first_confirmation = metadata.sha256_hash is None
         metadata.sha256_hash = sha256
         metadata.status = "uploaded"
         if size:
             metadata.size_bytes = size
         
-        await db.commit()
-        await db.refresh(metadata)
-        
-        logger.info(f"Document {document_id} confirmed with hash {sha256[:16]}...")
+        duplicate_blob = None
+        if first_confirmation:
+            duplicate_blob = await _adopt_content_blob(db, metadata)
         
-        # Publish document uploaded event
-        await service_bus_publisher.publish_document_uploaded(
+        outbox.add_document_uploaded(
+            db,
             document_id=document_id,
             citizen_id=str(metadata.citizen_id),
             filename=metadata.filename,
@@ -319,6 +545,12 @@ async def confirm_upload(
             blob_name=metadata.blob_name,
             size_bytes=metadata.size_bytes
         )
+        await db.commit()
+        await db.refresh(metadata)
+        outbox_relay.notify()
+        await _discard_blob(duplicate_blob)
+        
+        logger.info(f"Document {document_id} confirmed with hash {sha256[:16]}...")
 
         return {
             "message": "Upload confirmed", 
@@ -338,38 +570,91 @@ async def confirm_upload(
         )
 
 
+def _encode_cursor(created_at: datetime, document_id: str) -> str:
+    """Encode a keyset cursor for document listing."""
+    raw = json.dumps([created_at.isoformat(), document_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, str]:
+    """Decode a keyset cursor produced by ``_encode_cursor``."""
+    try:
+        created_at, document_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(created_at), str(document_id)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
 @router.get("/")
 async def list_documents(
     citizen_id: str,
+    response: Response,
     db: Annotated[AsyncSession, Depends(get_db)],
+    limit: int | None = Query(None, ge=1, le=500),
+    cursor: str | None = None,
 ) -> list[dict]:
-    """List all documents for a citizen."""
+    """List documents for a citizen, newest first.
+
+    Without ``limit`` or ``cursor`` all documents are returned. Otherwise the
+    listing is keyset-paginated on ``(created_at, id)`` (``limit`` defaults
+    to 100): pass the ``X-Next-Cursor`` response header as ``cursor`` to get
+    the next page. Only the listed columns are selected (no ORM hydration),
+    served by the partial index ``idx_document_citizen_created``.
+    """
     logger.info(f"Listing documents for citizen {citizen_id}")
 
+    after = _decode_cursor(cursor) if cursor else None
+    if limit is None and after is not None:
+        limit = 100
+
     try:
-        from sqlalchemy import select
-        result = await db.execute(
-            select(DocumentMetadata)
+        query = (
+            select(
+                DocumentMetadata.id,
+                DocumentMetadata.title,
+                DocumentMetadata.filename,
+                DocumentMetadata.content_type,
+                DocumentMetadata.status,
+                DocumentMetadata.size_bytes,
+                DocumentMetadata.created_at,
+                DocumentMetadata.updated_at,
+            )
             .where(DocumentMetadata.citizen_id == citizen_id)
             .where(DocumentMetadata.is_deleted == False)
-            .order_by(DocumentMetadata.created_at.desc())
         )
-        documents = result.scalars().all()
+        if after:
+            query = query.where(
+                tuple_(DocumentMetadata.created_at, DocumentMetadata.id) < tuple_(*after)
+            )
+        query = query.order_by(
+            DocumentMetadata.created_at.desc(), DocumentMetadata.id.desc()
+        )
+        if limit is not None:
+            query = query.limit(limit + 1)
+
+        rows = (await db.execute(query)).all()
         
-        logger.info(f"Found {len(documents)} documents for citizen {citizen_id}")
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            response.headers["X-Next-Cursor"] = _encode_cursor(rows[-1].created_at, rows[-1].id)
+        
+        logger.info(f"Found {len(rows)} documents for citizen {citizen_id}")
         
         return [
             {
-                "id": doc.id,
-                "title": doc.title,
-                "filename": doc.filename,
-                "content_type": doc.content_type,
-                "status": doc.status,
-                "size_bytes": doc.size_bytes,
-                "created_at": doc.created_at.isoformat(),
-                "updated_at": doc.updated_at.isoformat(),
+                "id": row.id,
+                "title": row.title,
+                "filename": row.filename,
+                "content_type": row.content_type,
+                "status": row.status,
+                "size_bytes": row.size_bytes,
+                "created_at": row.created_at.isoformat(),
+                "updated_at": row.updated_at.isoformat(),
             }
-            for doc in documents
+            for row in rows
         ]
 
     except Exception as e:
@@ -383,37 +668,15 @@ async def get_document_stats(
     citizen_id: str,
     db: Annotated[AsyncSession, Depends(get_db)],
 ) -> dict:
-    """Get document statistics for dashboard."""
+    """Get document statistics for dashboard.
+
+    Served from the citizen_folder_summary read model: a single primary-key
+    lookup (optionally cached) instead of counting document_metadata.
+    """
     logger.info(f"Getting document stats for citizen {citizen_id}")
 
     try:
-        from sqlalchemy import select, func
-        from sqlalchemy.orm import aliased
-        
-        # Total documents
-        total_result = await db.execute(
-            select(func.count(DocumentMetadata.id))
-            .where(DocumentMetadata.citizen_id == citizen_id)
-            .where(DocumentMetadata.is_deleted == False)
-        )
-        total_documents = total_result.scalar() or 0
-        
-        # Signed documents (assuming status 'signed' means signed)
-        signed_result = await db.execute(
-            select(func.count(DocumentMetadata.id))
-            .where(DocumentMetadata.citizen_id == citizen_id)
-            .where(DocumentMetadata.status == "signed")
-            .where(DocumentMetadata.is_deleted == False)
-        )
-        signed_documents = signed_result.scalar() or 0
-        
-        # For now, return mock data for transfers
-        # Transfer service stats
-        return {
-            "totalDocuments": total_documents,
-            "signedDocuments": signed_documents,
-            "pendingTransfers": 0,
-        }
+        return await folder_summary.get_stats(db, citizen_id)
 
     except Exception as e:
         logger.error(f"Error getting document stats: {e}")
@@ -453,18 +716,15 @@ async def delete_document(
                 detail=f"Document {document_id} already deleted"
             )
         
-        # Soft delete
+        # Soft delete (the content blob is purged once no document references it)
         metadata.is_deleted = True
+        await content_store.release(db, citizen_id, metadata.sha256_hash, metadata.blob_name)
+        outbox.add_document_deleted(db, document_id=document_id, citizen_id=citizen_id)
         await db.commit()
+        outbox_relay.notify()
         
         logger.info(f"Document {document_id} soft deleted")
         
-        # Publish document deleted event
-        await service_bus_publisher.publish_document_deleted(
-            document_id=document_id,
-            citizen_id=citizen_id
-        )
-        
         return {"message": "Document deleted successfully", "document_id": document_id}
 
     except HTTPException:
@@ -511,7 +771,7 @@ async def verify_document_integrity(
             )
         
         # Verify document integrity
-        hash_verifier = HashVerificationService(storage_client)
+        hash_verifier = HashVerificationService(storage_client, chunk_size=config.verify_chunk_size)
         integrity_result = await hash_verifier.verify_document_integrity(
             document_id=document_id,
             blob_name=metadata.blob_name,
@@ -527,6 +787,7 @@ async def verify_document_integrity(
             "actual_hash": integrity_result.get("actual_hash"),
             "expected_hash": integrity_result.get("expected_hash"),
             "blob_size": integrity_result.get("blob_size"),
+            "stats": integrity_result.get("stats"),
             "error": integrity_result.get("error")
         }
 
@@ -540,6 +801,23 @@ async def verify_document_integrity(
         )
 
 
+@router.post("/outbox/replay")
+async def replay_outbox_events(request: OutboxReplayRequest) -> dict[str, int]:
+    """Requeue outbox events parked after repeated broker rejections."""
+    logger.info(f"Replaying parked outbox events: {request.event_ids or 'all'}")
+
+    try:
+        replayed = await outbox_relay.replay_dead(request.event_ids)
+        return {"replayed": replayed}
+
+    except Exception as e:
+        logger.error(f"Error replaying outbox events: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to replay outbox events",
+        )
+
+
 @router.get("/config")
 async def get_service_config() -> dict:
     """Get service configuration (debug only)."""
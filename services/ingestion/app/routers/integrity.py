@@ -0,0 +1,146 @@
+"""Integrity scrubbing API router."""
+
+import logging
+import socket
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_config
+from app.database import AsyncSessionLocal, get_db
+from app.integrity_scrubber import IntegrityScrubber
+from app.models import IntegrityScrubJob, IntegrityScrubResult
+from app.routers.documents import storage_client
+from app.schemas import IntegrityScrubJobResponse, IntegrityScrubRequest
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+# Get configuration
+config = get_config()
+
+integrity_scrubber = IntegrityScrubber(
+    session_factory=AsyncSessionLocal,
+    storage_client=storage_client,
+    owner=config.pod_name or socket.gethostname(),
+    workers=config.scrub_workers,
+    bytes_per_second=config.scrub_bytes_per_second,
+    page_size=config.scrub_page_size,
+    chunk_size=config.verify_chunk_size,
+    stale_after_seconds=config.scrub_stale_after_seconds,
+)
+
+
+def _job_response(job: IntegrityScrubJob) -> IntegrityScrubJobResponse:
+    """Build job status response."""
+    return IntegrityScrubJobResponse(
+        job_id=job.id,
+        status=job.status,
+        citizen_id=job.citizen_id,
+        created_from=job.created_from,
+        created_to=job.created_to,
+        worm_only=job.worm_only,
+        documents_checked=job.documents_checked,
+        mismatches_found=job.mismatches_found,
+        bytes_verified=job.bytes_verified,
+        last_created_at=job.last_created_at,
+        last_document_id=job.last_document_id,
+        error=job.error,
+        created_at=job.created_at,
+        updated_at=job.updated_at,
+        completed_at=job.completed_at,
+    )
+
+
+@router.post(
+    "/scrubs",
+    response_model=IntegrityScrubJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def start_integrity_scrub(request: IntegrityScrubRequest) -> IntegrityScrubJobResponse:
+    """Start a background integrity scrubbing job.
+
+    Scope is one citizen, a created_at range, WORM-locked documents only,
+    or (no filters) the whole document_metadata table.
+    """
+    logger.info(f"Starting integrity scrub: {request.model_dump()}")
+
+    try:
+        job = await integrity_scrubber.create_job(
+            citizen_id=request.citizen_id,
+            created_from=request.created_from,
+            created_to=request.created_to,
+            worm_only=request.worm_only,
+        )
+        return _job_response(job)
+
+    except Exception as e:
+        logger.error(f"Error starting integrity scrub: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to start integrity scrub",
+        )
+
+
+@router.get("/scrubs/{job_id}", response_model=IntegrityScrubJobResponse)
+async def get_integrity_scrub(
+    job_id: str,
+    db: Annotated[AsyncSession, Depends(get_db)],
+) -> IntegrityScrubJobResponse:
+    """Get progress of an integrity scrubbing job."""
+    job = await db.get(IntegrityScrubJob, job_id)
+
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Integrity scrub job {job_id} not found"
+        )
+
+    return _job_response(job)
+
+
+@router.post("/scrubs/{job_id}/cancel")
+async def cancel_integrity_scrub(job_id: str) -> dict[str, str]:
+    """Cancel a running integrity scrubbing job."""
+    if not await integrity_scrubber.cancel_job(job_id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Integrity scrub job {job_id} is not running"
+        )
+
+    return {"message": "Integrity scrub cancelled", "job_id": job_id}
+
+
+@router.get("/scrubs/{job_id}/mismatches")
+async def list_integrity_mismatches(
+    job_id: str,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    after_id: int = 0,
+    limit: int = 100,
+) -> list[dict]:
+    """List mismatches found by a job (keyset paginated by result id)."""
+    result = await db.execute(
+        select(IntegrityScrubResult)
+        .where(IntegrityScrubResult.job_id == job_id)
+        .where(IntegrityScrubResult.id > after_id)
+        .order_by(IntegrityScrubResult.id)
+        .limit(min(limit, 1000))
+    )
+
+    return [
+        {
+            "id": row.id,
+            "document_id": row.document_id,
+            "citizen_id": row.citizen_id,
+            "blob_name": row.blob_name,
+            "expected_hash": row.expected_hash,
+            "actual_hash": row.actual_hash,
+            "expected_size": row.expected_size,
+            "actual_size": row.actual_size,
+            "error": row.error,
+            "checked_at": row.checked_at.isoformat(),
+        }
+        for row in result.scalars().all()
+    ]
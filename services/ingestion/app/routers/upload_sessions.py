@@ -0,0 +1,225 @@
+"""Resumable upload sessions API router."""
+
+import logging
+from typing import Annotated, Any
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.block_upload import BlockBlobStreamUploader, get_http_client
+from app.config import get_config
+from app import outbox
+from app.database import get_db
+from app.models import DocumentMetadata
+from app.routers.documents import _adopt_content_blob, _discard_blob, outbox_relay, storage_client
+from app.schemas import (
+    ByteRange,
+    UploadSessionCommitResponse,
+    UploadSessionCreateRequest,
+    UploadSessionResponse,
+)
+from app.upload_sessions import (
+    UploadSessionError,
+    UploadSessionNotFoundError,
+    UploadSessionService,
+    UploadSessionUnavailableError,
+    missing_chunks,
+    received_ranges,
+)
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+# Get configuration
+config = get_config()
+
+upload_sessions = UploadSessionService(
+    storage_client=storage_client,
+    uploader=BlockBlobStreamUploader(get_http_client(), chunk_size=config.upload_chunk_size),
+    chunk_size=config.upload_chunk_size,
+    session_ttl_seconds=config.upload_session_ttl_seconds,
+    max_file_size=config.max_file_size,
+)
+
+
+def _session_response(state: dict[str, Any]) -> UploadSessionResponse:
+    """Build session status response."""
+    ranges = received_ranges(state)
+    return UploadSessionResponse(
+        session_id=state["session_id"],
+        document_id=state["document_id"],
+        size_bytes=state["size_bytes"],
+        chunk_size=state["chunk_size"],
+        total_chunks=state["total_chunks"],
+        received_bytes=sum(end - start for start, end in ranges),
+        received_ranges=[ByteRange(start=start, end=end) for start, end in ranges],
+        missing_chunks=missing_chunks(state),
+        expires_at=state["expires_at"],
+    )
+
+
+def _commit_response(metadata: DocumentMetadata) -> UploadSessionCommitResponse:
+    """Build commit response for the recorded document."""
+    return UploadSessionCommitResponse(
+        message="Document uploaded successfully",
+        document_id=metadata.id,
+        filename=metadata.filename,
+        size_bytes=metadata.size_bytes,
+        sha256_hash=metadata.sha256_hash,
+    )
+
+
+def _http_error(e: Exception) -> HTTPException:
+    """Map session errors to HTTP errors."""
+    if isinstance(e, UploadSessionError):
+        return HTTPException(status_code=e.status_code, detail=str(e))
+    if isinstance(e, UploadSessionUnavailableError):
+        return HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    return HTTPException(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        detail=f"Upload session operation failed: {str(e)}",
+    )
+
+
+async def _read_chunk(request: Request, limit: int) -> bytes:
+    """Read the request body, refusing more than ``limit`` bytes."""
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > limit:
+        raise UploadSessionError(f"Chunk exceeds {limit} bytes", status_code=413)
+
+    data = bytearray()
+    async for part in request.stream():
+        data.extend(part)
+        if len(data) > limit:
+            raise UploadSessionError(f"Chunk exceeds {limit} bytes", status_code=413)
+    return bytes(data)
+
+
+@router.post("", response_model=UploadSessionResponse, status_code=status.HTTP_201_CREATED)
+async def create_upload_session(request: UploadSessionCreateRequest) -> UploadSessionResponse:
+    """Open a resumable upload session.
+
+    Upload the file with ``PUT /{session_id}/chunks/{n}`` (chunk ``n`` is bytes
+    ``[n * chunk_size, (n + 1) * chunk_size)``), in any order and with retries,
+    then ``POST /{session_id}/commit``.
+    """
+    logger.info(
+        f"Creating upload session for citizen {request.citizen_id}, "
+        f"file: {request.filename} ({request.size_bytes} bytes)"
+    )
+
+    try:
+        state = await upload_sessions.create(
+            citizen_id=request.citizen_id,
+            filename=request.filename,
+            content_type=request.content_type,
+            title=request.title,
+            size_bytes=request.size_bytes,
+            description=request.description,
+            sha256=request.sha256,
+        )
+        return _session_response(state)
+
+    except Exception as e:
+        logger.error(f"Error creating upload session: {e}")
+        raise _http_error(e)
+
+
+@router.get("/{session_id}", response_model=UploadSessionResponse)
+async def get_upload_session(session_id: str) -> UploadSessionResponse:
+    """Get received byte ranges and missing chunks, to resume an upload."""
+    try:
+        return _session_response(await upload_sessions.get(session_id))
+
+    except Exception as e:
+        if not isinstance(e, UploadSessionError):
+            logger.error(f"Error getting upload session {session_id}: {e}")
+        raise _http_error(e)
+
+
+@router.put("/{session_id}/chunks/{index}", response_model=UploadSessionResponse)
+async def upload_session_chunk(
+    session_id: str,
+    index: int,
+    request: Request,
+) -> UploadSessionResponse:
+    """Upload chunk ``index`` as the raw request body.
+
+    Re-sending a chunk replaces it; the response lists what is still missing.
+    """
+    try:
+        data = await _read_chunk(request, upload_sessions.chunk_size)
+        state = await upload_sessions.put_chunk(session_id, index, data)
+        return _session_response(state)
+
+    except Exception as e:
+        if not isinstance(e, UploadSessionError):
+            logger.error(f"Error uploading chunk {index} of session {session_id}: {e}")
+        raise _http_error(e)
+
+
+@router.post("/{session_id}/commit", response_model=UploadSessionCommitResponse)
+async def commit_upload_session(
+    session_id: str,
+    db: Annotated[AsyncSession, Depends(get_db)],
+) -> UploadSessionCommitResponse:
+    """Commit the staged chunks and record the document.
+
+    ``sha256_hash`` and ``size_bytes`` come from the hash computed while the
+    chunks were received. Retrying a commit that already went through (the
+    client lost the response) returns the same document.
+    """
+    logger.info(f"Committing upload session {session_id}")
+
+    try:
+        try:
+            state = await upload_sessions.get(session_id)
+        except UploadSessionNotFoundError:
+            doc_id = await upload_sessions.committed_document(session_id)
+            metadata = await db.get(DocumentMetadata, doc_id) if doc_id else None
+            if metadata is None:
+                raise
+            return _commit_response(metadata)
+        doc_id = state["document_id"]
+
+        # A retried commit whose first attempt already recorded the document
+        metadata = await db.get(DocumentMetadata, doc_id)
+        if metadata is None:
+            state = await upload_sessions.commit(session_id)
+            metadata = DocumentMetadata(
+                id=doc_id,
+                citizen_id=state["citizen_id"],
+                title=state["title"],
+                filename=state["filename"],
+                content_type=state["content_type"],
+                blob_name=state["blob_name"],
+                storage_provider="azure",
+                status="uploaded",
+                description=state["description"],
+                sha256_hash=state["sha256_hash"],
+                size_bytes=state["size_bytes"],
+            )
+            db.add(metadata)
+            duplicate_blob = await _adopt_content_blob(db, metadata)
+            outbox.add_document_uploaded(
+                db,
+                document_id=doc_id,
+                citizen_id=state["citizen_id"],
+                filename=state["filename"],
+                content_type=state["content_type"],
+                blob_name=metadata.blob_name,
+                size_bytes=state["size_bytes"],
+            )
+            await db.commit()
+            outbox_relay.notify()
+            await _discard_blob(duplicate_blob)
+            logger.info(f"Document uploaded via session {session_id}: {doc_id}")
+
+        await upload_sessions.complete(session_id, doc_id)
+
+        return _commit_response(metadata)
+
+    except Exception as e:
+        if not isinstance(e, UploadSessionError):
+            logger.error(f"Error committing upload session {session_id}: {e}")
+        raise _http_error(e)
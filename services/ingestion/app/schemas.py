@@ -1,5 +1,7 @@
 """Ingestion schemas."""
 
+from datetime import datetime
+
 from pydantic import BaseModel, Field
 
 
@@ -11,15 +13,91 @@ class UploadURLRequest(BaseModel):
     content_type: str = Field(..., description="MIME type")
     title: str = Field(..., description="Document title")
     description: str | None = Field(None, description="Document description")
+    sha256: str | None = Field(
+        None,
+        pattern=r"^[0-9a-f]{64}$",
+        description="Client-computed SHA-256 (hex); enables deduplication",
+    )
+    size_bytes: int | None = Field(None, ge=0, description="File size (checked against stored content)")
 
 
 class UploadURLResponse(BaseModel):
     """Response with presigned upload URL."""
 
-    upload_url: str = Field(..., description="Presigned PUT URL")
+    upload_url: str | None = Field(None, description="Presigned PUT URL (None if already present)")
     document_id: str = Field(..., description="Document UUID")
     blob_name: str = Field(..., description="Azure Blob name")
     expires_in: int = Field(..., description="URL expiration in seconds")
+    already_present: bool = Field(False, description="Content already stored; no upload needed")
+
+
+class BatchUploadFile(BaseModel):
+    """File entry of a batch upload request."""
+
+    filename: str = Field(..., description="Document filename")
+    content_type: str = Field(..., description="MIME type")
+    title: str = Field(..., description="Document title")
+    description: str | None = Field(None, description="Document description")
+
+
+class BatchUploadURLRequest(BaseModel):
+    """Request for many presigned upload URLs at once."""
+
+    citizen_id: str = Field(..., description="Citizen ID")
+    files: list[BatchUploadFile] = Field(..., min_length=1, max_length=50, description="Files to upload")
+
+
+class BatchUploadURLResponse(BaseModel):
+    """Response with one presigned upload URL per requested file (same order)."""
+
+    items: list[UploadURLResponse] = Field(..., description="Upload URLs")
+
+
+class UploadSessionCreateRequest(BaseModel):
+    """Request to open a resumable upload session."""
+
+    citizen_id: str = Field(..., description="Citizen ID")
+    filename: str = Field(..., description="Document filename")
+    content_type: str = Field(..., description="MIME type")
+    title: str = Field(..., description="Document title")
+    description: str | None = Field(None, description="Document description")
+    size_bytes: int = Field(..., gt=0, description="Total file size in bytes")
+    sha256: str | None = Field(
+        None,
+        pattern=r"^[0-9a-f]{64}$",
+        description="Client-computed SHA-256 (hex); verified on commit",
+    )
+
+
+class ByteRange(BaseModel):
+    """Byte range already received (``end`` exclusive)."""
+
+    start: int
+    end: int
+
+
+class UploadSessionResponse(BaseModel):
+    """Resumable upload session status."""
+
+    session_id: str = Field(..., description="Upload session ID")
+    document_id: str = Field(..., description="Document UUID assigned on commit")
+    size_bytes: int = Field(..., description="Declared file size")
+    chunk_size: int = Field(..., description="Chunk size; chunk N covers bytes [N*chunk_size, (N+1)*chunk_size)")
+    total_chunks: int = Field(..., description="Number of chunks")
+    received_bytes: int = Field(..., description="Bytes staged so far")
+    received_ranges: list[ByteRange] = Field(..., description="Byte ranges staged so far")
+    missing_chunks: list[int] = Field(..., description="Chunk indices still to upload")
+    expires_at: datetime = Field(..., description="Session expiry if idle")
+
+
+class UploadSessionCommitResponse(BaseModel):
+    """Result of committing a resumable upload session."""
+
+    message: str
+    document_id: str
+    filename: str
+    size_bytes: int
+    sha256_hash: str
 
 
 class DownloadURLRequest(BaseModel):
@@ -46,3 +124,38 @@ class DocumentMetadata(BaseModel):
     content_type: str
     blob_name: str
 
+
+
+class IntegrityScrubRequest(BaseModel):
+    """Request to start a bulk integrity scrubbing job."""
+
+    citizen_id: str | None = Field(None, description="Only documents of this citizen")
+    created_from: datetime | None = Field(None, description="Only documents created at or after")
+    created_to: datetime | None = Field(None, description="Only documents created before")
+    worm_only: bool = Field(False, description="Only WORM-locked documents")
+
+
+class IntegrityScrubJobResponse(BaseModel):
+    """Integrity scrubbing job status."""
+
+    job_id: str
+    status: str
+    citizen_id: str | None
+    created_from: datetime | None
+    created_to: datetime | None
+    worm_only: bool
+    documents_checked: int
+    mismatches_found: int
+    bytes_verified: int
+    last_created_at: datetime | None
+    last_document_id: str | None
+    error: str | None
+    created_at: datetime
+    updated_at: datetime
+    completed_at: datetime | None
+
+
+class OutboxReplayRequest(BaseModel):
+    """Request to replay parked outbox events."""
+
+    event_ids: list[int] | None = Field(None, description="Parked events to replay (all if omitted)")
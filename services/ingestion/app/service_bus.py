@@ -3,7 +3,7 @@
 import json
 import logging
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 
 from azure.servicebus.aio import ServiceBusClient
 from azure.servicebus import ServiceBusMessage
@@ -39,7 +39,22 @@ class ServiceBusEventPublisher:
             logger.debug("Service Bus not enabled, skipping document.uploaded event")
             return False
         
-        event = {
+        event = self.document_uploaded_event(
+            document_id, citizen_id, filename, content_type, blob_name, size_bytes
+        )
+        return await self._publish_event(event, document_id, citizen_id)
+    
+    @staticmethod
+    def document_uploaded_event(
+        document_id: str,
+        citizen_id: str,
+        filename: str,
+        content_type: str,
+        blob_name: str,
+        size_bytes: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Build a document.uploaded event body."""
+        return {
             "event_type": "document.uploaded",
             "timestamp": datetime.utcnow().isoformat(),
             "data": {
@@ -52,8 +67,6 @@ class ServiceBusEventPublisher:
                 "source": "ingestion-service"
             }
         }
-        
-        return await self._publish_event(event, document_id, citizen_id)
     
     async def publish_document_deleted(
         self,
@@ -65,7 +78,13 @@ class ServiceBusEventPublisher:
             logger.debug("Service Bus not enabled, skipping document.deleted event")
             return False
         
-        event = {
+        event = self.document_deleted_event(document_id, citizen_id)
+        return await self._publish_event(event, document_id, citizen_id)
+    
+    @staticmethod
+    def document_deleted_event(document_id: str, citizen_id: str) -> Dict[str, Any]:
+        """Build a document.deleted event body."""
+        return {
             "event_type": "document.deleted",
             "timestamp": datetime.utcnow().isoformat(),
             "data": {
@@ -74,8 +93,6 @@ class ServiceBusEventPublisher:
                 "source": "ingestion-service"
             }
         }
-        
-        return await self._publish_event(event, document_id, citizen_id)
     
     async def publish_document_signed(
         self,
@@ -101,6 +118,104 @@ class ServiceBusEventPublisher:
         
         return await self._publish_event(event, document_id, citizen_id)
     
+    async def publish_documents_uploaded_batch(
+        self,
+        documents: List[Dict[str, Any]]
+    ) -> bool:
+        """Publish many document uploaded events as Service Bus message batches.
+
+        Each item takes the same fields as ``publish_document_uploaded``.
+        """
+        if not self.enabled:
+            logger.debug("Service Bus not enabled, skipping document.uploaded batch")
+            return False
+        
+        events = [
+            (
+                self.document_uploaded_event(
+                    doc["document_id"],
+                    doc["citizen_id"],
+                    doc["filename"],
+                    doc["content_type"],
+                    doc["blob_name"],
+                    doc.get("size_bytes"),
+                ),
+                doc["document_id"],
+                doc["citizen_id"],
+            )
+            for doc in documents
+        ]
+        
+        return await self._publish_events(events)
+    
+    async def publish_outbox_events(
+        self,
+        events: List[Tuple[Dict[str, Any], str, str, str]]
+    ) -> bool:
+        """Publish relayed outbox rows as message batches.
+
+        Each item is ``(event, document_id, citizen_id, message_id)``; the
+        stable message ID lets duplicate detection drop redeliveries.
+        """
+        if not self.enabled:
+            logger.debug("Service Bus not enabled, skipping outbox events")
+            return False
+        
+        return await self._publish_events(events)
+    
+    async def publish_outbox_events_each(
+        self,
+        events: List[Tuple[Dict[str, Any], str, str, str]]
+    ) -> List[bool]:
+        """Publish relayed outbox rows one message at a time over one connection.
+
+        Used to isolate the rows of a rejected batch. Returns one flag per
+        event (all False if the broker could not be reached).
+        """
+        if not self.enabled:
+            logger.debug("Service Bus not enabled, skipping outbox events")
+            return [False] * len(events)
+        
+        results = []
+        try:
+            async with ServiceBusClient.from_connection_string(self.connection_string) as client:
+                async with client.get_queue_sender(queue_name=self.queue_name) as sender:
+                    for event_args in events:
+                        try:
+                            await sender.send_messages(self._build_message(*event_args))
+                            results.append(True)
+                        except Exception as e:
+                            logger.error(f"Failed to publish outbox event {event_args[3]}: {e}")
+                            results.append(False)
+        except Exception as e:
+            logger.error(f"Failed to publish outbox events: {e}")
+        
+        return results + [False] * (len(events) - len(results))
+    
+    def _build_message(
+        self,
+        event: Dict[str, Any],
+        document_id: str,
+        citizen_id: str,
+        message_id: Optional[str] = None
+    ) -> ServiceBusMessage:
+        """Build Service Bus message for an event."""
+        message = ServiceBusMessage(
+            body=json.dumps(event).encode('utf-8'),
+            content_type="application/json",
+            subject=event["event_type"],
+            message_id=message_id
+        )
+        
+        message.application_properties = {
+            "event_type": event["event_type"],
+            "document_id": document_id,
+            "citizen_id": citizen_id,
+            "source": "ingestion-service"
+        }
+        
+        return message
+    
     async def _publish_event(
         self,
         event: Dict[str, Any],
@@ -111,18 +226,7 @@ class ServiceBusEventPublisher:
         try:
             async with ServiceBusClient.from_connection_string(self.connection_string) as client:
                 async with client.get_queue_sender(queue_name=self.queue_name) as sender:
-                    message = ServiceBusMessage(
-                        body=json.dumps(event).encode('utf-8'),
-                        content_type="application/json",
-                        subject=event["event_type"]
-                    )
-                    
-                    message.application_properties = {
-                        "event_type": event["event_type"],
-                        "document_id": document_id,
-                        "citizen_id": citizen_id,
-                        "source": "ingestion-service"
-                    }
+                    message = self._build_message(event, document_id, citizen_id)
                     
                     await sender.send_messages(message)
                     logger.info(f"Published {event['event_type']} event for document {document_id}")
@@ -131,6 +235,37 @@ class ServiceBusEventPublisher:
         except Exception as e:
             logger.error(f"Failed to publish {event['event_type']} event: {e}")
             return False
+    
+    async def _publish_events(
+        self,
+        events: List[Tuple[Any, ...]]
+    ) -> bool:
+        """Publish events using as few message batches as fit the size limit."""
+        if not events:
+            return True
+        
+        try:
+            async with ServiceBusClient.from_connection_string(self.connection_string) as client:
+                async with client.get_queue_sender(queue_name=self.queue_name) as sender:
+                    batch = await sender.create_message_batch()
+                    
+                    for event_args in events:
+                        message = self._build_message(*event_args)
+                        try:
+                            batch.add_message(message)
+                        except ValueError:
+                            # Batch full: send it and start a new one
+                            await sender.send_messages(batch)
+                            batch = await sender.create_message_batch()
+                            batch.add_message(message)
+                    
+                    await sender.send_messages(batch)
+                    logger.info(f"Published {len(events)} events in batches")
+                    return True
+                    
+        except Exception as e:
+            logger.error(f"Failed to publish event batch: {e}")
+            return False
 
 
 # Global instance
@@ -0,0 +1,414 @@
+"""Resumable upload sessions.
+
+A client that cannot keep one long request alive (mobile networks, large
+scans) creates a session, PUTs the file in fixed-size chunks, asks which byte
+ranges the service already has and only resends what is missing, then commits.
+
+- Session state lives in Redis (``upload-session:{id}`` hash) so any pod can
+  serve any chunk; received chunks and their SHA-256 are kept in
+  ``upload-session:{id}:chunks``.
+- Each chunk N is staged as uncommitted Azure block ``make_block_id(N)``; a
+  retried chunk overwrites its own block, so resends are idempotent.
+- The whole-file SHA-256 is advanced incrementally while chunks arrive in
+  order. ``hashlib`` state cannot be persisted, so the running hasher stays in
+  the memory of the pod that received the contiguous prefix and Redis only
+  records how far it got (``hash_offset``). If the chain breaks (out-of-order
+  chunks, another pod, restart) the commit streams the committed blob once to
+  compute the hash instead.
+- Once the document is recorded the session is replaced by a short-lived
+  ``upload-session:{id}:committed`` key holding the document id, so a client
+  retrying a commit whose response it lost still gets the document.
+"""
+
+import asyncio
+import hashlib
+import logging
+import math
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Optional
+from uuid import uuid4
+
+from app.azure_storage import AzureBlobDocumentClient
+from app.block_upload import BlockBlobStreamUploader, make_block_id
+from app.hash_verification import HashVerificationService
+
+try:
+    from carpeta_common.redis_client import get_redis_client
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+SESSION_KEY_PREFIX = "upload-session:"
+
+# Compare-and-set of the incrementally hashed prefix length
+_ADVANCE_HASH_SCRIPT = """
+if redis.call('HGET', KEYS[1], 'hash_offset') == ARGV[1] then
+    redis.call('HSET', KEYS[1], 'hash_offset', ARGV[2])
+    return 1
+end
+return 0
+"""
+
+
+class UploadSessionError(Exception):
+    """Invalid operation on an upload session (maps to 4xx)."""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class UploadSessionNotFoundError(UploadSessionError):
+    """Session does not exist or has expired."""
+
+    def __init__(self, session_id: str):
+        super().__init__(f"Upload session {session_id} not found or expired", status_code=404)
+
+
+class UploadSessionUnavailableError(Exception):
+    """Session storage (Redis) is not available."""
+    pass
+
+
+def received_ranges(state: dict[str, Any]) -> list[tuple[int, int]]:
+    """Merge received chunk indices into byte ranges ``(start, end)`` (end exclusive)."""
+    chunk_size = state["chunk_size"]
+    size = state["size_bytes"]
+    ranges: list[tuple[int, int]] = []
+    for index in sorted(state["received"]):
+        start = index * chunk_size
+        end = min(start + chunk_size, size)
+        if ranges and ranges[-1][1] == start:
+            ranges[-1] = (ranges[-1][0], end)
+        else:
+            ranges.append((start, end))
+    return ranges
+
+
+def missing_chunks(state: dict[str, Any]) -> list[int]:
+    """Chunk indices not received yet."""
+    received = state["received"]
+    return [index for index in range(state["total_chunks"]) if index not in received]
+
+
+class UploadSessionService:
+    """Create, fill and commit resumable upload sessions.
+
+    Features:
+    - Redis-backed session state shared by all pods (TTL-bound)
+    - Chunks staged as uncommitted blocks; retries overwrite the same block
+    - Per-chunk SHA-256 so a resent chunk with different content is detected
+    - Whole-file SHA-256 advanced incrementally for in-order uploads
+    """
+
+    def __init__(
+        self,
+        storage_client: AzureBlobDocumentClient,
+        uploader: BlockBlobStreamUploader,
+        chunk_size: int = 4 * 1024 * 1024,
+        session_ttl_seconds: int = 24 * 3600,
+        max_file_size: Optional[int] = None,
+        max_local_hashers: int = 1024,
+        committed_ttl_seconds: int = 3600,
+    ):
+        """Initialize service.
+
+        Args:
+            storage_client: Azure Blob client (SAS issuing, hash fallback)
+            uploader: Block uploader used for Put Block / Put Block List
+            chunk_size: Chunk size in bytes for new sessions
+            session_ttl_seconds: Idle lifetime of a session (uncommitted blocks
+                are garbage-collected by Azure after 7 days)
+            max_file_size: Largest file a session may declare
+            max_local_hashers: Running hashers kept in memory (LRU)
+            committed_ttl_seconds: How long a committed session still answers
+                commit retries with its document
+        """
+        self.storage_client = storage_client
+        self.uploader = uploader
+        self.chunk_size = chunk_size
+        self.session_ttl_seconds = session_ttl_seconds
+        self.max_file_size = max_file_size
+        self.max_local_hashers = max_local_hashers
+        self.committed_ttl_seconds = committed_ttl_seconds
+
+        # session_id -> (hashed prefix length, running hasher)
+        self._hashers: OrderedDict[str, tuple[int, Any]] = OrderedDict()
+
+    # ------------------------------------------------------------------ #
+    # Redis state
+    # ------------------------------------------------------------------ #
+
+    @staticmethod
+    def _key(session_id: str) -> str:
+        return f"{SESSION_KEY_PREFIX}{session_id}"
+
+    @staticmethod
+    def _chunks_key(session_id: str) -> str:
+        return f"{SESSION_KEY_PREFIX}{session_id}:chunks"
+
+    @staticmethod
+    def _committed_key(session_id: str) -> str:
+        return f"{SESSION_KEY_PREFIX}{session_id}:committed"
+
+    async def _redis(self) -> Any:
+        if not REDIS_AVAILABLE:
+            raise UploadSessionUnavailableError("Redis client not installed")
+        try:
+            return await get_redis_client()
+        except Exception as e:
+            raise UploadSessionUnavailableError(f"Redis unavailable: {e}") from e
+
+    async def _touch(self, client: Any, session_id: str) -> datetime:
+        """Extend the session TTL on activity."""
+        expires_at = datetime.utcnow() + timedelta(seconds=self.session_ttl_seconds)
+        await client.hset(self._key(session_id), "expires_at", expires_at.isoformat())
+        await client.expire(self._key(session_id), self.session_ttl_seconds)
+        await client.expire(self._chunks_key(session_id), self.session_ttl_seconds)
+        return expires_at
+
+    async def get(self, session_id: str) -> dict[str, Any]:
+        """Load session state with the received chunk indices.
+
+        Raises:
+            UploadSessionNotFoundError: Unknown or expired session
+        """
+        client = await self._redis()
+        raw = await client.hgetall(self._key(session_id))
+        if not raw:
+            raise UploadSessionNotFoundError(session_id)
+        digests = await client.hgetall(self._chunks_key(session_id))
+
+        return {
+            "session_id": session_id,
+            "citizen_id": raw["citizen_id"],
+            "document_id": raw["document_id"],
+            "blob_name": raw["blob_name"],
+            "filename": raw["filename"],
+            "content_type": raw["content_type"],
+            "title": raw["title"],
+            "description": raw.get("description") or None,
+            "sha256": raw.get("sha256") or None,
+            "size_bytes": int(raw["size_bytes"]),
+            "chunk_size": int(raw["chunk_size"]),
+            "total_chunks": int(raw["total_chunks"]),
+            "hash_offset": int(raw["hash_offset"]),
+            "expires_at": datetime.fromisoformat(raw["expires_at"]),
+            "received": {int(index): digest for index, digest in digests.items()},
+        }
+
+    # ------------------------------------------------------------------ #
+    # Protocol
+    # ------------------------------------------------------------------ #
+
+    async def create(
+        self,
+        citizen_id: str,
+        filename: str,
+        content_type: str,
+        title: str,
+        size_bytes: int,
+        description: Optional[str] = None,
+        sha256: Optional[str] = None,
+    ) -> dict[str, Any]:
+        """Open a session for a file of ``size_bytes`` bytes.
+
+        Args:
+            sha256: Optional client-computed hash, verified on commit
+
+        Raises:
+            UploadSessionError: File larger than the configured limit
+        """
+        if self.max_file_size is not None and size_bytes > self.max_file_size:
+            raise UploadSessionError(
+                f"File exceeds maximum allowed size of {self.max_file_size} bytes",
+                status_code=413,
+            )
+
+        client = await self._redis()
+        session_id = str(uuid4())
+        document_id = str(uuid4())
+        blob_name = f"citizens/{citizen_id}/documents/{document_id}/{filename}"
+        expires_at = datetime.utcnow() + timedelta(seconds=self.session_ttl_seconds)
+
+        await client.hset(
+            self._key(session_id),
+            mapping={
+                "citizen_id": citizen_id,
+                "document_id": document_id,
+                "blob_name": blob_name,
+                "filename": filename,
+                "content_type": content_type,
+                "title": title,
+                "description": description or "",
+                "sha256": sha256 or "",
+                "size_bytes": size_bytes,
+                "chunk_size": self.chunk_size,
+                "total_chunks": math.ceil(size_bytes / self.chunk_size),
+                "hash_offset": 0,
+                "expires_at": expires_at.isoformat(),
+            },
+        )
+        await client.expire(self._key(session_id), self.session_ttl_seconds)
+        self._remember_hasher(session_id, 0, hashlib.sha256())
+
+        logger.info(f"Upload session {session_id} created for {blob_name} ({size_bytes} bytes)")
+        return await self.get(session_id)
+
+    def expected_chunk_length(self, state: dict[str, Any], index: int) -> int:
+        """Exact byte length chunk ``index`` must have (the last one may be short).
+
+        Raises:
+            UploadSessionError: Index outside the file
+        """
+        if index < 0 or index >= state["total_chunks"]:
+            raise UploadSessionError(
+                f"Chunk {index} out of range (0..{state['total_chunks'] - 1})",
+                status_code=416,
+            )
+        start = index * state["chunk_size"]
+        return min(state["chunk_size"], state["size_bytes"] - start)
+
+    async def put_chunk(self, session_id: str, index: int, data: bytes) -> dict[str, Any]:
+        """Stage chunk ``index`` as an uncommitted block.
+
+        Raises:
+            UploadSessionError: Bad index or wrong chunk length
+        """
+        state = await self.get(session_id)
+        expected = self.expected_chunk_length(state, index)
+        if len(data) != expected:
+            raise UploadSessionError(f"Chunk {index} must be {expected} bytes, got {len(data)}")
+
+        digest = (await asyncio.to_thread(hashlib.sha256, data)).hexdigest()
+        offset = index * state["chunk_size"]
+        previous = state["received"].get(index)
+        client = await self._redis()
+
+        if previous is not None and previous != digest and offset < state["hash_offset"]:
+            # Already part of the hashed prefix with different bytes: the running hash is stale
+            await client.hset(self._key(session_id), "hash_offset", -1)
+            self._hashers.pop(session_id, None)
+            state["hash_offset"] = -1
+
+        upload_url = self.storage_client.generate_blob_put_url(
+            state["blob_name"], content_type=state["content_type"]
+        )
+        await self.uploader.stage_block(upload_url, make_block_id(index), data)
+
+        await client.hset(self._chunks_key(session_id), str(index), digest)
+        state["expires_at"] = await self._touch(client, session_id)
+        state["received"][index] = digest
+
+        await self._advance_hash(client, session_id, state, offset, data)
+
+        return state
+
+    async def commit(self, session_id: str) -> dict[str, Any]:
+        """Commit all staged blocks in order and compute the file's SHA-256.
+
+        Committing again (e.g. the client retries after a timeout) re-runs
+        Put Block List, which is idempotent for the same block list.
+
+        Returns:
+            Session state plus ``sha256_hash`` and ``hash_source``
+            (``incremental`` or ``stream``)
+
+        Raises:
+            UploadSessionError: Chunks missing or hash mismatch
+        """
+        state = await self.get(session_id)
+        missing = missing_chunks(state)
+        if missing:
+            raise UploadSessionError(
+                f"Upload session {session_id} is missing chunks {missing[:20]}",
+                status_code=409,
+            )
+
+        upload_url = self.storage_client.generate_blob_put_url(
+            state["blob_name"], content_type=state["content_type"]
+        )
+        block_ids = [make_block_id(index) for index in range(state["total_chunks"])]
+        await self.uploader.commit_block_list(upload_url, block_ids, state["content_type"])
+
+        local = self._hashers.get(session_id)
+        if local is not None and local[0] == state["size_bytes"] == state["hash_offset"]:
+            sha256_hash = local[1].hexdigest()
+            hash_source = "incremental"
+        else:
+            verifier = HashVerificationService(self.storage_client)
+            result = await verifier.stream_sha256(state["blob_name"], state["size_bytes"])
+            sha256_hash = result["sha256"]
+            hash_source = "stream"
+
+        if state["sha256"] and state["sha256"] != sha256_hash:
+            await self.storage_client.delete_blob(state["blob_name"])
+            await self.discard(session_id)
+            raise UploadSessionError(
+                f"SHA-256 mismatch: declared {state['sha256']}, received {sha256_hash}",
+                status_code=422,
+            )
+
+        logger.info(f"Upload session {session_id} committed ({hash_source} hash)")
+        return {**state, "sha256_hash": sha256_hash, "hash_source": hash_source}
+
+    async def discard(self, session_id: str) -> None:
+        """Forget a session (after its document was recorded)."""
+        self._hashers.pop(session_id, None)
+        client = await self._redis()
+        await client.delete(self._key(session_id), self._chunks_key(session_id))
+
+    async def complete(self, session_id: str, document_id: str) -> None:
+        """Forget a committed session, remembering its document for commit retries."""
+        self._hashers.pop(session_id, None)
+        client = await self._redis()
+        await client.set(self._committed_key(session_id), document_id, ex=self.committed_ttl_seconds)
+        await client.delete(self._key(session_id), self._chunks_key(session_id))
+
+    async def committed_document(self, session_id: str) -> Optional[str]:
+        """Document id of a recently committed session, or None."""
+        client = await self._redis()
+        return await client.get(self._committed_key(session_id))
+
+    # ------------------------------------------------------------------ #
+    # Incremental hash
+    # ------------------------------------------------------------------ #
+
+    def _remember_hasher(self, session_id: str, offset: int, hasher: Any) -> None:
+        self._hashers[session_id] = (offset, hasher)
+        self._hashers.move_to_end(session_id)
+        while len(self._hashers) > self.max_local_hashers:
+            self._hashers.popitem(last=False)
+
+    async def _advance_hash(
+        self,
+        client: Any,
+        session_id: str,
+        state: dict[str, Any],
+        offset: int,
+        data: bytes,
+    ) -> None:
+        """Extend the running hash if ``data`` continues the hashed prefix."""
+        if state["hash_offset"] != offset:
+            return
+
+        local = self._hashers.get(session_id)
+        if local is None and offset == 0:
+            local = (0, hashlib.sha256())
+        if local is None or local[0] != offset:
+            return
+
+        candidate = local[1].copy()
+        await asyncio.to_thread(candidate.update, data)
+        new_offset = offset + len(data)
+
+        # Another pod (or a concurrent request) may have moved the prefix meanwhile
+        advanced = await client.eval(
+            _ADVANCE_HASH_SCRIPT, 1, self._key(session_id), str(offset), str(new_offset)
+        )
+        if advanced:
+            self._remember_hasher(session_id, new_offset, candidate)
+            state["hash_offset"] = new_offset
@@ -0,0 +1,23 @@
+"""Shared fixtures for ingestion service tests."""
+
+import os
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.models import Base
+
+# Database-backed tests run against a disposable PostgreSQL (its tables are recreated)
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+requires_db = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL not set")
+
+
+@pytest_asyncio.fixture
+async def session_factory():
+    engine = create_async_engine(TEST_DATABASE_URL)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
@@ -0,0 +1,59 @@
+"""Unit tests for the batch presigned-upload endpoint."""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from fastapi.testclient import TestClient
+
+from app.database import get_db
+from app.main import create_app
+from app.models import OutboxEvent
+from app.routers import documents
+
+
+def test_upload_urls_single_insert_and_outbox_events():
+    """N files cost one INSERT and one commit; events go to the outbox in that transaction."""
+    db = MagicMock()
+    db.execute = AsyncMock()
+    db.commit = AsyncMock()
+    db.rollback = AsyncMock()
+
+    async def override_db():
+        yield db
+
+    app = create_app()
+    app.dependency_overrides[get_db] = override_db
+
+    def fake_put(citizen_id, filename, content_type):
+        return {
+            "upload_url": f"https://acct/documents/{filename}?sig=x",
+            "document_id": f"id-{filename}",
+            "blob_name": f"citizens/{citizen_id}/documents/id-{filename}/{filename}",
+        }
+
+    publish = AsyncMock(return_value=True)
+    with patch.object(documents.storage_client, "generate_presigned_put", side_effect=fake_put), \
+            patch.object(documents.service_bus_publisher, "enabled", True), \
+            patch.object(documents.service_bus_publisher, "publish_documents_uploaded_batch", publish):
+        response = TestClient(app).post(
+            "/api/documents/upload-urls",
+            json={
+                "citizen_id": "123",
+                "files": [
+                    {"filename": f"f{i}.pdf", "content_type": "application/pdf", "title": f"Doc {i}"}
+                    for i in range(3)
+                ],
+            },
+        )
+
+    assert response.status_code == 200
+    items = response.json()["items"]
+    assert [item["document_id"] for item in items] == ["id-f0.pdf", "id-f1.pdf", "id-f2.pdf"]
+
+    db.execute.assert_awaited_once()
+    assert len(db.execute.call_args.args[1]) == 3
+    db.commit.assert_awaited_once()
+    publish.assert_not_awaited()
+    events = [call.args[0] for call in db.add.call_args_list]
+    assert all(isinstance(event, OutboxEvent) for event in events)
+    assert [event.document_id for event in events] == ["id-f0.pdf", "id-f1.pdf", "id-f2.pdf"]
+    assert events[0].payload["event_type"] == "document.uploaded"
@@ -0,0 +1,129 @@
+"""Unit tests for streaming block blob uploads."""
+
+import hashlib
+import io
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from starlette.formparsers import MultiPartParser
+
+from app.block_upload import BlockBlobStreamUploader, UploadTooLargeError, make_block_id
+from app.database import get_db
+from app.main import create_app
+from app.routers import documents
+
+
+class FakeUploadFile:
+    """Minimal async file-like object."""
+
+    def __init__(self, data: bytes):
+        self._buffer = io.BytesIO(data)
+
+    async def read(self, size: int = -1) -> bytes:
+        return self._buffer.read(size)
+
+
+def make_client(requests: list[httpx.Request]) -> httpx.AsyncClient:
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(201)
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def test_block_ids_have_same_length():
+    """Azure requires equal-length block IDs."""
+    assert len(make_block_id(0)) == len(make_block_id(99_999_999))
+
+
+@pytest.mark.asyncio
+async def test_upload_stages_blocks_and_commits():
+    """Chunks are staged as blocks and committed in order."""
+    requests: list[httpx.Request] = []
+    data = b"x" * 10 + b"y" * 10 + b"z" * 5
+
+    async with make_client(requests) as client:
+        uploader = BlockBlobStreamUploader(client, chunk_size=10, max_concurrency=2)
+        result = await uploader.upload(
+            "https://acct.blob.core.windows.net/documents/a.pdf?sv=1&sig=abc",
+            FakeUploadFile(data),
+            content_type="application/pdf",
+        )
+
+    assert result["size_bytes"] == len(data)
+    assert result["sha256_hash"] == hashlib.sha256(data).hexdigest()
+    assert result["block_count"] == 3
+
+    staged = [r for r in requests if r.url.params.get("comp") == "block"]
+    commits = [r for r in requests if r.url.params.get("comp") == "blocklist"]
+    assert len(staged) == 3
+    assert len(commits) == 1
+    assert commits[0].headers["x-ms-blob-content-type"] == "application/pdf"
+    body = commits[0].content.decode()
+    assert body.index(make_block_id(0)) < body.index(make_block_id(2))
+
+
+@pytest.mark.asyncio
+async def test_upload_rejects_oversized_stream():
+    """Uploads past max_size abort without committing."""
+    requests: list[httpx.Request] = []
+
+    async with make_client(requests) as client:
+        uploader = BlockBlobStreamUploader(client, chunk_size=4)
+        with pytest.raises(UploadTooLargeError):
+            await uploader.upload(
+                "https://acct.blob.core.windows.net/documents/a.pdf?sig=abc",
+                FakeUploadFile(b"0123456789"),
+                max_size=6,
+            )
+
+    assert not any(r.url.params.get("comp") == "blocklist" for r in requests)
+
+
+def direct_upload(monkeypatch, file_size):
+    """POST a file of ``file_size`` bytes to /upload-direct with a 1000-byte limit."""
+    monkeypatch.setattr(documents.config, "max_file_size", 1000)
+    db = MagicMock()
+    db.commit = AsyncMock()
+    db.refresh = AsyncMock()
+
+    async def override_db():
+        yield db
+
+    app = create_app()
+    app.dependency_overrides[get_db] = override_db
+    upload = AsyncMock(return_value={"sha256_hash": "a" * 64, "size_bytes": file_size})
+    presigned = {"upload_url": "https://acct/documents/x?sig=1", "document_id": "d1", "blob_name": "x"}
+
+    with patch.object(documents.storage_client, "generate_presigned_put", return_value=presigned), \
+            patch.object(BlockBlobStreamUploader, "upload", upload), \
+            patch.object(documents, "_adopt_content_blob", AsyncMock(return_value=None)):
+        response = TestClient(app).post(
+            "/api/documents/upload-direct",
+            files={"file": ("doc.pdf", b"x" * file_size, "application/pdf")},
+            data={"citizen_id": "123", "title": "Doc"},
+        )
+    return response, upload
+
+
+def test_direct_upload_at_the_limit_passes_the_length_precheck(monkeypatch):
+    """Multipart overhead does not push a file right at the limit over it."""
+    response, upload = direct_upload(monkeypatch, 1000)
+
+    assert response.status_code == 200
+    upload.assert_awaited_once()
+    assert upload.await_args.kwargs["max_size"] == 1000
+
+
+def test_direct_upload_far_over_the_limit_is_rejected_before_parsing(monkeypatch):
+    """The declared Content-Length is refused before the multipart form is read."""
+    parse = MagicMock(side_effect=AssertionError("form parsed"))
+    monkeypatch.setattr(MultiPartParser, "parse", parse)
+
+    response, upload = direct_upload(monkeypatch, 1000 + documents.MULTIPART_OVERHEAD_BYTES + 1)
+
+    assert response.status_code == 413
+    parse.assert_not_called()
+    upload.assert_not_awaited()
@@ -0,0 +1,147 @@
+"""Unit tests for content-addressed upload deduplication."""
+
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import content_store
+from app.database import get_db
+from app.main import create_app
+from app.models import ContentBlob, DocumentMetadata
+from app.routers import documents
+from tests.conftest import requires_db
+
+SHA = "a" * 64
+
+
+def make_client():
+    db = MagicMock()
+    db.add = MagicMock()
+    db.commit = AsyncMock()
+    db.refresh = AsyncMock()
+
+    async def override_db():
+        yield db
+
+    app = create_app()
+    app.dependency_overrides[get_db] = override_db
+    return TestClient(app), db
+
+
+def upload_request(**extra):
+    return {
+        "citizen_id": "123",
+        "filename": "cedula.pdf",
+        "content_type": "application/pdf",
+        "title": "Cédula",
+        **extra,
+    }
+
+
+def test_known_hash_references_existing_blob():
+    """A known hash creates a document on the existing blob and issues no SAS."""
+    client, db = make_client()
+    existing = content_store.ContentRef(
+        blob_name="citizens/123/documents/old/cedula.pdf",
+        size_bytes=2048,
+        content_type="application/pdf",
+        ref_count=2,
+    )
+
+    with patch.object(content_store, "acquire_existing", AsyncMock(return_value=existing)) as acquire, \
+            patch.object(documents.storage_client, "generate_presigned_put") as presign, \
+            patch.object(documents.service_bus_publisher, "publish_document_uploaded", AsyncMock()):
+        response = client.post("/api/documents/upload-url", json=upload_request(sha256=SHA, size_bytes=2048))
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["already_present"] is True
+    assert body["upload_url"] is None
+    assert body["blob_name"] == existing.blob_name
+    acquire.assert_awaited_once_with(db, "123", SHA, 2048)
+    presign.assert_not_called()
+
+    document = db.add.call_args.args[0]
+    assert document.blob_name == existing.blob_name
+    assert document.sha256_hash == SHA
+    assert document.status == "uploaded"
+
+
+def test_unknown_hash_issues_upload_url():
+    """Unseen content falls back to a normal presigned upload."""
+    client, _ = make_client()
+    presigned = {
+        "upload_url": "https://acct/documents/x?sig=1",
+        "document_id": "new-id",
+        "blob_name": "citizens/123/documents/new-id/cedula.pdf",
+    }
+
+    with patch.object(content_store, "acquire_existing", AsyncMock(return_value=None)), \
+            patch.object(documents.storage_client, "generate_presigned_put", return_value=presigned), \
+            patch.object(documents.service_bus_publisher, "publish_document_uploaded", AsyncMock()):
+        response = client.post("/api/documents/upload-url", json=upload_request(sha256=SHA))
+
+    assert response.status_code == 200
+    assert response.json()["already_present"] is False
+    assert response.json()["upload_url"] == presigned["upload_url"]
+
+
+def test_invalid_hash_rejected():
+    """Hashes must be 64 lowercase hex characters."""
+    client, _ = make_client()
+    response = client.post("/api/documents/upload-url", json=upload_request(sha256="not-a-hash"))
+    assert response.status_code == 422
+
+
+async def add_unreferenced_content(session_factory, blob_name, soft_deleted_document=False):
+    async with session_factory() as db:
+        db.add(ContentBlob(citizen_id="123", sha256_hash=SHA, blob_name=blob_name, size_bytes=10, ref_count=0))
+        if soft_deleted_document:
+            db.add(DocumentMetadata(
+                id="old", citizen_id="123", title="Doc", filename="doc.pdf", content_type="application/pdf",
+                blob_name=blob_name, sha256_hash=SHA, size_bytes=10, is_deleted=True,
+                created_at=datetime.utcnow(),
+            ))
+        await db.commit()
+
+
+@requires_db
+@pytest.mark.asyncio
+async def test_register_over_unreferenced_content_reports_replaced_blob(session_factory):
+    """Taking over a ref_count 0 row hands back the old blob when nothing points at it."""
+    await add_unreferenced_content(session_factory, "old-blob")
+
+    async with session_factory() as db:
+        content = await content_store.register(db, "123", SHA, "new-blob", 10, "application/pdf")
+        await db.commit()
+
+    assert (content.blob_name, content.ref_count, content.replaced_blob_name) == ("new-blob", 1, "old-blob")
+
+
+@requires_db
+@pytest.mark.asyncio
+async def test_register_leaves_blob_of_unpurged_documents_to_the_sweeper(session_factory):
+    """A soft-deleted row still points at the old blob: the sweeper deletes it with the row."""
+    await add_unreferenced_content(session_factory, "old-blob", soft_deleted_document=True)
+
+    async with session_factory() as db:
+        content = await content_store.register(db, "123", SHA, "new-blob", 10, "application/pdf")
+
+    assert content.blob_name == "new-blob"
+    assert content.replaced_blob_name is None
+
+
+@pytest.mark.asyncio
+async def test_adopting_replaced_content_discards_the_old_blob():
+    """The upload that replaced an unreferenced row returns the old blob for deletion."""
+    metadata = DocumentMetadata(
+        id="d1", citizen_id="123", blob_name="new-blob", sha256_hash=SHA, size_bytes=10,
+        content_type="application/pdf",
+    )
+    content = content_store.ContentRef("new-blob", 10, "application/pdf", 1, replaced_blob_name="old-blob")
+
+    with patch.object(content_store, "register", AsyncMock(return_value=content)):
+        assert await documents._adopt_content_blob(MagicMock(), metadata) == "old-blob"
+    assert metadata.blob_name == "new-blob"
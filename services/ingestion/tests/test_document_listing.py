@@ -0,0 +1,92 @@
+"""Unit tests for keyset-paginated document listing."""
+
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+from fastapi.testclient import TestClient
+
+from app.database import get_db
+from app.main import create_app
+from app.routers.documents import _decode_cursor, _encode_cursor
+
+
+def make_client(rows):
+    db = MagicMock()
+    db.execute = AsyncMock(return_value=MagicMock(all=MagicMock(return_value=rows)))
+
+    async def override_db():
+        yield db
+
+    app = create_app()
+    app.dependency_overrides[get_db] = override_db
+    return TestClient(app), db
+
+
+def make_row(i: int):
+    created = datetime(2026, 1, 1, 12, 0, i)
+    return SimpleNamespace(
+        id=f"doc-{i}", title="t", filename="f.pdf", content_type="application/pdf",
+        status="uploaded", size_bytes=10, created_at=created, updated_at=created,
+    )
+
+
+def test_cursor_roundtrip():
+    """Cursors decode to the (created_at, id) they encode."""
+    created = datetime(2026, 1, 1, 8, 30)
+    assert _decode_cursor(_encode_cursor(created, "doc-1")) == (created, "doc-1")
+
+
+def test_list_documents_sets_next_cursor():
+    """A full page returns `limit` items and a cursor for the next page."""
+    client, _ = make_client([make_row(i) for i in (3, 2, 1)])
+
+    response = client.get("/api/documents/", params={"citizen_id": "123", "limit": 2})
+
+    assert response.status_code == 200
+    assert [doc["id"] for doc in response.json()] == ["doc-3", "doc-2"]
+    assert _decode_cursor(response.headers["X-Next-Cursor"])[1] == "doc-2"
+
+
+def test_list_documents_last_page_has_no_cursor():
+    """The last page has no X-Next-Cursor header."""
+    client, _ = make_client([make_row(1)])
+
+    response = client.get("/api/documents/", params={"citizen_id": "123", "limit": 2})
+
+    assert len(response.json()) == 1
+    assert "X-Next-Cursor" not in response.headers
+
+
+def test_list_documents_rejects_invalid_cursor():
+    """Malformed cursors are a client error."""
+    client, db = make_client([])
+
+    response = client.get("/api/documents/", params={"citizen_id": "123", "cursor": "!!"})
+
+    assert response.status_code == 400
+    db.execute.assert_not_awaited()
+
+
+def test_list_documents_without_limit_returns_everything():
+    """Callers that do not page keep getting the full listing."""
+    client, db = make_client([make_row(i % 60) for i in range(150, 0, -1)])
+
+    response = client.get("/api/documents/", params={"citizen_id": "123"})
+
+    assert len(response.json()) == 150
+    assert "X-Next-Cursor" not in response.headers
+    assert "LIMIT" not in str(db.execute.await_args.args[0]).upper()
+
+
+def test_next_cursor_is_exposed_to_browsers():
+    """CORS responses let browser clients read the pagination header."""
+    client, _ = make_client([make_row(i) for i in (3, 2, 1)])
+
+    response = client.get(
+        "/api/documents/",
+        params={"citizen_id": "123", "limit": 2},
+        headers={"Origin": "http://localhost:3000"},
+    )
+
+    assert "X-Next-Cursor" in response.headers["Access-Control-Expose-Headers"]
@@ -0,0 +1,155 @@
+"""Unit tests for the citizen folder summary read model."""
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.folder_summary import FolderSummaryProjector
+
+
+class FakeSession:
+    """Async session stand-in whose transactions are no-ops."""
+
+    def __init__(self):
+        self.get = AsyncMock(return_value=None)
+        self.execute = AsyncMock()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def begin(self):
+        return self
+
+    def begin_nested(self):
+        return self
+
+
+def make_projector():
+    """Projector with an in-memory applied-event set and recorded deltas."""
+    session = FakeSession()
+    projector = FolderSummaryProjector(session_factory=lambda: session)
+    applied = set()
+    deltas = []
+
+    async def mark_applied(db, event_key, citizen_id):
+        if event_key in applied:
+            return False
+        applied.add(event_key)
+        return True
+
+    async def is_applied(db, event_key):
+        return event_key in applied
+
+    async def apply_delta(db, citizen_id, **delta):
+        deltas.append((citizen_id, delta))
+
+    projector._mark_applied = mark_applied
+    projector._is_applied = is_applied
+    projector._apply_delta = apply_delta
+    return projector, session, deltas
+
+
+@pytest.mark.asyncio
+async def test_get_stats_is_single_primary_key_lookup():
+    """Stats come from one db.get on citizen_folder_summary."""
+    projector = FolderSummaryProjector(session_factory=MagicMock())
+    db = FakeSession()
+    db.get.return_value = SimpleNamespace(
+        total_documents=5,
+        signed_documents=2,
+        worm_locked_documents=2,
+        total_bytes=1024,
+        pending_transfers=1,
+    )
+
+    stats = await projector.get_stats(db, "123")
+
+    assert stats == {
+        "totalDocuments": 5,
+        "signedDocuments": 2,
+        "wormLockedDocuments": 2,
+        "totalBytes": 1024,
+        "pendingTransfers": 1,
+    }
+    db.get.assert_awaited_once()
+    db.execute.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_uploaded_events_are_deduplicated():
+    """Presign and confirm events count the document once and its bytes once."""
+    projector, _, deltas = make_projector()
+    presign = {"event_type": "document.uploaded", "data": {"document_id": "d1", "citizen_id": "123"}}
+    confirm = {
+        "event_type": "document.uploaded",
+        "data": {"document_id": "d1", "citizen_id": "123", "size_bytes": 2048},
+    }
+
+    assert await projector.apply_event(presign) is True
+    assert await projector.apply_event(confirm) is True
+    assert await projector.apply_event(confirm) is False
+
+    assert deltas == [
+        ("123", {"total_documents": 1}),
+        ("123", {"total_bytes": 2048}),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_deleted_event_subtracts_document_counters():
+    """Deleting a signed document decrements every counter it contributed to."""
+    projector, session, deltas = make_projector()
+    result = MagicMock()
+    result.first.return_value = SimpleNamespace(state="SIGNED", worm_locked=True, size_bytes=10)
+    session.execute.return_value = result
+
+    await projector.apply_event(
+        {"event_type": "document.deleted", "data": {"document_id": "d1", "citizen_id": "123"}}
+    )
+
+    assert deltas == [
+        ("123", {
+            "total_documents": -1,
+            "signed_documents": -1,
+            "worm_locked_documents": -1,
+            "total_bytes": -10,
+        }),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_transfer_terminal_before_pending_is_not_counted():
+    """A confirmation overtaking the pending notification leaves the counter at zero."""
+    projector, _, deltas = make_projector()
+
+    assert await projector.apply_event({"transfer_id": "7", "citizen_id": 123, "status": "confirmed"}) is False
+    assert await projector.apply_event({"transfer_id": "7", "citizen_id": 123, "status": "pending"}) is False
+    assert deltas == []
+
+    await projector.apply_event({"transfer_id": "8", "citizen_id": 123, "status": "pending"})
+    await projector.apply_event({"transfer_id": "8", "citizen_id": 123, "status": "failed"})
+    assert deltas == [("123", {"pending_transfers": 1}), ("123", {"pending_transfers": -1})]
+
+
+@pytest.mark.asyncio
+async def test_reconcile_statements_compile_for_postgres():
+    """Reconcile builds set-based INSERT ... SELECT ... ON CONFLICT statements."""
+    projector = FolderSummaryProjector(session_factory=MagicMock())
+    db = FakeSession()
+    from datetime import datetime
+
+    await projector._reconcile_documents(db, datetime.utcnow())
+    await projector._reconcile_transfers(db, datetime.utcnow())
+
+    compiled = [
+        str(call.args[0].compile(dialect=postgresql.dialect()))
+        for call in db.execute.await_args_list
+    ]
+    assert "GROUP BY document_metadata.citizen_id" in compiled[0]
+    assert "ON CONFLICT (citizen_id) DO UPDATE" in compiled[0]
+    assert "FROM transfers" in compiled[2]
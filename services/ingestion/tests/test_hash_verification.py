@@ -0,0 +1,67 @@
+"""Unit tests for streaming hash verification."""
+
+import hashlib
+from unittest.mock import AsyncMock, Mock
+
+import httpx
+import pytest
+
+from app.hash_verification import HashVerificationService
+
+
+BLOB = bytes(range(256)) * 40  # 10240 bytes
+
+
+class RangeTransport(httpx.AsyncBaseTransport):
+    """Serve ranged reads of ``data`` without pre-reading the response body."""
+
+    def __init__(self, data: bytes, ranges: list[str]):
+        self.data = data
+        self.ranges = ranges
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        header = request.headers["Range"]
+        self.ranges.append(header)
+        start, end = (int(x) for x in header.removeprefix("bytes=").split("-"))
+        return httpx.Response(206, stream=httpx.ByteStream(self.data[start:end + 1]))
+
+
+def make_service(data: bytes, chunk_size: int) -> tuple[HashVerificationService, list[str]]:
+    ranges: list[str] = []
+
+    storage_client = Mock()
+    storage_client.generate_presigned_get.return_value = "https://acct/documents/doc.pdf?sig=abc"
+    storage_client.get_blob_properties = AsyncMock(return_value={
+        "size": len(data),
+        "content_type": "application/pdf",
+        "etag": "0x1",
+        "last_modified": None,
+    })
+
+    client = httpx.AsyncClient(transport=RangeTransport(data, ranges))
+    return HashVerificationService(storage_client, http_client=client, chunk_size=chunk_size), ranges
+
+
+@pytest.mark.asyncio
+async def test_verify_document_hash_streams_ranges():
+    """Hash is computed from ranged reads and matches the full content."""
+    service, ranges = make_service(BLOB, chunk_size=4096)
+
+    result = await service.verify_document_hash("doc.pdf", hashlib.sha256(BLOB).hexdigest())
+
+    assert result["verified"] is True
+    assert result["blob_size"] == len(BLOB)
+    assert ranges == ["bytes=0-4095", "bytes=4096-8191", "bytes=8192-10239"]
+    assert result["stats"]["range_requests"] == 3
+    assert result["stats"]["bytes_read"] == len(BLOB)
+
+
+@pytest.mark.asyncio
+async def test_verify_document_integrity_detects_mismatch():
+    """A wrong expected hash is reported as not verified."""
+    service, _ = make_service(BLOB, chunk_size=3000)
+
+    result = await service.verify_document_integrity("doc-1", "doc.pdf", "0" * 64, len(BLOB))
+
+    assert result["verified"] is False
+    assert result["actual_hash"] == hashlib.sha256(BLOB).hexdigest()
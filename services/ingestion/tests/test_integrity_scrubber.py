@@ -0,0 +1,175 @@
+"""Unit tests for bulk integrity scrubbing."""
+
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import pytest
+from sqlalchemy import select
+
+from app.integrity_scrubber import ByteRateLimiter, IntegrityScrubber, JobOwnershipLost, _naive_utc
+from app.models import DocumentMetadata, IntegrityScrubJob, IntegrityScrubResult
+from tests.conftest import requires_db
+
+
+@pytest.mark.asyncio
+async def test_byte_rate_limiter_caps_throughput():
+    """Acquiring beyond the bucket waits for refill."""
+    limiter = ByteRateLimiter(bytes_per_second=1000)
+
+    started = time.monotonic()
+    await limiter.acquire(1000)  # initial burst
+    await limiter.acquire(200)
+
+    assert time.monotonic() - started >= 0.18
+
+
+@pytest.mark.asyncio
+async def test_verify_page_respects_worker_limit():
+    """No more than ``workers`` verifications run at once."""
+    scrubber = IntegrityScrubber(Mock(), Mock(), owner="pod-1", workers=2, bytes_per_second=0)
+    in_flight = 0
+    peak = 0
+
+    async def fake_verify(document_id, blob_name, expected_hash, expected_size):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return {"verified": document_id != "doc-3", "blob_size": 10}
+
+    scrubber.verifier.verify_document_integrity = fake_verify
+    page = [
+        SimpleNamespace(id=f"doc-{i}", blob_name=f"b{i}", sha256_hash="a" * 64, size_bytes=10)
+        for i in range(6)
+    ]
+
+    outcomes = await scrubber._verify_page(page)
+
+    assert peak == 2
+    assert [doc.id for doc, result in outcomes if not result["verified"]] == ["doc-3"]
+
+
+def test_scope_datetimes_are_normalized_to_naive_utc():
+    """Aware bounds compare correctly against naive UTC ``created_at``."""
+    bogota = timezone(timedelta(hours=-5))
+
+    assert _naive_utc(datetime(2024, 1, 1, 19, 0, tzinfo=bogota)) == datetime(2024, 1, 2, 0, 0)
+    assert _naive_utc(datetime(2024, 1, 1, 19, 0)) == datetime(2024, 1, 1, 19, 0)
+    assert _naive_utc(None) is None
+
+
+async def add_documents(session_factory, count, **fields):
+    base = datetime(2024, 1, 1)
+    async with session_factory() as db:
+        for i in range(count):
+            db.add(DocumentMetadata(
+                id=f"doc-{i}", citizen_id="123", title="Doc", filename="doc.pdf",
+                content_type="application/pdf", blob_name=f"blob-{i}", sha256_hash="a" * 64,
+                size_bytes=10, created_at=base + timedelta(minutes=i), **fields,
+            ))
+        await db.commit()
+
+
+async def add_job(session_factory, job_id, owner, age_seconds=0):
+    updated_at = datetime.utcnow() - timedelta(seconds=age_seconds)
+    async with session_factory() as db:
+        db.add(IntegrityScrubJob(
+            id=job_id, status="running", worm_only=False, documents_checked=0, mismatches_found=0,
+            bytes_verified=0, owner=owner, created_at=updated_at, updated_at=updated_at,
+        ))
+        await db.commit()
+
+
+def make_scrubber(session_factory, owner, bad=(), **kwargs):
+    scrubber = IntegrityScrubber(session_factory, Mock(), owner=owner, bytes_per_second=0, **kwargs)
+    checked = []
+
+    async def fake_verify(document_id, blob_name, expected_hash, expected_size):
+        checked.append(document_id)
+        return {"verified": document_id not in bad, "blob_size": 10}
+
+    scrubber.verifier.verify_document_integrity = fake_verify
+    scrubber.start = lambda job_id: None
+    return scrubber, checked
+
+
+@requires_db
+@pytest.mark.asyncio
+async def test_resume_claims_only_stale_or_orphaned_jobs(session_factory):
+    await add_job(session_factory, "stale", owner="pod-dead", age_seconds=900)
+    await add_job(session_factory, "orphan", owner=None)
+    await add_job(session_factory, "busy", owner="pod-2", age_seconds=10)
+    scrubber, _ = make_scrubber(session_factory, "pod-1", stale_after_seconds=600)
+
+    assert sorted(await scrubber.resume_stale_jobs()) == ["orphan", "stale"]
+    async with session_factory() as db:
+        assert (await db.get(IntegrityScrubJob, "busy")).owner == "pod-2"
+
+
+@requires_db
+@pytest.mark.asyncio
+async def test_job_checkpoints_every_page_and_resumes_after_it(session_factory):
+    await add_documents(session_factory, 5)
+    scrubber, checked = make_scrubber(session_factory, "pod-1", bad={"doc-1"}, page_size=2)
+    job = await scrubber.create_job(created_from=datetime(2023, 12, 31, 19, 0, tzinfo=timezone(timedelta(hours=-5))))
+    assert job.created_from == datetime(2024, 1, 1)
+
+    async with session_factory() as db:
+        page = await scrubber._fetch_page(db, job)
+    await scrubber._checkpoint(job.id, page[-1], await scrubber._verify_page(page))
+
+    # A restarted runner continues after the checkpoint
+    checked.clear()
+    await scrubber.run_job(job.id)
+    assert checked == ["doc-2", "doc-3", "doc-4"]
+
+    async with session_factory() as db:
+        job = await db.get(IntegrityScrubJob, job.id)
+        results = (await db.execute(select(IntegrityScrubResult.document_id))).scalars().all()
+    assert (job.status, job.documents_checked, job.mismatches_found) == ("completed", 5, 1)
+    assert (job.last_document_id, job.bytes_verified) == ("doc-4", 50)
+    assert results == ["doc-1"]
+
+
+@requires_db
+@pytest.mark.asyncio
+async def test_reclaimed_job_rejects_old_owner_checkpoint(session_factory):
+    await add_documents(session_factory, 2)
+    await add_job(session_factory, "job", owner="pod-1")
+    old, _ = make_scrubber(session_factory, "pod-1", bad={"doc-0"})
+    new, _ = make_scrubber(session_factory, "pod-2", stale_after_seconds=0)
+
+    async with session_factory() as db:
+        job = await db.get(IntegrityScrubJob, "job")
+        page = await old._fetch_page(db, job)
+    outcomes = await old._verify_page(page)
+    assert await new.resume_stale_jobs() == ["job"]
+
+    with pytest.raises(JobOwnershipLost):
+        await old._checkpoint("job", page[-1], outcomes)
+
+    await old.run_job("job")  # Stops without touching the job
+    async with session_factory() as db:
+        job = await db.get(IntegrityScrubJob, "job")
+        results = (await db.execute(select(IntegrityScrubResult))).scalars().all()
+    assert (job.status, job.documents_checked, job.owner) == ("running", 0, "pod-2")
+    assert results == []
+
+
+@requires_db
+@pytest.mark.asyncio
+async def test_archived_blobs_are_not_scrubbed(session_factory):
+    await add_documents(session_factory, 2)
+    async with session_factory() as db:
+        (await db.get(DocumentMetadata, "doc-0")).lifecycle_tier = "Archive"
+        await db.commit()
+    scrubber, checked = make_scrubber(session_factory, "pod-1")
+
+    job = await scrubber.create_job()
+    await scrubber.run_job(job.id)
+
+    assert checked == ["doc-1"]
@@ -0,0 +1,93 @@
+"""Unit tests for the retention and lifecycle-tier sweeper."""
+
+from datetime import date
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.lifecycle_sweeper import MAX_BATCH_SIZE, LifecycleSweeper
+
+
+def make_row(doc_id, blob_name, sha="a" * 64, is_deleted=False):
+    return SimpleNamespace(
+        id=doc_id, citizen_id="123", blob_name=blob_name, sha256_hash=sha, is_deleted=is_deleted,
+    )
+
+
+def make_db(still_referenced):
+    """Session whose 'still referenced' query returns the given blob names."""
+    referenced = MagicMock()
+    referenced.scalars.return_value.all.return_value = still_referenced
+    db = MagicMock()
+    db.execute = AsyncMock(side_effect=lambda stmt, *a, **k: referenced)
+    return db
+
+
+def test_batch_size_capped_at_blob_batch_limit():
+    sweeper = LifecycleSweeper(MagicMock(), MagicMock(), batch_size=1000)
+    assert sweeper.batch_size == MAX_BATCH_SIZE
+
+
+def test_worm_tags_are_sanitized():
+    """Tag values only keep characters allowed by blob index tags."""
+    tags = LifecycleSweeper.worm_tags("SIGNED", date(2031, 1, 2), "hub#ref?1")
+    assert tags == {
+        "state": "SIGNED",
+        "worm": "true",
+        "retentionUntil": "2031-01-02",
+        "hubRef": "hub_ref_1",
+    }
+
+
+@pytest.mark.asyncio
+async def test_purge_keeps_blobs_still_referenced():
+    """Only blobs no other row references are deleted, in one batch call."""
+    storage = MagicMock()
+    storage.delete_blobs_batch = AsyncMock(side_effect=lambda names: names)
+    sweeper = LifecycleSweeper(MagicMock(), storage)
+    db = make_db(still_referenced=["shared"])
+
+    await sweeper._purge_chunk(db, [make_row("d1", "shared"), make_row("d2", "own"), make_row("d3", "own")])
+
+    storage.delete_blobs_batch.assert_awaited_once_with(["own"])
+
+
+@pytest.mark.asyncio
+async def test_purge_keeps_rows_whose_blob_delete_failed():
+    """A failed sub-request only keeps that blob's rows; the rest of the chunk is purged."""
+    storage = MagicMock()
+    storage.delete_blobs_batch = AsyncMock(return_value=["b1"])
+    sweeper = LifecycleSweeper(MagicMock(), storage)
+    db = make_db(still_referenced=[])
+
+    purged = await sweeper._purge_chunk(db, [make_row("d1", "b1"), make_row("d2", "b2")])
+
+    assert purged == 1
+    storage.delete_blobs_batch.assert_awaited_once_with(["b1", "b2"])
+    row_deletes = [
+        call.args[0] for call in db.execute.await_args_list
+        if call.args[0].is_delete and call.args[0].table.name == "document_metadata"
+    ]
+    assert [stmt.whereclause.right.value for stmt in row_deletes] == [["d1"]]
+
+
+@pytest.mark.asyncio
+async def test_sweep_runs_tiering_when_purge_fails(monkeypatch):
+    """A failing pass is logged and the remaining passes still run."""
+    sweeper = LifecycleSweeper(MagicMock(), MagicMock())
+    lock_conn = MagicMock()
+    lock_conn.execute = AsyncMock(return_value=MagicMock(scalar=MagicMock(return_value=True)))
+    lock_db = MagicMock()
+    lock_db.connection = AsyncMock(return_value=lock_conn)
+    sweeper.session_factory = MagicMock()
+    sweeper.session_factory.return_value.__aenter__ = AsyncMock(return_value=lock_db)
+    sweeper.session_factory.return_value.__aexit__ = AsyncMock(return_value=False)
+    monkeypatch.setattr(sweeper, "apply_worm_tags", AsyncMock(return_value=0))
+    monkeypatch.setattr(sweeper, "purge_expired_unsigned", AsyncMock(side_effect=RuntimeError("boom")))
+    monkeypatch.setattr(sweeper, "move_tier", AsyncMock(return_value=3))
+
+    stats = await sweeper.sweep()
+
+    assert stats == {"worm_tagged": 0, "purged": 0, "moved_to_cool": 3, "moved_to_archive": 3}
+    assert sweeper.move_tier.await_count == 2
@@ -0,0 +1,180 @@
+"""Unit tests for the transactional outbox relay."""
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.models import OutboxEvent
+from app.outbox import OutboxPublishError, OutboxRelay
+from tests.conftest import requires_db
+
+
+class FakeSession:
+    """Async session stand-in whose transactions are no-ops."""
+
+    def __init__(self, rows, updates=1):
+        result = MagicMock()
+        result.scalars.return_value.all.return_value = rows
+        self.execute = AsyncMock(side_effect=[result] + [MagicMock() for _ in range(updates)])
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def begin(self):
+        return self
+
+
+def outbox_row(row_id):
+    return SimpleNamespace(
+        id=row_id,
+        document_id=f"d{row_id}",
+        citizen_id="123",
+        payload={"event_type": "document.uploaded", "data": {"document_id": f"d{row_id}"}},
+    )
+
+
+def compiled(call):
+    return str(call.args[0].compile(dialect=postgresql.dialect()))
+
+
+@pytest.mark.asyncio
+async def test_relay_publishes_batch_and_marks_sent():
+    """Claimed rows go out as one batch with stable message IDs and are marked sent."""
+    session = FakeSession([outbox_row(1), outbox_row(2)])
+    publisher = MagicMock()
+    publisher.publish_outbox_events = AsyncMock(return_value=True)
+    relay = OutboxRelay(session_factory=lambda: session, publisher=publisher, batch_size=10)
+
+    assert await relay.relay_once() == 2
+
+    claim, mark = session.execute.await_args_list
+    assert "FOR UPDATE SKIP LOCKED" in compiled(claim)
+    assert "sent_at IS NULL" in compiled(claim)
+    events = publisher.publish_outbox_events.await_args.args[0]
+    assert [event[3] for event in events] == ["outbox-1", "outbox-2"]
+    assert "SET sent_at" in compiled(mark)
+
+
+@pytest.mark.asyncio
+async def test_unavailable_broker_leaves_rows_untouched():
+    """If nothing goes through, no attempt is counted and the relay backs off."""
+    session = FakeSession([outbox_row(1), outbox_row(2)])
+    publisher = MagicMock()
+    publisher.publish_outbox_events = AsyncMock(return_value=False)
+    publisher.publish_outbox_events_each = AsyncMock(return_value=[False, False])
+    relay = OutboxRelay(session_factory=lambda: session, publisher=publisher)
+
+    with pytest.raises(OutboxPublishError):
+        await relay.relay_once()
+
+    assert session.execute.await_count == 1  # the claim only
+
+
+@pytest.mark.asyncio
+async def test_rejected_batch_is_retried_row_by_row():
+    """One event the broker rejects does not hold back the rest of its batch."""
+    session = FakeSession([outbox_row(1), outbox_row(2), outbox_row(3)], updates=2)
+    publisher = MagicMock()
+    publisher.publish_outbox_events = AsyncMock(return_value=False)
+    publisher.publish_outbox_events_each = AsyncMock(return_value=[True, False, True])
+    relay = OutboxRelay(session_factory=lambda: session, publisher=publisher)
+
+    with pytest.raises(OutboxPublishError):
+        await relay.relay_once()
+
+    assert len(publisher.publish_outbox_events_each.await_args.args[0]) == 3
+    _, sent, failed = session.execute.await_args_list
+    assert sent.args[0].compile().params["id_1"] == [1, 3]
+    assert failed.args[0].compile().params["id_1"] == [2]
+    assert "attempts" in compiled(failed)
+    assert "dead_at=CASE" in compiled(failed)
+
+
+@pytest.mark.asyncio
+async def test_empty_outbox_publishes_nothing():
+    """No unsent rows means no broker call."""
+    session = FakeSession([])
+    publisher = MagicMock()
+    publisher.publish_outbox_events = AsyncMock()
+    relay = OutboxRelay(session_factory=lambda: session, publisher=publisher)
+
+    assert await relay.relay_once() == 0
+    publisher.publish_outbox_events.assert_not_awaited()
+
+
+def add_events(db, *document_ids):
+    for document_id in document_ids:
+        db.add(OutboxEvent(
+            event_type="document.uploaded", document_id=document_id, citizen_id="123",
+            payload={"event_type": "document.uploaded"},
+        ))
+
+
+def poison_publisher():
+    """Broker that accepts every event except the ones of document "poison"."""
+    async def publish(events):
+        return all(document_id != "poison" for _, document_id, _, _ in events)
+
+    async def publish_each(events):
+        return [document_id != "poison" for _, document_id, _, _ in events]
+
+    publisher = MagicMock()
+    publisher.publish_outbox_events = AsyncMock(side_effect=publish)
+    publisher.publish_outbox_events_each = AsyncMock(side_effect=publish_each)
+    return publisher
+
+
+@requires_db
+@pytest.mark.asyncio
+async def test_rejected_event_is_parked_after_max_attempts_and_replayed(session_factory):
+    """A row the broker keeps rejecting is parked, then requeued by replay_dead."""
+    relay = OutboxRelay(session_factory=session_factory, publisher=poison_publisher(), max_attempts=2)
+    async with session_factory() as db:
+        add_events(db, "poison")
+        await db.commit()
+
+    for round_ in range(2):
+        async with session_factory() as db:
+            add_events(db, f"good-{round_}")
+            await db.commit()
+        with pytest.raises(OutboxPublishError):
+            await relay.relay_once()
+    assert await relay.relay_once() == 0
+
+    async with session_factory() as db:
+        rows = {row.document_id: row for row in (await db.execute(select(OutboxEvent))).scalars()}
+    assert rows["good-0"].sent_at is not None and rows["good-1"].sent_at is not None
+    assert (rows["poison"].attempts, rows["poison"].sent_at) == (2, None)
+    assert rows["poison"].dead_at is not None
+
+    relay.publisher = MagicMock(publish_outbox_events=AsyncMock(return_value=True))
+    assert await relay.replay_dead() == 1
+    assert await relay.relay_once() == 1
+
+
+@requires_db
+@pytest.mark.asyncio
+async def test_broker_outage_does_not_use_up_attempts(session_factory):
+    """Failed publishes with nothing going through never park events."""
+    async with session_factory() as db:
+        add_events(db, "a", "b")
+        await db.commit()
+
+    publisher = MagicMock()
+    publisher.publish_outbox_events = AsyncMock(return_value=False)
+    publisher.publish_outbox_events_each = AsyncMock(return_value=[False, False])
+    relay = OutboxRelay(session_factory=session_factory, publisher=publisher, max_attempts=1)
+
+    for _ in range(3):
+        with pytest.raises(OutboxPublishError):
+            await relay.relay_once()
+
+    async with session_factory() as db:
+        rows = (await db.execute(select(OutboxEvent))).scalars().all()
+    assert [(row.attempts, row.dead_at) for row in rows] == [(0, None), (0, None)]
@@ -0,0 +1,203 @@
+"""Unit tests for resumable upload sessions."""
+
+import hashlib
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import HTTPException
+
+from app import upload_sessions as upload_sessions_module
+from app.block_upload import make_block_id
+from app.models import DocumentMetadata
+from app.routers import upload_sessions as upload_sessions_router
+from app.upload_sessions import (
+    UploadSessionError,
+    UploadSessionNotFoundError,
+    UploadSessionService,
+    missing_chunks,
+    received_ranges,
+)
+
+CHUNK = 4
+DATA = b"0123456789"  # 3 chunks: 4 + 4 + 2 bytes
+
+
+class FakeRedis:
+    """Hash-only in-memory Redis with the compare-and-set script."""
+
+    def __init__(self):
+        self.hashes: dict[str, dict[str, str]] = {}
+        self.strings: dict[str, str] = {}
+
+    async def hset(self, key, field=None, value=None, mapping=None):
+        target = self.hashes.setdefault(key, {})
+        if mapping:
+            target.update({k: str(v) for k, v in mapping.items()})
+        if field is not None:
+            target[field] = str(value)
+
+    async def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    async def set(self, key, value, ex=None):
+        self.strings[key] = str(value)
+
+    async def get(self, key):
+        return self.strings.get(key)
+
+    async def expire(self, key, ttl):
+        return True
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.hashes.pop(key, None)
+
+    async def eval(self, script, numkeys, key, expected, new):
+        target = self.hashes.get(key, {})
+        if target.get("hash_offset") == expected:
+            target["hash_offset"] = new
+            return 1
+        return 0
+
+
+@pytest.fixture
+def service():
+    redis = FakeRedis()
+    storage = MagicMock()
+    storage.generate_blob_put_url.return_value = "https://blob/doc?sig=x"
+    storage.delete_blob = AsyncMock()
+    uploader = MagicMock()
+    uploader.stage_block = AsyncMock()
+    uploader.commit_block_list = AsyncMock()
+
+    svc = UploadSessionService(storage, uploader, chunk_size=CHUNK, max_file_size=100)
+    with patch.object(upload_sessions_module, "get_redis_client", AsyncMock(return_value=redis)):
+        yield svc
+
+
+async def create(service, **extra):
+    return await service.create(
+        citizen_id="123",
+        filename="cedula.pdf",
+        content_type="application/pdf",
+        title="Cédula",
+        size_bytes=len(DATA),
+        **extra,
+    )
+
+
+@pytest.mark.asyncio
+async def test_in_order_upload_commits_with_incremental_hash(service):
+    """Chunks sent in order are hashed as they arrive; commit does not re-read the blob."""
+    state = await create(service)
+    session_id = state["session_id"]
+    assert state["total_chunks"] == 3
+
+    for index in range(3):
+        await service.put_chunk(session_id, index, DATA[index * CHUNK:(index + 1) * CHUNK])
+
+    with patch.object(upload_sessions_module.HashVerificationService, "stream_sha256", AsyncMock()) as stream:
+        result = await service.commit(session_id)
+
+    assert result["sha256_hash"] == hashlib.sha256(DATA).hexdigest()
+    assert result["size_bytes"] == len(DATA)
+    assert result["hash_source"] == "incremental"
+    stream.assert_not_awaited()
+    service.uploader.commit_block_list.assert_awaited_once_with(
+        "https://blob/doc?sig=x",
+        [make_block_id(0), make_block_id(1), make_block_id(2)],
+        "application/pdf",
+    )
+
+
+@pytest.mark.asyncio
+async def test_resume_reports_missing_ranges_and_falls_back_to_streamed_hash(service):
+    """An interrupted upload only resends missing chunks; a broken hash chain is recomputed."""
+    session_id = (await create(service))["session_id"]
+    await service.put_chunk(session_id, 0, DATA[0:4])
+    state = await service.put_chunk(session_id, 2, DATA[8:10])
+
+    assert received_ranges(state) == [(0, 4), (8, 10)]
+    assert missing_chunks(state) == [1]
+
+    with pytest.raises(UploadSessionError) as exc:
+        await service.commit(session_id)
+    assert exc.value.status_code == 409
+
+    # A new pod without the running hasher resumes the upload
+    service._hashers.clear()
+    await service.put_chunk(session_id, 1, DATA[4:8])
+    assert service.uploader.stage_block.await_count == 3
+
+    digest = hashlib.sha256(DATA).hexdigest()
+    with patch.object(
+        upload_sessions_module.HashVerificationService,
+        "stream_sha256",
+        AsyncMock(return_value={"sha256": digest}),
+    ) as stream:
+        result = await service.commit(session_id)
+
+    assert result["sha256_hash"] == digest
+    assert result["hash_source"] == "stream"
+    stream.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_chunk_length_and_index_are_validated(service):
+    """Every chunk but the last must be exactly chunk_size bytes."""
+    session_id = (await create(service))["session_id"]
+
+    with pytest.raises(UploadSessionError) as exc:
+        await service.put_chunk(session_id, 0, b"01")
+    assert exc.value.status_code == 400
+
+    with pytest.raises(UploadSessionError) as exc:
+        await service.put_chunk(session_id, 3, b"0")
+    assert exc.value.status_code == 416
+
+    service.uploader.stage_block.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_declared_hash_mismatch_rejects_commit(service):
+    """A declared SHA-256 that does not match the received bytes fails the commit."""
+    session_id = (await create(service, sha256="f" * 64))["session_id"]
+    for index in range(3):
+        await service.put_chunk(session_id, index, DATA[index * CHUNK:(index + 1) * CHUNK])
+
+    with pytest.raises(UploadSessionError) as exc:
+        await service.commit(session_id)
+
+    assert exc.value.status_code == 422
+    service.storage_client.delete_blob.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_commit_retry_after_completion_returns_the_document(service, monkeypatch):
+    """A client that lost the commit response gets the recorded document, not a 404."""
+    state = await create(service)
+    session_id, doc_id = state["session_id"], state["document_id"]
+    await service.complete(session_id, doc_id)
+
+    with pytest.raises(UploadSessionNotFoundError):
+        await service.get(session_id)
+    assert await service.committed_document(session_id) == doc_id
+
+    metadata = DocumentMetadata(
+        id=doc_id, filename="cedula.pdf", size_bytes=len(DATA), sha256_hash="a" * 64
+    )
+    db = MagicMock()
+    db.get = AsyncMock(return_value=metadata)
+    monkeypatch.setattr(upload_sessions_router, "upload_sessions", service)
+
+    response = await upload_sessions_router.commit_upload_session(session_id, db)
+
+    assert response.document_id == doc_id
+    assert response.sha256_hash == "a" * 64
+    db.get.assert_awaited_once_with(DocumentMetadata, doc_id)
+    service.uploader.commit_block_list.assert_not_awaited()
+
+    # Unknown sessions are still 404
+    with pytest.raises(HTTPException) as exc:
+        await upload_sessions_router.commit_upload_session("missing", db)
+    assert exc.value.status_code == 404
@@ -29,6 +29,9 @@ from app.models import (
 )
 from app.sanitizer import DataSanitizer, AuditLogger
 from app.hub_rate_limiter import HubRateLimiter
+from app.hub_retry_queue import HubRetryQueue
+from app.hub_scheduler import PRIORITY_BULK, HubCallScheduler, HubScheduleTimeout
+from app.operator_directory import OperatorDirectory, OperatorFetchError
 from app.telemetry import HubTelemetry
 from app.redis_client import RedisClient
 
@@ -42,6 +45,20 @@ except ImportError:
     CIRCUIT_BREAKER_AVAILABLE = False
     logger.warning("⚠️  Circuit breaker not available")
 
+try:
+    from carpeta_common.idempotency import IdempotencyInProgress, IdempotencyStore, IdempotentResponse
+    IDEMPOTENCY_AVAILABLE = True
+except ImportError:
+    IDEMPOTENCY_AVAILABLE = False
+    logger.warning("⚠️  Idempotency store not available")
+
+try:
+    from carpeta_common.redis_client import get_json, get_redis_client, set_json
+    REDIS_CACHE_AVAILABLE = True
+except ImportError:
+    REDIS_CACHE_AVAILABLE = False
+    logger.warning("⚠️  Redis cache not available")
+
 try:
     from opentelemetry import metrics, trace
     OTEL_AVAILABLE = True
@@ -67,15 +84,53 @@ class MinTICClient:
             limits=httpx.Limits(max_keepalive_connections=5, max_connections=10)
         )
         
-        # Hub rate limiter (protect public hub from saturation)
+        # Hub rate limiter (protect public hub from saturation) and the
+        # scheduler that makes callers wait for its tokens by priority
         self.hub_rate_limiter = HubRateLimiter(
             requests_per_minute=settings.hub_rate_limit_per_minute,
-            enabled=settings.hub_rate_limit_enabled
+            enabled=settings.hub_rate_limit_enabled,
+            burst=settings.hub_rate_limit_burst
+        )
+        self.hub_scheduler = HubCallScheduler(
+            self.hub_rate_limiter,
+            default_timeout=settings.hub_schedule_timeout_seconds,
+            interactive_reserve=settings.hub_interactive_reserve
         )
         
         # Redis client for caching
         self.redis_client = RedisClient(settings)
         
+        # Terminal hub responses replayed to repeated operations. The
+        # in-progress marker covers the longest hub slot wait plus the call,
+        # so a duplicate cannot claim the key while the first one is queued.
+        self.idempotency = IdempotencyStore(
+            namespace="hub",
+            in_progress_ttl_seconds=int(
+                max(settings.hub_bulk_schedule_timeout_seconds, settings.hub_schedule_timeout_seconds)
+                + settings.request_timeout
+                + 30
+            ),
+        ) if IDEMPOTENCY_AVAILABLE else None
+        
+        # Operator directory (in-process snapshot, refreshed in the background)
+        self.operator_directory = OperatorDirectory(
+            fetch_operators=self._fetch_operators_from_hub,
+            refresh_seconds=settings.operator_directory_refresh_seconds,
+            max_stale_seconds=settings.operator_directory_max_stale_seconds,
+        )
+        
+        # Delayed retries of hub operations that could not be made
+        self.retry_queue = HubRetryQueue(
+            self,
+            batch_size=settings.hub_retry_batch_size,
+            base_delay_seconds=settings.hub_retry_base_delay_seconds,
+            max_delay_seconds=settings.hub_retry_max_delay_seconds,
+            max_attempts=settings.hub_retry_max_attempts,
+        )
+        
+        # In-flight validateCitizen calls, shared by concurrent callers (single-flight)
+        self._validation_flights: dict[int, asyncio.Future] = {}
+        
         # Circuit breakers per endpoint
         self.circuit_breakers = {}
         if CIRCUIT_BREAKER_AVAILABLE:
@@ -230,84 +285,82 @@ class MinTICClient:
         # Don't retry 2xx, 3xx, 4xx
         return False
     
-    async def _check_idempotency(self, key: str) -> Optional[MinTICResponse]:
-        """Check if operation was already executed (idempotency).
+    @staticmethod
+    def _is_terminal(result: MinTICResponse) -> bool:
+        """Hub answers worth replaying (2xx, 204, 501); 5xx and 202 (queued) are retried instead."""
+        return (result.ok and result.status != 202) or result.status in [204, 501]
+    
+    async def _acquire_hub_slot(self, endpoint: str, priority: Optional[int] = None) -> bool:
+        """Wait for a hub call slot (shared token bucket, by priority).
         
-        Args:
-            key: Idempotency key (e.g., hub:registerCitizen:123)
-            
         Returns:
-            Cached response if exists and was successful, None otherwise
+            False if no slot was granted before the caller's deadline
         """
+        timeout = (
+            self.settings.hub_bulk_schedule_timeout_seconds
+            if priority == PRIORITY_BULK or (priority is None and endpoint == "authenticateDocument")
+            else self.settings.hub_schedule_timeout_seconds
+        )
         try:
-            from carpeta_common.redis_client import get_json
-            
-            cached = await get_json(key)
-            if cached:
-                # Check if previous call was terminal (2xx, 204, 501)
-                status = cached.get('status', 0)
-                
-                if 200 <= status < 300 or status in [204, 501]:
-                    logger.info(
-                        f"🔁 Idempotency: Operation already executed with status {status}, "
-                        f"returning cached result"
-                    )
-                    return MinTICResponse(**cached)
-            
-            return None
-            
-        except ImportError:
-            logger.debug("carpeta_common not available, idempotency disabled")
-            return None
-        except Exception as e:
-            logger.warning(f"⚠️  Idempotency check failed: {e}")
-            return None
+            await self.hub_scheduler.acquire(endpoint, priority=priority, timeout=timeout)
+            return True
+        except HubScheduleTimeout:
+            return False
     
-    async def _save_idempotent_result(self, key: str, result: MinTICResponse, ttl: int = 900):
-        """Save operation result for idempotency.
+    async def _idempotent(self, key: str, ttl: int, call) -> MinTICResponse:
+        """Execute a hub operation once per key and replay its terminal result.
+        
+        Concurrent duplicates (e.g. from another pod) wait for the first call
+        instead of hitting the hub again.
         
         Args:
-            key: Idempotency key
-            result: Operation result
-            ttl: Time to live in seconds (default 900s = 15min)
+            key: Idempotency key (e.g., registerCitizen:123)
+            ttl: How long the result is replayed, in seconds
+            call: Coroutine function performing the hub call
+            
+        Returns:
+            Hub result, or the stored result of the original call
         """
+        if self.idempotency is None:
+            return await call()
+        
+        async def _run() -> IdempotentResponse:
+            result = await call()
+            return IdempotentResponse(result.status, result.model_dump())
+        
         try:
-            from carpeta_common.redis_client import set_json
-            
-            # Only cache terminal statuses (2xx, 204, 501)
-            if result.ok or result.status in [204, 501]:
-                await set_json(key, result.model_dump(), ttl=ttl)
-                logger.debug(f"💾 Saved idempotent result: {key} (TTL={ttl}s)")
-        except ImportError:
-            pass  # Idempotency disabled without Redis
-        except Exception as e:
-            logger.warning(f"⚠️  Failed to save idempotent result: {e}")
+            response = await self.idempotency.run(
+                key,
+                _run,
+                wait_seconds=self.settings.hub_idempotency_wait_seconds,
+                ttl_seconds=ttl,
+                should_store=lambda response: self._is_terminal(MinTICResponse(**response.body)),
+            )
+        except IdempotencyInProgress:
+            # Not a result: the caller must retry (and must not record success)
+            logger.info(f"🔁 Idempotency: {key} still in progress on another request")
+            return MinTICResponse(
+                ok=False,
+                status=409,
+                message="Operation already in progress, retry later",
+                data={"in_progress": True, "retryable": True}
+            )
+        
+        return MinTICResponse(**response.body)
     
     async def _enqueue_for_retry(self, operation: str, payload: dict):
-        """Enqueue operation for later retry when circuit breaker is OPEN.
+        """Enqueue operation for later retry (circuit breaker OPEN, no hub slot).
         
         Args:
             operation: Operation name
             payload: Request payload
         """
-        try:
-            from carpeta_common.message_broker import publish_event
-            from datetime import datetime
-            
-            await publish_event(
-                event_type=f"hub.{operation}.queued",
-                queue_name="hub-retry-queue",
-                payload={
-                    "operation": operation,
-                    "data": payload,
-                    "queued_at": datetime.utcnow().isoformat()
-                }
-            )
-            logger.info(f"📨 Operation queued for retry: {operation}")
-        except ImportError:
-            logger.warning("⚠️  Message broker not available, cannot queue operation")
-        except Exception as e:
-            logger.error(f"❌ Failed to queue operation: {e}")
+        await self.retry_queue.enqueue(operation, payload)
+    
+    def _circuit_open(self, endpoint: str) -> bool:
+        """Whether the endpoint's circuit breaker is OPEN."""
+        cb = self.circuit_breakers.get(endpoint)
+        return bool(cb and cb.state == CircuitBreakerState.OPEN)
     
     def _record_metrics(self, endpoint: str, duration: float, status: int, success: bool):
         """Record metrics for hub call.
@@ -346,38 +399,30 @@ class MinTICClient:
         wait=wait_exponential(multiplier=2, min=1, max=10) + wait_random(0, 2),
         reraise=True
     )
-    async def register_citizen(self, request: RegisterCitizenRequest) -> MinTICResponse:
+    async def register_citizen(
+        self, request: RegisterCitizenRequest, priority: Optional[int] = None
+    ) -> MinTICResponse:
         """Register citizen in MinTIC Hub with full functionality.
 
         POST /apis/registerCitizen
         Responses:
         - 201: Ciudadano registrado exitosamente
+        - 202: Queued for retry (circuit open or no hub slot in time)
+        - 409: Same operation in progress elsewhere (not sent; retry later)
         - 501: Error - ciudadano ya existe
         - 500: Application Error
+        
+        Args:
+            request: Citizen to register
+            priority: Hub scheduling priority (defaults to interactive)
         """
         endpoint_name = "registerCitizen"
         
-        # Check hub rate limit
-        allowed, remaining = await self.hub_rate_limiter.check_limit(endpoint_name)
-        if not allowed:
-            logger.warning(f"⚠️  Hub rate limit EXCEEDED for {endpoint_name}")
-            return MinTICResponse(
-                ok=True,
-                status=202,
-                message=f"Hub rate limit exceeded ({self.settings.hub_rate_limit_per_minute} req/min), operation queued for retry",
-                data={"queued": True, "reason": "rate_limit", "remaining": remaining}
-            )
-        
-        # Check idempotency
-        idempotency_key = f"hub:registerCitizen:{request.id}"
-        cached = await self._check_idempotency(idempotency_key)
-        if cached:
-            return cached
-        
         # Check circuit breaker
         cb = self.circuit_breakers.get(endpoint_name)
         if cb and cb.state == CircuitBreakerState.OPEN:
             logger.warning(f"⚠️  Circuit breaker OPEN for {endpoint_name}")
+            await self._enqueue_for_retry(endpoint_name, request.model_dump())
             return MinTICResponse(
                 ok=True,
                 status=202,
@@ -385,49 +430,63 @@ class MinTICClient:
                 data={"queued": True, "reason": "circuit_breaker"}
             )
         
-        try:
-            logger.info(f"📤 Calling hub registerCitizen: id={request.id}, operator={request.operatorId}")
-            
-            # Execute with circuit breaker
-            async def _call():
-                response = await self.client.post(
-                    "/apis/registerCitizen",
-                    json=request.model_dump(),
+        async def _execute() -> MinTICResponse:
+            # Wait for a hub call slot (replayed duplicates never get here)
+            if not await self._acquire_hub_slot(endpoint_name, priority):
+                logger.warning(f"⚠️  No hub slot for {endpoint_name} in time")
+                await self._enqueue_for_retry(endpoint_name, request.model_dump())
+                return MinTICResponse(
+                    ok=True,
+                    status=202,
+                    message=f"Hub rate limit exceeded ({self.settings.hub_rate_limit_per_minute} req/min), operation queued for retry",
+                    data={"queued": True, "reason": "rate_limit"}
                 )
+            
+            try:
+                logger.info(f"📤 Calling hub registerCitizen: id={request.id}, operator={request.operatorId}")
                 
-                # Only treat 5xx as errors, not 4xx or specific codes like 501
-                if 500 <= response.status_code < 600 and response.status_code != 501:
-                    raise httpx.HTTPStatusError(
-                        f"Hub returned {response.status_code}",
-                        request=response.request,
-                        response=response
+                # Execute with circuit breaker
+                async def _call():
+                    response = await self.client.post(
+                        "/apis/registerCitizen",
+                        json=request.model_dump(),
                     )
+                    
+                    # Only treat 5xx as errors, not 4xx or specific codes like 501
+                    if 500 <= response.status_code < 600 and response.status_code != 501:
+                        raise httpx.HTTPStatusError(
+                            f"Hub returned {response.status_code}",
+                            request=response.request,
+                            response=response
+                        )
+                    
+                    return response
                 
-                return response
-            
-            # Call with circuit breaker
-            if cb:
-                response = await cb.call(_call)
-            else:
-                response = await _call()
-            
-            result = self._parse_response(response)
-            
-            if result.status == 201:
-                logger.info(f"✅ Citizen {request.id} registered in hub")
-            elif result.status == 501:
-                logger.warning(f"⚠️  Citizen {request.id} already exists: {result.message}")
-            else:
-                logger.error(f"❌ Hub error: {result.status} - {result.message}")
-            
-            # Save for idempotency (TTL: 15 minutes)
-            await self._save_idempotent_result(idempotency_key, result, ttl=900)
-            
-            return result
-            
-        except (httpx.TimeoutException, httpx.ConnectError) as e:
-            logger.error(f"❌ Hub communication error: {e}")
-            raise  # Let retry decorator handle it
+                # Call with circuit breaker
+                if cb:
+                    response = await cb.call(_call)
+                else:
+                    response = await _call()
+                
+                result = self._parse_response(response)
+                
+                if result.status in [201, 501]:
+                    await self._invalidate_validation(request.id)
+                
+                if result.status == 201:
+                    logger.info(f"✅ Citizen {request.id} registered in hub")
+                elif result.status == 501:
+                    logger.warning(f"⚠️  Citizen {request.id} already exists: {result.message}")
+                else:
+                    logger.error(f"❌ Hub error: {result.status} - {result.message}")
+                
+                return result
+                
+            except (httpx.TimeoutException, httpx.ConnectError) as e:
+                logger.error(f"❌ Hub communication error: {e}")
+                raise  # Let retry decorator handle it
+
+        return await self._idempotent(f"registerCitizen:{request.id}", 900, _execute)
 
     @retry(
         retry=retry_if_result(_should_retry.__func__) | retry_if_exception_type((httpx.TimeoutException, httpx.ConnectError)),
@@ -436,59 +495,59 @@ class MinTICClient:
         reraise=True
     )
     async def unregister_citizen(
-        self, request: UnregisterCitizenRequest
+        self, request: UnregisterCitizenRequest, priority: Optional[int] = None
     ) -> MinTICResponse:
         """Unregister citizen from MinTIC Hub with idempotency.
 
         DELETE /apis/unregisterCitizen
         Responses:
         - 201: Deleted
+        - 202: Queued for retry (no hub slot in time)
+        - 409: Same operation in progress elsewhere (not sent; retry later)
         - 204: No Content (sin contenido)
         - 501: Error (no retry)
         - 500: Application Error (retry)
+        
+        Args:
+            request: Citizen to unregister
+            priority: Hub scheduling priority (defaults to normal)
         """
         endpoint_name = "unregisterCitizen"
         
-        # Check hub rate limit
-        allowed, remaining = await self.hub_rate_limiter.check_limit(endpoint_name)
-        if not allowed:
-            logger.warning(f"⚠️  Hub rate limit EXCEEDED for {endpoint_name}")
-            await self._enqueue_for_retry(endpoint_name, request.model_dump())
-            return MinTICResponse(
-                ok=True,
-                status=202,
-                message="Hub rate limit exceeded, operation queued",
-                data={"queued": True, "reason": "rate_limit"}
-            )
-        
-        # Check idempotency
-        idempotency_key = f"hub:unregisterCitizen:{request.id}"
-        cached = await self._check_idempotency(idempotency_key)
-        if cached:
-            return cached
-        
-        try:
-            response = await self.client.request(
-                "DELETE",
-                "/apis/unregisterCitizen",
-                json=request.model_dump(),
-            )
-            
-            result = self._parse_response(response)
-            
-            if result.ok:
-                logger.info(f"✅ Citizen {request.id} unregistered from hub")
-            else:
-                logger.warning(f"⚠️  Unregister failed: {result.status} - {result.message}")
-            
-            # Save for idempotency (TTL: 5 minutes)
-            await self._save_idempotent_result(idempotency_key, result, ttl=300)
-            
-            return result
+        async def _execute() -> MinTICResponse:
+            # Wait for a hub call slot (replayed duplicates never get here)
+            if not await self._acquire_hub_slot(endpoint_name, priority):
+                logger.warning(f"⚠️  No hub slot for {endpoint_name} in time")
+                await self._enqueue_for_retry(endpoint_name, request.model_dump())
+                return MinTICResponse(
+                    ok=True,
+                    status=202,
+                    message="Hub rate limit exceeded, operation queued",
+                    data={"queued": True, "reason": "rate_limit"}
+                )
             
-        except (httpx.TimeoutException, httpx.ConnectError) as e:
-            logger.error(f"❌ Hub communication error: {e}")
-            raise  # Let retry decorator handle it
+            try:
+                response = await self.client.request(
+                    "DELETE",
+                    "/apis/unregisterCitizen",
+                    json=request.model_dump(),
+                )
+                
+                result = self._parse_response(response)
+                
+                if result.ok:
+                    await self._invalidate_validation(request.id)
+                    logger.info(f"✅ Citizen {request.id} unregistered from hub")
+                else:
+                    logger.warning(f"⚠️  Unregister failed: {result.status} - {result.message}")
+                
+                return result
+                
+            except (httpx.TimeoutException, httpx.ConnectError) as e:
+                logger.error(f"❌ Hub communication error: {e}")
+                raise  # Let retry decorator handle it
+
+        return await self._idempotent(f"unregisterCitizen:{request.id}", 300, _execute)
 
     @retry(
         retry=retry_if_result(_should_retry.__func__) | retry_if_exception_type((httpx.TimeoutException, httpx.ConnectError)),
@@ -497,7 +556,7 @@ class MinTICClient:
         reraise=True
     )
     async def authenticate_document(
-        self, request: AuthenticateDocumentRequest
+        self, request: AuthenticateDocumentRequest, priority: Optional[int] = None
     ) -> MinTICResponse:
         """Authenticate document in MinTIC Hub with idempotency.
 
@@ -505,76 +564,170 @@ class MinTICClient:
         Responses:
         - 200: Documento autenticado exitosamente
         - 204: No Content (sin contenido)
+        - 429: No hub slot in time (not sent; retry later)
+        - 409: Same operation in progress elsewhere (not sent; retry later)
         - 501: Error de parámetros (no retry)
         - 500: Application Error (retry)
+        
+        Args:
+            request: Document to authenticate
+            priority: Hub scheduling priority (defaults to bulk; pass
+                PRIORITY_INTERACTIVE when a user is waiting)
         """
-        # Check idempotency (use document URL hash for key)
+        # Idempotency key from the document URL hash
         # Note: We could use document_id, but using citizen_id for grouping
-        import hashlib
         url_hash = hashlib.sha256(request.UrlDocument.encode()).hexdigest()[:16]
-        idempotency_key = f"hub:authdoc:{request.idCitizen}:{url_hash}"
         
-        cached = await self._check_idempotency(idempotency_key)
-        if cached:
-            return cached
-        
-        try:
-            # Sanitize data (minimal: only citizen_id, URL, title)
-            sanitized_data = DataSanitizer.sanitize_authenticate_document(request.model_dump())
-            
-            # Masked log (don't expose full citizen ID or URL in logs)
-            masked_id = DataSanitizer.mask_pii(str(request.idCitizen), show_chars=4)
-            masked_url = DataSanitizer.mask_pii(request.UrlDocument, show_chars=20)
-            logger.info(
-                f"📤 Calling hub authenticateDocument: "
-                f"citizen={masked_id}, url={masked_url}, title={request.documentTitle}"
-            )
-            
-            response = await self.client.put(
-                "/apis/authenticateDocument",
-                json=sanitized_data,  # Send only required fields
-            )
-            
-            result = self._parse_response(response)
-            
-            # Audit log
-            await AuditLogger.log_hub_call(
-                operation="authenticateDocument",
-                sanitized_payload=sanitized_data,
-                response_status=result.status,
-                response_message=result.message
-            )
-            
-            if result.ok:
-                logger.info(f"✅ Document authenticated for citizen {masked_id}")
-            else:
-                logger.warning(f"⚠️  Authentication failed: {result.status} - {result.message}")
-            
-            # Save for idempotency (TTL: 15 minutes)
-            await self._save_idempotent_result(idempotency_key, result, ttl=900)
-            
-            return result
+        async def _execute() -> MinTICResponse:
+            if not await self._acquire_hub_slot("authenticateDocument", priority):
+                return MinTICResponse(
+                    ok=False,
+                    status=429,
+                    message="Hub rate limit exceeded, try again later",
+                    data={"reason": "rate_limit"}
+                )
             
-        except (httpx.TimeoutException, httpx.ConnectError) as e:
-            logger.error(f"❌ Hub communication error: {e}")
-            raise  # Let retry decorator handle it
+            try:
+                # Sanitize data (minimal: only citizen_id, URL, title)
+                sanitized_data = DataSanitizer.sanitize_authenticate_document(request.model_dump())
+                
+                # Masked log (don't expose full citizen ID or URL in logs)
+                masked_id = DataSanitizer.mask_pii(str(request.idCitizen), show_chars=4)
+                masked_url = DataSanitizer.mask_pii(request.UrlDocument, show_chars=20)
+                logger.info(
+                    f"📤 Calling hub authenticateDocument: "
+                    f"citizen={masked_id}, url={masked_url}, title={request.documentTitle}"
+                )
+                
+                response = await self.client.put(
+                    "/apis/authenticateDocument",
+                    json=sanitized_data,  # Send only required fields
+                )
+                
+                result = self._parse_response(response)
+                
+                # Audit log
+                await AuditLogger.log_hub_call(
+                    operation="authenticateDocument",
+                    sanitized_payload=sanitized_data,
+                    response_status=result.status,
+                    response_message=result.message
+                )
+                
+                if result.ok:
+                    logger.info(f"✅ Document authenticated for citizen {masked_id}")
+                else:
+                    logger.warning(f"⚠️  Authentication failed: {result.status} - {result.message}")
+                
+                return result
+                
+            except (httpx.TimeoutException, httpx.ConnectError) as e:
+                logger.error(f"❌ Hub communication error: {e}")
+                raise  # Let retry decorator handle it
 
-    @retry(
-        retry=retry_if_result(_should_retry.__func__) | retry_if_exception_type((httpx.TimeoutException, httpx.ConnectError)),
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=2, min=1, max=10) + wait_random(0, 2),
-        reraise=True
-    )
+        return await self._idempotent(f"authdoc:{request.idCitizen}:{url_hash}", 900, _execute)
+
+    @staticmethod
+    def _validation_cache_key(citizen_id: int) -> str:
+        return f"mintic:validateCitizen:{citizen_id}"
+    
     async def validate_citizen(self, citizen_id: int) -> MinTICResponse:
-        """Validate citizen in MinTIC Hub.
+        """Validate citizen in MinTIC Hub (cached, single-flight).
 
         GET /apis/validateCitizen/{id}
+        
+        Features:
+        - Redis result cache shared by all pods; 200 and 204 answers are
+          cached with separate TTLs and dropped on register/unregister
+        - Concurrent validations of the same citizen share one hub call
+        
         Responses:
         - 200: Citizen exists and is valid
         - 204: Citizen not found (sin contenido)
         - 501: Invalid ID format (no retry)
         - 500: Application Error (retry)
         """
+        cached = await self._get_cached_validation(citizen_id)
+        if cached is not None:
+            return cached
+        
+        flight = self._validation_flights.get(citizen_id)
+        if flight is None:
+            flight = asyncio.ensure_future(self._validate_and_cache(citizen_id))
+            self._validation_flights[citizen_id] = flight
+            flight.add_done_callback(lambda done: self._end_validation_flight(citizen_id, done))
+        else:
+            logger.info(f"🔗 Validation of citizen {citizen_id} joined in-flight hub call")
+        
+        # Shielded: a cancelled caller must not cancel the call others wait for
+        return await asyncio.shield(flight)
+    
+    def _end_validation_flight(self, citizen_id: int, flight: asyncio.Future) -> None:
+        if self._validation_flights.get(citizen_id) is flight:
+            del self._validation_flights[citizen_id]
+        if not flight.cancelled():
+            flight.exception()  # Retrieved: waiters may all be gone
+    
+    async def _get_cached_validation(self, citizen_id: int) -> Optional[MinTICResponse]:
+        if not REDIS_CACHE_AVAILABLE:
+            return None
+        try:
+            cached = await get_json(self._validation_cache_key(citizen_id))
+        except Exception as e:
+            logger.warning(f"⚠️  Validation cache read failed: {e}")
+            return None
+        if cached is None:
+            return None
+        logger.info(f"📦 Cache HIT: validateCitizen {citizen_id} ({cached['status']})")
+        return MinTICResponse(**cached)
+    
+    async def _validate_and_cache(self, citizen_id: int) -> MinTICResponse:
+        flight = asyncio.current_task()
+        result = await self._call_validate_citizen(citizen_id)
+        
+        if result.status == 200:
+            ttl = self.settings.hub_validation_cache_ttl_seconds
+        elif result.status == 204:
+            ttl = self.settings.hub_validation_negative_ttl_seconds
+        else:
+            return result
+        
+        # Invalidated while in flight (citizen registered/unregistered): don't cache
+        if REDIS_CACHE_AVAILABLE and self._validation_flights.get(citizen_id) is flight:
+            try:
+                await set_json(self._validation_cache_key(citizen_id), result.model_dump(), ttl=ttl)
+            except Exception as e:
+                logger.warning(f"⚠️  Validation cache write failed: {e}")
+        
+        return result
+    
+    async def _invalidate_validation(self, citizen_id: int) -> None:
+        """Drop the cached validation of a citizen whose hub registration changed."""
+        self._validation_flights.pop(citizen_id, None)
+        if not REDIS_CACHE_AVAILABLE:
+            return
+        try:
+            client = await get_redis_client()
+            await client.delete(self._validation_cache_key(citizen_id))
+        except Exception as e:
+            logger.warning(f"⚠️  Validation cache invalidation failed: {e}")
+
+    @retry(
+        retry=retry_if_result(_should_retry.__func__) | retry_if_exception_type((httpx.TimeoutException, httpx.ConnectError)),
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=2, min=1, max=10) + wait_random(0, 2),
+        reraise=True
+    )
+    async def _call_validate_citizen(self, citizen_id: int) -> MinTICResponse:
+        """GET /apis/validateCitizen/{id} (with retries)."""
+        if not await self._acquire_hub_slot("validateCitizen"):
+            return MinTICResponse(
+                ok=False,
+                status=429,
+                message="Hub rate limit exceeded, try again later",
+                data={"reason": "rate_limit"}
+            )
+        
         try:
             response = await self.client.get(f"/apis/validateCitizen/{citizen_id}")
             
@@ -731,13 +884,13 @@ class MinTICClient:
             return None
     
     async def get_operators(self) -> tuple[list[OperatorInfo], MinTICResponse]:
-        """Get all operators from MinTIC Hub with Redis cache and anti-stampede.
+        """Get all operators from the operator directory.
         
-        GET /apis/getOperators
+        GET /apis/getOperators (through OperatorDirectory)
         
         Features:
-        - Redis cache (300s TTL)
-        - Anti-stampede pattern (single-flight with locks)
+        - Served from the in-process snapshot, refreshed in the background
+        - Stale operators kept while the hub is down or its circuit is open
         - Normalizes operator data (tolerates missing fields)
         - Filters operators without transferAPIURL
         - Validates https:// in production
@@ -745,124 +898,87 @@ class MinTICClient:
         Responses:
         - 200: List of operators (JSON array)
         - 204: No operators (sin contenido)
-        - 500: Application Error (retry)
+        - 503: Directory never loaded and hub unavailable
         """
-        cache_key = "mintic:operators"
-        lock_key = "lock:mintic:operators"
+        snapshot = await self.operator_directory.ensure_loaded()
         
-        # Try cache first
-        try:
-            from carpeta_common.redis_client import get_json, set_json, acquire_lock, release_lock
-            
-            # Check cache
-            cached = await get_json(cache_key)
-            if cached:
-                logger.info(f"📦 Cache HIT: {cache_key} ({len(cached)} operators)")
-                
-                # Parse from cache
-                operators = [OperatorInfo(**op) for op in cached]
-                
-                return operators, MinTICResponse(
-                    ok=True,
-                    status=200,
-                    message=f"Retrieved from cache ({len(operators)} operators)",
-                    data=cached
-                )
-        except ImportError:
-            logger.warning("⚠️  carpeta_common not available, cache disabled")
-        except Exception as e:
-            logger.warning(f"⚠️  Cache read failed: {e}")
+        if snapshot is None:
+            return [], MinTICResponse(
+                ok=False,
+                status=503,
+                message="Operator directory unavailable (hub unreachable)"
+            )
         
-        # Cache miss or error - fetch from hub with anti-stampede lock
-        lock_token = None
+        if not snapshot.operators:
+            return [], MinTICResponse(ok=True, status=204, message="Sin contenido")
         
-        try:
-            from carpeta_common.redis_client import acquire_lock, release_lock
-            
-            # Try to acquire lock (only one pod fetches)
-            lock_token = await acquire_lock(lock_key, ttl=10)
-            
-            if not lock_token:
-                # Another pod is fetching, wait and retry cache
-                logger.info("🔒 Another pod is fetching operators, waiting...")
-                await asyncio.sleep(1)
-                
-                # Check cache again
-                try:
-                    cached = await get_json(cache_key)
-                    if cached:
-                        logger.info(f"📦 Cache populated by other pod ({len(cached)} operators)")
-                        operators = [OperatorInfo(**op) for op in cached]
-                        return operators, MinTICResponse(
-                            ok=True,
-                            status=200,
-                            message="Retrieved from cache (waited for other pod)",
-                            data=cached
-                        )
-                except Exception:
-                    pass
-                
-                # If still no cache, fetch ourselves
-                logger.info("⚠️  Cache still empty, fetching anyway")
+        return list(snapshot.operators), MinTICResponse(
+            ok=True,
+            status=200,
+            message=f"Operator directory ({len(snapshot.operators)} operators, {int(snapshot.age)}s old)",
+            data=snapshot.payload
+        )
+    
+    def get_operator(self, operator_id: str) -> Optional[OperatorInfo]:
+        """Operator by ID from the operator directory (no I/O)."""
+        return self.operator_directory.get(operator_id)
+    
+    @retry(
+        retry=retry_if_exception_type((httpx.TimeoutException, httpx.ConnectError)),
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=2, min=1, max=10) + wait_random(0, 2),
+        reraise=True
+    )
+    async def _fetch_operators_from_hub(self) -> list[OperatorInfo]:
+        """Fetch and normalize operators from the hub (OperatorDirectory source).
         
-        except ImportError:
-            pass  # No anti-stampede without Redis
-        except Exception as e:
-            logger.warning(f"⚠️  Lock acquisition failed: {e}")
+        Raises:
+            OperatorFetchError: Circuit open or unexpected hub answer
+        """
+        endpoint_name = "getOperators"
         
-        # Fetch from hub
-        try:
+        cb = self.circuit_breakers.get(endpoint_name)
+        if cb and cb.state == CircuitBreakerState.OPEN:
+            raise OperatorFetchError(f"Circuit breaker OPEN for {endpoint_name}")
+        
+        if not await self._acquire_hub_slot(endpoint_name):
+            raise OperatorFetchError(f"No hub slot for {endpoint_name} in time")
+        
+        async def _call():
             response = await self.client.get("/apis/getOperators")
-            
-            result = self._parse_response(response)
-            
-            if result.ok and result.data and isinstance(result.data, list):
-                # Normalize and filter operators
-                normalized_operators = []
-                
-                for raw_op in result.data:
-                    normalized = self._normalize_operator(raw_op)
-                    if normalized:
-                        normalized_operators.append(normalized)
-                    # else: filtered out (logged in _normalize_operator)
-                
-                logger.info(
-                    f"✅ Retrieved {len(result.data)} operators from hub, "
-                    f"{len(normalized_operators)} valid after filtering"
+            if 500 <= response.status_code < 600:
+                raise httpx.HTTPStatusError(
+                    f"Hub returned {response.status_code}",
+                    request=response.request,
+                    response=response
                 )
-                
-                # Cache valid operators
-                try:
-                    from carpeta_common.redis_client import set_json
-                    
-                    cache_data = [op.model_dump() for op in normalized_operators]
-                    await set_json(cache_key, cache_data, ttl=300)
-                    logger.info(f"💾 Cached {len(normalized_operators)} operators (TTL=300s)")
-                except Exception as e:
-                    logger.warning(f"⚠️  Failed to cache operators: {e}")
-                
-                return normalized_operators, result
-                
-            elif result.status == 204:
-                # No operators
-                logger.info("ℹ️  No operators found (204 No Content)")
-                return [], result
-            else:
-                logger.warning(f"⚠️  Get operators failed: {result.status} - {result.message}")
-                return [], result
-                
+            return response
+        
+        try:
+            response = await cb.call(_call) if cb else await _call()
         except (httpx.TimeoutException, httpx.ConnectError) as e:
             logger.error(f"❌ Hub communication error: {e}")
-            raise  # Let retry decorator handle it (handled by outer retry decorator)
-        
-        finally:
-            # Release lock if acquired
-            if lock_token:
-                try:
-                    from carpeta_common.redis_client import release_lock
-                    await release_lock(lock_key, lock_token)
-                except Exception as e:
-                    logger.warning(f"⚠️  Lock release failed: {e}")
+            raise  # Let retry decorator handle it
+        
+        result = self._parse_response(response)
+        
+        if result.status == 204:
+            logger.info("ℹ️  No operators found (204 No Content)")
+            return []
+        
+        if not (result.ok and isinstance(result.data, list)):
+            raise OperatorFetchError(f"Get operators failed: {result.status} - {result.message}")
+        
+        # Normalize and filter operators (invalid ones are logged in _normalize_operator)
+        normalized_operators = [
+            normalized for normalized in map(self._normalize_operator, result.data) if normalized
+        ]
+        
+        logger.info(
+            f"✅ Retrieved {len(result.data)} operators from hub, "
+            f"{len(normalized_operators)} valid after filtering"
+        )
+        return normalized_operators
 
     # New methods for enhanced MinTIC Hub integration
 
@@ -892,40 +1008,39 @@ class MinTICClient:
             if document_ids:
                 local_documents = [doc for doc in local_documents if doc.get('id') in document_ids]
             
-            synced_count = 0
-            failed_count = 0
-            details = []
-            
-            # Sync each document with hub
-            for document in local_documents:
-                try:
-                    # Authenticate document with hub
-                    auth_request = AuthenticateDocumentRequest(
-                        idCitizen=int(citizen_id),
-                        UrlDocument=document.get('download_url', ''),
-                        documentTitle=document.get('title', 'Documento')
-                    )
-                    
-                    result = await self.authenticate_document(auth_request)
-                    
-                    if result.success:
-                        synced_count += 1
-                        details.append(f"Document {document.get('id')} synced successfully")
-                        
-                        # Update document status in local system
-                        await self._update_document_status(
-                            document.get('id'), 
-                            'synced', 
-                            {'hub_response': result.data}
+            semaphore = asyncio.Semaphore(self.settings.document_sync_workers)
+            
+            async def sync_document(document: dict) -> tuple[bool, str]:
+                async with semaphore:
+                    try:
+                        # Authenticate document with hub
+                        auth_request = AuthenticateDocumentRequest(
+                            idCitizen=int(citizen_id),
+                            UrlDocument=document.get('download_url', ''),
+                            documentTitle=document.get('title', 'Documento')
                         )
-                    else:
-                        failed_count += 1
-                        details.append(f"Document {document.get('id')} sync failed: {result.message}")
                         
-                except Exception as e:
-                    failed_count += 1
-                    details.append(f"Document {document.get('id')} sync error: {str(e)}")
-                    logger.error(f"Document sync error: {e}")
+                        result = await self.authenticate_document(auth_request)
+                        
+                        if result.success:
+                            # Update document status in local system
+                            await self._update_document_status(
+                                document.get('id'), 
+                                'synced', 
+                                {'hub_response': result.data}
+                            )
+                            return True, f"Document {document.get('id')} synced successfully"
+                        return False, f"Document {document.get('id')} sync failed: {result.message}"
+                            
+                    except Exception as e:
+                        logger.error(f"Document sync error: {e}")
+                        return False, f"Document {document.get('id')} sync error: {str(e)}"
+            
+            # Sync documents with hub concurrently (paced by the hub scheduler)
+            outcomes = await asyncio.gather(*(sync_document(document) for document in local_documents))
+            synced_count = sum(1 for synced, _ in outcomes if synced)
+            failed_count = len(outcomes) - synced_count
+            details = [detail for _, detail in outcomes]
             
             # Update sync status in cache
             cache_key = f"sync_status:{citizen_id}"
@@ -1128,8 +1243,13 @@ class MinTICClient:
                 }
             }
 
-    async def _get_local_citizen_documents(self, citizen_id: str) -> list[dict]:
-        """Get citizen documents from local system."""
+    async def _get_local_citizen_documents(self, citizen_id: str, raise_errors: bool = False) -> list[dict]:
+        """Get citizen documents from local system.
+
+        Returns an empty list if the metadata service fails, unless
+        ``raise_errors`` is set (callers that must not mistake an outage for
+        a citizen without documents).
+        """
         try:
             # Call metadata service to get citizen documents
             metadata_url = f"{self.settings.metadata_url}/api/documents/citizen/{citizen_id}"
@@ -1156,6 +1276,8 @@ class MinTICClient:
                 
         except Exception as e:
             logger.error(f"Failed to get local documents for citizen {citizen_id}: {e}")
+            if raise_errors:
+                raise
             # Return empty list on error
             return []
 
@@ -1218,8 +1340,14 @@ class MinTICClient:
         except Exception as e:
             logger.error(f"Failed to handle transfer completion: {e}")
 
-    async def _update_document_status(self, document_id: str, status: str, result: dict) -> None:
-        """Update document status in local system."""
+    async def _update_document_status(
+        self,
+        document_id: str,
+        status: str,
+        result: dict,
+        raise_errors: bool = False
+    ) -> None:
+        """Update document status in local system (errors are only logged unless ``raise_errors``)."""
         try:
             # Call metadata service to update document status
             metadata_url = f"{self.settings.metadata_url}/api/documents/{document_id}/status"
@@ -1236,6 +1364,8 @@ class MinTICClient:
                 
         except Exception as e:
             logger.error(f"Failed to update document status: {e}")
+            if raise_errors:
+                raise
 
     async def _update_citizen_data(self, citizen_id: str, update_type: str, data: dict) -> None:
         """Update citizen data in local system."""
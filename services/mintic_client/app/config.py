@@ -45,12 +45,113 @@ class Settings(BaseSettings):
     # Hub rate limiting (protect public hub from saturation)
     hub_rate_limit_per_minute: int = Field(default=10, alias="HUB_RATE_LIMIT_PER_MINUTE")
     hub_rate_limit_enabled: bool = Field(default=True, alias="HUB_RATE_LIMIT_ENABLED")
+    hub_rate_limit_burst: int = Field(
+        default=3,
+        alias="HUB_RATE_LIMIT_BURST",
+        description="Hub calls per endpoint allowed back to back (token bucket capacity)"
+    )
+    hub_interactive_reserve: float = Field(
+        default=1.0,
+        alias="HUB_INTERACTIVE_RESERVE",
+        description="Tokens non-interactive hub calls must leave for interactive ones"
+    )
+    hub_schedule_timeout_seconds: float = Field(
+        default=10.0,
+        alias="HUB_SCHEDULE_TIMEOUT_SECONDS",
+        description="How long interactive and normal hub calls wait for a slot"
+    )
+    hub_bulk_schedule_timeout_seconds: float = Field(
+        default=120.0,
+        alias="HUB_BULK_SCHEDULE_TIMEOUT_SECONDS",
+        description="How long bulk hub calls (document syncs) wait for a slot"
+    )
+    
+    # Hub call idempotency (duplicate calls replay the first call's result)
+    hub_idempotency_wait_seconds: float = Field(
+        default=5.0,
+        alias="HUB_IDEMPOTENCY_WAIT_SECONDS",
+        description="How long a duplicate hub call waits for an in-progress one"
+    )
+    
+    # validateCitizen result cache (shared by all pods)
+    hub_validation_cache_ttl_seconds: int = Field(
+        default=300,
+        alias="HUB_VALIDATION_CACHE_TTL_SECONDS",
+        description="How long a positive (200) validateCitizen answer is cached"
+    )
+    hub_validation_negative_ttl_seconds: int = Field(
+        default=60,
+        alias="HUB_VALIDATION_NEGATIVE_TTL_SECONDS",
+        description="How long a negative (204) validateCitizen answer is cached"
+    )
+    
+    # Operator directory (getOperators snapshot)
+    operator_directory_refresh_seconds: float = Field(
+        default=240.0,
+        alias="OPERATOR_DIRECTORY_REFRESH_SECONDS",
+        description="Snapshot age at which the operator directory is refreshed from the hub"
+    )
+    operator_directory_max_stale_seconds: int = Field(
+        default=86400,
+        alias="OPERATOR_DIRECTORY_MAX_STALE_SECONDS",
+        description="How long the last snapshot is kept (served while the hub is down)"
+    )
+    
+    # Delayed retries of hub operations (Redis, drained by every pod)
+    hub_retry_batch_size: int = Field(
+        default=10,
+        alias="HUB_RETRY_BATCH_SIZE",
+        description="Queued hub operations run per drain before polling again"
+    )
+    hub_retry_base_delay_seconds: float = Field(
+        default=5.0,
+        alias="HUB_RETRY_BASE_DELAY_SECONDS",
+        description="Backoff after the first failed retry (doubles each attempt, jittered)"
+    )
+    hub_retry_max_delay_seconds: float = Field(
+        default=900.0,
+        alias="HUB_RETRY_MAX_DELAY_SECONDS",
+        description="Backoff cap between retries"
+    )
+    hub_retry_max_attempts: int = Field(
+        default=8,
+        alias="HUB_RETRY_MAX_ATTEMPTS",
+        description="Retries before a hub operation is dead-lettered"
+    )
+    
+    # Bulk document sync jobs (authenticateDocument at bulk priority)
+    document_sync_workers: int = Field(
+        default=4,
+        alias="DOCUMENT_SYNC_WORKERS",
+        description="Documents in flight per sync job (the hub rate budget sets the actual pace)"
+    )
+    document_sync_page_size: int = Field(
+        default=50,
+        alias="DOCUMENT_SYNC_PAGE_SIZE",
+        description="Documents synced between checkpoints"
+    )
+    document_sync_max_attempts: int = Field(
+        default=3,
+        alias="DOCUMENT_SYNC_MAX_ATTEMPTS",
+        description="Attempts before a document is marked failed"
+    )
+    document_sync_stale_after_seconds: int = Field(
+        default=600,
+        alias="DOCUMENT_SYNC_STALE_AFTER_SECONDS",
+        description="Running jobs without progress for this long are resumed by another pod"
+    )
+    document_sync_reclaim_interval_seconds: int = Field(
+        default=60,
+        alias="DOCUMENT_SYNC_RECLAIM_INTERVAL_SECONDS",
+        description="How often each pod looks for stale document sync jobs to resume"
+    )
     
     # Internal service URLs (development local)
     citizen_url: str = Field(default="http://localhost:8000", alias="CITIZEN_URL")
     transfer_url: str = Field(default="http://localhost:8002", alias="TRANSFER_URL")
     signature_url: str = Field(default="http://localhost:8003", alias="SIGNATURE_URL")
     document_url: str = Field(default="http://localhost:8004", alias="DOCUMENT_URL")
+    metadata_url: str = Field(default="http://localhost:8004", alias="METADATA_URL")
     
     # Hub URL (alias for mintic_base_url)
     hub_url: str = Field(default="https://mock-mintic-hub.example.com", alias="HUB_URL")
@@ -1,7 +1,7 @@
 """Database models for MinTIC Client service."""
 
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Index, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
@@ -24,3 +24,60 @@ class Operator(Base):
     
     def __repr__(self):
         return f"<Operator(id={self.id}, mintic_id='{self.mintic_operator_id}', name='{self.name}')>"
+
+
+class DocumentSyncJob(Base):
+    """Bulk document sync (hub authenticateDocument) job with resumable checkpoint."""
+    
+    __tablename__ = "document_sync_jobs"
+    
+    id = Column(String(255), primary_key=True)
+    status = Column(String(20), nullable=False, default="running", index=True)  # running | completed | failed | cancelled
+    
+    # Scope
+    citizen_ids = Column(Text, nullable=False)  # JSON list of citizen IDs, in processing order
+    document_ids = Column(Text, nullable=True)  # JSON list: only these documents
+    document_statuses = Column(Text, nullable=True)  # JSON list: only documents in these local statuses
+    
+    # Checkpoint: citizens whose documents are already listed in document_sync_items
+    citizens_expanded = Column(Integer, nullable=False, default=0)
+    
+    # Progress counters
+    documents_total = Column(Integer, nullable=False, default=0)
+    documents_synced = Column(Integer, nullable=False, default=0)
+    documents_failed = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    
+    # Pod currently running the job (used to resume stale jobs after restart)
+    owner = Column(String(255), nullable=True)
+    
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    completed_at = Column(DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f"<DocumentSyncJob(id='{self.id}', status='{self.status}')>"
+
+
+class DocumentSyncItem(Base):
+    """Per-document outcome of a bulk document sync job."""
+    
+    __tablename__ = "document_sync_items"
+    __table_args__ = (
+        UniqueConstraint("job_id", "document_id", name="uq_document_sync_items_job_document"),
+        Index("ix_document_sync_items_job_status", "job_id", "status", "id"),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    job_id = Column(String(255), nullable=False)
+    citizen_id = Column(String(20), nullable=False)
+    document_id = Column(String(255), nullable=False)
+    title = Column(String(255), nullable=True)
+    status = Column(String(20), nullable=False, default="pending")  # pending | synced | failed
+    attempts = Column(Integer, nullable=False, default=0)
+    hub_status = Column(Integer, nullable=True)
+    error = Column(Text, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f"<DocumentSyncItem(job_id='{self.job_id}', document_id='{self.document_id}', status='{self.status}')>"
@@ -0,0 +1,464 @@
+"""Bulk document sync (hub authenticateDocument) jobs.
+
+A job covers a list of citizens. Their documents are listed from the metadata
+service a page of citizens at a time into ``document_sync_items``, then
+authenticated through a bounded worker pool at bulk priority, so the calls
+queue behind interactive ones in the hub scheduler and never exceed the hub
+rate budget. Each page's outcomes and counters are checkpointed in one
+transaction, so a job resumes where it stopped after a restart.
+
+Every write is fenced on the job's owner: a pod that stalled long enough for
+another pod to reclaim its job finds its next write rejected and stops
+instead of double-syncing. The owner keeps ``updated_at`` fresh while a page
+is in flight, and every pod periodically reclaims jobs whose owner went quiet.
+"""
+
+import asyncio
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any, Optional
+from uuid import uuid4
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database_models import DocumentSyncItem, DocumentSyncJob
+from app.hub_scheduler import PRIORITY_BULK
+from app.models import AuthenticateDocumentRequest
+
+if TYPE_CHECKING:
+    from app.client import MinTICClient
+
+logger = logging.getLogger(__name__)
+
+# Hub outcomes that say "not now" rather than "failed": 429 (no hub slot in
+# time) and 409 (same call in progress elsewhere). Requeued without an attempt.
+REQUEUE_STATUSES = (409, 429)
+
+
+class JobOwnershipLost(Exception):
+    """A fenced write matched no row: the job was cancelled, finished or reclaimed."""
+
+
+class DocumentSyncRunner:
+    """Run and resume bulk document sync jobs."""
+
+    def __init__(
+        self,
+        client: "MinTICClient",
+        session_factory: sessionmaker,
+        owner: str,
+        workers: int = 4,
+        page_size: int = 50,
+        max_attempts: int = 3,
+        stale_after_seconds: int = 600,
+        reclaim_interval_seconds: float = 60.0,
+    ):
+        """
+        Initialize runner.
+
+        Args:
+            client: MinTIC client (hub calls, metadata lookups)
+            session_factory: Async session factory
+            owner: Identifier of this pod (used to claim jobs)
+            workers: Max documents in flight (the hub scheduler sets the actual pace)
+            page_size: Documents synced (and citizens listed) per checkpoint
+            max_attempts: Attempts before a retryable failure becomes final
+            stale_after_seconds: Running jobs without progress for this long are resumed
+            reclaim_interval_seconds: How often stale jobs are looked for
+        """
+        self.client = client
+        self.session_factory = session_factory
+        self.owner = owner
+        self.workers = workers
+        self.page_size = page_size
+        self.max_attempts = max_attempts
+        self.stale_after_seconds = stale_after_seconds
+        self.reclaim_interval_seconds = reclaim_interval_seconds
+        # Touch in-flight jobs well before they look stale to other pods
+        self.heartbeat_seconds = max(stale_after_seconds / 4, 1)
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._reclaimer: Optional[asyncio.Task] = None
+
+    # -- job lifecycle -----------------------------------------------------
+
+    async def create_job(
+        self,
+        citizen_ids: list[str],
+        document_ids: Optional[list[str]] = None,
+        document_statuses: Optional[list[str]] = None,
+        job_id: Optional[str] = None,
+    ) -> Optional[DocumentSyncJob]:
+        """
+        Persist a new job and start it in the background.
+
+        Returns:
+            The job, or None if a job with ``job_id`` already exists
+        """
+        job_id = job_id or str(uuid4())
+
+        async with self.session_factory() as db:
+            result = await db.execute(
+                pg_insert(DocumentSyncJob)
+                .values(
+                    id=job_id,
+                    status="running",
+                    citizen_ids=json.dumps(list(dict.fromkeys(citizen_ids))),
+                    document_ids=json.dumps(document_ids) if document_ids else None,
+                    document_statuses=json.dumps(document_statuses) if document_statuses else None,
+                    citizens_expanded=0,
+                    documents_total=0,
+                    documents_synced=0,
+                    documents_failed=0,
+                    owner=self.owner,
+                    created_at=datetime.utcnow(),
+                    updated_at=datetime.utcnow(),
+                )
+                .on_conflict_do_nothing(index_elements=[DocumentSyncJob.id])
+                .returning(DocumentSyncJob.id)
+            )
+            inserted = result.scalar_one_or_none()
+            await db.commit()
+
+            if inserted is None:
+                return None
+
+            job = await db.get(DocumentSyncJob, job_id)
+
+        logger.info(f"🚀 Created document sync job {job_id} ({len(citizen_ids)} citizens)")
+        self.start(job_id)
+        return job
+
+    def start(self, job_id: str) -> None:
+        """Run a job in the background on this pod."""
+        if job_id in self._tasks:
+            return
+
+        task = asyncio.create_task(self.run_job(job_id))
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+
+    async def cancel_job(self, job_id: str) -> bool:
+        """Mark a job as cancelled; its runner stops after the current page."""
+        async with self.session_factory() as db:
+            result = await db.execute(
+                update(DocumentSyncJob)
+                .where(DocumentSyncJob.id == job_id)
+                .where(DocumentSyncJob.status == "running")
+                .values(status="cancelled", completed_at=datetime.utcnow())
+            )
+            await db.commit()
+        return result.rowcount > 0
+
+    async def resume_stale_jobs(self) -> list[str]:
+        """Claim and resume running jobs that lost their owner."""
+        threshold = datetime.utcnow() - timedelta(seconds=self.stale_after_seconds)
+
+        async with self.session_factory() as db:
+            result = await db.execute(
+                update(DocumentSyncJob)
+                .where(DocumentSyncJob.status == "running")
+                .where(
+                    or_(
+                        DocumentSyncJob.owner.is_(None),
+                        DocumentSyncJob.owner == self.owner,
+                        DocumentSyncJob.updated_at < threshold,
+                    )
+                )
+                .values(owner=self.owner, updated_at=datetime.utcnow())
+                .returning(DocumentSyncJob.id)
+            )
+            job_ids = list(result.scalars().all())
+            await db.commit()
+
+        for job_id in job_ids:
+            logger.info(f"🔁 Resuming document sync job {job_id}")
+            self.start(job_id)
+
+        return job_ids
+
+    async def start_reclaimer(self) -> None:
+        """Resume stale jobs now and then periodically in the background."""
+        if self._reclaimer is None:
+            self._reclaimer = asyncio.create_task(self._reclaim_loop())
+
+    async def _reclaim_loop(self) -> None:
+        while True:
+            try:
+                await self.resume_stale_jobs()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️  Document sync jobs not resumed: {e}")
+            await asyncio.sleep(self.reclaim_interval_seconds)
+
+    async def shutdown(self) -> None:
+        """Stop local runners and release job ownership for other pods."""
+        if self._reclaimer is not None:
+            self._reclaimer.cancel()
+            await asyncio.gather(self._reclaimer, return_exceptions=True)
+            self._reclaimer = None
+
+        job_ids = list(self._tasks)
+        for task in list(self._tasks.values()):
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+        if not job_ids:
+            return
+
+        try:
+            async with self.session_factory() as db:
+                await db.execute(
+                    update(DocumentSyncJob)
+                    .where(DocumentSyncJob.id.in_(job_ids))
+                    .where(DocumentSyncJob.owner == self.owner)
+                    .values(owner=None)
+                )
+                await db.commit()
+        except Exception as e:
+            logger.error(f"❌ Failed to release document sync jobs: {e}")
+
+    # -- execution ---------------------------------------------------------
+
+    async def run_job(self, job_id: str) -> None:
+        """Process a job page by page until done, cancelled or failed."""
+        try:
+            while True:
+                async with self.session_factory() as db:
+                    job = await db.get(DocumentSyncJob, job_id)
+                    if job is None or job.status != "running" or job.owner != self.owner:
+                        return
+                    page = await self._fetch_pending(db, job_id)
+
+                # List the next citizens' documents once the known ones run low
+                citizen_ids = json.loads(job.citizen_ids)
+                if len(page) < self.page_size and job.citizens_expanded < len(citizen_ids):
+                    await self._expand_citizens(job, citizen_ids)
+                    continue
+
+                if not page:
+                    await self._finish(job_id, "completed")
+                    logger.info(f"✅ Document sync job {job_id} completed")
+                    return
+
+                outcomes = await self._sync_page_owned(job_id, page)
+                await self._checkpoint(job_id, outcomes)
+        except asyncio.CancelledError:
+            raise
+        except JobOwnershipLost:
+            logger.warning(f"⚠️  Document sync job {job_id} no longer owned by {self.owner}, stopping")
+        except Exception as e:
+            logger.error(f"❌ Document sync job {job_id} failed: {e}")
+            await self._finish(job_id, "failed", error=str(e))
+
+    def _owned(self, job_id: str):
+        """UPDATE of a job, fenced on it still running under this owner."""
+        return (
+            update(DocumentSyncJob)
+            .where(DocumentSyncJob.id == job_id)
+            .where(DocumentSyncJob.status == "running")
+            .where(DocumentSyncJob.owner == self.owner)
+        )
+
+    async def _touch(self, job_id: str) -> None:
+        """Refresh ``updated_at`` so other pods do not reclaim the job."""
+        async with self.session_factory() as db:
+            result = await db.execute(
+                self._owned(job_id).values(updated_at=datetime.utcnow()).returning(DocumentSyncJob.id)
+            )
+            if result.scalar_one_or_none() is None:
+                await db.rollback()
+                raise JobOwnershipLost(job_id)
+            await db.commit()
+
+    async def _fetch_pending(self, db, job_id: str) -> list[Any]:
+        """Next page of pending documents (fresh ones before retries)."""
+        result = await db.execute(
+            select(
+                DocumentSyncItem.id,
+                DocumentSyncItem.citizen_id,
+                DocumentSyncItem.document_id,
+                DocumentSyncItem.title,
+                DocumentSyncItem.attempts,
+            )
+            .where(DocumentSyncItem.job_id == job_id)
+            .where(DocumentSyncItem.status == "pending")
+            .order_by(DocumentSyncItem.attempts, DocumentSyncItem.id)
+            .limit(self.page_size)
+        )
+        return list(result.all())
+
+    async def _expand_citizens(self, job: DocumentSyncJob, citizen_ids: list[str]) -> None:
+        """List documents of the next page of citizens into sync items."""
+        citizens = citizen_ids[job.citizens_expanded:job.citizens_expanded + self.page_size]
+        document_ids = set(json.loads(job.document_ids)) if job.document_ids else None
+        statuses = set(json.loads(job.document_statuses)) if job.document_statuses else None
+        semaphore = asyncio.Semaphore(self.workers)
+
+        async def list_documents(citizen_id: str) -> tuple[str, list[dict]]:
+            async with semaphore:
+                # A metadata outage fails the job instead of skipping these citizens
+                return citizen_id, await self.client._get_local_citizen_documents(citizen_id, raise_errors=True)
+
+        listed = await asyncio.gather(*(list_documents(citizen_id) for citizen_id in citizens))
+        rows = [
+            {
+                "job_id": job.id,
+                "citizen_id": citizen_id,
+                "document_id": str(doc["id"]),
+                "title": (doc.get("title") or "Documento")[:255],
+                "status": "pending",
+                "attempts": 0,
+                "updated_at": datetime.utcnow(),
+            }
+            for citizen_id, documents in listed
+            for doc in documents
+            if doc.get("id")
+            and (document_ids is None or str(doc["id"]) in document_ids)
+            and (statuses is None or doc.get("status") in statuses)
+        ]
+
+        async with self.session_factory() as db:
+            inserted = 0
+            if rows:
+                result = await db.execute(
+                    pg_insert(DocumentSyncItem)
+                    .values(rows)
+                    .on_conflict_do_nothing(constraint="uq_document_sync_items_job_document")
+                    .returning(DocumentSyncItem.id)
+                )
+                inserted = len(result.scalars().all())
+            result = await db.execute(
+                self._owned(job.id)
+                .where(DocumentSyncJob.citizens_expanded == job.citizens_expanded)
+                .values(
+                    citizens_expanded=DocumentSyncJob.citizens_expanded + len(citizens),
+                    documents_total=DocumentSyncJob.documents_total + inserted,
+                    updated_at=datetime.utcnow(),
+                )
+                .returning(DocumentSyncJob.id)
+            )
+            if result.scalar_one_or_none() is None:
+                await db.rollback()
+                raise JobOwnershipLost(job.id)
+            await db.commit()
+
+        logger.info(f"📋 Document sync job {job.id}: {inserted} documents from {len(citizens)} citizens")
+
+    async def _sync_page_owned(self, job_id: str, page: list[Any]) -> list[tuple[Any, dict[str, Any]]]:
+        """Sync a page while heartbeating the job; abandon it if ownership is lost."""
+        sync = asyncio.create_task(self._sync_page(page))
+        try:
+            while True:
+                done, _ = await asyncio.wait({sync}, timeout=self.heartbeat_seconds)
+                if done:
+                    return sync.result()
+                await self._touch(job_id)
+        finally:
+            sync.cancel()
+
+    async def _sync_page(self, page: list[Any]) -> list[tuple[Any, dict[str, Any]]]:
+        """Authenticate a page of documents with at most ``workers`` in flight."""
+        semaphore = asyncio.Semaphore(self.workers)
+
+        async def sync(item: Any) -> tuple[Any, dict[str, Any]]:
+            async with semaphore:
+                return item, await self._sync_document(item)
+
+        return await asyncio.gather(*(sync(item) for item in page))
+
+    async def _sync_document(self, item: Any) -> dict[str, Any]:
+        """Authenticate one document; returns its new status, hub status and error."""
+        try:
+            url = await self.client._get_document_sas_url(item.document_id)
+            result = await self.client.authenticate_document(
+                AuthenticateDocumentRequest(
+                    idCitizen=int(item.citizen_id),
+                    UrlDocument=url,
+                    documentTitle=item.title or "Documento",
+                ),
+                priority=PRIORITY_BULK,
+            )
+        except Exception as e:
+            return self._retry_or_fail(item, None, str(e))
+
+        if result.status in (204, 501):
+            # Hub answered but did not authenticate (no content / parameter error)
+            return {"status": "failed", "hub_status": result.status, "error": result.message}
+
+        if self.client._is_terminal(result):
+            try:
+                await self.client._update_document_status(
+                    item.document_id, "synced", {"hub_response": result.data}, raise_errors=True
+                )
+            except Exception as e:
+                # Authenticated but not recorded locally: retry rather than report it synced
+                return self._retry_or_fail(item, result.status, f"Document status update failed: {e}")
+            return {"status": "synced", "hub_status": result.status, "error": None}
+
+        if result.status in REQUEUE_STATUSES:
+            return {"status": "pending", "hub_status": result.status, "error": result.message, "attempt": False}
+
+        # 5xx after retries
+        return self._retry_or_fail(item, result.status, result.message)
+
+    def _retry_or_fail(self, item: Any, hub_status: Optional[int], error: str) -> dict[str, Any]:
+        status = "failed" if item.attempts + 1 >= self.max_attempts else "pending"
+        return {"status": status, "hub_status": hub_status, "error": error}
+
+    async def _checkpoint(self, job_id: str, outcomes: list[tuple[Any, dict[str, Any]]]) -> None:
+        """Store per-document outcomes and advance the counters in one transaction.
+
+        Only items still pending are updated, and the counters only count
+        those, so a page replayed after a reclaim is not counted twice.
+        """
+        synced = failed = 0
+
+        async with self.session_factory() as db:
+            for item, outcome in outcomes:
+                attempts = DocumentSyncItem.attempts + (1 if outcome.get("attempt", True) else 0)
+                result = await db.execute(
+                    update(DocumentSyncItem)
+                    .where(DocumentSyncItem.id == item.id)
+                    .where(DocumentSyncItem.status == "pending")
+                    .values(
+                        status=outcome["status"],
+                        attempts=attempts,
+                        hub_status=outcome["hub_status"],
+                        error=outcome["error"],
+                        updated_at=datetime.utcnow(),
+                    )
+                    .returning(DocumentSyncItem.id)
+                )
+                if result.scalar_one_or_none() is None:
+                    continue
+                synced += outcome["status"] == "synced"
+                failed += outcome["status"] == "failed"
+
+            result = await db.execute(
+                self._owned(job_id)
+                .values(
+                    documents_synced=DocumentSyncJob.documents_synced + synced,
+                    documents_failed=DocumentSyncJob.documents_failed + failed,
+                    updated_at=datetime.utcnow(),
+                )
+                .returning(DocumentSyncJob.id)
+            )
+            if result.scalar_one_or_none() is None:
+                await db.rollback()
+                raise JobOwnershipLost(job_id)
+            await db.commit()
+
+        if failed:
+            logger.warning(f"⚠️  Document sync job {job_id}: {failed} documents failed")
+
+    async def _finish(self, job_id: str, status: str, error: Optional[str] = None) -> None:
+        """Mark a job as finished."""
+        async with self.session_factory() as db:
+            await db.execute(
+                self._owned(job_id).values(status=status, error=error, completed_at=datetime.utcnow())
+            )
+            await db.commit()
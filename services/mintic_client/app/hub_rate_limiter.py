@@ -3,9 +3,9 @@
 CONTEXT:
 - MinTIC hub is PUBLIC (shared by all operators)
 - We MUST NOT saturate it with excessive requests
-- Rate limit per endpoint: 10 req/min (configurable)
-- If limit reached → 202 Accepted + queue for retry
-- If circuit breaker OPEN → 202 Accepted + queue for retry
+- Rate limit per endpoint: 10 req/min (configurable), shared by all pods
+- Callers wait for a token in HubCallScheduler (app.hub_scheduler) instead
+  of being rejected when the budget is momentarily used up
 """
 
 import logging
@@ -19,7 +19,7 @@ try:
     REDIS_AVAILABLE = True
 except ImportError:
     REDIS_AVAILABLE = False
-    logger.warning("⚠️  Redis not available, hub rate limiting disabled")
+    logger.warning("⚠️  Redis not available, hub rate limiting is per-pod")
 
 try:
     from opentelemetry import metrics
@@ -30,162 +30,178 @@ except ImportError:
 
 class HubRateLimiter:
     """Rate limiter specifically for MinTIC hub calls.
-    
+
     Protects the public hub from accidental saturation.
-    Uses sliding window algorithm in Redis.
+    Uses an atomic token bucket per endpoint (Lua script in Redis, shared by
+    all pods): tokens refill continuously at requests_per_minute / 60 per
+    second up to ``burst``, so the quota is used smoothly instead of in
+    per-minute bursts. Falls back to an in-process bucket without Redis.
+    """
+
+    # KEYS[1]: bucket; ARGV: refill rate (tokens/s), capacity, cost, tokens to leave
+    # Returns {allowed, seconds until enough tokens, tokens left}
+    TOKEN_BUCKET_SCRIPT = """
+    local now_parts = redis.call("TIME")
+    local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+    local rate = tonumber(ARGV[1])
+    local capacity = tonumber(ARGV[2])
+    local cost = tonumber(ARGV[3])
+    local reserve = tonumber(ARGV[4])
+
+    local bucket = redis.call("HMGET", KEYS[1], "tokens", "ts")
+    local tokens = tonumber(bucket[1]) or capacity
+    local ts = tonumber(bucket[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+    local allowed = 0
+    local wait = 0
+    if tokens - cost >= reserve then
+        tokens = tokens - cost
+        allowed = 1
+    else
+        wait = (cost + reserve - tokens) / rate
+    end
+
+    redis.call("HSET", KEYS[1], "tokens", tokens, "ts", now)
+    redis.call("EXPIRE", KEYS[1], math.ceil(capacity / rate) + 1)
+    return {allowed, tostring(wait), tostring(tokens)}
     """
-    
-    def __init__(self, requests_per_minute: int = 10, enabled: bool = True):
+
+    def __init__(self, requests_per_minute: int = 10, enabled: bool = True, burst: int = 3):
         """Initialize hub rate limiter.
-        
+
         Args:
             requests_per_minute: Max requests per minute per endpoint
             enabled: Whether rate limiting is enabled
+            burst: Bucket capacity (calls allowed back to back after idling)
         """
         self.requests_per_minute = requests_per_minute
         self.enabled = enabled
-        self.redis_client = None
-        
-        if enabled and REDIS_AVAILABLE:
-            try:
-                self.redis_client = get_redis_client()
-                logger.info(
-                    f"✅ Hub rate limiter initialized: {requests_per_minute} req/min per endpoint"
-                )
-            except Exception as e:
-                logger.warning(f"⚠️  Failed to connect to Redis: {e}")
-                self.enabled = False
+        self.burst = max(burst, 1)
+        self.rate = requests_per_minute / 60.0
+
+        # Per-pod buckets used when Redis is unavailable: endpoint -> (tokens, ts)
+        self._local_buckets: dict[str, tuple[float, float]] = {}
+        self._fallback_logged = False
+
+        if enabled:
+            logger.info(
+                f"✅ Hub rate limiter initialized: {requests_per_minute} req/min per endpoint "
+                f"(burst {self.burst})"
+            )
         else:
             logger.warning("⚠️  Hub rate limiting disabled")
-        
+
         # OpenTelemetry metrics
         if OTEL_AVAILABLE:
             meter = metrics.get_meter(__name__)
             self.rate_limit_exceeded = meter.create_counter(
                 "hub.rate_limit.exceeded",
-                description="Number of hub calls rate limited"
-            )
-            self.rate_limit_remaining = meter.create_up_down_counter(
-                "hub.rate_limit.remaining",
-                description="Remaining hub calls in current window"
+                description="Number of hub calls that had to wait for a token"
             )
-    
-    async def check_limit(self, endpoint: str) -> tuple[bool, int]:
-        """Check if hub call is allowed.
-        
+
+    @staticmethod
+    def _key(endpoint: str) -> str:
+        return f"hub:tokenbucket:{endpoint}"
+
+    async def try_acquire(self, endpoint: str, reserve: float = 0) -> tuple[bool, float]:
+        """Take one token for a hub call if available.
+
         Args:
             endpoint: Hub endpoint name (e.g., "registerCitizen")
-            
+            reserve: Tokens that must remain afterwards (kept for higher priorities)
+
         Returns:
-            Tuple of (allowed: bool, remaining: int)
+            Tuple of (allowed, seconds until a token is expected)
         """
-        if not self.enabled or not self.redis_client:
-            return True, self.requests_per_minute
-        
-        try:
-            # Sliding window key: hub:ratelimit:{endpoint}:{current_minute}
-            current_minute = int(time.time() / 60)
-            key = f"hub:ratelimit:{endpoint}:{current_minute}"
-            
-            # Get current count
-            current_count = await self.redis_client.get(key)
-            if current_count is None:
-                current_count = 0
-            else:
-                current_count = int(current_count)
-            
-            remaining = self.requests_per_minute - current_count
-            
-            # Check if limit exceeded
-            if current_count >= self.requests_per_minute:
-                logger.warning(
-                    f"⚠️  Hub rate limit EXCEEDED for {endpoint}: "
-                    f"{current_count}/{self.requests_per_minute} req/min"
-                )
-                
-                # Record metric
-                if OTEL_AVAILABLE and hasattr(self, 'rate_limit_exceeded'):
-                    self.rate_limit_exceeded.add(1, {"endpoint": endpoint})
-                
-                return False, 0
-            
-            # Increment counter
-            pipe = self.redis_client.pipeline()
-            pipe.incr(key)
-            pipe.expire(key, 60)  # TTL: 60 seconds
-            await pipe.execute()
-            
-            remaining -= 1
-            
-            # Record remaining metric
-            if OTEL_AVAILABLE and hasattr(self, 'rate_limit_remaining'):
-                self.rate_limit_remaining.add(
-                    remaining,
-                    {"endpoint": endpoint}
+        if not self.enabled:
+            return True, 0.0
+
+        if REDIS_AVAILABLE:
+            try:
+                client = await get_redis_client()
+                allowed, wait, _ = await client.eval(
+                    self.TOKEN_BUCKET_SCRIPT,
+                    1,
+                    self._key(endpoint),
+                    self.rate,
+                    self.burst,
+                    1,
+                    reserve,
                 )
-            
-            logger.debug(
-                f"✅ Hub rate limit OK for {endpoint}: "
-                f"{current_count + 1}/{self.requests_per_minute} "
-                f"(remaining: {remaining})"
-            )
-            
-            return True, remaining
-            
-        except Exception as e:
-            logger.error(f"❌ Hub rate limit check failed: {e}")
-            # On error, allow the request (fail open)
-            return True, self.requests_per_minute
-    
+                self._fallback_logged = False
+                return self._record(endpoint, bool(int(allowed)), float(wait))
+            except Exception as e:
+                if not self._fallback_logged:
+                    logger.warning(f"⚠️  Hub rate limiter using local bucket: {e}")
+                    self._fallback_logged = True
+
+        return self._record(endpoint, *self._try_acquire_local(endpoint, reserve))
+
+    def _try_acquire_local(self, endpoint: str, reserve: float) -> tuple[bool, float]:
+        now = time.monotonic()
+        tokens, ts = self._local_buckets.get(endpoint, (float(self.burst), now))
+        tokens = min(self.burst, tokens + (now - ts) * self.rate)
+
+        if tokens - 1 >= reserve:
+            self._local_buckets[endpoint] = (tokens - 1, now)
+            return True, 0.0
+
+        self._local_buckets[endpoint] = (tokens, now)
+        return False, (1 + reserve - tokens) / self.rate
+
+    def _record(self, endpoint: str, allowed: bool, wait: float) -> tuple[bool, float]:
+        if not allowed:
+            logger.debug(f"⏳ Hub rate limit for {endpoint}: next token in {wait:.2f}s")
+            if OTEL_AVAILABLE and hasattr(self, 'rate_limit_exceeded'):
+                self.rate_limit_exceeded.add(1, {"endpoint": endpoint})
+        return allowed, wait
+
     async def get_current_usage(self, endpoint: str) -> dict:
         """Get current rate limit usage for endpoint.
-        
+
         Args:
             endpoint: Hub endpoint name
-            
+
         Returns:
-            Dict with current, limit, remaining, reset_at
+            Dict with limit, burst, available tokens and refill time
         """
-        if not self.enabled or not self.redis_client:
+        if not self.enabled:
             return {
                 "enabled": False,
-                "current": 0,
                 "limit": self.requests_per_minute,
-                "remaining": self.requests_per_minute,
-                "reset_at": None
+                "burst": self.burst,
+                "available": self.burst,
             }
-        
+
+        tokens: Optional[float] = None
         try:
-            current_minute = int(time.time() / 60)
-            key = f"hub:ratelimit:{endpoint}:{current_minute}"
-            
-            current_count = await self.redis_client.get(key)
-            if current_count is None:
-                current_count = 0
-            else:
-                current_count = int(current_count)
-            
-            remaining = max(0, self.requests_per_minute - current_count)
-            reset_at = (current_minute + 1) * 60  # Next minute
-            
-            return {
-                "enabled": True,
-                "endpoint": endpoint,
-                "current": current_count,
-                "limit": self.requests_per_minute,
-                "remaining": remaining,
-                "reset_at": reset_at,
-                "reset_in_seconds": reset_at - int(time.time())
-            }
-            
+            if REDIS_AVAILABLE:
+                client = await get_redis_client()
+                bucket = await client.hmget(self._key(endpoint), "tokens", "ts")
+                if bucket[0] is not None:
+                    elapsed = max(time.time() - float(bucket[1]), 0.0)
+                    tokens = min(self.burst, float(bucket[0]) + elapsed * self.rate)
         except Exception as e:
             logger.error(f"❌ Failed to get hub rate limit usage: {e}")
             return {
                 "enabled": True,
                 "error": str(e),
-                "current": 0,
                 "limit": self.requests_per_minute,
-                "remaining": self.requests_per_minute,
-                "reset_at": None
+                "burst": self.burst,
             }
 
+        if tokens is None and endpoint in self._local_buckets:
+            local_tokens, ts = self._local_buckets[endpoint]
+            tokens = min(self.burst, local_tokens + (time.monotonic() - ts) * self.rate)
+        if tokens is None:
+            tokens = float(self.burst)
+
+        return {
+            "enabled": True,
+            "endpoint": endpoint,
+            "limit": self.requests_per_minute,
+            "burst": self.burst,
+            "available": round(tokens, 2),
+            "full_in_seconds": round((self.burst - tokens) / self.rate, 2)
+        }
@@ -0,0 +1,383 @@
+"""Durable delayed retries of hub operations.
+
+Hub calls that could not be made (circuit open, no rate budget in time, hub
+errors) are stored in Redis, shared by all pods: a sorted set of operation
+keys scored by next-attempt time, and a hash with each key's payload.
+registerCitizen and unregisterCitizen share one key per citizen, so only the
+latest of the two is kept and they can never run in the wrong order;
+authenticateDocument entries are keyed by citizen and document.
+
+A worker in every pod claims due entries one at a time (the claim pushes the
+entry's score forward by a lease, so a crashed pod's entry comes back), runs
+them through the normal client methods (hub scheduler at normal priority,
+circuit breakers, idempotency), and reschedules failures with jittered
+exponential backoff until they are dead-lettered.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import time
+from typing import TYPE_CHECKING, Any, Optional
+
+from app.hub_scheduler import PRIORITY_NORMAL
+from app.models import (
+    AuthenticateDocumentRequest,
+    MinTICResponse,
+    RegisterCitizenRequest,
+    UnregisterCitizenRequest,
+)
+
+if TYPE_CHECKING:
+    from app.client import MinTICClient
+
+logger = logging.getLogger(__name__)
+
+try:
+    from carpeta_common.redis_client import get_redis_client
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+    logger.warning("⚠️  Redis not available, failed hub operations cannot be queued")
+
+
+class HubRetryQueue:
+    """
+    Delayed retry queue for hub operations.
+
+    Features:
+    - Due-time ordered entries in Redis (survive restarts, shared by pods)
+    - Duplicate operations for the same citizen coalesced; a later
+      register/unregister replaces the opposite one
+    - Per-entry claims with a lease (no double processing across pods)
+    - Jittered exponential backoff, dead letter after max attempts
+    - Entries drained one at a time through the hub scheduler, so a
+      recovering hub is not hit with a burst
+    """
+
+    # KEYS[1]: due zset, KEYS[2]: payloads, KEYS[3]: attempts; ARGV: key, payload, due time
+    # Returns 1 if queued, 0 if coalesced into an existing entry (keeps its due time).
+    # A different payload (e.g. unregister replacing register) starts its attempts over.
+    ENQUEUE_SCRIPT = """
+    if redis.call("HGET", KEYS[2], ARGV[1]) ~= ARGV[2] then
+        redis.call("HDEL", KEYS[3], ARGV[1])
+    end
+    redis.call("HSET", KEYS[2], ARGV[1], ARGV[2])
+    return redis.call("ZADD", KEYS[1], "NX", ARGV[3], ARGV[1])
+    """
+
+    # KEYS[1]: due zset, KEYS[2]: payloads; ARGV: now, lease until
+    # Returns {key, payload} of the earliest due entry, or {} if none is due
+    CLAIM_SCRIPT = """
+    while true do
+        local keys = redis.call("ZRANGEBYSCORE", KEYS[1], "-inf", ARGV[1], "LIMIT", 0, 1)
+        if #keys == 0 then
+            return {}
+        end
+        local payload = redis.call("HGET", KEYS[2], keys[1])
+        if payload then
+            redis.call("ZADD", KEYS[1], "XX", ARGV[2], keys[1])
+            return {keys[1], payload}
+        end
+        redis.call("ZREM", KEYS[1], keys[1])
+    end
+    """
+
+    # KEYS[1]: due zset, KEYS[2]: payloads, KEYS[3]: attempts; ARGV: key, claimed payload, now
+    # Removes the entry unless a different payload was coalesced into it meanwhile
+    # (then it is made due again). Returns 1 if removed.
+    ACK_SCRIPT = """
+    if redis.call("HGET", KEYS[2], ARGV[1]) == ARGV[2] then
+        redis.call("ZREM", KEYS[1], ARGV[1])
+        redis.call("HDEL", KEYS[2], ARGV[1])
+        redis.call("HDEL", KEYS[3], ARGV[1])
+        return 1
+    end
+    redis.call("ZADD", KEYS[1], "XX", ARGV[3], ARGV[1])
+    return 0
+    """
+
+    # KEYS[1]: due zset, KEYS[2]: payloads, KEYS[3]: attempts; ARGV: key, claimed payload, now
+    # Counts a failed attempt of the claimed payload and returns the new count.
+    # Returns 0 (and makes the entry due again) if a different payload replaced it.
+    ATTEMPT_SCRIPT = """
+    if redis.call("HGET", KEYS[2], ARGV[1]) == ARGV[2] then
+        return redis.call("HINCRBY", KEYS[3], ARGV[1], 1)
+    end
+    redis.call("ZADD", KEYS[1], "XX", ARGV[3], ARGV[1])
+    return 0
+    """
+
+    # KEYS[1]: due zset, KEYS[2]: payloads; ARGV: key, claimed payload, now, next attempt time
+    # Reschedules the claimed payload; a different payload coalesced meanwhile is made due now.
+    # Returns 1 if rescheduled.
+    RESCHEDULE_SCRIPT = """
+    if redis.call("HGET", KEYS[2], ARGV[1]) == ARGV[2] then
+        redis.call("ZADD", KEYS[1], "XX", ARGV[4], ARGV[1])
+        return 1
+    end
+    redis.call("ZADD", KEYS[1], "XX", ARGV[3], ARGV[1])
+    return 0
+    """
+
+    # KEYS[1]: due zset, KEYS[2]: payloads, KEYS[3]: attempts, KEYS[4]: dead letters;
+    # ARGV: key, claimed payload, now, dead letter record
+    # Same guard as ACK_SCRIPT: a different payload coalesced meanwhile is made due
+    # instead of being dead-lettered with the claimed one. Returns 1 if dead-lettered.
+    DEAD_LETTER_SCRIPT = """
+    if redis.call("HGET", KEYS[2], ARGV[1]) == ARGV[2] then
+        redis.call("HSET", KEYS[4], ARGV[1], ARGV[4])
+        redis.call("ZREM", KEYS[1], ARGV[1])
+        redis.call("HDEL", KEYS[2], ARGV[1])
+        redis.call("HDEL", KEYS[3], ARGV[1])
+        return 1
+    end
+    redis.call("ZADD", KEYS[1], "XX", ARGV[3], ARGV[1])
+    return 0
+    """
+
+    def __init__(
+        self,
+        client: "MinTICClient",
+        batch_size: int = 10,
+        base_delay_seconds: float = 5.0,
+        max_delay_seconds: float = 900.0,
+        max_attempts: int = 8,
+        poll_seconds: float = 2.0,
+        lease_seconds: float = 120.0,
+        circuit_open_delay_seconds: float = 30.0,
+        key_prefix: str = "hub:retry",
+    ):
+        """
+        Initialize retry queue.
+
+        Args:
+            client: MinTIC client running the operations
+            batch_size: Entries run per drain before yielding to the poll loop
+            base_delay_seconds: Backoff after the first failed attempt
+            max_delay_seconds: Backoff cap
+            max_attempts: Attempts before an entry is dead-lettered
+            poll_seconds: Wait between polls when nothing is due
+            lease_seconds: How long a claimed entry stays hidden from other pods
+                (covers one entry: slot wait plus the call and its retries)
+            circuit_open_delay_seconds: Delay for entries whose circuit is open
+                (not counted as an attempt)
+            key_prefix: Prefix of the Redis keys
+        """
+        self.client = client
+        self.batch_size = batch_size
+        self.base_delay_seconds = base_delay_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.max_attempts = max_attempts
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self.circuit_open_delay_seconds = circuit_open_delay_seconds
+
+        self.due_key = f"{key_prefix}:due"
+        self.payloads_key = f"{key_prefix}:payloads"
+        self.attempts_key = f"{key_prefix}:attempts"
+        self.dead_key = f"{key_prefix}:dead"
+
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def entry_key(operation: str, payload: dict) -> str:
+        """Coalescing key: the citizen's registration, or citizen and document URL."""
+        citizen_id = payload.get("id", payload.get("idCitizen"))
+        if operation == "authenticateDocument":
+            url_hash = hashlib.sha256(str(payload.get("UrlDocument", "")).encode()).hexdigest()[:16]
+            return f"{operation}:{citizen_id}:{url_hash}"
+        if operation in ("registerCitizen", "unregisterCitizen"):
+            # One entry per citizen: the latest registration change wins
+            return f"citizenRegistration:{citizen_id}"
+        return f"{operation}:{citizen_id}"
+
+    def backoff(self, attempts: int) -> float:
+        """Jittered exponential delay after ``attempts`` failed attempts."""
+        delay = min(self.max_delay_seconds, self.base_delay_seconds * 2 ** max(attempts - 1, 0))
+        return random.uniform(delay / 2, delay)
+
+    async def enqueue(self, operation: str, payload: dict, delay: float = 0.0) -> bool:
+        """
+        Queue an operation for retry.
+
+        Args:
+            operation: Hub endpoint name (e.g., "unregisterCitizen")
+            payload: Request payload
+            delay: Seconds before the first retry
+
+        Returns:
+            True if queued or coalesced, False if it could not be stored
+        """
+        if not REDIS_AVAILABLE:
+            logger.warning(f"⚠️  Cannot queue {operation} for retry (no Redis)")
+            return False
+
+        key = self.entry_key(operation, payload)
+        try:
+            redis = await get_redis_client()
+            created = await redis.eval(
+                self.ENQUEUE_SCRIPT,
+                3,
+                self.due_key,
+                self.payloads_key,
+                self.attempts_key,
+                key,
+                json.dumps({"operation": operation, "payload": payload}, sort_keys=True),
+                time.time() + delay,
+            )
+        except Exception as e:
+            logger.error(f"❌ Failed to queue {operation} for retry: {e}")
+            return False
+
+        if int(created):
+            logger.info(f"📨 Operation queued for retry: {key}")
+        else:
+            logger.info(f"🔁 Operation already queued, coalesced: {key}")
+        return True
+
+    async def stats(self) -> dict:
+        """Queue depth, due entries and dead letters."""
+        if not REDIS_AVAILABLE:
+            return {"enabled": False}
+
+        redis = await get_redis_client()
+        return {
+            "enabled": True,
+            "queued": await redis.zcard(self.due_key),
+            "due": await redis.zcount(self.due_key, "-inf", time.time()),
+            "dead_letters": await redis.hlen(self.dead_key),
+        }
+
+    async def start(self) -> None:
+        """Start draining the queue in the background."""
+        if self._task is None and REDIS_AVAILABLE:
+            self._task = asyncio.create_task(self._run())
+            logger.info("🚀 Hub retry worker started")
+
+    async def stop(self) -> None:
+        """Stop the background worker (claimed entries come back after their lease)."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                processed = await self.drain_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Hub retry worker error: {e}")
+                processed = 0
+
+            # Keep going while full batches are due, otherwise poll with jitter
+            if processed < self.batch_size:
+                await asyncio.sleep(self.poll_seconds + random.uniform(0, self.poll_seconds))
+
+    async def drain_once(self) -> int:
+        """
+        Run up to ``batch_size`` due entries.
+
+        Each entry is claimed right before it runs, so its lease only has to
+        cover that entry (a batch claimed up front could expire mid-batch and
+        be picked up by another pod).
+
+        Returns:
+            Number of entries claimed
+        """
+        redis = await get_redis_client()
+        processed = 0
+        while processed < self.batch_size:
+            now = time.time()
+            claimed = await redis.eval(
+                self.CLAIM_SCRIPT,
+                2,
+                self.due_key,
+                self.payloads_key,
+                now,
+                now + self.lease_seconds,
+            )
+            if not claimed:
+                break
+            key, raw = claimed
+            await self._process(redis, key, raw)
+            processed += 1
+        return processed
+
+    async def _process(self, redis: Any, key: str, raw: str) -> None:
+        entry = json.loads(raw)
+        operation = entry["operation"]
+
+        if self.client._circuit_open(operation):
+            await self._reschedule(redis, key, raw, self.circuit_open_delay_seconds)
+            return
+
+        try:
+            result = await self._execute(operation, entry["payload"])
+            error = None if self.client._is_terminal(result) else f"{result.status}: {result.message}"
+        except Exception as e:
+            error = str(e)
+
+        if error is None:
+            await redis.eval(self.ACK_SCRIPT, 3, self.due_key, self.payloads_key, self.attempts_key, key, raw, time.time())
+            logger.info(f"✅ Queued hub operation completed: {key}")
+            return
+
+        # A payload coalesced while this one ran is not charged with its failure
+        attempts = int(await redis.eval(
+            self.ATTEMPT_SCRIPT, 3, self.due_key, self.payloads_key, self.attempts_key, key, raw, time.time()
+        ))
+        if not attempts:
+            logger.info(f"🔁 Queued hub operation {key} failed ({error}) but was replaced, running the new one")
+            return
+        if attempts >= self.max_attempts:
+            await self._dead_letter(redis, key, raw, entry, attempts, error)
+            return
+
+        delay = self.backoff(attempts)
+        if await self._reschedule(redis, key, raw, delay):
+            logger.warning(f"⚠️  Queued hub operation {key} failed ({error}), retry {attempts} in {delay:.0f}s")
+
+    async def _reschedule(self, redis: Any, key: str, raw: str, delay: float) -> bool:
+        """Push the claimed entry back by ``delay`` unless it was replaced meanwhile."""
+        now = time.time()
+        rescheduled = await redis.eval(
+            self.RESCHEDULE_SCRIPT, 2, self.due_key, self.payloads_key, key, raw, now, now + delay
+        )
+        return bool(int(rescheduled))
+
+    async def _execute(self, operation: str, payload: dict) -> MinTICResponse:
+        if operation == "registerCitizen":
+            return await self.client.register_citizen(RegisterCitizenRequest(**payload), priority=PRIORITY_NORMAL)
+        if operation == "unregisterCitizen":
+            return await self.client.unregister_citizen(UnregisterCitizenRequest(**payload), priority=PRIORITY_NORMAL)
+        if operation == "authenticateDocument":
+            return await self.client.authenticate_document(AuthenticateDocumentRequest(**payload), priority=PRIORITY_NORMAL)
+        raise ValueError(f"Unknown hub operation: {operation}")
+
+    async def _dead_letter(self, redis: Any, key: str, raw: str, entry: dict, attempts: int, error: str) -> None:
+        now = time.time()
+        record = {**entry, "attempts": attempts, "error": error, "dead_at": now}
+        dead = await redis.eval(
+            self.DEAD_LETTER_SCRIPT,
+            4,
+            self.due_key,
+            self.payloads_key,
+            self.attempts_key,
+            self.dead_key,
+            key,
+            raw,
+            now,
+            json.dumps(record),
+        )
+        if int(dead):
+            logger.error(f"❌ Hub operation {key} dead-lettered after {attempts} attempts: {error}")
+        else:
+            logger.info(f"🔁 Queued hub operation {key} was replaced before being dead-lettered, running the new one")
@@ -0,0 +1,174 @@
+"""Priority-aware scheduling of MinTIC hub calls.
+
+Hub calls wait for a token of the endpoint's bucket (HubRateLimiter, shared by
+all pods) instead of being rejected. Waiters of an endpoint are served in
+priority order, then FIFO; each gives up at its own deadline. Across pods,
+lower-priority calls only take a token while ``interactive_reserve`` tokens
+stay in the bucket, so bulk syncs cannot starve interactive calls elsewhere.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+from dataclasses import dataclass, field
+from typing import Optional
+
+from app.hub_rate_limiter import HubRateLimiter
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_INTERACTIVE = 0  # A user is waiting (validateCitizen, registration)
+PRIORITY_NORMAL = 1
+PRIORITY_BULK = 2  # Background syncs (authenticateDocument batches)
+
+# Default priority of each hub endpoint (callers may override per call)
+ENDPOINT_PRIORITIES = {
+    "validateCitizen": PRIORITY_INTERACTIVE,
+    "registerCitizen": PRIORITY_INTERACTIVE,
+    "getOperators": PRIORITY_INTERACTIVE,
+    "unregisterCitizen": PRIORITY_NORMAL,
+    "registerOperator": PRIORITY_NORMAL,
+    "registerTransferEndpoint": PRIORITY_NORMAL,
+    "authenticateDocument": PRIORITY_BULK,
+}
+
+
+class HubScheduleTimeout(Exception):
+    """Raised when no hub call slot was available before the caller's deadline."""
+    pass
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    seq: int
+    future: asyncio.Future = field(compare=False)
+
+
+class HubCallScheduler:
+    """
+    Hands out hub call slots from the shared token buckets.
+
+    Features:
+    - Callers wait for a slot up to a deadline instead of failing
+    - Per-endpoint priority queue (interactive before bulk, FIFO within a priority)
+    - One dispatcher per busy endpoint polls the bucket only when a token is due
+    - Tokens reserved for interactive calls across pods
+    """
+
+    def __init__(
+        self,
+        limiter: HubRateLimiter,
+        default_timeout: float = 10.0,
+        interactive_reserve: float = 1.0,
+    ):
+        """
+        Initialize scheduler.
+
+        Args:
+            limiter: Token bucket rate limiter
+            default_timeout: Longest wait for a slot when the caller gives none
+            interactive_reserve: Tokens lower-priority calls must leave in the bucket
+        """
+        self.limiter = limiter
+        self.default_timeout = default_timeout
+        self.interactive_reserve = interactive_reserve
+
+        self._queues: dict[str, list[_Waiter]] = {}
+        self._dispatchers: dict[str, asyncio.Task] = {}
+        self._wakeups: dict[str, asyncio.Event] = {}
+        self._seq = itertools.count()
+
+    async def acquire(
+        self,
+        endpoint: str,
+        priority: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> None:
+        """
+        Wait for a slot to call ``endpoint``.
+
+        Args:
+            endpoint: Hub endpoint name
+            priority: PRIORITY_* (defaults to the endpoint's)
+            timeout: Seconds to wait at most (defaults to the scheduler's)
+
+        Raises:
+            HubScheduleTimeout: If no slot was granted in time
+        """
+        if not self.limiter.enabled:
+            return
+
+        if priority is None:
+            priority = ENDPOINT_PRIORITIES.get(endpoint, PRIORITY_NORMAL)
+        timeout = self.default_timeout if timeout is None else timeout
+
+        waiter = _Waiter(
+            priority=priority,
+            seq=next(self._seq),
+            future=asyncio.get_running_loop().create_future(),
+        )
+        queue = self._queues.setdefault(endpoint, [])
+        heapq.heappush(queue, waiter)
+        if queue[0] is waiter:
+            # New head outranks the one the dispatcher is sleeping for
+            self._wakeups.setdefault(endpoint, asyncio.Event()).set()
+        self._ensure_dispatcher(endpoint)
+
+        # On timeout or cancellation the future is cancelled and skipped by the dispatcher
+        try:
+            await asyncio.wait_for(waiter.future, timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"⚠️  No hub slot for {endpoint} within {timeout}s (priority {priority})")
+            raise HubScheduleTimeout(f"No hub slot for {endpoint} within {timeout}s")
+
+    def queue_depths(self) -> dict[str, int]:
+        """Waiting callers per endpoint."""
+        return {
+            endpoint: sum(1 for waiter in queue if not waiter.future.done())
+            for endpoint, queue in self._queues.items()
+        }
+
+    def _ensure_dispatcher(self, endpoint: str) -> None:
+        task = self._dispatchers.get(endpoint)
+        if task is None or task.done():
+            self._dispatchers[endpoint] = asyncio.create_task(self._dispatch(endpoint))
+
+    async def _dispatch(self, endpoint: str) -> None:
+        queue = self._queues[endpoint]
+        wakeup = self._wakeups.setdefault(endpoint, asyncio.Event())
+        try:
+            while queue:
+                wakeup.clear()
+                head = queue[0]
+                if head.future.done():
+                    heapq.heappop(queue)
+                    continue
+
+                reserve = 0 if head.priority == PRIORITY_INTERACTIVE else self.interactive_reserve
+                try:
+                    allowed, wait = await self.limiter.try_acquire(endpoint, reserve=reserve)
+                except Exception as e:
+                    logger.error(f"❌ Hub rate limiter failed, allowing call: {e}")
+                    allowed, wait = True, 0.0
+
+                if allowed:
+                    # Best waiter now (one may have arrived or given up during the call)
+                    while queue:
+                        waiter = heapq.heappop(queue)
+                        if not waiter.future.done():
+                            waiter.future.set_result(None)
+                            break
+                    continue
+
+                # Sleep until a token is due for the head, or until a better
+                # waiter arrives (an interactive call needs no reserve)
+                try:
+                    await asyncio.wait_for(wakeup.wait(), max(wait, 0.01))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            if not queue:
+                self._queues.pop(endpoint, None)
+                self._wakeups.pop(endpoint, None)
@@ -1,6 +1,7 @@
 """MinTIC Client Service - Main application."""
 
 import logging
+import socket
 from contextlib import asynccontextmanager
 from typing import AsyncIterator
 
@@ -9,7 +10,8 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from app.client import MinTICClient
 from app.config import Settings
-from app.database import init_db
+from app.database import AsyncSessionLocal, init_db
+from app.document_sync import DocumentSyncRunner
 from app.routers import mintic, status
 
 logging.basicConfig(
@@ -45,8 +47,21 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     else:
         logger.info("Redis disabled, skipping connection")
     
+    # Keep the operator directory refreshed in the background
+    await app.state.mintic_client.operator_directory.start()
+    
+    # Drain queued hub operations with backoff
+    await app.state.mintic_client.retry_queue.start()
+    
+    # Resume document sync jobs interrupted by a restart or a stalled pod
+    await app.state.document_sync.start_reclaimer()
+    
     yield
     
+    await app.state.document_sync.shutdown()
+    await app.state.mintic_client.retry_queue.stop()
+    await app.state.mintic_client.operator_directory.stop()
+    
     # Cleanup
     if settings.redis_enabled:
         try:
@@ -86,6 +101,18 @@ def create_app() -> FastAPI:
     # Initialize MinTIC client
     mintic_client = MinTICClient(settings)
     app.state.mintic_client = mintic_client
+    
+    # Bulk document sync jobs (run in this pod, resumable by any pod)
+    app.state.document_sync = DocumentSyncRunner(
+        client=mintic_client,
+        session_factory=AsyncSessionLocal,
+        owner=socket.gethostname(),
+        workers=settings.document_sync_workers,
+        page_size=settings.document_sync_page_size,
+        max_attempts=settings.document_sync_max_attempts,
+        stale_after_seconds=settings.document_sync_stale_after_seconds,
+        reclaim_interval_seconds=settings.document_sync_reclaim_interval_seconds,
+    )
 
     # Routers
     app.include_router(mintic.router, prefix="/api/mintic", tags=["mintic"])
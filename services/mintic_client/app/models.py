@@ -1,5 +1,6 @@
 """MinTIC Client models matching exact API specs."""
 
+from datetime import datetime
 from typing import Any
 from pydantic import BaseModel, Field
 
@@ -49,6 +50,14 @@ class RegisterTransferEndPointRequest(BaseModel):
     endPointConfirm: str = Field(..., description="Transfer confirmation endpoint URL")
 
 
+class DocumentSyncJobRequest(BaseModel):
+    """Request to start a bulk document sync job."""
+
+    citizen_ids: list[str] = Field(..., min_length=1, description="Citizens whose documents are authenticated")
+    document_ids: list[str] | None = Field(None, description="Only these documents")
+    document_statuses: list[str] | None = Field(None, description="Only documents in these local statuses")
+
+
 # Response Models
 class OperatorInfo(BaseModel):
     """Operator information."""
@@ -84,3 +93,21 @@ class MinTICResponse(BaseModel):
         """Alias for backward compatibility."""
         return self.ok
 
+
+
+class DocumentSyncJobResponse(BaseModel):
+    """Bulk document sync job progress."""
+
+    job_id: str
+    status: str
+    citizens_total: int
+    citizens_expanded: int
+    documents_total: int
+    documents_synced: int
+    documents_failed: int
+    documents_pending: int
+    progress: float = Field(..., description="Fraction of known documents finished (0-1)")
+    error: str | None
+    created_at: datetime
+    updated_at: datetime
+    completed_at: datetime | None
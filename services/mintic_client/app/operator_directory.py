@@ -0,0 +1,277 @@
+"""Operator directory with stale-while-revalidate refresh.
+
+Operators from the hub's getOperators are served from an in-process snapshot
+indexed by operator ID, so lookups during transfers are dictionary hits. The
+snapshot is refreshed in the background before it expires, shared between
+pods through Redis (only the pod holding the refresh lock calls the hub), and
+kept serving while the hub is down or its circuit is open. An
+``operator.directory_changed`` event is published only when the content hash
+of a freshly fetched snapshot differs from the previous one.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional
+
+from app.models import OperatorInfo
+
+logger = logging.getLogger(__name__)
+
+try:
+    from carpeta_common.redis_client import acquire_lock, get_json, release_lock, set_json
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+    logger.warning("⚠️  Redis not available, operator directory is per-pod")
+
+try:
+    from carpeta_common.bus import ServiceBusClient
+    BUS_AVAILABLE = True
+except ImportError:
+    BUS_AVAILABLE = False
+    logger.warning("⚠️  Service Bus not available, operator changes are not published")
+
+
+class OperatorFetchError(Exception):
+    """Raised when the hub cannot provide the operator list."""
+    pass
+
+
+@dataclass(frozen=True)
+class OperatorSnapshot:
+    """Immutable operator list as fetched from the hub at ``fetched_at``."""
+    operators: tuple[OperatorInfo, ...]
+    payload: list[dict]
+    digest: str
+    fetched_at: float
+    by_id: dict[str, OperatorInfo] = field(repr=False)
+
+    @classmethod
+    def build(cls, payload: list[dict], fetched_at: float) -> "OperatorSnapshot":
+        operators = tuple(OperatorInfo(**op) for op in payload)
+        canonical = json.dumps(sorted(payload, key=lambda op: op["OperatorId"]), sort_keys=True)
+        return cls(
+            operators=operators,
+            payload=payload,
+            digest=hashlib.sha256(canonical.encode("utf-8")).hexdigest(),
+            fetched_at=fetched_at,
+            by_id={op.OperatorId: op for op in operators},
+        )
+
+    @property
+    def age(self) -> float:
+        return max(time.time() - self.fetched_at, 0.0)
+
+
+class OperatorDirectory:
+    """
+    Operator directory served from memory.
+
+    Features:
+    - In-process snapshot indexed by operator ID (L1)
+    - Snapshot shared by all pods in Redis (L2), one pod refreshes from the hub
+    - Background refresh ahead of expiry; callers never wait once loaded
+    - Stale snapshot kept while the hub is failing
+    - Change event only when the snapshot hash changes
+    """
+
+    def __init__(
+        self,
+        fetch_operators: Callable[[], Awaitable[list[OperatorInfo]]],
+        refresh_seconds: float = 240.0,
+        max_stale_seconds: int = 86400,
+        retry_seconds: float = 15.0,
+        cache_key: str = "mintic:operators:snapshot",
+        lock_ttl: int = 30,
+    ):
+        """
+        Initialize operator directory.
+
+        Args:
+            fetch_operators: Fetches normalized operators from the hub
+                (raises OperatorFetchError or httpx errors when it cannot)
+            refresh_seconds: Snapshot age at which it is refreshed
+            max_stale_seconds: How long a snapshot is kept in Redis for stale serving
+            retry_seconds: Delay between refresh attempts while the hub is failing
+            cache_key: Redis key of the shared snapshot
+            lock_ttl: TTL of the Redis lock held while refreshing from the hub
+        """
+        self.fetch_operators = fetch_operators
+        self.refresh_seconds = refresh_seconds
+        self.max_stale_seconds = max_stale_seconds
+        self.retry_seconds = retry_seconds
+        self.cache_key = cache_key
+        self.lock_key = f"lock:{cache_key}"
+        self.lock_ttl = lock_ttl
+
+        self._snapshot: Optional[OperatorSnapshot] = None
+        self._refresh_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def snapshot(self) -> Optional[OperatorSnapshot]:
+        """Current snapshot (None until first loaded)."""
+        return self._snapshot
+
+    def get(self, operator_id: str) -> Optional[OperatorInfo]:
+        """Operator by ID from the current snapshot."""
+        snapshot = self._snapshot
+        return snapshot.by_id.get(operator_id) if snapshot else None
+
+    async def ensure_loaded(self) -> Optional[OperatorSnapshot]:
+        """Current snapshot, loading it first if this pod has none yet."""
+        if self._snapshot is None:
+            await self.refresh()
+        return self._snapshot
+
+    async def refresh(self) -> bool:
+        """
+        Bring the snapshot up to date (Redis first, hub when due).
+
+        Returns:
+            True if the snapshot is fresh, False if a stale one is kept
+        """
+        async with self._refresh_lock:
+            shared = await self._read_shared()
+            if shared is not None and shared.age < self.refresh_seconds:
+                self._adopt(shared)
+                return True
+
+            lock_token = await self._acquire_lock()
+            if lock_token is None and shared is not None:
+                # Another pod is refreshing from the hub; serve its previous snapshot meanwhile
+                self._adopt(shared)
+                return False
+
+            try:
+                operators = await self.fetch_operators()
+            except Exception as e:
+                logger.warning(f"⚠️  Operator refresh failed, serving stale directory: {e}")
+                if shared is not None:
+                    self._adopt(shared)
+                return False
+            finally:
+                await self._release_lock(lock_token)
+
+            snapshot = OperatorSnapshot.build([op.model_dump() for op in operators], time.time())
+            previous = shared or self._snapshot
+            await self._write_shared(snapshot)
+            self._adopt(snapshot)
+
+            if previous is not None and previous.digest != snapshot.digest:
+                await self._publish_change(previous, snapshot)
+
+            logger.info(f"✅ Operator directory refreshed ({len(snapshot.operators)} operators)")
+            return True
+
+    def _adopt(self, snapshot: OperatorSnapshot) -> None:
+        current = self._snapshot
+        if current is None or snapshot.fetched_at >= current.fetched_at:
+            self._snapshot = snapshot
+
+    async def start(self) -> None:
+        """Start background refresh."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info("🚀 Operator directory refresh started")
+
+    async def stop(self) -> None:
+        """Stop background refresh."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            snapshot = self._snapshot
+            if snapshot is None:
+                delay = 0.0
+            elif snapshot.age < self.refresh_seconds:
+                delay = self.refresh_seconds - snapshot.age
+            else:
+                delay = self.retry_seconds
+            # Jitter spreads refreshes of pods started together
+            await asyncio.sleep(delay + random.uniform(0, self.retry_seconds))
+
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Operator directory refresh error: {e}")
+
+    # -- shared snapshot (Redis) -------------------------------------------
+
+    async def _read_shared(self) -> Optional[OperatorSnapshot]:
+        if not REDIS_AVAILABLE:
+            return None
+        try:
+            cached = await get_json(self.cache_key)
+        except Exception as e:
+            logger.warning(f"⚠️  Operator directory cache read failed: {e}")
+            return None
+        if not cached:
+            return None
+        current = self._snapshot
+        if current is not None and current.digest == cached["digest"] and current.fetched_at == cached["fetched_at"]:
+            return current  # Unchanged: no need to rebuild the OperatorInfo objects
+        return OperatorSnapshot.build(cached["operators"], cached["fetched_at"])
+
+    async def _write_shared(self, snapshot: OperatorSnapshot) -> None:
+        if not REDIS_AVAILABLE:
+            return
+        try:
+            await set_json(
+                self.cache_key,
+                {"operators": snapshot.payload, "digest": snapshot.digest, "fetched_at": snapshot.fetched_at},
+                ttl=self.max_stale_seconds,
+            )
+        except Exception as e:
+            logger.warning(f"⚠️  Operator directory cache write failed: {e}")
+
+    async def _acquire_lock(self) -> Optional[str]:
+        if not REDIS_AVAILABLE:
+            return None
+        try:
+            return await acquire_lock(self.lock_key, ttl=self.lock_ttl)
+        except Exception as e:
+            logger.warning(f"⚠️  Operator directory lock failed: {e}")
+            return None
+
+    async def _release_lock(self, token: Optional[str]) -> None:
+        if token is None:
+            return
+        try:
+            await release_lock(self.lock_key, token)
+        except Exception as e:
+            logger.warning(f"⚠️  Operator directory lock release failed: {e}")
+
+    async def _publish_change(self, previous: OperatorSnapshot, snapshot: OperatorSnapshot) -> None:
+        added = sorted(set(snapshot.by_id) - set(previous.by_id))
+        removed = sorted(set(previous.by_id) - set(snapshot.by_id))
+        changed = sorted(
+            op_id for op_id in set(snapshot.by_id) & set(previous.by_id)
+            if snapshot.by_id[op_id] != previous.by_id[op_id]
+        )
+        logger.info(f"📢 Operator directory changed: +{added} -{removed} ~{changed}")
+
+        if not BUS_AVAILABLE:
+            return
+        try:
+            await ServiceBusClient().publish_event(
+                queue_name="operator-events",
+                event_type="operator.directory_changed",
+                data={"digest": snapshot.digest, "added": added, "removed": removed, "changed": changed},
+                event_id=f"operator-directory:{snapshot.digest}",
+            )
+        except Exception as e:
+            logger.warning(f"⚠️  Failed to publish operator change: {e}")
@@ -4,13 +4,19 @@ import json
 import logging
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.client import MinTICClient
 from app.database import get_db
+from app.database_models import DocumentSyncItem, DocumentSyncJob
+from app.document_sync import DocumentSyncRunner
 from app.models import (
     AuthenticateDocumentRequest,
+    DocumentSyncJobRequest,
+    DocumentSyncJobResponse,
     MinTICResponse,
     OperatorInfo,
     RegisterCitizenRequest,
@@ -28,6 +34,11 @@ def get_mintic_client(request: Request) -> MinTICClient:
     return request.app.state.mintic_client
 
 
+def get_document_sync(request: Request) -> DocumentSyncRunner:
+    """Get document sync job runner from app state."""
+    return request.app.state.document_sync
+
+
 @router.post("/register-citizen", response_model=MinTICResponse)
 async def register_citizen(
     data: RegisterCitizenRequest,
@@ -195,6 +206,124 @@ async def sync_documents(
         )
 
 
+def _sync_job_response(job: DocumentSyncJob) -> DocumentSyncJobResponse:
+    """Build sync job progress response."""
+    finished = job.documents_synced + job.documents_failed
+    return DocumentSyncJobResponse(
+        job_id=job.id,
+        status=job.status,
+        citizens_total=len(json.loads(job.citizen_ids)),
+        citizens_expanded=job.citizens_expanded,
+        documents_total=job.documents_total,
+        documents_synced=job.documents_synced,
+        documents_failed=job.documents_failed,
+        documents_pending=job.documents_total - finished,
+        progress=round(finished / job.documents_total, 4) if job.documents_total else 0.0,
+        error=job.error,
+        created_at=job.created_at,
+        updated_at=job.updated_at,
+        completed_at=job.completed_at,
+    )
+
+
+@router.post(
+    "/sync/jobs",
+    response_model=DocumentSyncJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def start_document_sync_job(
+    data: DocumentSyncJobRequest,
+    runner: Annotated[DocumentSyncRunner, Depends(get_document_sync)],
+) -> DocumentSyncJobResponse:
+    """Start a background bulk document sync with MinTIC Hub.
+
+    Documents of all given citizens (optionally only some IDs or local
+    statuses) are authenticated at bulk priority within the hub rate budget.
+    """
+    logger.info(f"Starting document sync job for {len(data.citizen_ids)} citizens")
+
+    try:
+        job = await runner.create_job(
+            citizen_ids=data.citizen_ids,
+            document_ids=data.document_ids,
+            document_statuses=data.document_statuses,
+        )
+        return _sync_job_response(job)
+
+    except Exception as e:
+        logger.error(f"Error starting document sync job: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to start document sync job"
+        )
+
+
+@router.get("/sync/jobs/{job_id}", response_model=DocumentSyncJobResponse)
+async def get_document_sync_job(
+    job_id: str,
+    db: Annotated[AsyncSession, Depends(get_db)],
+) -> DocumentSyncJobResponse:
+    """Get progress of a bulk document sync job."""
+    job = await db.get(DocumentSyncJob, job_id)
+
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Document sync job {job_id} not found"
+        )
+
+    return _sync_job_response(job)
+
+
+@router.post("/sync/jobs/{job_id}/cancel")
+async def cancel_document_sync_job(
+    job_id: str,
+    runner: Annotated[DocumentSyncRunner, Depends(get_document_sync)],
+) -> dict[str, str]:
+    """Cancel a running bulk document sync job."""
+    if not await runner.cancel_job(job_id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Document sync job {job_id} is not running"
+        )
+
+    return {"message": "Document sync job cancelled", "job_id": job_id}
+
+
+@router.get("/sync/jobs/{job_id}/documents")
+async def list_document_sync_outcomes(
+    job_id: str,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    status_filter: str | None = Query(None, alias="status"),
+    after_id: int = 0,
+    limit: int = 100,
+) -> list[dict]:
+    """List per-document outcomes of a job (keyset paginated by item id)."""
+    query = (
+        select(DocumentSyncItem)
+        .where(DocumentSyncItem.job_id == job_id)
+        .where(DocumentSyncItem.id > after_id)
+    )
+    if status_filter:
+        query = query.where(DocumentSyncItem.status == status_filter)
+
+    result = await db.execute(query.order_by(DocumentSyncItem.id).limit(min(limit, 1000)))
+
+    return [
+        {
+            "id": item.id,
+            "citizen_id": item.citizen_id,
+            "document_id": item.document_id,
+            "status": item.status,
+            "attempts": item.attempts,
+            "hub_status": item.hub_status,
+            "error": item.error,
+            "updated_at": item.updated_at.isoformat(),
+        }
+        for item in result.scalars().all()
+    ]
+
+
 @router.post("/webhooks/hub-notification")
 async def handle_hub_notification(
     notification: dict,
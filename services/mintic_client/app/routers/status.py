@@ -41,6 +41,8 @@ async def hub_rate_limit_status(
     status = {
         "enabled": client.hub_rate_limiter.enabled,
         "limit_per_minute": client.hub_rate_limiter.requests_per_minute,
+        "burst": client.hub_rate_limiter.burst,
+        "waiting": client.hub_scheduler.queue_depths(),
         "endpoints": {}
     }
     
@@ -51,6 +53,18 @@ async def hub_rate_limit_status(
     return status
 
 
+@router.get("/ops/hub-retry-queue/status")
+async def hub_retry_queue_status(
+    client: MinTICClient = Depends(get_client)
+) -> Dict:
+    """Get queued hub operations: total, due now and dead-lettered."""
+    try:
+        return await client.retry_queue.stats()
+    except Exception as e:
+        logger.error(f"❌ Failed to get hub retry queue status: {e}")
+        return {"enabled": True, "error": str(e)}
+
+
 @router.get("/ops/circuit-breakers/status")
 async def circuit_breakers_status(
     client: MinTICClient = Depends(get_client)
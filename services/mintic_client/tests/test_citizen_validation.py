@@ -0,0 +1,95 @@
+"""
+Unit tests for cached, single-flight citizen validation
+"""
+
+import asyncio
+
+import pytest
+
+import app.client as client_module
+from app.client import MinTICClient
+from app.config import Settings
+from app.models import MinTICResponse
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+        self.ttls = {}
+
+    async def delete(self, key):
+        self.values.pop(key, None)
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    fake = FakeRedis()
+
+    async def get_json(key):
+        return fake.values.get(key)
+
+    async def set_json(key, obj, ttl=None):
+        fake.values[key] = obj
+        fake.ttls[key] = ttl
+        return True
+
+    async def get_redis_client():
+        return fake
+
+    monkeypatch.setattr(client_module, "get_json", get_json)
+    monkeypatch.setattr(client_module, "set_json", set_json)
+    monkeypatch.setattr(client_module, "get_redis_client", get_redis_client)
+    return fake
+
+
+def make_client(monkeypatch, status, delay=0.0):
+    client = MinTICClient(settings=Settings())
+    calls = []
+
+    async def hub_call(citizen_id):
+        calls.append(citizen_id)
+        await asyncio.sleep(delay)
+        return MinTICResponse(ok=True, status=status, message="ok")
+
+    monkeypatch.setattr(client, "_call_validate_citizen", hub_call)
+    return client, calls
+
+
+@pytest.mark.asyncio
+async def test_concurrent_validations_share_one_hub_call(monkeypatch, redis):
+    client, calls = make_client(monkeypatch, 200, delay=0.05)
+
+    results = await asyncio.gather(*(client.validate_citizen(123) for _ in range(10)))
+
+    assert calls == [123]
+    assert all(result.status == 200 for result in results)
+    assert client._validation_flights == {}
+
+    await client.validate_citizen(123)
+    assert calls == [123]
+
+
+@pytest.mark.asyncio
+async def test_positive_and_negative_answers_use_separate_ttls(monkeypatch, redis):
+    settings = Settings()
+    client, _ = make_client(monkeypatch, 200)
+    await client.validate_citizen(1)
+    client, _ = make_client(monkeypatch, 204)
+    await client.validate_citizen(2)
+
+    assert redis.ttls["mintic:validateCitizen:1"] == settings.hub_validation_cache_ttl_seconds
+    assert redis.ttls["mintic:validateCitizen:2"] == settings.hub_validation_negative_ttl_seconds
+
+
+@pytest.mark.asyncio
+async def test_errors_are_not_cached_and_invalidation_drops_answer(monkeypatch, redis):
+    client, calls = make_client(monkeypatch, 500)
+    await client.validate_citizen(7)
+    assert redis.values == {}
+
+    client, calls = make_client(monkeypatch, 204)
+    await client.validate_citizen(7)
+    await client._invalidate_validation(7)
+    await client.validate_citizen(7)
+
+    assert calls == [7, 7]
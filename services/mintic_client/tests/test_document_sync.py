@@ -0,0 +1,243 @@
+"""
+Unit tests for bulk document sync jobs
+"""
+
+import asyncio
+import json
+import os
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.database_models import Base, DocumentSyncItem, DocumentSyncJob
+from app.document_sync import DocumentSyncRunner, JobOwnershipLost
+from app.hub_scheduler import PRIORITY_BULK
+from app.models import MinTICResponse
+
+
+class FakeClient:
+    def __init__(self, statuses):
+        self.statuses = statuses
+        self.priorities = []
+        self.updated = []
+        self.in_flight = 0
+        self.peak = 0
+        self.status_update_error = None
+
+    async def _get_document_sas_url(self, document_id):
+        return f"https://blob.example/{document_id}?sig=x"
+
+    async def authenticate_document(self, request, priority=None):
+        self.priorities.append(priority)
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        status = self.statuses[request.UrlDocument.split("/")[-1].split("?")[0]]
+        return MinTICResponse(ok=200 <= status < 300 or status == 501, status=status, message="hub")
+
+    async def _update_document_status(self, document_id, status, result, raise_errors=False):
+        if self.status_update_error is not None:
+            raise self.status_update_error
+        self.updated.append(document_id)
+
+    @staticmethod
+    def _is_terminal(result):
+        return (result.ok and result.status != 202) or result.status in [204, 501]
+
+
+def item(document_id, attempts=0):
+    return SimpleNamespace(id=document_id, citizen_id="123", document_id=document_id, title="Doc", attempts=attempts)
+
+
+@pytest.mark.asyncio
+async def test_sync_page_respects_worker_limit_and_bulk_priority():
+    client = FakeClient({f"doc-{i}": 200 for i in range(6)})
+    runner = DocumentSyncRunner(client, Mock(), owner="pod-1", workers=2)
+
+    outcomes = await runner._sync_page([item(f"doc-{i}") for i in range(6)])
+
+    assert client.peak == 2
+    assert set(client.priorities) == {PRIORITY_BULK}
+    assert all(outcome["status"] == "synced" for _, outcome in outcomes)
+    assert sorted(client.updated) == [f"doc-{i}" for i in range(6)]
+
+
+@pytest.mark.asyncio
+async def test_outcomes_are_final_or_retried():
+    client = FakeClient({"ok": 200, "params": 501, "down": 500, "busy": 429, "elsewhere": 409})
+    runner = DocumentSyncRunner(client, Mock(), owner="pod-1", max_attempts=3)
+
+    outcomes = {
+        doc.document_id: outcome
+        for doc, outcome in await runner._sync_page(
+            [item("ok"), item("params"), item("down"), item("busy", attempts=2), item("elsewhere", attempts=2)]
+        )
+    }
+
+    assert outcomes["ok"]["status"] == "synced"
+    assert outcomes["params"] == {"status": "failed", "hub_status": 501, "error": "hub"}
+    assert outcomes["down"]["status"] == "pending"  # Retried on a later page
+    assert outcomes["busy"] == {"status": "pending", "hub_status": 429, "error": "hub", "attempt": False}
+    assert outcomes["elsewhere"]["attempt"] is False
+    assert client.updated == ["ok"]
+
+
+@pytest.mark.asyncio
+async def test_failed_local_status_update_is_not_reported_synced():
+    client = FakeClient({"ok": 200})
+    client.status_update_error = RuntimeError("metadata down")
+    runner = DocumentSyncRunner(client, Mock(), owner="pod-1", max_attempts=3)
+
+    [(_, outcome)] = await runner._sync_page([item("ok")])
+
+    assert outcome["status"] == "pending"
+    assert "metadata down" in outcome["error"]
+
+
+# -- database-backed (set TEST_DATABASE_URL to a disposable PostgreSQL) ----------
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+requires_db = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL not set")
+
+
+@pytest_asyncio.fixture
+async def session_factory():
+    engine = create_async_engine(TEST_DATABASE_URL)
+    tables = [DocumentSyncJob.__table__, DocumentSyncItem.__table__]
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all, tables=tables)
+        await conn.run_sync(Base.metadata.create_all, tables=tables)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+async def add_job(session_factory, job_id, owner, age_seconds=0, documents=()):
+    updated_at = datetime.utcnow() - timedelta(seconds=age_seconds)
+    async with session_factory() as db:
+        db.add(DocumentSyncJob(
+            id=job_id, status="running", citizen_ids=json.dumps(["123"]), citizens_expanded=1,
+            documents_total=len(documents), documents_synced=0, documents_failed=0,
+            owner=owner, created_at=updated_at, updated_at=updated_at,
+        ))
+        for document_id in documents:
+            db.add(DocumentSyncItem(
+                job_id=job_id, citizen_id="123", document_id=document_id, title="Doc",
+                status="pending", attempts=0, updated_at=updated_at,
+            ))
+        await db.commit()
+
+
+async def load(session_factory, job_id):
+    async with session_factory() as db:
+        job = await db.get(DocumentSyncJob, job_id)
+        items = (await db.execute(
+            select(DocumentSyncItem).where(DocumentSyncItem.job_id == job_id).order_by(DocumentSyncItem.id)
+        )).scalars().all()
+    return job, {item.document_id: item for item in items}
+
+
+@requires_db
+@pytest.mark.asyncio
+async def test_resume_claims_only_stale_or_orphaned_jobs(session_factory, monkeypatch):
+    await add_job(session_factory, "stale", owner="pod-dead", age_seconds=900)
+    await add_job(session_factory, "orphan", owner=None)
+    await add_job(session_factory, "busy", owner="pod-2", age_seconds=10)
+    runner = DocumentSyncRunner(FakeClient({}), session_factory, owner="pod-1", stale_after_seconds=600)
+    started = []
+    monkeypatch.setattr(runner, "start", started.append)
+
+    assert sorted(await runner.resume_stale_jobs()) == ["orphan", "stale"]
+    assert sorted(started) == ["orphan", "stale"]
+    assert (await load(session_factory, "stale"))[0].owner == "pod-1"
+    assert (await load(session_factory, "busy"))[0].owner == "pod-2"
+
+
+@requires_db
+@pytest.mark.asyncio
+async def test_checkpoint_counts_pending_items_once_and_requeues_without_attempt(session_factory):
+    await add_job(session_factory, "job", owner="pod-1", documents=["ok", "down", "busy"])
+    client = FakeClient({"ok": 200, "down": 500, "busy": 429})
+    runner = DocumentSyncRunner(client, session_factory, owner="pod-1")
+
+    async with session_factory() as db:
+        page = await runner._fetch_pending(db, "job")
+    outcomes = await runner._sync_page(page)
+    await runner._checkpoint("job", outcomes)
+    await runner._checkpoint("job", outcomes)  # Replayed page: already settled items are skipped
+
+    job, items = await load(session_factory, "job")
+    assert job.documents_synced == 1
+    assert (items["ok"].status, items["ok"].attempts) == ("synced", 1)
+    assert (items["down"].status, items["down"].attempts) == ("pending", 2)
+    assert (items["busy"].status, items["busy"].attempts) == ("pending", 0)
+
+
+@requires_db
+@pytest.mark.asyncio
+async def test_reclaimed_job_rejects_old_owner_writes(session_factory):
+    await add_job(session_factory, "job", owner="pod-1", documents=["ok"])
+    client = FakeClient({"ok": 200})
+    old = DocumentSyncRunner(client, session_factory, owner="pod-1")
+    new = DocumentSyncRunner(client, session_factory, owner="pod-2", stale_after_seconds=0)
+    new.start = lambda job_id: None
+
+    async with session_factory() as db:
+        page = await old._fetch_pending(db, "job")
+    outcomes = await old._sync_page(page)
+    assert await new.resume_stale_jobs() == ["job"]
+
+    with pytest.raises(JobOwnershipLost):
+        await old._checkpoint("job", outcomes)
+    job, items = await load(session_factory, "job")
+    assert job.documents_synced == 0
+    assert items["ok"].status == "pending"  # Rolled back with the fenced job update
+
+    await old.run_job("job")  # Stops without touching the job
+    assert (await load(session_factory, "job"))[0].status == "running"
+
+
+@requires_db
+@pytest.mark.asyncio
+async def test_job_runs_to_completion_from_citizen_listing(session_factory):
+    client = FakeClient({"a": 200, "b": 501})
+    client._get_local_citizen_documents = lambda citizen_id, raise_errors=False: asyncio.sleep(
+        0, [{"id": "a", "title": "A"}, {"id": "b", "title": "B"}]
+    )
+    runner = DocumentSyncRunner(client, session_factory, owner="pod-1", page_size=1)
+    runner.start = lambda job_id: None
+
+    job = await runner.create_job(["123"], job_id="job")
+    await runner.run_job(job.id)
+
+    job, items = await load(session_factory, "job")
+    assert job.status == "completed"
+    assert (job.citizens_expanded, job.documents_total) == (1, 2)
+    assert (job.documents_synced, job.documents_failed) == (1, 1)
+    assert (items["a"].status, items["b"].status) == ("synced", "failed")
+
+
+@requires_db
+@pytest.mark.asyncio
+async def test_metadata_outage_fails_job_without_skipping_citizens(session_factory):
+    async def list_documents(citizen_id, raise_errors=False):
+        assert raise_errors
+        raise RuntimeError("metadata down")
+
+    client = FakeClient({})
+    client._get_local_citizen_documents = list_documents
+    runner = DocumentSyncRunner(client, session_factory, owner="pod-1")
+    runner.start = lambda job_id: None
+
+    job = await runner.create_job(["123"], job_id="job")
+    await runner.run_job(job.id)
+
+    job, items = await load(session_factory, "job")
+    assert job.status == "failed"
+    assert "metadata down" in job.error
+    assert (job.citizens_expanded, items) == (0, {})
@@ -0,0 +1,243 @@
+"""
+Unit tests for durable delayed retries of hub operations
+"""
+
+import json
+import time
+from unittest.mock import AsyncMock
+
+import pytest
+
+import app.hub_retry_queue as retry_module
+from app.hub_retry_queue import HubRetryQueue
+from app.models import MinTICResponse
+
+
+class FakeRedis:
+    def __init__(self):
+        self.zsets = {}
+        self.hashes = {}
+        self.acked = []
+
+    async def eval(self, script, numkeys, *args):
+        keys, argv = args[:numkeys], args[numkeys:]
+        zset = self.zsets.setdefault(keys[0], {})
+        payloads = self.hashes.setdefault(keys[1], {})
+
+        if script == HubRetryQueue.ENQUEUE_SCRIPT:
+            key, payload, due = argv
+            if payloads.get(key) != payload:
+                self.hashes.setdefault(keys[2], {}).pop(key, None)
+            payloads[key] = payload
+            if key in zset:
+                return 0
+            zset[key] = due
+            return 1
+
+        if script == HubRetryQueue.CLAIM_SCRIPT:
+            now, lease_until = argv
+            due = sorted((score, key) for key, score in zset.items() if score <= now)
+            if not due:
+                return []
+            key = due[0][1]
+            zset[key] = lease_until
+            return [key, payloads[key]]
+
+        # Every other script only acts on the claimed payload; a replaced one is made due
+        key, claimed, now = argv[:3]
+        if payloads.get(key) != claimed:
+            if key in zset:
+                zset[key] = now
+            return 0
+
+        if script == HubRetryQueue.ATTEMPT_SCRIPT:
+            attempts = self.hashes.setdefault(keys[2], {})
+            attempts[key] = attempts.get(key, 0) + 1
+            return attempts[key]
+
+        if script == HubRetryQueue.RESCHEDULE_SCRIPT:
+            if key in zset:
+                zset[key] = argv[3]
+            return 1
+
+        if script == HubRetryQueue.DEAD_LETTER_SCRIPT:
+            self.hashes.setdefault(keys[3], {})[key] = argv[3]
+        else:
+            self.acked.append(key)
+        zset.pop(key, None)
+        payloads.pop(key, None)
+        self.hashes.setdefault(keys[2], {}).pop(key, None)
+        return 1
+
+
+class FakeClient:
+    def __init__(self, status, redis=None, due_key=None):
+        self.status = status
+        self.circuit_open = False
+        self.calls = 0
+        self.redis = redis
+        self.due_key = due_key
+        self.leased_during_call = []
+
+    def _circuit_open(self, endpoint):
+        return self.circuit_open
+
+    async def unregister_citizen(self, request, priority=None):
+        self.calls += 1
+        if self.redis is not None:
+            now = time.time()
+            self.leased_during_call.append(
+                sorted(key for key, score in self.redis.zsets[self.due_key].items() if score > now)
+            )
+        return MinTICResponse(ok=200 <= self.status < 300, status=self.status, message="hub")
+
+    @staticmethod
+    def _is_terminal(result):
+        return (result.ok and result.status != 202) or result.status in [204, 501]
+
+
+def queued_entry(queue, redis):
+    payload = {"id": 123, "operatorId": "op-1", "operatorName": "Operator"}
+    key = queue.entry_key("unregisterCitizen", payload)
+    raw = json.dumps({"operation": "unregisterCitizen", "payload": payload}, sort_keys=True)
+    redis.zsets[queue.due_key] = {key: time.time()}
+    redis.hashes[queue.payloads_key] = {key: raw}
+    return key, raw
+
+
+def test_entries_are_coalesced_per_citizen():
+    assert HubRetryQueue.entry_key("unregisterCitizen", {"id": 1}) == HubRetryQueue.entry_key(
+        "unregisterCitizen", {"id": 1, "operatorId": "other"}
+    )
+    # Register and unregister share the citizen's entry: the latest one wins
+    assert HubRetryQueue.entry_key("registerCitizen", {"id": 1}) == HubRetryQueue.entry_key(
+        "unregisterCitizen", {"id": 1}
+    )
+    assert HubRetryQueue.entry_key("registerCitizen", {"id": 1}) != HubRetryQueue.entry_key(
+        "registerCitizen", {"id": 2}
+    )
+    assert HubRetryQueue.entry_key("authenticateDocument", {"idCitizen": 1, "UrlDocument": "a"}) != (
+        HubRetryQueue.entry_key("authenticateDocument", {"idCitizen": 1, "UrlDocument": "b"})
+    )
+
+
+def test_backoff_is_jittered_exponential_and_capped():
+    queue = HubRetryQueue(FakeClient(200), base_delay_seconds=5, max_delay_seconds=60)
+
+    for attempts, delay in [(1, 5), (2, 10), (3, 20), (10, 60)]:
+        assert delay / 2 <= queue.backoff(attempts) <= delay
+
+
+@pytest.mark.asyncio
+async def test_failures_back_off_then_dead_letter():
+    redis = FakeRedis()
+    client = FakeClient(500)
+    queue = HubRetryQueue(client, max_attempts=2)
+    key, raw = queued_entry(queue, redis)
+
+    await queue._process(redis, key, raw)
+    assert redis.zsets[queue.due_key][key] > time.time()
+    assert redis.hashes[queue.attempts_key][key] == 1
+
+    await queue._process(redis, key, raw)
+    assert key not in redis.zsets[queue.due_key]
+    dead = json.loads(redis.hashes[queue.dead_key][key])
+    assert dead["attempts"] == 2
+    assert dead["error"] == "500: hub"
+
+
+@pytest.mark.asyncio
+async def test_success_acks_and_open_circuit_defers_without_attempt():
+    redis = FakeRedis()
+    client = FakeClient(201)
+    queue = HubRetryQueue(client, circuit_open_delay_seconds=30)
+    key, raw = queued_entry(queue, redis)
+
+    client.circuit_open = True
+    await queue._process(redis, key, raw)
+    assert client.calls == 0
+    assert redis.zsets[queue.due_key][key] > time.time() + 25
+    assert queue.attempts_key not in redis.hashes
+
+    client.circuit_open = False
+    await queue._process(redis, key, raw)
+    assert redis.acked == [key]
+
+
+@pytest.mark.asyncio
+async def test_unregister_replaces_queued_register_and_its_attempts(monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setattr(retry_module, "REDIS_AVAILABLE", True)
+    monkeypatch.setattr(retry_module, "get_redis_client", AsyncMock(return_value=redis), raising=False)
+    queue = HubRetryQueue(FakeClient(200))
+    register = {"id": 123, "name": "Ana", "address": "Calle 1", "email": "a@b.co",
+                "operatorId": "op-1", "operatorName": "Operator"}
+    unregister = {"id": 123, "operatorId": "op-1", "operatorName": "Operator"}
+
+    await queue.enqueue("registerCitizen", register)
+    key = queue.entry_key("registerCitizen", register)
+    redis.hashes[queue.attempts_key] = {key: 3}
+    await queue.enqueue("unregisterCitizen", unregister)
+
+    assert list(redis.zsets[queue.due_key]) == [key]
+    assert json.loads(redis.hashes[queue.payloads_key][key])["operation"] == "unregisterCitizen"
+    assert key not in redis.hashes[queue.attempts_key]
+
+
+@pytest.mark.asyncio
+async def test_drain_leases_each_entry_right_before_running_it(monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setattr(retry_module, "get_redis_client", AsyncMock(return_value=redis), raising=False)
+    queue = HubRetryQueue(FakeClient(200), batch_size=10, lease_seconds=120)
+    queue.client.redis, queue.client.due_key = redis, queue.due_key
+    now = time.time()
+    for citizen_id in (1, 2):
+        payload = {"id": citizen_id, "operatorId": "op-1", "operatorName": "Operator"}
+        key = queue.entry_key("unregisterCitizen", payload)
+        redis.hashes.setdefault(queue.payloads_key, {})[key] = json.dumps(
+            {"operation": "unregisterCitizen", "payload": payload}, sort_keys=True
+        )
+        redis.zsets.setdefault(queue.due_key, {})[key] = now - 10 + citizen_id
+
+    assert await queue.drain_once() == 2
+
+    # Only the running entry is leased; the next one is still plainly due
+    assert queue.client.leased_during_call == [["citizenRegistration:1"], ["citizenRegistration:2"]]
+
+
+@pytest.mark.asyncio
+async def test_failure_of_replaced_payload_is_not_charged_to_the_new_one():
+    redis = FakeRedis()
+    queue = HubRetryQueue(FakeClient(500), max_attempts=1)
+    key, raw = queued_entry(queue, redis)
+    register = json.dumps({"operation": "registerCitizen", "payload": {"id": 123}}, sort_keys=True)
+
+    async def replaced_while_running(request, priority=None):
+        # registerCitizen coalesced into the entry while the claimed unregister runs
+        redis.hashes[queue.payloads_key][key] = register
+        return MinTICResponse(ok=False, status=500, message="hub")
+
+    queue.client.unregister_citizen = replaced_while_running
+    await queue._process(redis, key, raw)
+
+    # Neither dead-lettered nor backed off: the new payload is due right away with no attempts
+    assert queue.dead_key not in redis.hashes
+    assert redis.hashes[queue.payloads_key][key] == register
+    assert redis.zsets[queue.due_key][key] <= time.time()
+    assert key not in redis.hashes.get(queue.attempts_key, {})
+
+    # Replaced between the attempt count and the reschedule: still made due, not pushed back
+    queue = HubRetryQueue(FakeClient(500), max_attempts=5)
+    key, raw = queued_entry(queue, redis)
+    redis.hashes[queue.attempts_key] = {}
+    original = redis.eval
+
+    async def replace_after_attempt(script, numkeys, *args):
+        result = await original(script, numkeys, *args)
+        if script == HubRetryQueue.ATTEMPT_SCRIPT:
+            redis.hashes[queue.payloads_key][key] = register
+        return result
+
+    redis.eval = replace_after_attempt
+    await queue._process(redis, key, raw)
+    assert redis.zsets[queue.due_key][key] <= time.time()
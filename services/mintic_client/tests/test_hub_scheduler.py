@@ -0,0 +1,98 @@
+"""
+Unit tests for priority-aware hub call scheduling
+"""
+
+import asyncio
+
+import pytest
+
+import app.hub_rate_limiter as limiter_module
+from app.client import MinTICClient
+from app.config import Settings
+from app.hub_rate_limiter import HubRateLimiter
+from app.hub_scheduler import (
+    PRIORITY_BULK,
+    PRIORITY_INTERACTIVE,
+    HubCallScheduler,
+    HubScheduleTimeout,
+)
+
+
+@pytest.fixture(autouse=True)
+def local_buckets(monkeypatch):
+    monkeypatch.setattr(limiter_module, "REDIS_AVAILABLE", False)
+
+
+@pytest.mark.asyncio
+async def test_local_bucket_keeps_reserve_for_interactive_calls():
+    limiter = HubRateLimiter(requests_per_minute=60, burst=2)
+
+    assert (await limiter.try_acquire("validateCitizen", reserve=1))[0] is True
+    allowed, wait = await limiter.try_acquire("validateCitizen", reserve=1)
+    assert allowed is False
+    assert wait > 0
+    assert (await limiter.try_acquire("validateCitizen"))[0] is True
+
+
+@pytest.mark.asyncio
+async def test_waiters_are_served_by_priority():
+    # 1200 req/min: one token every 50ms after the single-token burst
+    limiter = HubRateLimiter(requests_per_minute=1200, burst=1)
+    scheduler = HubCallScheduler(limiter, default_timeout=2.0, interactive_reserve=0)
+    await scheduler.acquire("authenticateDocument")  # Drain the bucket
+    served = []
+
+    async def call(name, priority):
+        await scheduler.acquire("authenticateDocument", priority=priority)
+        served.append(name)
+
+    tasks = [asyncio.create_task(call(f"bulk-{i}", PRIORITY_BULK)) for i in range(3)]
+    await asyncio.sleep(0)
+    tasks.append(asyncio.create_task(call("interactive", PRIORITY_INTERACTIVE)))
+    await asyncio.gather(*tasks)
+
+    assert served == ["interactive", "bulk-0", "bulk-1", "bulk-2"]
+    assert scheduler.queue_depths() == {}
+
+
+@pytest.mark.asyncio
+async def test_interactive_arrival_wakes_dispatcher_sleeping_for_bulk():
+    # 60 req/min: a bulk call must wait ~1s for a token above the reserve,
+    # while the token already in the bucket is free for interactive calls
+    limiter = HubRateLimiter(requests_per_minute=60, burst=2)
+    scheduler = HubCallScheduler(limiter, default_timeout=2.0, interactive_reserve=1)
+    await scheduler.acquire("validateCitizen")
+    bulk = asyncio.create_task(scheduler.acquire("validateCitizen", priority=PRIORITY_BULK))
+    await asyncio.sleep(0.05)
+
+    started = asyncio.get_running_loop().time()
+    await scheduler.acquire("validateCitizen", priority=PRIORITY_INTERACTIVE, timeout=0.5)
+
+    assert asyncio.get_running_loop().time() - started < 0.2
+    assert not bulk.done()
+    bulk.cancel()
+    for task in [bulk, *scheduler._dispatchers.values()]:
+        task.cancel()
+    await asyncio.gather(bulk, *scheduler._dispatchers.values(), return_exceptions=True)
+
+
+@pytest.mark.asyncio
+async def test_waiter_gives_up_at_its_deadline():
+    limiter = HubRateLimiter(requests_per_minute=1, burst=1)
+    scheduler = HubCallScheduler(limiter, default_timeout=0.05)
+    await scheduler.acquire("registerCitizen")
+
+    with pytest.raises(HubScheduleTimeout):
+        await scheduler.acquire("registerCitizen")
+
+    assert scheduler.queue_depths() == {"registerCitizen": 0}
+
+
+def test_idempotency_marker_outlives_the_longest_slot_wait():
+    """A queued bulk call keeps its idempotency key until it has called the hub."""
+    settings = Settings(hub_bulk_schedule_timeout_seconds=120, request_timeout=10)
+    client = MinTICClient(settings)
+
+    if client.idempotency is None:
+        pytest.skip("carpeta_common not installed")
+    assert client.idempotency.in_progress_ttl_seconds > 120 + 10
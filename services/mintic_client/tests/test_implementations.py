@@ -235,6 +235,25 @@ class TestNotificationHandlers:
             mock_update.assert_called_once_with('transfer1', 'completed', {'success': True})
 
 
+class TestIdempotency:
+    """Test replay of hub operations."""
+
+    @pytest.mark.asyncio
+    async def test_operation_in_progress_elsewhere_is_retryable_failure(self, mintic_client):
+        """A duplicate that outwaits the original call must not look successful."""
+        from carpeta_common.idempotency import IdempotencyInProgress
+
+        mintic_client.idempotency = MagicMock()
+        mintic_client.idempotency.run = AsyncMock(side_effect=IdempotencyInProgress("busy"))
+        call = AsyncMock()
+
+        result = await mintic_client._idempotent("authdoc:123:abc", 900, call)
+
+        assert (result.ok, result.status) == (False, 409)
+        assert not MinTICClient._is_terminal(result)
+        call.assert_not_awaited()
+
+
 class TestServiceUpdates:
     """Test service update functionality."""
 
@@ -0,0 +1,81 @@
+"""
+Unit tests for the stale-while-revalidate operator directory
+"""
+
+import pytest
+
+import app.operator_directory as directory_module
+from app.models import OperatorInfo
+from app.operator_directory import OperatorDirectory, OperatorFetchError
+
+
+def operator(operator_id, url="https://op.example/transfer"):
+    return OperatorInfo(OperatorId=operator_id, OperatorName=f"Operator {operator_id}", transferAPIURL=url)
+
+
+class FakeHub:
+    def __init__(self, operators):
+        self.operators = operators
+        self.calls = 0
+        self.down = False
+
+    async def __call__(self):
+        self.calls += 1
+        if self.down:
+            raise OperatorFetchError("hub down")
+        return list(self.operators)
+
+
+@pytest.fixture
+def directory(monkeypatch):
+    monkeypatch.setattr(directory_module, "REDIS_AVAILABLE", False)
+    hub = FakeHub([operator("op-a"), operator("op-b")])
+    directory = OperatorDirectory(fetch_operators=hub, refresh_seconds=240)
+    changes = []
+
+    async def record_change(previous, snapshot):
+        changes.append(snapshot.digest)
+
+    monkeypatch.setattr(directory, "_publish_change", record_change)
+    return directory, hub, changes
+
+
+@pytest.mark.asyncio
+async def test_lookups_are_served_from_snapshot(directory):
+    directory, hub, _ = directory
+
+    snapshot = await directory.ensure_loaded()
+    await directory.ensure_loaded()
+
+    assert hub.calls == 1
+    assert [op.OperatorId for op in snapshot.operators] == ["op-a", "op-b"]
+    assert directory.get("op-b").OperatorName == "Operator op-b"
+    assert directory.get("missing") is None
+
+
+@pytest.mark.asyncio
+async def test_stale_snapshot_is_kept_while_hub_is_down(directory):
+    directory, hub, _ = directory
+    await directory.refresh()
+    loaded = directory.snapshot
+
+    hub.down = True
+    assert await directory.refresh() is False
+
+    assert directory.snapshot is loaded
+    assert directory.get("op-a") is not None
+
+
+@pytest.mark.asyncio
+async def test_change_event_only_when_hash_changes(directory):
+    directory, hub, changes = directory
+    await directory.refresh()
+
+    hub.operators = [operator("op-b"), operator("op-a")]  # Same content, other order
+    await directory.refresh()
+    assert changes == []
+
+    hub.operators = [operator("op-a", url="https://op-a.example/v2/transfer")]
+    await directory.refresh()
+    assert changes == [directory.snapshot.digest]
+    assert directory.get("op-b") is None
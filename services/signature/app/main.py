@@ -43,7 +43,9 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     except Exception as e:
         logger.warning(f"Database initialization failed: {e}")
         logger.info("Continuing without database for testing purposes")
+    await signature._blob.start()
     yield
+    await signature._blob.stop()
     try:
         await engine.dispose()
         logger.info("Database connection disposed")
@@ -174,15 +174,8 @@ async def sign_document(
                     f"retention_until={retention_date.isoformat()}"
                 )
                 
-                # Azure Storage blob tags update
-                #     blob_name=document.blob_name,
-                #     tags={
-                #         "state": "SIGNED",
-                #         "worm": "true",
-                #         "retentionUntil": retention_date.isoformat(),
-                #         "hubRef": hub_sig_ref
-                #     }
-                # )
+                # Blob index tags (state/worm/retentionUntil/hubRef) are applied in
+                # bulk by the ingestion lifecycle sweeper (worm_tags_applied=false)
                 
             except Exception as worm_error:
                 logger.error(f"❌ Failed to activate WORM: {worm_error}")
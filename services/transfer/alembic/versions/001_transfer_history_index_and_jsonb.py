@@ -0,0 +1,67 @@
+"""Index transfer history by citizen and store document_ids as JSONB
+
+Revision ID: 001
+Revises:
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+
+
+# revision identifiers, used by Alembic.
+revision = '001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Add the citizen history index and convert document_ids to JSONB."""
+
+    # Tables of a fresh database are created by the service (create_all) with
+    # this schema already; only databases created before it need converting.
+    inspector = sa.inspect(op.get_bind())
+    if 'transfers' not in inspector.get_table_names():
+        return
+
+    columns = {column['name']: column for column in inspector.get_columns('transfers')}
+    if not isinstance(columns['document_ids']['type'], JSONB):
+        op.alter_column(
+            'transfers',
+            'document_ids',
+            type_=JSONB,
+            postgresql_using="NULLIF(document_ids, '')::jsonb",
+        )
+
+    # (citizen_id, initiated_at DESC, id DESC) serves the confirmation lookup
+    # (latest transfer of a citizen) and keyset pagination of GET /api/transfers/
+    # as bounded index range scans. Built concurrently: transfers stays writable.
+    indexes = {index['name'] for index in inspector.get_indexes('transfers')}
+    with op.get_context().autocommit_block():
+        if 'idx_transfers_citizen_initiated' not in indexes:
+            op.create_index(
+                'idx_transfers_citizen_initiated',
+                'transfers',
+                ['citizen_id', sa.text('initiated_at DESC'), sa.text('id DESC')],
+                postgresql_concurrently=True,
+            )
+        # Leading column of the composite index: the single-column index is redundant
+        if 'ix_transfers_citizen_id' in indexes:
+            op.drop_index('ix_transfers_citizen_id', 'transfers', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Restore the citizen_id index and the JSON string column."""
+
+    with op.get_context().autocommit_block():
+        op.create_index('ix_transfers_citizen_id', 'transfers', ['citizen_id'], postgresql_concurrently=True)
+        op.drop_index('idx_transfers_citizen_initiated', 'transfers', postgresql_concurrently=True)
+
+    op.alter_column(
+        'transfers',
+        'document_ids',
+        type_=sa.Text(),
+        postgresql_using='document_ids::text',
+    )
@@ -0,0 +1,46 @@
+"""Add operator credential registry
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Create operators table (B2B client credentials)."""
+
+    # May already exist when the service created it at startup (create_all)
+    if 'operators' in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    op.create_table(
+        'operators',
+        sa.Column('operator_id', sa.String(), primary_key=True),
+        sa.Column('operator_name', sa.String(), nullable=False),
+        sa.Column('client_id', sa.String(), nullable=False),
+        sa.Column('client_secret_hash', sa.String(), nullable=False),
+        sa.Column('transfer_api_url', sa.String(), nullable=False),
+        sa.Column('confirm_api_url', sa.String(), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=False, server_default='true'),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.text('now()')),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.text('now()')),
+    )
+    # Token issuance looks operators up by client_id
+    op.create_index('ix_operators_client_id', 'operators', ['client_id'], unique=True)
+
+
+def downgrade() -> None:
+    """Drop operators table."""
+
+    op.drop_index('ix_operators_client_id', 'operators')
+    op.drop_table('operators')
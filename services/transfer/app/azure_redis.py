@@ -122,117 +122,6 @@ class AzureRedisService:
         
         return None
     
-    async def set_idempotency_key(
-        self,
-        idempotency_key: str,
-        ttl_seconds: int = 3600  # 1 hour
-    ) -> bool:
-        """Set idempotency key using Redis SETNX for distributed locking."""
-        try:
-            if not self.is_available:
-                return await self._local_set_idempotency_nx(idempotency_key, ttl_seconds)
-            
-            cache_key = f"idempotency:{idempotency_key}"
-            # Use SETNX (SET if Not eXists) for atomic idempotency
-            was_set = await self.client.setnx(cache_key, "processing")
-            
-            if was_set:
-                # Set expiration only if we successfully acquired the key
-                await self.client.expire(cache_key, ttl_seconds)
-                logger.info(f"Idempotency key {idempotency_key} acquired via Redis SETNX")
-                return True
-            else:
-                logger.warning(f"Idempotency key {idempotency_key} already exists in Redis")
-                return False
-            
-        except Exception as e:
-            logger.error(f"Failed to set idempotency key {idempotency_key}: {e}")
-            return await self._local_set_idempotency_nx(idempotency_key, ttl_seconds)
-    
-    async def _local_set_idempotency_nx(
-        self,
-        idempotency_key: str,
-        ttl_seconds: int
-    ) -> bool:
-        """Local idempotency cache fallback with SETNX behavior."""
-        cache_key = f"idempotency:{idempotency_key}"
-        
-        # Check if key already exists (SETNX behavior)
-        if cache_key in self._local_cache:
-            cache_entry = self._local_cache[cache_key]
-            if datetime.utcnow() < cache_entry["expires"]:
-                logger.warning(f"Idempotency key {idempotency_key} already exists locally")
-                return False
-            else:
-                # Expired, remove it
-                del self._local_cache[cache_key]
-        
-        # Set the key (SETNX behavior)
-        self._local_cache[cache_key] = {
-            "data": "processing",
-            "expires": datetime.utcnow() + timedelta(seconds=ttl_seconds)
-        }
-        
-        logger.info(f"Idempotency key {idempotency_key} acquired locally")
-        return True
-    
-    async def get_idempotency_key(self, idempotency_key: str) -> Optional[Dict[str, Any]]:
-        """Check if idempotency key exists."""
-        try:
-            if not self.is_available:
-                return await self._local_get_idempotency(idempotency_key)
-            
-            cache_key = f"idempotency:{idempotency_key}"
-            cached_data = await self.client.get(cache_key)
-            
-            if cached_data:
-                return json.loads(cached_data)
-            
-            return None
-            
-        except Exception as e:
-            logger.error(f"Failed to get idempotency key {idempotency_key}: {e}")
-            return await self._local_get_idempotency(idempotency_key)
-    
-    async def _local_get_idempotency(self, idempotency_key: str) -> Optional[Dict[str, Any]]:
-        """Local idempotency cache get fallback."""
-        cache_key = f"idempotency:{idempotency_key}"
-        
-        if cache_key in self._local_cache:
-            cache_entry = self._local_cache[cache_key]
-            if datetime.utcnow() < cache_entry["expires"]:
-                return cache_entry["data"]
-            else:
-                # Expired, remove from cache
-                del self._local_cache[cache_key]
-        
-        return None
-    
-    async def delete_idempotency_key(self, idempotency_key: str) -> bool:
-        """Delete idempotency key after processing."""
-        try:
-            if not self.is_available:
-                return await self._local_delete_idempotency(idempotency_key)
-            
-            cache_key = f"idempotency:{idempotency_key}"
-            await self.client.delete(cache_key)
-            
-            logger.info(f"Idempotency key {idempotency_key} deleted from Redis")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Failed to delete idempotency key {idempotency_key}: {e}")
-            return await self._local_delete_idempotency(idempotency_key)
-    
-    async def _local_delete_idempotency(self, idempotency_key: str) -> bool:
-        """Local idempotency delete fallback."""
-        cache_key = f"idempotency:{idempotency_key}"
-        if cache_key in self._local_cache:
-            del self._local_cache[cache_key]
-            logger.info(f"Idempotency key {idempotency_key} deleted from local cache")
-            return True
-        return False
-
     async def delete_transfer_cache(self, transfer_id: str) -> bool:
         """Delete transfer from cache."""
         try:
@@ -1,14 +1,17 @@
 """Azure Storage integration for transfer service."""
 
+import asyncio
 import logging
 import json
-from typing import Optional, Dict, Any
-from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, List
+from datetime import datetime
 
 try:
-    from azure.storage.blob import BlobServiceClient, generate_blob_sas, BlobSasPermissions
+    from azure.storage.blob import BlobServiceClient
     from azure.identity import DefaultAzureCredential
     from azure.core.exceptions import AzureError
+    from carpeta_common.blob_storage import AsyncBlobStorage
+    from carpeta_common.sas_issuer import SasIssuer
     AZURE_STORAGE_AVAILABLE = True
 except ImportError:
     AZURE_STORAGE_AVAILABLE = False
@@ -20,11 +23,90 @@ logger = logging.getLogger(__name__)
 settings = get_settings()
 
 
+class BlobBlockWriter:
+    """Write a document as staged blocks and commit them once complete.
+
+    Only the block IDs are kept; each chunk can be dropped after ``write``.
+    """
+    
+    def __init__(self, blob_client: Any, blob_name: str, sas_url_fn: Any):
+        self.blob_client = blob_client
+        self.blob_name = blob_name
+        self._sas_url_fn = sas_url_fn
+        self.block_ids: List[str] = []
+        self.size = 0
+    
+    def reset(self) -> None:
+        """Start over (retried download); re-staged blocks overwrite the old ones."""
+        self.block_ids = []
+        self.size = 0
+    
+    async def write(self, chunk: bytes) -> None:
+        """Stage one chunk as the next block."""
+        block_id = f"block-{len(self.block_ids):08d}"  # fixed length, base64-encoded by the SDK
+        await self.blob_client.stage_block(block_id, chunk, length=len(chunk))
+        self.block_ids.append(block_id)
+        self.size += len(chunk)
+    
+    async def commit(self, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Commit the staged blocks in order with the final metadata."""
+        blob_metadata = {key: str(value) for key, value in metadata.items()}
+        await self.blob_client.commit_block_list(self.block_ids, metadata=blob_metadata)
+        logger.info(f"Document {self.blob_name} committed ({len(self.block_ids)} blocks)")
+        return {
+            "success": True,
+            "blob_name": self.blob_name,
+            "sas_url": self._sas_url_fn(self.blob_name),
+            "size": self.size,
+            "metadata": blob_metadata,
+        }
+
+
+class LocalFileWriter:
+    """Local fallback with the ``BlobBlockWriter`` interface."""
+    
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.size = 0
+        self._file = None
+    
+    def reset(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self.size = 0
+    
+    async def write(self, chunk: bytes) -> None:
+        if self._file is None:
+            self._file = open(self.file_path, "wb")
+        await asyncio.to_thread(self._file.write, chunk)
+        self.size += len(chunk)
+    
+    async def commit(self, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        if self._file is None:
+            self._file = open(self.file_path, "wb")  # empty document
+        self._file.close()
+        self._file = None
+        logger.info(f"Document saved locally at {self.file_path}")
+        return {
+            "success": True,
+            "local_path": self.file_path,
+            "size": self.size,
+            "metadata": metadata,
+        }
+
+
 class AzureStorageService:
-    """Azure Storage service with fallback to local storage."""
+    """Azure Storage service with fallback to local storage.
+    
+    Blob operations use one process-wide native-async client with a pooled
+    transport; the sync client only fetches user delegation keys for SAS.
+    """
     
     def __init__(self):
         self.client = None
+        self.async_storage = None
+        self.sas_issuer = None
         self.container_name = settings.azure_storage_container_name
         self.is_available = False
         
@@ -52,6 +134,44 @@ class AzureStorageService:
             self.client = BlobServiceClient(account_url=account_url, credential=credential)
         else:
             raise ValueError("Azure Storage not configured")
+        
+        # Native-async client for blob operations (pool opened inside the event loop)
+        self.async_storage = AsyncBlobStorage(
+            account_url=self.client.url,
+            connection_string=settings.azure_storage_connection_string,
+            use_managed_identity=not settings.azure_storage_connection_string,
+            pool_size=settings.azure_storage_pool_size,
+        )
+        
+        # Shared SAS issuer: signing key cached in memory, SAS minted without network calls
+        account_key = settings.azure_storage_account_key or getattr(self.client.credential, "account_key", None)
+        self.sas_issuer = SasIssuer(
+            account_name=self.client.account_name,
+            container_name=self.container_name,
+            account_key=account_key,
+            blob_service_client=None if account_key else self.client,
+            account_url=self.client.url,
+        )
+    
+    async def start(self) -> None:
+        """Open the async Blob client pool and warm the user delegation key."""
+        if self.async_storage:
+            try:
+                await self.async_storage.start()
+            except Exception as e:
+                logger.warning(f"Could not create async Blob client: {e}")
+        if self.sas_issuer:
+            try:
+                await self.sas_issuer.start()
+            except Exception as e:
+                logger.warning(f"Could not warm user delegation key: {e}")
+    
+    async def stop(self) -> None:
+        """Stop background key refresh and close the async Blob client pool."""
+        if self.sas_issuer:
+            await self.sas_issuer.stop()
+        if self.async_storage:
+            await self.async_storage.close()
     
     async def upload_document(
         self, 
@@ -69,10 +189,7 @@ class AzureStorageService:
             blob_name = f"transfers/{citizen_id}/{document_id}"
             
             # Upload to Azure Storage
-            blob_client = self.client.get_blob_client(
-                container=self.container_name,
-                blob=blob_name
-            )
+            blob_client = await self.async_storage.get_blob_client(self.container_name, blob_name)
             
             # Set metadata
             blob_metadata = {
@@ -82,14 +199,14 @@ class AzureStorageService:
                 **(metadata or {})
             }
             
-            blob_client.upload_blob(
+            await blob_client.upload_blob(
                 document_data,
                 metadata=blob_metadata,
                 overwrite=True
             )
             
             # Generate SAS URL for access
-            sas_url = self._generate_sas_url(blob_name)
+            sas_url = self.generate_sas_url(blob_name)
             
             logger.info(f"Document {document_id} uploaded to Azure Storage")
             
@@ -106,6 +223,24 @@ class AzureStorageService:
             # Fallback to local storage
             return await self._local_upload(document_data, document_id, citizen_id, metadata)
     
+    async def open_document_writer(self, document_id: str, citizen_id: int) -> Any:
+        """Open a streaming writer for a document (staged blocks, or a local file).
+        
+        The caller writes chunks as they arrive and commits with the final
+        metadata (e.g. the SHA-256 computed while streaming).
+        """
+        if self.is_available:
+            blob_name = f"transfers/{citizen_id}/{document_id}"
+            blob_client = await self.async_storage.get_blob_client(self.container_name, blob_name)
+            return BlobBlockWriter(blob_client, blob_name, self.generate_sas_url)
+        
+        import os
+        import tempfile
+        
+        storage_dir = os.path.join(tempfile.gettempdir(), "transfer_documents")
+        os.makedirs(storage_dir, exist_ok=True)
+        return LocalFileWriter(os.path.join(storage_dir, f"{citizen_id}_{document_id}"))
+    
     async def _local_upload(
         self, 
         document_data: bytes, 
@@ -135,23 +270,23 @@ class AzureStorageService:
             "metadata": metadata or {}
         }
     
-    def _generate_sas_url(self, blob_name: str) -> str:
-        """Generate SAS URL for blob access."""
+    def generate_sas_url(
+        self,
+        blob_name: str,
+        expires_in: Optional[int] = None,
+        container_name: Optional[str] = None
+    ) -> str:
+        """Generate read SAS URL for blob access (in-memory, reused within TTL)."""
         try:
-            if not self.client:
+            if not self.sas_issuer:
                 return ""
             
-            # Generate SAS token
-            sas_token = generate_blob_sas(
-                account_name=settings.azure_storage.account_name,
-                container_name=self.container_name,
-                blob_name=blob_name,
-                permission=BlobSasPermissions(read=True),
-                expiry=datetime.utcnow() + timedelta(minutes=settings.azure_storage.sas_ttl_minutes)
+            return self.sas_issuer.generate_read_url(
+                blob_name,
+                expires_in=expires_in or settings.azure_storage_sas_ttl_minutes * 60,
+                container_name=container_name,
             )
             
-            return f"https://{settings.azure_storage.account_name}.blob.core.windows.net/{self.container_name}/{blob_name}?{sas_token}"
-            
         except Exception as e:
             logger.error(f"Failed to generate SAS URL: {e}")
             return ""
@@ -162,13 +297,10 @@ class AzureStorageService:
             if not self.is_available:
                 return await self._local_download(blob_name)
             
-            blob_client = self.client.get_blob_client(
-                container=self.container_name,
-                blob=blob_name
-            )
+            blob_client = await self.async_storage.get_blob_client(self.container_name, blob_name)
             
-            download_stream = blob_client.download_blob()
-            return download_stream.readall()
+            download_stream = await blob_client.download_blob()
+            return await download_stream.readall()
             
         except Exception as e:
             logger.error(f"Failed to download document {blob_name}: {e}")
@@ -195,12 +327,9 @@ class AzureStorageService:
             if not self.is_available:
                 return await self._local_delete(blob_name)
             
-            blob_client = self.client.get_blob_client(
-                container=self.container_name,
-                blob=blob_name
-            )
+            blob_client = await self.async_storage.get_blob_client(self.container_name, blob_name)
             
-            blob_client.delete_blob()
+            await blob_client.delete_blob()
             logger.info(f"Document {blob_name} deleted from Azure Storage")
             return True
             
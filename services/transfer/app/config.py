@@ -41,6 +41,7 @@ class Settings(BaseSettings):
     azure_storage_container_name: str = Field(default="documents", alias="AZURE_STORAGE_CONTAINER_NAME", description="Azure Storage container name")
     azure_storage_connection_string: Optional[str] = Field(default=None, alias="AZURE_STORAGE_CONNECTION_STRING", description="Azure Storage connection string")
     azure_storage_sas_ttl_minutes: int = Field(default=15, alias="AZURE_STORAGE_SAS_TTL_MINUTES", description="SAS token TTL in minutes")
+    azure_storage_pool_size: int = Field(default=100, alias="AZURE_STORAGE_POOL_SIZE", description="Max pooled connections of the async Blob client")
     
     # Azure Service Bus configuration
     servicebus_connection_string: Optional[str] = Field(default=None, alias="SERVICEBUS_CONNECTION_STRING", description="Service Bus connection string")
@@ -54,15 +55,29 @@ class Settings(BaseSettings):
     redis_db: int = Field(default=0, alias="REDIS_DB", description="Redis database number")
     redis_ssl: bool = Field(default=True, alias="REDIS_SSL", description="Always true for Azure Cache for Redis")
     redis_enabled: bool = Field(default=True, alias="REDIS_ENABLED", description="Enable Redis cache")
+    idempotency_ttl_seconds: int = Field(default=86400, alias="IDEMPOTENCY_TTL_SECONDS", description="How long responses are replayed for a repeated Idempotency-Key")
+    idempotency_wait_seconds: float = Field(default=5.0, alias="IDEMPOTENCY_WAIT_SECONDS", description="How long a duplicate waits for the original request to finish")
     
     # Transfer-specific settings
     max_document_size_mb: int = Field(default=50, alias="MAX_DOCUMENT_SIZE_MB", description="Maximum document size in MB")
     download_timeout_seconds: int = Field(default=300, alias="DOWNLOAD_TIMEOUT_SECONDS", description="Timeout for document downloads in seconds")
+    transfer_fetch_concurrency: int = Field(default=8, alias="TRANSFER_FETCH_CONCURRENCY", description="Documents downloaded and stored in parallel per inbound transfer")
+    transfer_block_size: int = Field(default=4 * 1024 * 1024, alias="TRANSFER_BLOCK_SIZE", description="Chunk size in bytes streamed and staged per block for inbound documents")
+    transfer_fetch_per_host_limit: int = Field(default=4, alias="TRANSFER_FETCH_PER_HOST_LIMIT", description="Concurrent downloads per source operator host")
+    transfer_workers_enabled: bool = Field(default=True, alias="TRANSFER_WORKERS_ENABLED", description="Process inbound transfer jobs in the API pods (disable when running the worker deployment)")
+    transfer_worker_concurrency: int = Field(default=4, alias="TRANSFER_WORKER_CONCURRENCY", description="Inbound transfer jobs processed at once per worker process")
+    transfer_job_lease_seconds: int = Field(default=300, alias="TRANSFER_JOB_LEASE_SECONDS", description="Lease on a claimed transfer job; reclaimed by another worker after it expires")
+    transfer_job_max_attempts: int = Field(default=5, alias="TRANSFER_JOB_MAX_ATTEMPTS", description="Attempts before an inbound transfer job fails and req_status=0 is sent")
+    sagas_enabled: bool = Field(default=True, alias="SAGAS_ENABLED", description="Run the saga executor in this process")
+    saga_concurrency: int = Field(default=50, alias="SAGA_CONCURRENCY", description="Saga steps executed at once per pod (waiting sagas do not count)")
+    saga_lease_seconds: int = Field(default=300, alias="SAGA_LEASE_SECONDS", description="Lease on a claimed saga; must exceed every step timeout")
+    saga_confirmation_timeout_seconds: int = Field(default=86400, alias="SAGA_CONFIRMATION_TIMEOUT_SECONDS", description="How long a transfer saga waits for the destination's confirmation")
     
     # JWT Configuration
     jwt_secret: str = Field(default="mock_jwt_secret_123", alias="JWT_SECRET", description="JWT secret key for token signing")
     jwt_algorithm: str = Field(default="HS256", alias="JWT_ALGORITHM", description="JWT algorithm for token signing")
     jwt_expiration_hours: int = Field(default=24, alias="JWT_EXPIRATION_HOURS", description="JWT token expiration in hours")
+    operator_cache_ttl_seconds: float = Field(default=60.0, alias="OPERATOR_CACHE_TTL_SECONDS", description="How long operator credentials are cached per pod")
     
     # Health check settings
     health_check_timeout: int = Field(default=5, alias="HEALTH_CHECK_TIMEOUT", description="Health check timeout in seconds")
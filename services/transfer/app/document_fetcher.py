@@ -0,0 +1,244 @@
+"""Parallel fetch-and-store of documents received in an inbound transfer.
+
+The source operator hands us one presigned URL per document. Documents are
+fetched by a bounded pool of workers sharing one pooled HTTP client, with a
+per-source-host limit so one slow operator endpoint cannot take every
+connection. Each document is streamed straight into our container: chunks
+are teed into SHA-256 and staged as blocks, and only the digest and size are
+kept, so peak memory per transfer is a few chunk buffers per worker whatever
+the size of the citizen's folder. Total time approaches that of the slowest
+document instead of the sum.
+"""
+
+import asyncio
+import hashlib
+import logging
+from datetime import datetime
+from typing import Any, Optional
+from urllib.parse import urlsplit
+
+import httpx
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
+
+logger = logging.getLogger(__name__)
+
+
+class DocumentTooLargeError(Exception):
+    """Raised when a streamed document exceeds the configured size limit."""
+
+    def __init__(self, max_size: int):
+        super().__init__(f"Document exceeds maximum allowed size of {max_size} bytes")
+        self.max_size = max_size
+
+
+class TransferDocumentFetcher:
+    """Download transfer documents concurrently and store them.
+
+    Features:
+    - One process-wide httpx client (keep-alive connections reused across transfers)
+    - ``max_concurrency`` workers per transfer, ``per_host_limit`` requests per source host
+    - Streaming GET -> SHA-256 -> staged blocks (no document held in memory)
+    - Per-document retry with exponential backoff
+    - Results returned in request order
+    """
+
+    def __init__(
+        self,
+        storage: Any,
+        max_concurrency: int = 8,
+        per_host_limit: int = 4,
+        max_connections: int = 64,
+        timeout_seconds: float = 60.0,
+        max_attempts: int = 3,
+        retry_backoff_seconds: float = 2.0,
+        chunk_size: int = 4 * 1024 * 1024,
+        max_document_size: Optional[int] = None,
+    ):
+        """Initialize fetcher.
+
+        Args:
+            storage: Storage service exposing ``open_document_writer``
+            max_concurrency: Documents fetched in parallel per transfer
+            per_host_limit: Concurrent requests per source host (all transfers)
+            max_connections: Connection pool size of the shared HTTP client
+            timeout_seconds: Per-request timeout
+            max_attempts: Download attempts per document
+            retry_backoff_seconds: Base of the exponential backoff between attempts
+            chunk_size: Streaming chunk (and staged block) size in bytes
+            max_document_size: Abort documents larger than this many bytes
+        """
+        self.storage = storage
+        self.max_concurrency = max_concurrency
+        self.per_host_limit = per_host_limit
+        self.max_connections = max_connections
+        self.timeout_seconds = timeout_seconds
+        self.max_attempts = max_attempts
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.chunk_size = chunk_size
+        self.max_document_size = max_document_size
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_limits: dict[str, asyncio.Semaphore] = {}
+
+    def get_client(self) -> httpx.AsyncClient:
+        """Get or create the shared HTTP client."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout_seconds, connect=10.0),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections // 2,
+                ),
+            )
+        return self._client
+
+    async def close(self) -> None:
+        """Close the shared HTTP client."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc.lower()
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host_limit)
+        return self._host_limits[host]
+
+    async def _stream_into(self, url: str, writer: Any) -> tuple[str, int]:
+        """Stream ``url`` into ``writer``, hashing on the way.
+
+        At most one block is being staged while the next chunk downloads, so
+        memory stays at a couple of chunk buffers whatever the document size.
+
+        Returns:
+            (sha256 hex digest, size in bytes)
+        """
+        writer.reset()
+        hasher = hashlib.sha256()
+        size = 0
+        pending: Optional[asyncio.Task] = None
+
+        try:
+            async with self._host_limit(url):
+                async with self.get_client().stream("GET", url) as response:
+                    response.raise_for_status()
+                    async for chunk in response.aiter_bytes(self.chunk_size):
+                        size += len(chunk)
+                        if self.max_document_size is not None and size > self.max_document_size:
+                            raise DocumentTooLargeError(self.max_document_size)
+
+                        # hashlib releases the GIL for large buffers
+                        await asyncio.to_thread(hasher.update, chunk)
+
+                        if pending is not None:
+                            await pending
+                        pending = asyncio.create_task(writer.write(chunk))
+
+                    if pending is not None:
+                        await pending
+                        pending = None
+        finally:
+            if pending is not None and not pending.done():
+                pending.cancel()
+                await asyncio.gather(pending, return_exceptions=True)
+
+        return hasher.hexdigest(), size
+
+    async def fetch_and_store(self, citizen_id: int, document_id: str, url: str) -> dict[str, Any]:
+        """Stream one document from the source operator into our storage.
+
+        Only the digest and size are kept. Download failures propagate;
+        storage failures are reported in ``storage_result`` so the remaining
+        documents still get stored.
+        """
+
+        @retry(
+            retry=retry_if_exception_type(httpx.HTTPError),
+            stop=stop_after_attempt(self.max_attempts),
+            wait=wait_exponential(
+                multiplier=self.retry_backoff_seconds,
+                min=min(1, self.retry_backoff_seconds),
+                max=10,
+            ),
+            reraise=True,
+        )
+        async def _stream(writer: Any) -> tuple[str, int]:
+            # A retry restarts the document; re-staged blocks overwrite the partial ones
+            return await self._stream_into(url, writer)
+
+        logger.info(f"Downloading document {document_id} from {urlsplit(url).netloc}")
+        sha256_hash: Optional[str] = None
+        size: Optional[int] = None
+
+        try:
+            writer = await self.storage.open_document_writer(document_id, citizen_id)
+            sha256_hash, size = await _stream(writer)
+            storage_result = await writer.commit({
+                "citizen_id": citizen_id,
+                "document_id": document_id,
+                "upload_time": datetime.utcnow().isoformat(),
+                "sha256": sha256_hash,
+                "size": size,
+                "original_url": url,
+            })
+            logger.info(f"Document {document_id} stored successfully ({size} bytes)")
+        except (httpx.HTTPError, DocumentTooLargeError):
+            raise
+        except Exception as e:
+            logger.error(f"Failed to store document {document_id}: {e}")
+            storage_result = {"success": False, "error": str(e)}
+
+        return {
+            "id": document_id,
+            "sha256": sha256_hash,
+            "size": size,
+            "storage_result": storage_result,
+        }
+
+    async def fetch_and_store_all(
+        self,
+        citizen_id: int,
+        url_documents: dict[str, list[str]],
+    ) -> list[dict[str, Any]]:
+        """Fetch and store every document of a transfer through a bounded worker pool.
+
+        The URLs of one document share its blob name (and block IDs), so they
+        are stored one after another by the same worker; different documents
+        run in parallel.
+
+        Returns:
+            One result per URL, in request order
+
+        Raises:
+            httpx.HTTPError: If a document could not be downloaded (the other
+                in-flight downloads are cancelled)
+        """
+        jobs: list[tuple[str, list[tuple[int, str]]]] = []
+        position = 0
+        for document_id, urls in url_documents.items():
+            jobs.append((document_id, [(position + i, url) for i, url in enumerate(urls)]))
+            position += len(urls)
+        results: list[Optional[dict[str, Any]]] = [None] * position
+        queue: asyncio.Queue = asyncio.Queue()
+        for job in jobs:
+            queue.put_nowait(job)
+
+        async def _worker() -> None:
+            while not queue.empty():
+                document_id, urls = queue.get_nowait()
+                for url_position, url in urls:
+                    results[url_position] = await self.fetch_and_store(citizen_id, document_id, url)
+
+        workers = [
+            asyncio.create_task(_worker())
+            for _ in range(min(self.max_concurrency, len(jobs)))
+        ]
+        try:
+            await asyncio.gather(*workers)
+        except BaseException:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            raise
+
+        return results
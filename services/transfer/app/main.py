@@ -1,5 +1,6 @@
 """Transfer Service - Main application."""
 
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 from typing import AsyncIterator
@@ -8,6 +9,11 @@ from fastapi import FastAPI
 
 from app.database import engine, init_db
 from app.routers import transfer, auth
+from app.azure_storage import azure_storage
+from app.config import get_settings
+from app.transfer_jobs import document_fetcher, transfer_job_worker
+from app.transfer_progress import transfer_progress
+from app.saga import saga_executor
 
 # Import from common package (with fallback)
 try:
@@ -39,7 +45,27 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     except Exception as e:
         logger.warning(f"Database initialization failed: {e}")
         logger.info("Continuing without database for testing purposes")
+    await azure_storage.start()
+    settings = get_settings()
+    worker_task = None
+    if settings.transfer_workers_enabled:
+        worker_task = asyncio.create_task(transfer_job_worker.run_forever())
+    # Resumes sagas interrupted by a restart, then runs new ones
+    saga_task = None
+    if settings.sagas_enabled:
+        saga_task = asyncio.create_task(saga_executor.run_forever())
     yield
+    if worker_task is not None:
+        worker_task.cancel()
+        await asyncio.gather(worker_task, return_exceptions=True)
+        await transfer_job_worker.shutdown()
+    if saga_task is not None:
+        saga_task.cancel()
+        await asyncio.gather(saga_task, return_exceptions=True)
+        await saga_executor.shutdown()
+    await document_fetcher.close()
+    await transfer_progress.close()
+    await azure_storage.stop()
     try:
         await engine.dispose()
         logger.info("Database connection disposed")
@@ -74,6 +100,7 @@ def create_app() -> FastAPI:
             allow_credentials=True,
             allow_methods=["GET", "POST", "PUT", "DELETE", "PATCH"],
             allow_headers=["Content-Type", "Authorization", "X-Request-ID", "X-Trace-ID"],
+            expose_headers=["X-Next-Cursor"],
         )
 
     # Routers
@@ -4,7 +4,8 @@ from datetime import datetime
 from enum import Enum
 from pydantic import BaseModel, Field
 from typing import Optional
-from sqlalchemy import Column, DateTime, Integer, String, Text, Enum as SQLEnum
+from sqlalchemy import Boolean, Column, DateTime, Index, Integer, String, Text, Enum as SQLEnum
+from sqlalchemy.dialects.postgresql import JSONB
 import enum
 
 from app.base import Base
@@ -23,6 +24,10 @@ class TransferStatus(str, enum.Enum):
     FAILED = "failed"
 
 
+# TransferStatus is redefined below for the API models; DB code uses this name
+DBTransferStatus = TransferStatus
+
+
 class Transfer(Base):
     """Transfer record model.
     
@@ -31,7 +36,7 @@ class Transfer(Base):
     __tablename__ = "transfers"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    citizen_id = Column(Integer, nullable=False, index=True)  # Citizen ID being transferred
+    citizen_id = Column(Integer, nullable=False)  # Citizen ID being transferred
     citizen_name = Column(String, nullable=False)
     citizen_email = Column(String, nullable=False)
     
@@ -51,8 +56,8 @@ class Transfer(Base):
     # Status tracking
     status = Column(SQLEnum(TransferStatus), default=TransferStatus.PENDING, nullable=False)
     
-    # Documents transferred (JSON-serialized list of doc IDs)
-    document_ids = Column(Text, nullable=True)  # Store as JSON string
+    # Documents transferred (list of doc IDs)
+    document_ids = Column(JSONB, nullable=True)
     
     # Timestamps
     initiated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -63,6 +68,117 @@ class Transfer(Base):
     # Error info (if failed)
     error_message = Column(Text, nullable=True)
     retry_count = Column(Integer, default=0)  # For hub unregister retries
+    
+    __table_args__ = (
+        # Citizen history, newest first: confirmation lookup and keyset pagination
+        Index("idx_transfers_citizen_initiated", citizen_id, initiated_at.desc(), id.desc()),
+    )
+
+
+class TransferJob(Base):
+    """Durable work item for an inbound transfer.
+    
+    Created with the transfer record when a source operator calls
+    /transferCitizen; claimed by transfer workers with a renewable lease, so
+    jobs of a crashed pod are picked up again once the lease expires.
+    """
+    __tablename__ = "transfer_jobs"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    transfer_id = Column(Integer, nullable=False, unique=True)
+    citizen_id = Column(Integer, nullable=False)
+    
+    # queued -> running -> done | failed; stage: fetch -> confirm
+    status = Column(String(20), nullable=False, default="queued")
+    stage = Column(String(20), nullable=False, default="fetch")
+    
+    # TransferCitizenRequest fields needed by the worker (JSON string)
+    payload = Column(Text, nullable=False)
+    
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    locked_by = Column(String, nullable=True)
+    locked_until = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    
+    __table_args__ = (
+        # Claim scan: due queued jobs and expired leases
+        Index("idx_transfer_jobs_claim", "status", "next_attempt_at"),
+    )
+
+
+class Operator(Base):
+    """Operator allowed to request B2B tokens (see app.operator_registry)."""
+    __tablename__ = "operators"
+
+    operator_id = Column(String, primary_key=True)
+    operator_name = Column(String, nullable=False)
+
+    # OAuth 2.0 client credentials; only a salted hash of the secret is stored
+    client_id = Column(String, nullable=False, unique=True, index=True)
+    client_secret_hash = Column(String, nullable=False)
+
+    transfer_api_url = Column(String, nullable=False)
+    confirm_api_url = Column(String, nullable=False)
+    is_active = Column(Boolean, nullable=False, default=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+
+class SagaInstance(Base):
+    """Persisted state of a running saga (see app.saga_executor).
+
+    A saga waiting for an external event is only this row; executors claim
+    it again when the event arrives or its deadline passes.
+    """
+    __tablename__ = "sagas"
+
+    id = Column(String(36), primary_key=True)
+    saga_type = Column(String(50), nullable=False)
+
+    # running | waiting | compensating -> completed | compensated
+    state = Column(String(20), nullable=False, default="running")
+    step_index = Column(Integer, nullable=False, default=0)
+    attempts = Column(Integer, nullable=False, default=0)
+
+    # Saga data (JSON), completed steps still to compensate (JSON list)
+    context = Column(Text, nullable=False)
+    compensations = Column(Text, nullable=False, default="[]")
+
+    # External event the saga waits for and its payload once delivered (JSON)
+    correlation_key = Column(String, nullable=True, index=True)
+    event = Column(Text, nullable=True)
+
+    # Next time an executor should look at the saga (retry, deadline or now)
+    wake_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    locked_by = Column(String, nullable=True)
+    locked_until = Column(DateTime, nullable=True)
+    error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("idx_sagas_claim", "state", "wake_at"),
+    )
+
+
+class SagaStepLog(Base):
+    """Append-only log of saga step outcomes."""
+    __tablename__ = "saga_step_log"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    saga_id = Column(String(36), nullable=False, index=True)
+    step = Column(String(50), nullable=False)
+
+    # completed | failed | waiting | timed_out | compensated | compensation_failed
+    outcome = Column(String(30), nullable=False)
+    detail = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
 
 # ============================================================================
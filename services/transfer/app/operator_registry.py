@@ -0,0 +1,212 @@
+"""Operator credential registry.
+
+Operators allowed to request B2B tokens are stored in Postgres (``operators``)
+with a salted PBKDF2 hash of their client secret, and looked up by the unique
+``client_id`` index, so every replica authenticates against the same registry.
+Credentials are cached per process for a short TTL; registering an operator
+invalidates the local cache.
+"""
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import logging
+import secrets
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal
+from app.models import Operator, RegisterOperatorRequest
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+HASH_ALGORITHM = "pbkdf2_sha256"
+
+
+class OperatorAlreadyExists(Exception):
+    """Raised when the operator ID or client ID is already registered."""
+    pass
+
+
+@dataclass(frozen=True)
+class OperatorCredential:
+    """Cached view of an operator used to issue tokens."""
+    operator_id: str
+    operator_name: str
+    client_secret_hash: str
+    is_active: bool
+
+
+def hash_client_secret(secret: str, iterations: int = 100_000) -> str:
+    """Hash a client secret as ``pbkdf2_sha256$iterations$salt$hash``."""
+    salt = secrets.token_bytes(16)
+    digest = hashlib.pbkdf2_hmac("sha256", secret.encode("utf-8"), salt, iterations)
+    return "$".join([
+        HASH_ALGORITHM,
+        str(iterations),
+        base64.b64encode(salt).decode("ascii"),
+        base64.b64encode(digest).decode("ascii"),
+    ])
+
+
+def verify_client_secret(secret: str, encoded: str) -> bool:
+    """Check a client secret against ``hash_client_secret`` output (constant-time compare)."""
+    try:
+        algorithm, iterations, salt, expected = encoded.split("$")
+    except ValueError:
+        return False
+    if algorithm != HASH_ALGORITHM:
+        return False
+    digest = hashlib.pbkdf2_hmac("sha256", secret.encode("utf-8"), base64.b64decode(salt), int(iterations))
+    return hmac.compare_digest(digest, base64.b64decode(expected))
+
+
+class OperatorRegistry:
+    """Persistent operator registry with a local credential cache.
+
+    Features:
+    - One indexed lookup by ``client_id`` per cache miss
+    - Secrets stored as salted PBKDF2 hashes, verified off the event loop
+    - Per-process TTL cache, invalidated on registration
+    - Registration conflicts enforced by the database (unique keys)
+    """
+
+    def __init__(
+        self,
+        session_factory: sessionmaker,
+        cache_ttl_seconds: float = 60.0,
+        cache_size: int = 1000,
+        hash_iterations: int = 100_000,
+    ):
+        """Initialize registry.
+
+        Args:
+            session_factory: Async session factory
+            cache_ttl_seconds: How long a credential is served without the database
+            cache_size: Credentials cached per process
+            hash_iterations: PBKDF2 iterations for newly registered secrets
+        """
+        self.session_factory = session_factory
+        self.cache_ttl_seconds = cache_ttl_seconds
+        self.cache_size = cache_size
+        self.hash_iterations = hash_iterations
+
+        self._cache: dict[str, tuple[float, OperatorCredential]] = {}
+
+    def invalidate(self, client_id: Optional[str] = None) -> None:
+        """Drop one cached credential, or all of them."""
+        if client_id is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(client_id, None)
+
+    async def get_credential(self, client_id: str) -> Optional[OperatorCredential]:
+        """Get the credential of a client ID (cached)."""
+        cached = self._cache.get(client_id)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+
+        async with self.session_factory() as db:
+            row = (await db.execute(
+                select(
+                    Operator.operator_id,
+                    Operator.operator_name,
+                    Operator.client_secret_hash,
+                    Operator.is_active,
+                ).where(Operator.client_id == client_id)
+            )).first()
+
+        if row is None:
+            self._cache.pop(client_id, None)
+            return None
+
+        credential = OperatorCredential(
+            operator_id=row.operator_id,
+            operator_name=row.operator_name,
+            client_secret_hash=row.client_secret_hash,
+            is_active=row.is_active,
+        )
+        if len(self._cache) >= self.cache_size:
+            self._cache.pop(next(iter(self._cache)))
+        self._cache[client_id] = (time.monotonic() + self.cache_ttl_seconds, credential)
+        return credential
+
+    async def authenticate(self, client_id: str, client_secret: str) -> Optional[OperatorCredential]:
+        """Return the operator if the client credentials are valid."""
+        credential = await self.get_credential(client_id)
+        if credential is None:
+            return None
+        if not await asyncio.to_thread(verify_client_secret, client_secret, credential.client_secret_hash):
+            return None
+        return credential
+
+    async def register(self, request: RegisterOperatorRequest) -> Operator:
+        """Persist a new operator.
+
+        Raises:
+            OperatorAlreadyExists: If the operator ID or client ID is taken
+        """
+        secret_hash = await asyncio.to_thread(hash_client_secret, request.client_secret, self.hash_iterations)
+
+        async with self.session_factory() as db:
+            existing = (await db.execute(
+                select(Operator.operator_id, Operator.client_id).where(
+                    or_(Operator.operator_id == request.operator_id, Operator.client_id == request.client_id)
+                )
+            )).first()
+            if existing is not None:
+                if existing.operator_id == request.operator_id:
+                    raise OperatorAlreadyExists(f"Operator {request.operator_id} already exists")
+                raise OperatorAlreadyExists(f"Client ID {request.client_id} is already in use")
+
+            now = datetime.utcnow()
+            operator = Operator(
+                operator_id=request.operator_id,
+                operator_name=request.operator_name,
+                client_id=request.client_id,
+                client_secret_hash=secret_hash,
+                transfer_api_url=request.transfer_api_url,
+                confirm_api_url=request.confirm_api_url,
+                is_active=True,
+                created_at=now,
+                updated_at=now,
+            )
+            db.add(operator)
+            try:
+                await db.commit()
+            except IntegrityError:
+                # Registered concurrently by another request
+                await db.rollback()
+                raise OperatorAlreadyExists(
+                    f"Operator {request.operator_id} or client ID {request.client_id} already exists"
+                )
+
+        self.invalidate(request.client_id)
+        return operator
+
+    async def list_operators(self) -> list[Operator]:
+        """All registered operators."""
+        async with self.session_factory() as db:
+            result = await db.execute(select(Operator).order_by(Operator.operator_id))
+            return list(result.scalars().all())
+
+    async def get_operator(self, operator_id: str) -> Optional[Operator]:
+        """Operator by ID."""
+        async with self.session_factory() as db:
+            return await db.get(Operator, operator_id)
+
+
+# Global instance
+operator_registry = OperatorRegistry(
+    session_factory=AsyncSessionLocal,
+    cache_ttl_seconds=settings.operator_cache_ttl_seconds,
+)
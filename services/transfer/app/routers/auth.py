@@ -2,7 +2,7 @@
 
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, Optional
+from typing import Optional
 
 import jwt
 from fastapi import APIRouter, HTTPException, status
@@ -14,17 +14,13 @@ from app.models import (
     OperatorTokenResponse,
     RegisterOperatorRequest,
     RegisterOperatorResponse,
-    OperatorConfig,
 )
+from app.operator_registry import OperatorAlreadyExists, operator_registry
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 settings = get_settings()
 
-# In-memory operator store (use database in production)
-operators_store: Dict[str, OperatorConfig] = {}
-
-
 class OperatorTokenRequestForm(BaseModel):
     """Form data for OAuth 2.0 token request."""
     client_id: str
@@ -84,23 +80,18 @@ async def operator_token(request: OperatorTokenRequest):
             detail="Only client_credentials grant type is supported"
         )
     
-    # Find operator by client_id
-    operator = None
-    for op in operators_store.values():
-        if op.client_id == request.client_id:
-            operator = op
-            break
-    
-    if not operator:
-        logger.warning(f"Operator not found: {request.client_id}")
+    # Indexed lookup by client_id (cached per pod) and secret hash check
+    try:
+        operator = await operator_registry.authenticate(request.client_id, request.client_secret)
+    except Exception as e:
+        logger.error(f"Operator registry unavailable: {e}")
         raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid client credentials"
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Operator registry unavailable"
         )
     
-    # Verify client secret
-    if operator.client_secret != request.client_secret:
-        logger.warning(f"Invalid client secret for operator: {request.client_id}")
+    if not operator:
+        logger.warning(f"Invalid client credentials for operator: {request.client_id}")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid client credentials"
@@ -135,35 +126,15 @@ async def register_operator(request: RegisterOperatorRequest):
     """
     logger.info(f"Registering operator: {request.operator_id}")
     
-    # Check if operator already exists
-    if request.operator_id in operators_store:
+    # Operator ID and client ID are unique keys of the registry
+    try:
+        await operator_registry.register(request)
+    except OperatorAlreadyExists as e:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
-            detail=f"Operator {request.operator_id} already exists"
+            detail=str(e)
         )
     
-    # Check if client_id is already in use
-    for op in operators_store.values():
-        if op.client_id == request.client_id:
-            raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT,
-                detail=f"Client ID {request.client_id} is already in use"
-            )
-    
-    # Create operator configuration
-    operator_config = OperatorConfig(
-        operator_id=request.operator_id,
-        operator_name=request.operator_name,
-        client_id=request.client_id,
-        client_secret=request.client_secret,
-        transfer_api_url=request.transfer_api_url,
-        confirm_api_url=request.confirm_api_url,
-        is_active=True
-    )
-    
-    # Store operator
-    operators_store[request.operator_id] = operator_config
-    
     logger.info(f"Operator registered successfully: {request.operator_id}")
     
     return RegisterOperatorResponse(
@@ -178,6 +149,7 @@ async def list_operators():
     """
     List all registered operators (for debugging/admin purposes).
     """
+    operators = await operator_registry.list_operators()
     return {
         "operators": [
             {
@@ -189,7 +161,7 @@ async def list_operators():
                 "is_active": op.is_active,
                 "created_at": op.created_at
             }
-            for op in operators_store.values()
+            for op in operators
         ]
     }
 
@@ -199,13 +171,13 @@ async def get_operator(operator_id: str):
     """
     Get operator configuration by ID.
     """
-    if operator_id not in operators_store:
+    op = await operator_registry.get_operator(operator_id)
+    if op is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Operator {operator_id} not found"
         )
     
-    op = operators_store[operator_id]
     return {
         "operator_id": op.operator_id,
         "operator_name": op.operator_name,
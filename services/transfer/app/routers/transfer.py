@@ -1,15 +1,17 @@
 """Transfer API router for P2P transfers."""
 
+import asyncio
+import base64
 import hashlib
+import json
 import logging
 from datetime import datetime
 from typing import Annotated, Optional
-from uuid import UUID, uuid4
+from uuid import uuid4
 
-import httpx
 import jwt
-from fastapi import APIRouter, Depends, Header, HTTPException, status
-from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import JSONResponse, StreamingResponse
 
 from app.config import get_settings
 from app.models import (
@@ -22,23 +24,32 @@ from app.models import (
     TransferStatusResponse,
     TransferStatus,
     Transfer as DBTransfer,
-    TransferStatus as DBTransferStatus
+    DBTransferStatus,
 )
 from app.database import get_db
-from sqlalchemy import select, update, delete
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, tuple_, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.azure_storage import azure_storage
 from app.azure_servicebus import azure_servicebus
 from app.azure_redis import azure_redis
+from app.transfer_jobs import enqueue_transfer_job, transfer_job_worker
+from app.transfer_progress import transfer_progress
+from app.saga import saga_executor, transfer_confirmation_key
+from carpeta_common.idempotency import IdempotencyInProgress, IdempotencyKeyReused, IdempotencyStore
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 settings = get_settings()
 
-# In-memory stores (use Redis in production)
-idempotency_store: dict[str, TransferCitizenResponse] = {}
-transfer_store: dict[str, TransferStatusResponse] = {}
+# Responses of /transferCitizen replayed to retried requests
+citizen_idempotency = IdempotencyStore(
+    namespace="transfer:citizen",
+    ttl_seconds=settings.idempotency_ttl_seconds,
+)
+
+# Running transfer processes (strong references until they finish)
+_transfer_tasks: set[asyncio.Task] = set()
 
 
 async def verify_b2b_token(authorization: str = Header(...)) -> dict:
@@ -87,35 +98,7 @@ async def verify_b2b_token(authorization: str = Header(...)) -> dict:
         )
 
 
-async def download_document_with_retry(url: str) -> bytes:
-    """Download document from presigned URL with retry logic."""
-
-    @retry(
-        retry=retry_if_exception_type(httpx.HTTPError),
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=2, min=1, max=10),
-    )
-    async def _download() -> bytes:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, timeout=60.0)
-            response.raise_for_status()
-            return response.content
-
-    return await _download()
-
-
-def verify_sha256(data: bytes, expected_hash: str | None = None) -> str:
-    """Verify document integrity with SHA-256."""
-    computed_hash = hashlib.sha256(data).hexdigest()
-    if expected_hash and computed_hash != expected_hash:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Document integrity check failed",
-        )
-    return computed_hash
-
-
-@router.post("/transferCitizen", response_model=TransferCitizenResponse)
+@router.post("/transferCitizen", response_model=TransferCitizenResponse, status_code=status.HTTP_201_CREATED)
 async def transfer_citizen(
     request: TransferCitizenRequest,
     idempotency_key: Annotated[str, Header(alias="Idempotency-Key")],
@@ -125,20 +108,19 @@ async def transfer_citizen(
     """Receive citizen transfer from another operator.
 
     Flow:
-    1. Check idempotency key
-    2. Download documents from presigned URLs
-    3. Verify SHA-256 integrity
-    4. Store in local S3 and database
-    5. Call confirmation endpoint
-    6. Return 201 or 409 (duplicate)
+    1. Check idempotency key (a repeated key gets the original response)
+    2. Persist the transfer and its job in one transaction
+    3. Return 201; a transfer worker downloads, verifies and stores the
+       documents and calls the confirmation endpoint (see app.transfer_jobs)
 
     Headers:
     - Authorization: Bearer <b2b_token>
     - Idempotency-Key: <uuid>
 
     Responses:
-    - 201: Citizen transfer received and processing
-    - 409: Duplicate request (idempotency)
+    - 201: Citizen transfer received and processing (replayed for a repeated key)
+    - 409: Request with the same key still being processed
+    - 422: Key already used for a different request
     """
     logger.info(
         f"Received transfer request for citizen {request.id} "
@@ -156,92 +138,35 @@ async def transfer_citizen(
             # Continue without authentication for testing
             operator_info = {"operator_id": "test-operator", "operator_name": "Test Operator"}
 
-    # Check idempotency with Redis SETNX (distributed) + Database fallback
-    idempotency_acquired = False
+    # Duplicates get the original answer; concurrent ones wait for it
+    fingerprint = hashlib.sha256(request.model_dump_json().encode()).hexdigest()
     try:
-        # Try Redis SETNX for distributed idempotency
-        if azure_redis.is_available:
-            idempotency_acquired = await azure_redis.set_idempotency_key(
-                idempotency_key=idempotency_key,
-                ttl_seconds=3600  # 1 hour TTL
-            )
-            if not idempotency_acquired:
-                logger.warning(f"Duplicate request with idempotency key {idempotency_key} (Redis)")
-                raise HTTPException(
-                    status_code=status.HTTP_409_CONFLICT,
-                    detail="Duplicate request",
-                )
-            logger.info(f"Idempotency key {idempotency_key} acquired via Redis SETNX")
-        else:
-            logger.warning("Redis not available, using database-only idempotency")
-            # Fallback to database-only idempotency
-            existing_transfer = await db.execute(
-                select(Transfer).where(Transfer.idempotency_key == idempotency_key)
-            )
-            if existing_transfer.scalar_one_or_none():
-                logger.warning(f"Duplicate request with idempotency key {idempotency_key} (Database)")
-                raise HTTPException(
-                    status_code=status.HTTP_409_CONFLICT,
-                    detail="Duplicate request",
-                )
-            idempotency_acquired = True
-    except Exception as e:
-        logger.error(f"Idempotency check failed: {e}")
-        # Fallback to database-only idempotency
-        existing_transfer = await db.execute(
-            select(DBTransfer).where(DBTransfer.idempotency_key == idempotency_key)
+        replay = await citizen_idempotency.begin(
+            idempotency_key,
+            fingerprint=fingerprint,
+            wait_seconds=settings.idempotency_wait_seconds,
         )
-        if existing_transfer.scalar_one_or_none():
-            logger.warning(f"Duplicate request with idempotency key {idempotency_key} (Database fallback)")
-            raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT,
-                detail="Duplicate request",
-            )
-        idempotency_acquired = True
+    except IdempotencyInProgress:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Request with this Idempotency-Key is still being processed",
+        )
+    except IdempotencyKeyReused:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key was already used for a different request",
+        )
+    if replay is not None:
+        logger.info(f"Replaying response for idempotency key {idempotency_key}")
+        return JSONResponse(status_code=replay.status_code, content=replay.body)
+
+    response = TransferCitizenResponse(
+        message="Citizen transfer received and processing",
+        citizen_id=request.id,
+    )
 
     try:
-        # Download and verify documents
-        downloaded_docs = []
-        for doc_id, urls in request.urlDocuments.items():
-            for url in urls:
-                logger.info(f"Downloading document from {url}")
-                data = await download_document_with_retry(url)
-                sha256_hash = verify_sha256(data)
-                downloaded_docs.append(
-                    {"id": doc_id, "data": data, "sha256": sha256_hash, "size": len(data)}
-                )
-
-        # Store documents in Azure Storage with fallback
-        stored_docs = []
-        for doc in downloaded_docs:
-            try:
-                storage_result = await azure_storage.upload_document(
-                    document_data=doc["data"],
-                    document_id=doc["id"],
-                    citizen_id=request.id,
-                    metadata={
-                        "sha256": doc["sha256"],
-                        "size": doc["size"],
-                        "original_url": request.urlDocuments[doc["id"]][0] if doc["id"] in request.urlDocuments else ""
-                    }
-                )
-                stored_docs.append({
-                    "id": doc["id"],
-                    "storage_result": storage_result
-                })
-                logger.info(f"Document {doc['id']} stored successfully")
-            except Exception as e:
-                logger.error(f"Failed to store document {doc['id']}: {e}")
-                # Continue with local storage fallback
-                stored_docs.append({
-                    "id": doc["id"],
-                    "storage_result": {"success": False, "error": str(e)}
-                })
-
-        logger.info(f"Downloaded and stored {len(downloaded_docs)} documents")
-
-        # Create transfer record in database
-        import json
+        # Transfer record and its job commit together: the job survives restarts
         transfer_record = DBTransfer(
             citizen_id=request.id,
             citizen_name=request.citizenName,
@@ -250,82 +175,64 @@ async def transfer_citizen(
             idempotency_key=idempotency_key,
             confirm_url=request.confirmAPI,
             status=DBTransferStatus.PENDING,
-            document_ids=json.dumps([doc["id"] for doc in downloaded_docs]),
+            document_ids=list(request.urlDocuments),
             source_operator_id=operator_info.get("operator_id") if operator_info else None,
             source_operator_name=operator_info.get("operator_name") if operator_info else None
         )
-        
         db.add(transfer_record)
+        await db.flush()
+        enqueue_transfer_job(db, transfer_record, request)
         await db.commit()
-        await db.refresh(transfer_record)
-        
-        logger.info(f"Transfer record created with ID: {transfer_record.id}")
-
-        # Cache transfer data in Redis
-        try:
-            await azure_redis.set_transfer_cache(
-                transfer_id=str(transfer_record.id),
-                data={
-                    "citizen_id": request.id,
-                    "citizen_name": request.citizenName,
-                    "status": "pending",
-                    "documents": stored_docs
-                }
-            )
-        except Exception as e:
-            logger.warning(f"Failed to cache transfer data: {e}")
+    except IntegrityError:
+        # Committed by an earlier attempt whose stored response was lost: same answer
+        await db.rollback()
+        logger.info(f"Transfer with idempotency key {idempotency_key} already queued")
+        await citizen_idempotency.complete(
+            idempotency_key, status.HTTP_201_CREATED, response.model_dump(), fingerprint
+        )
+        return response
+    except Exception as e:
+        logger.error(f"Error queuing transfer: {e}")
+        await citizen_idempotency.abort(idempotency_key)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Transfer failed: {str(e)}",
+        )
 
-        # Send notification to Service Bus
-        try:
-            await azure_servicebus.send_transfer_notification(
-                transfer_id=str(transfer_record.id),
-                citizen_id=request.id,
-                status="pending",
-                message="Transfer initiated",
-                metadata={
-                    "operator_id": operator_info.get("operator_id") if operator_info else "unknown",
-                    "document_count": len(downloaded_docs)
-                }
-            )
-        except Exception as e:
-            logger.warning(f"Failed to send Service Bus notification: {e}")
+    await citizen_idempotency.complete(
+        idempotency_key, status.HTTP_201_CREATED, response.model_dump(), fingerprint
+    )
+    transfer_job_worker.notify()
+    logger.info(f"Transfer {transfer_record.id} queued for citizen {request.id}")
 
-        # Create response
-        response = TransferCitizenResponse(
-            message="Citizen transfer received and processing",
+    # Send notification to Service Bus
+    try:
+        await azure_servicebus.send_transfer_notification(
+            transfer_id=str(transfer_record.id),
             citizen_id=request.id,
+            status="pending",
+            message="Transfer initiated",
+            metadata={
+                "operator_id": operator_info.get("operator_id") if operator_info else "unknown",
+                "document_count": sum(len(urls) for urls in request.urlDocuments.values())
+            }
         )
+    except Exception as e:
+        logger.warning(f"Failed to send Service Bus notification: {e}")
 
-        # Call confirmation endpoint asynchronously
-        # In production, use background task or queue
-        try:
-            await send_confirmation(request.confirmAPI, request.id, req_status=1)
-        except Exception as e:
-            logger.error(f"Error sending confirmation: {e}")
-            # Don't fail the transfer if confirmation fails
-            # It will be retried
-
-        # Clean up idempotency key after successful processing
-        try:
-            if azure_redis.is_available:
-                await azure_redis.delete_idempotency_key(idempotency_key)
-                logger.info(f"Idempotency key {idempotency_key} cleaned up")
-        except Exception as e:
-            logger.warning(f"Failed to clean up idempotency key: {e}")
+    return response
 
-        return response
 
+@router.get("/transferJobs/stats")
+async def transfer_job_stats() -> dict[str, int]:
+    """Inbound transfer queue depth (autoscaling signal for transfer workers)."""
+    try:
+        return await transfer_job_worker.queue_depth()
     except Exception as e:
-        logger.error(f"Error processing transfer: {e}")
-        # Send failure confirmation
-        try:
-            await send_confirmation(request.confirmAPI, request.id, req_status=0)
-        except Exception as conf_error:
-            logger.error(f"Error sending failure confirmation: {conf_error}")
-
+        logger.error(f"Error reading transfer job queue depth: {e}")
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Transfer failed: {str(e)}",
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Transfer job queue unavailable",
         )
 
 
@@ -350,59 +257,66 @@ async def transfer_citizen_confirm(
         f"with status {request.req_status}"
     )
 
-    # Find transfer record in database (get the most recent one)
-    transfer_result = await db.execute(
-        select(DBTransfer)
-        .where(DBTransfer.citizen_id == request.id)
-        .order_by(DBTransfer.initiated_at.desc())
-        .limit(1)
-    )
-    transfer = transfer_result.scalar_one_or_none()
-    
-    if not transfer:
-        logger.warning(f"Transfer not found for citizen {request.id}")
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Transfer not found"
-        )
-
     if request.req_status == 1:
         # Success: Update transfer status to confirmed
         logger.info(f"Transfer successful, updating status for citizen {request.id}")
-        transfer.status = DBTransferStatus.CONFIRMED
-        transfer.confirmed_at = datetime.utcnow()
-        await db.commit()
+        values = {"status": DBTransferStatus.CONFIRMED, "confirmed_at": datetime.utcnow()}
         message = f"Citizen {request.id} transfer confirmed"
     else:
         # Failure: Mark transfer as failed
         logger.warning(f"Transfer failed for citizen {request.id}")
-        transfer.status = DBTransferStatus.FAILED
-        transfer.error_message = "Transfer rejected by destination operator"
-        await db.commit()
+        values = {
+            "status": DBTransferStatus.FAILED,
+            "error_message": "Transfer rejected by destination operator",
+        }
         message = f"Citizen {request.id} transfer failed"
 
-    return TransferConfirmResponse(message=message)
-
+    # Update the most recent transfer in one statement; the subquery is a
+    # single-entry scan of idx_transfers_citizen_initiated
+    latest_transfer = (
+        select(DBTransfer.id)
+        .where(DBTransfer.citizen_id == request.id)
+        .order_by(DBTransfer.initiated_at.desc(), DBTransfer.id.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        update(DBTransfer)
+        .where(DBTransfer.id == latest_transfer)
+        .values(**values)
+        .returning(DBTransfer.id)
+    )
+    transfer_id = result.scalar_one_or_none()
+    
+    if transfer_id is None:
+        logger.warning(f"Transfer not found for citizen {request.id}")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Transfer not found"
+        )
+    await db.commit()
 
-async def send_confirmation(confirm_url: str, citizen_id: int, req_status: int) -> None:
-    """Send confirmation to source operator."""
+    # Wakes the transfer saga waiting for this confirmation (on whichever pod claims it)
+    try:
+        await saga_executor.deliver_event(
+            transfer_confirmation_key(request.id),
+            {"req_status": request.req_status},
+        )
+    except Exception as e:
+        logger.warning(f"Failed to deliver confirmation to transfer saga: {e}")
 
-    @retry(
-        retry=retry_if_exception_type(httpx.HTTPError),
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=2, min=1, max=10),
-    )
-    async def _send() -> None:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                confirm_url,
-                json={"id": citizen_id, "req_status": req_status},
-                timeout=30.0,
-            )
-            response.raise_for_status()
-            logger.info(f"Confirmation sent successfully to {confirm_url}")
+    # Lets consumers (e.g. the folder summary) stop counting the transfer as pending
+    try:
+        await azure_servicebus.send_transfer_notification(
+            transfer_id=str(transfer_id),
+            citizen_id=request.id,
+            status="confirmed" if request.req_status == 1 else "failed",
+            message=message,
+        )
+    except Exception as e:
+        logger.warning(f"Failed to send Service Bus notification: {e}")
 
-    await _send()
+    return TransferConfirmResponse(message=message)
 
 
 @router.post("/initiate", response_model=InitiateTransferResponse)
@@ -444,8 +358,8 @@ async def initiate_transfer(
             updated_at=now,
         )
         
-        # Store transfer record
-        transfer_store[transfer_id] = transfer_record
+        # Store transfer record (shared by all replicas)
+        await transfer_progress.save(transfer_record)
         
         # Background transfer processing
         # 1. Get citizen documents from metadata service
@@ -455,8 +369,10 @@ async def initiate_transfer(
         # 5. Update transfer status based on response
         
         # For now, simulate immediate success
-        # In production, this would be handled by a background worker
-        await simulate_transfer_process(transfer_id, request)
+        # Progress is pushed to /status/{transfer_id}/events as it advances
+        task = asyncio.create_task(simulate_transfer_process(transfer_id, request))
+        _transfer_tasks.add(task)
+        task.add_done_callback(_transfer_tasks.discard)
         
         return InitiateTransferResponse(
             transfer_id=transfer_id,
@@ -477,7 +393,7 @@ async def initiate_transfer(
 async def get_transfer_status(transfer_id: str) -> TransferStatusResponse:
     """Get transfer status by ID.
     
-    This endpoint is used by the frontend to poll for transfer status.
+    Prefer /status/{transfer_id}/events, which pushes every update.
     
     Returns:
     - 200: Transfer status
@@ -485,13 +401,47 @@ async def get_transfer_status(transfer_id: str) -> TransferStatusResponse:
     """
     logger.info(f"Getting status for transfer {transfer_id}")
     
-    if transfer_id not in transfer_store:
+    transfer_record = await transfer_progress.get(transfer_id)
+    if transfer_record is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Transfer not found",
         )
     
-    return transfer_store[transfer_id]
+    return transfer_record
+
+
+@router.get("/status/{transfer_id}/events")
+async def stream_transfer_status(transfer_id: str) -> StreamingResponse:
+    """Stream transfer status as server-sent events.
+    
+    Sends the current status, then one ``status`` event per update on any
+    replica, and an ``end`` event once the transfer completes, fails or is
+    cancelled. Idle connections get a comment every 15 seconds.
+    
+    Returns:
+    - 200: text/event-stream
+    - 404: Transfer not found
+    """
+    if await transfer_progress.get(transfer_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Transfer not found",
+        )
+
+    async def events():
+        async for progress in transfer_progress.subscribe(transfer_id):
+            if progress is None:
+                yield ": keepalive\n\n"
+                continue
+            yield f"event: status\ndata: {progress.model_dump_json()}\n\n"
+        yield "event: end\ndata: {}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 async def simulate_transfer_process(transfer_id: str, request: InitiateTransferRequest):
@@ -503,14 +453,8 @@ async def simulate_transfer_process(transfer_id: str, request: InitiateTransferR
     3. Sends to destination operator
     4. Handles confirmation
     """
-    import asyncio
-    
     async def update_status(status: TransferStatus, progress: int, message: str):
-        if transfer_id in transfer_store:
-            transfer_store[transfer_id].status = status
-            transfer_store[transfer_id].progress = progress
-            transfer_store[transfer_id].message = message
-            transfer_store[transfer_id].updated_at = datetime.utcnow()
+        await transfer_progress.update(transfer_id, status=status, progress=progress, message=message)
     
     try:
         # Simulate processing steps
@@ -531,49 +475,107 @@ async def simulate_transfer_process(transfer_id: str, request: InitiateTransferR
         
     except Exception as e:
         logger.error(f"Transfer process failed: {e}")
-        if transfer_id in transfer_store:
-            transfer_store[transfer_id].status = TransferStatus.FAILED
-            transfer_store[transfer_id].error = str(e)
-            transfer_store[transfer_id].updated_at = datetime.utcnow()
+        try:
+            await transfer_progress.update(transfer_id, status=TransferStatus.FAILED, error=str(e))
+        except Exception as update_error:
+            logger.error(f"Failed to record transfer failure: {update_error}")
+
+
+
+def _encode_cursor(initiated_at: datetime, transfer_id: int) -> str:
+    """Encode a keyset cursor for transfer listing."""
+    raw = json.dumps([initiated_at.isoformat(), transfer_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
 
 
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Decode a keyset cursor produced by ``_encode_cursor``."""
+    try:
+        initiated_at, transfer_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(initiated_at), int(transfer_id)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
 
 @router.get("/")
 async def list_transfers(
-    citizen_id: str,
-    status_filter: str = None,
-    limit: int = 50,
-    offset: int = 0,
+    citizen_id: int,
+    response: Response,
+    status_filter: Optional[DBTransferStatus] = None,
+    limit: Optional[int] = Query(None, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
 ) -> list[dict]:
-    """List transfers for a citizen."""
+    """List transfers for a citizen, newest first.
+
+    Without ``limit`` or ``cursor`` all transfers are returned. Otherwise the
+    listing is keyset-paginated on ``(initiated_at, id)`` (``limit`` defaults
+    to 50): pass the ``X-Next-Cursor`` response header as ``cursor`` to get
+    the next page. Pages are range scans of ``idx_transfers_citizen_initiated``
+    however deep the history goes. ``offset`` is still accepted (without a
+    cursor) for older clients.
+    """
     logger.info(f"Listing transfers for citizen {citizen_id}")
     
-    # Query transfers from database
-    query = select(DBTransfer).where(DBTransfer.citizen_id == int(citizen_id))
+    if cursor and offset:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Use either cursor or offset, not both"
+        )
+    
+    after = _decode_cursor(cursor) if cursor else None
+    if limit is None and after is not None:
+        limit = 50
+    
+    query = select(
+        DBTransfer.id,
+        DBTransfer.citizen_id,
+        DBTransfer.citizen_email,
+        DBTransfer.destination_operator_id,
+        DBTransfer.status,
+        DBTransfer.document_ids,
+        DBTransfer.initiated_at,
+        DBTransfer.confirmed_at,
+    ).where(DBTransfer.citizen_id == citizen_id)
     
     if status_filter:
         query = query.where(DBTransfer.status == status_filter)
+    if after:
+        query = query.where(tuple_(DBTransfer.initiated_at, DBTransfer.id) < tuple_(*after))
     
-    query = query.offset(offset).limit(limit)
+    query = query.order_by(DBTransfer.initiated_at.desc(), DBTransfer.id.desc())
+    if offset:
+        query = query.offset(offset)
+    if limit is not None:
+        query = query.limit(limit + 1)
     
-    result = await db.execute(query)
-    transfers = result.scalars().all()
+    rows = (await db.execute(query)).all()
+    
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = _encode_cursor(rows[-1].initiated_at, rows[-1].id)
     
     # Convert to response format
     transfer_list = []
-    for transfer in transfers:
+    for row in rows:
+        document_ids = row.document_ids or []
         transfer_list.append({
-            "id": str(transfer.id),
-            "document_id": transfer.document_ids or "",
-            "document_title": f"Transfer {transfer.id}",
-            "from_citizen_id": str(transfer.citizen_id),
-            "to_citizen_id": transfer.destination_operator_id or "",
-            "to_email": transfer.citizen_email,
-            "status": transfer.status.value,
-            "created_at": transfer.initiated_at.isoformat(),
-            "updated_at": transfer.confirmed_at.isoformat() if transfer.confirmed_at else transfer.initiated_at.isoformat(),
-            "message": f"Transfer {transfer.status.value}"
+            "id": str(row.id),
+            # Same shape as before document_ids became JSONB (JSON-encoded list)
+            "document_id": json.dumps(document_ids) if document_ids else "",
+            "document_ids": document_ids,
+            "document_title": f"Transfer {row.id}",
+            "from_citizen_id": str(row.citizen_id),
+            "to_citizen_id": row.destination_operator_id or "",
+            "to_email": row.citizen_email,
+            "status": row.status.value,
+            "created_at": row.initiated_at.isoformat(),
+            "updated_at": row.confirmed_at.isoformat() if row.confirmed_at else row.initiated_at.isoformat(),
+            "message": f"Transfer {row.status.value}"
         })
     
     return transfer_list
@@ -669,7 +671,17 @@ async def create_transfer(
         }
         
         # Store transfer
-        transfer_store[transfer_id] = type('Transfer', (), transfer_record)()
+        now = datetime.utcnow()
+        await transfer_progress.save(
+            TransferStatusResponse(
+                transfer_id=transfer_id,
+                status=TransferStatus.PENDING,
+                progress=0,
+                message=message or "Transfer created",
+                created_at=now,
+                updated_at=now,
+            )
+        )
         
         logger.info(f"Transfer {transfer_id} created successfully")
         
@@ -697,19 +709,19 @@ async def accept_transfer(
     """Accept a transfer."""
     logger.info(f"Accepting transfer {transfer_id}")
     
-    if transfer_id not in transfer_store:
+    # Update transfer status
+    transfer = await transfer_progress.update(
+        transfer_id,
+        status=TransferStatus.COMPLETED,
+        progress=100,
+        message="Transfer accepted",
+    )
+    if transfer is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Transfer not found"
         )
     
-    transfer = transfer_store[transfer_id]
-    
-    # Update transfer status
-    transfer.status = TransferStatus.COMPLETED
-    transfer.updated_at = datetime.utcnow()
-    transfer.message = "Transfer accepted"
-    
     logger.info(f"Transfer {transfer_id} accepted")
     
     return {
@@ -726,19 +738,18 @@ async def reject_transfer(
     """Reject a transfer."""
     logger.info(f"Rejecting transfer {transfer_id}")
     
-    if transfer_id not in transfer_store:
+    # Update transfer status
+    transfer = await transfer_progress.update(
+        transfer_id,
+        status=TransferStatus.FAILED,
+        message="Transfer rejected",
+    )
+    if transfer is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Transfer not found"
         )
     
-    transfer = transfer_store[transfer_id]
-    
-    # Update transfer status
-    transfer.status = TransferStatus.FAILED
-    transfer.updated_at = datetime.utcnow()
-    transfer.message = "Transfer rejected"
-    
     logger.info(f"Transfer {transfer_id} rejected")
     
     return {
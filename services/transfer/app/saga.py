@@ -1,23 +1,35 @@
 """Saga pattern for distributed transfer operations.
 
-Implements choreography-based saga with compensation.
+Implements choreography-based saga with compensation, run durably by
+``SagaExecutor`` (state and step log persisted, resumed after restarts).
 
 Steps:
 1. Generate SAS URLs (compensate: revoke SAS)
-2. Send transfer request (compensate: send cancel)
-3. Wait for confirmation (timeout: fail saga)
+2. Send transfer request
+3. Wait for confirmation (event from /transferCitizenConfirm; timeout: fail saga)
 4. Delete source data on success (no compensation)
 
 Each step publishes events to Service Bus for observability and recovery.
 """
 
 import logging
+import socket
 from datetime import datetime, timedelta
 from enum import Enum
 from typing import Dict, Any, Optional
 import asyncio
 
+from app.config import get_settings
+from app.database import AsyncSessionLocal
+from app.saga_executor import DurableSaga, SagaExecutor, SagaStepSpec
+
 logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+def transfer_confirmation_key(citizen_id: int) -> str:
+    """Correlation key of the confirmation a transfer saga waits for."""
+    return f"transfer-confirm:{citizen_id}"
 
 
 class SagaStep(str, Enum):
@@ -42,12 +54,25 @@ class SagaState(str, Enum):
     COMPENSATED = "compensated"
 
 
-class TransferSaga:
+class TransferSaga(DurableSaga):
     """Saga for citizen transfer between operators.
     
-    Manages distributed transaction with compensation on failure.
+    Manages distributed transaction with compensation on failure. Start it
+    with ``saga_executor.start(TransferSaga(...))``.
     """
     
+    saga_type = "transfer"
+    steps = [
+        SagaStepSpec("generate_sas", "_step_generate_sas", compensation="_compensate_generate_sas"),
+        SagaStepSpec("send_transfer", "_step_send_transfer", timeout_seconds=60),
+        SagaStepSpec(
+            "wait_confirmation",
+            "_step_wait_confirmation",
+            wait_seconds=settings.saga_confirmation_timeout_seconds,
+        ),
+        SagaStepSpec("delete_source", "_step_delete_source", timeout_seconds=120),
+    ]
+    
     def __init__(
         self,
         transfer_id: int,
@@ -72,7 +97,6 @@ class TransferSaga:
         self.destination_url = destination_url
         
         # State
-        self.state = SagaState.RUNNING
         self.current_step = SagaStep.STARTED
         self.started_at = datetime.utcnow()
         self.completed_at: Optional[datetime] = None
@@ -81,52 +105,53 @@ class TransferSaga:
         self.sas_urls: list[str] = []
         self.document_ids: list[str] = []
         self.confirmation_received = False
-        self.error: Optional[str] = None
-        
-        # Compensation data
-        self.compensation_actions: list[Dict[str, Any]] = []
     
-    async def execute(self) -> bool:
-        """Execute saga steps.
+    def to_context(self) -> Dict[str, Any]:
+        """Saga data persisted after every step."""
+        return {
+            "transfer_id": self.transfer_id,
+            "citizen_id": self.citizen_id,
+            "source_operator": self.source_operator,
+            "destination_operator": self.destination_operator,
+            "destination_url": self.destination_url,
+            "current_step": self.current_step.value,
+            "started_at": self.started_at.isoformat(),
+            "sas_urls": self.sas_urls,
+            "document_ids": self.document_ids,
+            "confirmation_received": self.confirmation_received,
+        }
+    
+    @classmethod
+    def from_context(cls, context: Dict[str, Any]) -> "TransferSaga":
+        """Rebuild the saga from its persisted data."""
+        saga = cls(
+            transfer_id=context["transfer_id"],
+            citizen_id=context["citizen_id"],
+            source_operator=context["source_operator"],
+            destination_operator=context["destination_operator"],
+            destination_url=context["destination_url"],
+        )
+        saga.current_step = SagaStep(context["current_step"])
+        saga.started_at = datetime.fromisoformat(context["started_at"])
+        saga.sas_urls = context["sas_urls"]
+        saga.document_ids = context["document_ids"]
+        saga.confirmation_received = context["confirmation_received"]
+        return saga
+    
+    def correlation_key(self) -> str:
+        return transfer_confirmation_key(self.citizen_id)
+    
+    async def on_completed(self):
+        """Publish completion once the last step is done."""
+        self.current_step = SagaStep.COMPLETED
+        self.completed_at = datetime.utcnow()
         
-        Returns:
-            True if saga completed successfully, False otherwise
-        """
-        try:
-            # Step 1: Generate SAS URLs for documents
-            await self._step_generate_sas()
-            
-            # Step 2: Send transfer request to destination
-            await self._step_send_transfer()
-            
-            # Step 3: Wait for confirmation (with timeout)
-            await self._step_wait_confirmation()
-            
-            # Step 4: Delete source data
-            await self._step_delete_source()
-            
-            # Mark as completed
-            self.state = SagaState.COMPLETED
-            self.current_step = SagaStep.COMPLETED
-            self.completed_at = datetime.utcnow()
-            
-            await self._publish_saga_event("transfer.saga.completed", {
-                "transfer_id": self.transfer_id,
-                "duration_seconds": (self.completed_at - self.started_at).total_seconds()
-            })
-            
-            logger.info(f"✅ Transfer saga completed: {self.transfer_id}")
-            return True
-            
-        except Exception as e:
-            logger.error(f"❌ Transfer saga failed: {e}")
-            self.state = SagaState.FAILED
-            self.error = str(e)
-            
-            # Execute compensation
-            await self._compensate()
-            
-            return False
+        await self._publish_saga_event("transfer.saga.completed", {
+            "transfer_id": self.transfer_id,
+            "duration_seconds": (self.completed_at - self.started_at).total_seconds()
+        })
+        
+        logger.info(f"✅ Transfer saga completed: {self.transfer_id}")
     
     async def _step_generate_sas(self):
         """Step 1: Generate SAS URLs for all citizen documents."""
@@ -161,12 +186,6 @@ class TransferSaga:
             self.sas_urls = sas_urls
             self.document_ids = document_ids
             
-            # Record compensation action
-            self.compensation_actions.append({
-                "action": "revoke_sas",
-                "sas_urls": self.sas_urls.copy()
-            })
-            
             self.current_step = SagaStep.SAS_GENERATED
             await self._publish_saga_event("transfer.step.sas_generated", {
                 "transfer_id": self.transfer_id,
@@ -214,19 +233,16 @@ class TransferSaga:
             await asyncio.sleep(0.1)
             self.current_step = SagaStep.TRANSFER_SENT
     
-    async def _step_wait_confirmation(self):
-        """Step 3: Wait for confirmation from destination.
+    async def _step_wait_confirmation(self, event: Dict[str, Any]):
+        """Step 3: Handle the confirmation from destination.
         
-        In real implementation, this would be:
-        - Webhook callback
-        - Polling
-        - Service Bus event subscription
+        The executor parks the saga until /transferCitizenConfirm delivers
+        the event (or the confirmation timeout fails the saga).
         """
-        logger.info(f"⏳ [Saga {self.transfer_id}] Step 3: Waiting for confirmation")
+        logger.info(f"⏳ [Saga {self.transfer_id}] Step 3: Confirmation received")
         
-        # TODO: Implement actual confirmation wait
-        # For now, mock immediate confirmation
-        await asyncio.sleep(0.5)
+        if event.get("req_status") != 1:
+            raise Exception("Transfer rejected by destination operator")
         
         self.confirmation_received = True
         self.current_step = SagaStep.CONFIRMED
@@ -272,25 +288,20 @@ class TransferSaga:
             await asyncio.sleep(0.1)
             self.current_step = SagaStep.SOURCE_DELETED
     
-    async def _compensate(self):
-        """Execute compensation actions in reverse order."""
-        logger.warning(f"🔄 [Saga {self.transfer_id}] Starting compensation")
-        
-        self.state = SagaState.COMPENSATING
-        
-        # Execute compensations in reverse order
-        for action in reversed(self.compensation_actions):
-            try:
-                await self._execute_compensation(action)
-            except Exception as e:
-                logger.error(f"Compensation action failed: {e}")
-        
-        self.state = SagaState.COMPENSATED
+    async def _compensate_generate_sas(self):
+        """Compensate step 1."""
+        await self._execute_compensation({
+            "action": "revoke_sas",
+            "sas_urls": self.sas_urls
+        })
+    
+    async def on_compensated(self, error: Optional[str]):
+        """Publish compensation once every completed step was compensated."""
         self.current_step = SagaStep.COMPENSATED
         
         await self._publish_saga_event("transfer.saga.compensated", {
             "transfer_id": self.transfer_id,
-            "error": self.error
+            "error": error
         })
         
         logger.info(f"✅ [Saga {self.transfer_id}] Compensation completed")
@@ -341,33 +352,20 @@ class TransferSaga:
             return []
 
     async def _generate_sas_url(self, blob_name: str, container: str) -> str:
-        """Generate SAS URL for blob."""
+        """Generate SAS URL for blob (valid for 1 hour).
+        
+        Uses the process-wide SasIssuer, so no client or network call per document.
+        """
         try:
-            from azure.storage.blob import BlobServiceClient, generate_blob_sas, BlobSasPermissions
-            from datetime import datetime, timedelta
+            from app.azure_storage import azure_storage
             
-            # Get Azure Storage credentials
-            account_name = self.storage_account_name
-            account_key = self.storage_account_key
-            
-            # Create blob service client
-            blob_service_client = BlobServiceClient(
-                account_url=f"https://{account_name}.blob.core.windows.net",
-                credential=account_key
-            )
-            
-            # Generate SAS token (valid for 1 hour)
-            sas_token = generate_blob_sas(
-                account_name=account_name,
-                container_name=container,
-                blob_name=blob_name,
-                account_key=account_key,
-                permission=BlobSasPermissions(read=True),
-                expiry=datetime.utcnow() + timedelta(hours=1)
+            sas_url = azure_storage.generate_sas_url(
+                blob_name,
+                expires_in=3600,
+                container_name=container
             )
-            
-            # Construct SAS URL
-            sas_url = f"https://{account_name}.blob.core.windows.net/{container}/{blob_name}?{sas_token}"
+            if not sas_url:
+                raise Exception("Azure Storage not configured")
             
             return sas_url
             
@@ -430,3 +428,12 @@ class TransferSaga:
             logger.error(f"Failed to update transfer status: {e}")
             # Don't raise exception for status update failures
 
+
+# Global instance
+saga_executor = SagaExecutor(
+    session_factory=AsyncSessionLocal,
+    owner=settings.pod_name or socket.gethostname(),
+    definitions=[TransferSaga],
+    concurrency=settings.saga_concurrency,
+    lease_seconds=settings.saga_lease_seconds,
+)
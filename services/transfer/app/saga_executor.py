@@ -0,0 +1,497 @@
+"""Durable saga executor.
+
+Sagas are persisted in ``sagas`` with their step position, data (context)
+and the completed steps that still need compensating; every step outcome is
+appended to ``saga_step_log``. Executors on any pod claim due sagas
+(``FOR UPDATE SKIP LOCKED``) under a lease and run them step by step,
+persisting after each one, so a saga interrupted by a restart resumes from
+its last completed step once the lease is released or expires.
+
+A step that waits for an external event (e.g. the destination operator's
+confirmation) parks the saga: the row is marked ``waiting`` with a deadline
+and no coroutine is kept. ``deliver_event`` wakes it from any pod; an
+executor claims it again when the event arrives or when the deadline passes,
+in which case the saga fails and is compensated. Waiting sagas therefore only
+cost a row, and ``concurrency`` bounds the steps actually running per pod.
+"""
+
+import asyncio
+import json
+import logging
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, ClassVar, Iterable, Optional
+from uuid import uuid4
+
+from sqlalchemy import and_, case, func, insert, or_, select, update
+from sqlalchemy.orm import sessionmaker
+
+from app.models import SagaInstance, SagaStepLog
+
+logger = logging.getLogger(__name__)
+
+SAGA_RUNNING = "running"
+SAGA_WAITING = "waiting"
+SAGA_COMPENSATING = "compensating"
+SAGA_COMPLETED = "completed"
+SAGA_COMPENSATED = "compensated"
+
+ACTIVE_STATES = (SAGA_RUNNING, SAGA_WAITING, SAGA_COMPENSATING)
+
+
+@dataclass(frozen=True)
+class SagaStepSpec:
+    """One step of a saga.
+
+    ``action`` and ``compensation`` name coroutine methods of the saga. Steps
+    must be idempotent: a step interrupted by a crash runs again.
+
+    A step with ``wait_seconds`` waits for the saga's correlated event; its
+    action receives the event payload, and the saga fails if no event
+    arrives within ``wait_seconds``.
+    """
+
+    name: str
+    action: str
+    compensation: Optional[str] = None
+    timeout_seconds: float = 60.0
+    max_attempts: int = 3
+    wait_seconds: Optional[float] = None
+
+
+class DurableSaga(ABC):
+    """Base class of sagas run by ``SagaExecutor``.
+
+    Subclasses define ``saga_type`` and ``steps``, and round-trip their data
+    through ``to_context``/``from_context`` (JSON-serializable).
+    """
+
+    saga_type: ClassVar[str]
+    steps: ClassVar[list[SagaStepSpec]]
+
+    @abstractmethod
+    def to_context(self) -> dict[str, Any]:
+        """Saga data to persist (JSON-serializable)."""
+
+    @classmethod
+    @abstractmethod
+    def from_context(cls, context: dict[str, Any]) -> "DurableSaga":
+        """Rebuild the saga from persisted data."""
+
+    def correlation_key(self) -> Optional[str]:
+        """Key under which the saga's external event is delivered."""
+        return None
+
+    async def on_completed(self) -> None:
+        """Called once after the last step."""
+
+    async def on_compensated(self, error: Optional[str]) -> None:
+        """Called once after a failed saga has been compensated."""
+
+
+class _LeaseLost(Exception):
+    """The saga was claimed by another executor."""
+
+
+class SagaExecutor:
+    """Run persisted sagas.
+
+    Features:
+    - Step log and saga state persisted after every step
+    - Incomplete sagas resumed on startup (own leases released) or after lease expiry
+    - Event waits park the saga row instead of holding a coroutine
+    - Per-step timeouts, retries with exponential backoff, reverse-order compensation
+    - ``concurrency`` sagas processed at once per pod
+    """
+
+    def __init__(
+        self,
+        session_factory: sessionmaker,
+        owner: str,
+        definitions: Iterable[type[DurableSaga]] = (),
+        concurrency: int = 50,
+        lease_seconds: int = 300,
+        retry_base_seconds: float = 5.0,
+        poll_interval_seconds: float = 2.0,
+    ):
+        """Initialize executor.
+
+        Args:
+            session_factory: Async session factory
+            owner: Lease owner name (pod name)
+            definitions: Saga classes this executor can run
+            concurrency: Sagas processed at once by this process
+            lease_seconds: Lease length, renewed after every step (must exceed step timeouts)
+            retry_base_seconds: First delay before retrying a failed step (doubles per attempt)
+            poll_interval_seconds: Idle wait between claims when not notified
+        """
+        self.session_factory = session_factory
+        self.owner = owner
+        self.concurrency = concurrency
+        self.lease_seconds = lease_seconds
+        self.retry_base_seconds = retry_base_seconds
+        self.poll_interval_seconds = poll_interval_seconds
+
+        self._definitions: dict[str, type[DurableSaga]] = {}
+        for definition in definitions:
+            self.register(definition)
+
+        self._tasks: set[asyncio.Task] = set()
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def register(self, definition: type[DurableSaga]) -> None:
+        """Make a saga type runnable by this executor."""
+        self._definitions[definition.saga_type] = definition
+
+    def notify(self) -> None:
+        """Wake the executor after starting or waking a saga."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def start(self, saga: DurableSaga) -> str:
+        """Persist a new saga; an executor picks it up right away.
+
+        Returns:
+            Saga ID
+        """
+        saga_id = str(uuid4())
+        async with self.session_factory() as db:
+            async with db.begin():
+                db.add(
+                    SagaInstance(
+                        id=saga_id,
+                        saga_type=saga.saga_type,
+                        state=SAGA_RUNNING,
+                        context=json.dumps(saga.to_context()),
+                        compensations="[]",
+                        correlation_key=saga.correlation_key(),
+                        wake_at=datetime.utcnow(),
+                    )
+                )
+        self.notify()
+        logger.info(f"Saga {saga.saga_type} {saga_id} started")
+        return saga_id
+
+    async def deliver_event(self, correlation_key: str, payload: dict[str, Any]) -> bool:
+        """Record an external event for the saga waiting on ``correlation_key``.
+
+        Events that arrive before the saga reaches its waiting step are kept
+        and consumed when it gets there.
+
+        Returns:
+            True if an active saga received the event
+        """
+        now = datetime.utcnow()
+        async with self.session_factory() as db:
+            async with db.begin():
+                result = await db.execute(
+                    update(SagaInstance)
+                    .where(SagaInstance.correlation_key == correlation_key)
+                    .where(SagaInstance.state.in_([SAGA_RUNNING, SAGA_WAITING]))
+                    .where(SagaInstance.event.is_(None))
+                    .values(
+                        event=json.dumps(payload),
+                        state=SAGA_RUNNING,
+                        wake_at=case((SagaInstance.state == SAGA_WAITING, now), else_=SagaInstance.wake_at),
+                        updated_at=now,
+                    )
+                    .returning(SagaInstance.id)
+                )
+                delivered = result.scalars().all()
+        if delivered:
+            self.notify()
+        return bool(delivered)
+
+    async def counts(self) -> dict[str, int]:
+        """Count active sagas per state."""
+        async with self.session_factory() as db:
+            rows = await db.execute(
+                select(SagaInstance.state, func.count())
+                .where(SagaInstance.state.in_(ACTIVE_STATES))
+                .group_by(SagaInstance.state)
+            )
+            counts = dict(rows.all())
+        return {state: counts.get(state, 0) for state in ACTIVE_STATES}
+
+    async def claim(self, limit: int) -> list[Any]:
+        """Lease up to ``limit`` sagas that are due (new, woken, retrying or past their deadline)."""
+        now = datetime.utcnow()
+        candidates = (
+            select(SagaInstance.id)
+            .where(SagaInstance.state.in_(ACTIVE_STATES))
+            .where(SagaInstance.wake_at <= now)
+            .where(or_(SagaInstance.locked_until.is_(None), SagaInstance.locked_until < now))
+            .order_by(SagaInstance.wake_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        async with self.session_factory() as db:
+            async with db.begin():
+                result = await db.execute(
+                    update(SagaInstance)
+                    .where(SagaInstance.id.in_(candidates))
+                    .values(
+                        locked_by=self.owner,
+                        locked_until=now + timedelta(seconds=self.lease_seconds),
+                        updated_at=now,
+                    )
+                    .returning(
+                        SagaInstance.id,
+                        SagaInstance.saga_type,
+                        SagaInstance.state,
+                        SagaInstance.step_index,
+                        SagaInstance.attempts,
+                        SagaInstance.context,
+                        SagaInstance.compensations,
+                        SagaInstance.event,
+                        SagaInstance.error,
+                    )
+                )
+                return list(result.all())
+
+    async def _persist(
+        self,
+        saga_id: str,
+        step: str,
+        outcome: str,
+        detail: Optional[str] = None,
+        extra_condition: Any = None,
+        **values: Any,
+    ) -> bool:
+        """Update a saga this executor owns and log the step outcome in one transaction."""
+        now = datetime.utcnow()
+        condition = and_(SagaInstance.id == saga_id, SagaInstance.locked_by == self.owner)
+        if extra_condition is not None:
+            condition = and_(condition, extra_condition)
+        if values.get("locked_by", self.owner) is not None:
+            values.setdefault("locked_until", now + timedelta(seconds=self.lease_seconds))
+
+        async with self.session_factory() as db:
+            async with db.begin():
+                result = await db.execute(
+                    update(SagaInstance).where(condition).values(updated_at=now, **values)
+                )
+                if not result.rowcount:
+                    return False
+                await db.execute(
+                    insert(SagaStepLog).values(saga_id=saga_id, step=step, outcome=outcome, detail=detail, created_at=now)
+                )
+        return True
+
+    async def process(self, row: Any) -> None:
+        """Run a claimed saga until it completes, parks, schedules a retry or is compensated."""
+        definition = self._definitions.get(row.saga_type)
+        if definition is None:
+            logger.error(f"Saga {row.id} has unknown type {row.saga_type}")
+            return
+
+        saga = definition.from_context(json.loads(row.context))
+        compensations: list[str] = json.loads(row.compensations)
+
+        try:
+            if row.state == SAGA_COMPENSATING:
+                await self._compensate(row.id, definition, saga, compensations, row.error)
+                return
+
+            index = row.step_index
+            attempts = row.attempts
+            event = json.loads(row.event) if row.event else None
+            deadline_passed = row.state == SAGA_WAITING
+
+            while index < len(definition.steps):
+                spec = definition.steps[index]
+                args: tuple = ()
+
+                if spec.wait_seconds is not None:
+                    if event is None and deadline_passed:
+                        await self._fail(row.id, definition, saga, compensations, spec.name,
+                                         f"No event within {spec.wait_seconds:g}s", outcome="timed_out")
+                        return
+                    if event is None:
+                        parked = await self._persist(
+                            row.id, spec.name, "waiting",
+                            extra_condition=SagaInstance.event.is_(None),
+                            state=SAGA_WAITING,
+                            wake_at=datetime.utcnow() + timedelta(seconds=spec.wait_seconds),
+                            locked_by=None,
+                            locked_until=None,
+                        )
+                        if parked:
+                            return
+                        event = await self._load_event(row.id)
+                    args = (event,)
+
+                try:
+                    await asyncio.wait_for(getattr(saga, spec.action)(*args), timeout=spec.timeout_seconds)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    error = str(e) or type(e).__name__
+                    attempts += 1
+                    if spec.wait_seconds is None and attempts < spec.max_attempts:
+                        delay = self.retry_base_seconds * (2 ** (attempts - 1))
+                        logger.warning(f"Saga {row.id} step {spec.name} failed (attempt {attempts}), retrying in {delay:g}s: {error}")
+                        if not await self._persist(
+                            row.id, spec.name, "failed", error,
+                            attempts=attempts,
+                            context=json.dumps(saga.to_context()),
+                            wake_at=datetime.utcnow() + timedelta(seconds=delay),
+                            locked_by=None,
+                            locked_until=None,
+                        ):
+                            raise _LeaseLost()
+                        return
+                    await self._fail(row.id, definition, saga, compensations, spec.name, error)
+                    return
+
+                if spec.compensation:
+                    compensations.append(spec.name)
+                index += 1
+                attempts = 0
+                if not await self._persist(
+                    row.id, spec.name, "completed",
+                    step_index=index,
+                    attempts=0,
+                    context=json.dumps(saga.to_context()),
+                    compensations=json.dumps(compensations),
+                ):
+                    raise _LeaseLost()
+
+            if not await self._persist(
+                row.id, "saga", SAGA_COMPLETED,
+                state=SAGA_COMPLETED, locked_by=None, locked_until=None,
+            ):
+                raise _LeaseLost()
+            logger.info(f"Saga {row.saga_type} {row.id} completed")
+            try:
+                await saga.on_completed()
+            except Exception as e:
+                logger.warning(f"Saga {row.id} completion hook failed: {e}")
+
+        except _LeaseLost:
+            logger.warning(f"Lost lease on saga {row.id}; another executor continues it")
+
+    async def _load_event(self, saga_id: str) -> Optional[dict[str, Any]]:
+        async with self.session_factory() as db:
+            result = await db.execute(select(SagaInstance.event).where(SagaInstance.id == saga_id))
+            event = result.scalar_one_or_none()
+        return json.loads(event) if event else None
+
+    async def _fail(
+        self,
+        saga_id: str,
+        definition: type[DurableSaga],
+        saga: DurableSaga,
+        compensations: list[str],
+        step: str,
+        error: str,
+        outcome: str = "failed",
+    ) -> None:
+        """Record the failed step and compensate the completed ones."""
+        logger.error(f"Saga {saga_id} step {step} failed: {error}")
+        if not await self._persist(
+            saga_id, step, outcome, error,
+            state=SAGA_COMPENSATING,
+            error=error,
+            context=json.dumps(saga.to_context()),
+        ):
+            raise _LeaseLost()
+        await self._compensate(saga_id, definition, saga, compensations, error)
+
+    async def _compensate(
+        self,
+        saga_id: str,
+        definition: type[DurableSaga],
+        saga: DurableSaga,
+        compensations: list[str],
+        error: Optional[str],
+    ) -> None:
+        """Compensate completed steps in reverse order, persisting after each one."""
+        specs = {spec.name: spec for spec in definition.steps}
+        while compensations:
+            spec = specs[compensations[-1]]
+            try:
+                await asyncio.wait_for(getattr(saga, spec.compensation)(), timeout=spec.timeout_seconds)
+                outcome, detail = "compensated", None
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Compensation is best effort; leave the rest of the saga consistent
+                logger.error(f"Saga {saga_id} compensation of {spec.name} failed: {e}")
+                outcome, detail = "compensation_failed", str(e) or type(e).__name__
+            compensations.pop()
+            if not await self._persist(
+                saga_id, spec.name, outcome, detail,
+                compensations=json.dumps(compensations),
+                context=json.dumps(saga.to_context()),
+            ):
+                raise _LeaseLost()
+
+        if not await self._persist(
+            saga_id, "saga", SAGA_COMPENSATED, error,
+            state=SAGA_COMPENSATED, locked_by=None, locked_until=None,
+        ):
+            raise _LeaseLost()
+        logger.info(f"Saga {saga_id} compensated")
+        try:
+            await saga.on_compensated(error)
+        except Exception as e:
+            logger.warning(f"Saga {saga_id} compensation hook failed: {e}")
+
+    async def recover(self) -> int:
+        """Release leases this owner held before a restart so its sagas resume now."""
+        async with self.session_factory() as db:
+            async with db.begin():
+                result = await db.execute(
+                    update(SagaInstance)
+                    .where(SagaInstance.locked_by == self.owner)
+                    .where(SagaInstance.state.in_(ACTIVE_STATES))
+                    .values(locked_by=None, locked_until=None, updated_at=datetime.utcnow())
+                )
+        return result.rowcount or 0
+
+    async def run_forever(self) -> None:
+        """Claim and run sagas until cancelled."""
+        self._wakeup = asyncio.Event()
+        try:
+            recovered = await self.recover()
+            if recovered:
+                logger.info(f"Resuming {recovered} interrupted sagas")
+        except Exception as e:
+            logger.error(f"Error recovering sagas: {e}")
+        logger.info(f"Saga executor started ({self.concurrency} slots, owner {self.owner})")
+
+        while True:
+            self._wakeup.clear()
+            free = self.concurrency - len(self._tasks)
+            if free > 0:
+                try:
+                    for row in await self.claim(free):
+                        task = asyncio.create_task(self.process(row))
+                        self._tasks.add(task)
+                        task.add_done_callback(self._tasks.discard)
+                except Exception as e:
+                    logger.error(f"Error claiming sagas: {e}")
+
+            # Wake on a new saga or event, a finished saga (free slot) or the poll interval
+            wakeup = asyncio.create_task(self._wakeup.wait())
+            try:
+                await asyncio.wait(
+                    {wakeup, *self._tasks},
+                    timeout=self.poll_interval_seconds,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+            finally:
+                wakeup.cancel()
+
+    async def shutdown(self) -> None:
+        """Stop in-flight sagas and release their leases (they resume elsewhere)."""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        try:
+            await self.recover()
+        except Exception as e:
+            logger.warning(f"Could not release saga leases: {e}")
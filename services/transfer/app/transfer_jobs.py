@@ -0,0 +1,459 @@
+"""Durable processing of inbound citizen transfers.
+
+``/transferCitizen`` only validates the request and persists the transfer
+together with a ``transfer_jobs`` row, then answers 201. Transfer workers
+claim due jobs (``FOR UPDATE SKIP LOCKED``) under a lease that is renewed
+while they work, download and store the documents, and call the source
+operator's ``confirmAPI``. A job whose pod dies is claimed again once its
+lease expires; failed attempts are retried with exponential backoff and the
+source operator is told ``req_status=0`` once a job gives up.
+
+Every write of a job is fenced on its lease (``locked_by`` and the claim's
+``attempts``): a worker whose lease was taken over stops processing and never
+stores documents or calls ``confirmAPI`` for that job again.
+
+Workers run inside the API pods by default (``TRANSFER_WORKERS_ENABLED``) or
+as a separate deployment::
+
+    python -m app.transfer_jobs
+
+Queue depth (``GET /api/transferJobs/stats``) is the autoscaling signal; a
+KEDA postgresql scaler can also query it directly::
+
+    SELECT count(*) FROM transfer_jobs WHERE status IN ('queued', 'running')
+"""
+
+import asyncio
+import json
+import logging
+import socket
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+import httpx
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
+
+from app.azure_redis import azure_redis
+from app.azure_servicebus import azure_servicebus
+from app.azure_storage import azure_storage
+from app.config import get_settings
+from app.database import AsyncSessionLocal
+from app.document_fetcher import DocumentTooLargeError, TransferDocumentFetcher
+from app.models import DBTransferStatus, Transfer, TransferCitizenRequest, TransferJob
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+STAGE_FETCH = "fetch"
+STAGE_CONFIRM = "confirm"
+
+
+async def send_confirmation(confirm_url: str, citizen_id: int, req_status: int) -> None:
+    """Send confirmation to source operator."""
+
+    @retry(
+        retry=retry_if_exception_type(httpx.HTTPError),
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=2, min=1, max=10),
+    )
+    async def _send() -> None:
+        async with httpx.AsyncClient() as client:
+            response = await client.post(
+                confirm_url,
+                json={"id": citizen_id, "req_status": req_status},
+                timeout=30.0,
+            )
+            response.raise_for_status()
+            logger.info(f"Confirmation sent successfully to {confirm_url}")
+
+    await _send()
+
+
+def enqueue_transfer_job(db: AsyncSession, transfer: Transfer, request: TransferCitizenRequest) -> TransferJob:
+    """Add the processing job of an inbound transfer to the caller's transaction.
+
+    ``transfer`` must already be flushed (its ``id`` assigned).
+    """
+    job = TransferJob(
+        transfer_id=transfer.id,
+        citizen_id=request.id,
+        status=JOB_QUEUED,
+        stage=STAGE_FETCH,
+        payload=json.dumps({
+            "urlDocuments": request.urlDocuments,
+            "confirmAPI": request.confirmAPI,
+        }),
+    )
+    db.add(job)
+    return job
+
+
+class JobLeaseLost(Exception):
+    """Raised when a job's lease was taken over by another claim."""
+    pass
+
+
+def _is_permanent(error: Exception) -> bool:
+    """Errors that retrying cannot fix."""
+    if isinstance(error, DocumentTooLargeError):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        code = error.response.status_code
+        return 400 <= code < 500 and code not in (408, 429)
+    return False
+
+
+class TransferJobWorker:
+    """Claim and process transfer jobs.
+
+    Features:
+    - Jobs claimed with FOR UPDATE SKIP LOCKED (any number of pods/processes)
+    - Lease renewed while processing; expired leases are reclaimed after a crash
+    - Writes fenced on the lease; processing stops as soon as it is lost
+    - Fetch and confirm stages: a failed confirmation does not re-download
+    - Exponential backoff between attempts, ``req_status=0`` after the last one
+    """
+
+    def __init__(
+        self,
+        session_factory: sessionmaker,
+        fetcher: TransferDocumentFetcher,
+        owner: str,
+        concurrency: int = 4,
+        lease_seconds: int = 300,
+        max_attempts: int = 5,
+        retry_base_seconds: int = 30,
+        poll_interval_seconds: float = 2.0,
+    ):
+        """Initialize worker.
+
+        Args:
+            session_factory: Async session factory
+            fetcher: Document fetcher (downloads and stores documents)
+            owner: Lease owner name (pod name)
+            concurrency: Jobs processed at once by this process
+            lease_seconds: Lease length; renewed every third of it
+            max_attempts: Attempts before a job fails for good
+            retry_base_seconds: First retry delay (doubles per attempt)
+            poll_interval_seconds: Idle wait between claims when not notified
+        """
+        self.session_factory = session_factory
+        self.fetcher = fetcher
+        self.owner = owner
+        self.concurrency = concurrency
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.poll_interval_seconds = poll_interval_seconds
+
+        self._tasks: set[asyncio.Task] = set()
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def notify(self) -> None:
+        """Wake the worker after enqueuing a job."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def queue_depth(self) -> dict[str, int]:
+        """Count jobs per state (queued and running drive autoscaling)."""
+        async with self.session_factory() as db:
+            rows = await db.execute(
+                select(TransferJob.status, func.count())
+                .where(TransferJob.status.in_([JOB_QUEUED, JOB_RUNNING]))
+                .group_by(TransferJob.status)
+            )
+            counts = dict(rows.all())
+        return {"queued": counts.get(JOB_QUEUED, 0), "running": counts.get(JOB_RUNNING, 0)}
+
+    async def claim(self, limit: int) -> list[Any]:
+        """Lease up to ``limit`` due jobs (or jobs whose lease expired)."""
+        now = datetime.utcnow()
+        candidates = (
+            select(TransferJob.id)
+            .where(
+                or_(
+                    and_(TransferJob.status == JOB_QUEUED, TransferJob.next_attempt_at <= now),
+                    and_(TransferJob.status == JOB_RUNNING, TransferJob.locked_until < now),
+                )
+            )
+            .order_by(TransferJob.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        async with self.session_factory() as db:
+            async with db.begin():
+                result = await db.execute(
+                    update(TransferJob)
+                    .where(TransferJob.id.in_(candidates))
+                    .values(
+                        status=JOB_RUNNING,
+                        locked_by=self.owner,
+                        locked_until=now + timedelta(seconds=self.lease_seconds),
+                        attempts=TransferJob.attempts + 1,
+                        updated_at=now,
+                    )
+                    .returning(
+                        TransferJob.id,
+                        TransferJob.transfer_id,
+                        TransferJob.citizen_id,
+                        TransferJob.stage,
+                        TransferJob.payload,
+                        TransferJob.attempts,
+                    )
+                )
+                return list(result.all())
+
+    def _owned(self, job: Any):
+        """UPDATE of a job, fenced on this claim still holding its lease."""
+        return (
+            update(TransferJob)
+            .where(TransferJob.id == job.id)
+            .where(TransferJob.status == JOB_RUNNING)
+            .where(TransferJob.locked_by == self.owner)
+            .where(TransferJob.attempts == job.attempts)
+        )
+
+    async def _update_job(self, job: Any, **values: Any) -> bool:
+        """Update a job this claim still holds; False if the lease was lost."""
+        async with self.session_factory() as db:
+            async with db.begin():
+                result = await db.execute(self._owned(job).values(updated_at=datetime.utcnow(), **values))
+        return bool(result.rowcount)
+
+    async def _renew_lease(self, job: Any) -> None:
+        """Extend the lease.
+
+        Raises:
+            JobLeaseLost: If another claim took the job over
+        """
+        if not await self._update_job(job, locked_until=datetime.utcnow() + timedelta(seconds=self.lease_seconds)):
+            raise JobLeaseLost(f"Lost lease on transfer job {job.id}")
+
+    async def _heartbeat(self, job: Any) -> None:
+        """Renew the lease while the job is being processed; returns once it is lost."""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await self._renew_lease(job)
+            except JobLeaseLost:
+                logger.warning(f"Lost lease on transfer job {job.id}")
+                return
+            except Exception as e:
+                logger.warning(f"Could not renew lease on transfer job {job.id}: {e}")
+
+    async def _store_documents(self, job: Any, payload: dict[str, Any]) -> None:
+        """Fetch stage: download and store every document, then move to confirm."""
+        documents = await self.fetcher.fetch_and_store_all(job.citizen_id, payload["urlDocuments"])
+
+        async with self.session_factory() as db:
+            async with db.begin():
+                result = await db.execute(
+                    self._owned(job).values(stage=STAGE_CONFIRM, updated_at=datetime.utcnow())
+                )
+                if not result.rowcount:
+                    raise JobLeaseLost(f"Lost lease on transfer job {job.id}")
+                await db.execute(
+                    update(Transfer)
+                    .where(Transfer.id == job.transfer_id)
+                    .values(document_ids=[doc["id"] for doc in documents])
+                )
+
+        logger.info(f"Transfer {job.transfer_id}: stored {len(documents)} documents")
+
+        try:
+            await azure_redis.set_transfer_cache(
+                transfer_id=str(job.transfer_id),
+                data={
+                    "citizen_id": job.citizen_id,
+                    "status": "pending",
+                    "documents": [
+                        {"id": doc["id"], "storage_result": doc["storage_result"]}
+                        for doc in documents
+                    ],
+                },
+            )
+        except Exception as e:
+            logger.warning(f"Failed to cache transfer data: {e}")
+
+    async def process(self, job: Any) -> None:
+        """Run one claimed job to completion or to its next retry.
+
+        Processing is cancelled as soon as the heartbeat finds the lease lost.
+        """
+        work = asyncio.create_task(self._run(job))
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+        try:
+            await asyncio.wait({work, heartbeat}, return_when=asyncio.FIRST_COMPLETED)
+            if not work.done():
+                logger.warning(f"Transfer job {job.id} abandoned: lease taken over by another worker")
+        finally:
+            heartbeat.cancel()
+            work.cancel()
+            await asyncio.gather(work, heartbeat, return_exceptions=True)
+
+    async def _run(self, job: Any) -> None:
+        payload = json.loads(job.payload)
+        try:
+            if job.stage == STAGE_FETCH:
+                await self._store_documents(job, payload)
+            # Only confirm while still holding the job
+            await self._renew_lease(job)
+            await send_confirmation(payload["confirmAPI"], job.citizen_id, req_status=1)
+            if await self._update_job(job, status=JOB_DONE, locked_by=None, locked_until=None, last_error=None):
+                logger.info(f"Transfer job {job.id} (transfer {job.transfer_id}) completed")
+        except asyncio.CancelledError:
+            raise
+        except JobLeaseLost as e:
+            logger.warning(f"{e}, stopping")
+        except Exception as e:
+            logger.error(f"Transfer job {job.id} attempt {job.attempts} failed: {e}")
+            try:
+                await self._retry_or_fail(job, payload, e)
+            except Exception as update_error:
+                # The lease expires and the job is claimed again
+                logger.error(f"Could not record failure of transfer job {job.id}: {update_error}")
+
+    async def _retry_or_fail(self, job: Any, payload: dict[str, Any], error: Exception) -> None:
+        """Schedule the next attempt, or fail the transfer and tell the source operator."""
+        if job.attempts < self.max_attempts and not _is_permanent(error):
+            delay = self.retry_base_seconds * (2 ** (job.attempts - 1))
+            await self._update_job(
+                job,
+                status=JOB_QUEUED,
+                locked_by=None,
+                locked_until=None,
+                next_attempt_at=datetime.utcnow() + timedelta(seconds=delay),
+                last_error=str(error),
+            )
+            return
+
+        async with self.session_factory() as db:
+            async with db.begin():
+                result = await db.execute(
+                    self._owned(job).values(
+                        status=JOB_FAILED,
+                        locked_by=None,
+                        locked_until=None,
+                        last_error=str(error),
+                        updated_at=datetime.utcnow(),
+                    )
+                )
+                if not result.rowcount:
+                    # Another worker holds the job now; it decides and confirms
+                    logger.warning(f"Lost lease on transfer job {job.id}, not failing it")
+                    return
+                await db.execute(
+                    update(Transfer)
+                    .where(Transfer.id == job.transfer_id)
+                    .values(status=DBTransferStatus.FAILED, error_message=str(error))
+                )
+
+        try:
+            await send_confirmation(payload["confirmAPI"], job.citizen_id, req_status=0)
+        except Exception as conf_error:
+            logger.error(f"Error sending failure confirmation: {conf_error}")
+
+        try:
+            await azure_servicebus.send_transfer_notification(
+                transfer_id=str(job.transfer_id),
+                citizen_id=job.citizen_id,
+                status="failed",
+                message=f"Inbound transfer failed: {error}",
+            )
+        except Exception as e:
+            logger.warning(f"Failed to send Service Bus notification: {e}")
+
+    async def run_forever(self) -> None:
+        """Claim and process jobs until cancelled."""
+        self._wakeup = asyncio.Event()
+        logger.info(f"Transfer workers started ({self.concurrency} slots, owner {self.owner})")
+
+        while True:
+            self._wakeup.clear()
+            free = self.concurrency - len(self._tasks)
+            if free > 0:
+                try:
+                    for job in await self.claim(free):
+                        task = asyncio.create_task(self.process(job))
+                        self._tasks.add(task)
+                        task.add_done_callback(self._tasks.discard)
+                except Exception as e:
+                    logger.error(f"Error claiming transfer jobs: {e}")
+
+            # Wake on a new job, a finished job (free slot) or the poll interval
+            wakeup = asyncio.create_task(self._wakeup.wait())
+            try:
+                await asyncio.wait(
+                    {wakeup, *self._tasks},
+                    timeout=self.poll_interval_seconds,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+            finally:
+                wakeup.cancel()
+
+    async def shutdown(self) -> None:
+        """Stop in-flight jobs and hand them back to the queue."""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        try:
+            async with self.session_factory() as db:
+                async with db.begin():
+                    await db.execute(
+                        update(TransferJob)
+                        .where(TransferJob.status == JOB_RUNNING)
+                        .where(TransferJob.locked_by == self.owner)
+                        .values(status=JOB_QUEUED, locked_by=None, locked_until=None, next_attempt_at=datetime.utcnow())
+                    )
+        except Exception as e:
+            logger.warning(f"Could not release transfer job leases: {e}")
+
+
+# Inbound transfer downloads (shared HTTP pool, bounded per transfer and per source host)
+document_fetcher = TransferDocumentFetcher(
+    storage=azure_storage,
+    max_concurrency=settings.transfer_fetch_concurrency,
+    per_host_limit=settings.transfer_fetch_per_host_limit,
+    timeout_seconds=settings.download_timeout_seconds,
+    chunk_size=settings.transfer_block_size,
+    max_document_size=settings.max_document_size_mb * 1024 * 1024,
+)
+
+# Global instance
+transfer_job_worker = TransferJobWorker(
+    session_factory=AsyncSessionLocal,
+    fetcher=document_fetcher,
+    owner=settings.pod_name or socket.gethostname(),
+    concurrency=settings.transfer_worker_concurrency,
+    lease_seconds=settings.transfer_job_lease_seconds,
+    max_attempts=settings.transfer_job_max_attempts,
+)
+
+
+async def main() -> None:
+    """Run transfer workers as a standalone process."""
+    from app.database import engine, init_db
+
+    await init_db()
+    await azure_storage.start()
+    try:
+        await transfer_job_worker.run_forever()
+    finally:
+        await transfer_job_worker.shutdown()
+        await document_fetcher.close()
+        await azure_storage.stop()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=settings.log_level, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    asyncio.run(main())
@@ -0,0 +1,236 @@
+"""Shared transfer progress with push updates.
+
+Progress of citizen-initiated transfers is kept in Redis
+(``transfer-progress:{id}``) and every update is published on the channel of
+the same name, so any replica can answer ``/status/{id}`` and stream updates
+to the browser (``/status/{id}/events``, server-sent events). Each pod holds a
+single pattern subscription and fans messages out to its local subscribers,
+so open streams cost no Redis connection each. Streams read the stored status
+once the subscription is in place, again after it reconnects, and whenever
+they have been idle for a keepalive period, so no terminal update is missed.
+Without Redis the store falls back to process memory (single replica only).
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, AsyncIterator, Optional
+
+from app.azure_redis import AzureRedisService, azure_redis
+from app.models import TransferStatus, TransferStatusResponse
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "transfer-progress:"
+
+TERMINAL_STATUSES = {TransferStatus.COMPLETED, TransferStatus.FAILED, TransferStatus.CANCELLED}
+
+
+class TransferProgressStore:
+    """Persist transfer progress and push every update to subscribers.
+
+    Features:
+    - Latest status per transfer in Redis (shared by all replicas, TTL)
+    - Updates published on ``transfer-progress:{id}``
+    - One pattern subscription per pod, fanned out to local subscribers
+    - Slow subscribers only miss intermediate states, never the latest one
+    - In-memory fallback when Redis is not configured
+    """
+
+    def __init__(
+        self,
+        redis_service: AzureRedisService,
+        ttl_seconds: int = 86400,
+        subscriber_buffer: int = 16,
+        reconnect_max_seconds: float = 30.0,
+    ):
+        """Initialize store.
+
+        Args:
+            redis_service: Redis service (``client`` is used when available)
+            ttl_seconds: How long a transfer's progress is kept after its last update
+            subscriber_buffer: Updates buffered per subscriber before dropping the oldest
+            reconnect_max_seconds: Longest wait between subscription reconnects
+        """
+        self.redis_service = redis_service
+        self.ttl_seconds = ttl_seconds
+        self.subscriber_buffer = subscriber_buffer
+        self.reconnect_max_seconds = reconnect_max_seconds
+
+        self._local: dict[str, str] = {}
+        self._subscribers: dict[str, set[asyncio.Queue]] = {}
+        self._listener: Optional[asyncio.Task] = None
+        self._subscribed = asyncio.Event()
+
+    @property
+    def _redis(self) -> Any:
+        return self.redis_service.client if self.redis_service.is_available else None
+
+    async def save(self, progress: TransferStatusResponse) -> None:
+        """Store the latest status and publish it."""
+        key = f"{KEY_PREFIX}{progress.transfer_id}"
+        data = progress.model_dump_json()
+        redis = self._redis
+
+        if redis is None:
+            self._local[key] = data
+            self._dispatch(progress.transfer_id, data)
+            return
+
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.set(key, data, ex=self.ttl_seconds)
+            pipe.publish(key, data)
+            await pipe.execute()
+
+    async def get(self, transfer_id: str) -> Optional[TransferStatusResponse]:
+        """Get the latest status of a transfer."""
+        key = f"{KEY_PREFIX}{transfer_id}"
+        redis = self._redis
+        data = self._local.get(key) if redis is None else await redis.get(key)
+        return TransferStatusResponse.model_validate_json(data) if data else None
+
+    async def update(
+        self,
+        transfer_id: str,
+        status: Optional[TransferStatus] = None,
+        progress: Optional[int] = None,
+        message: Optional[str] = None,
+        error: Optional[str] = None,
+    ) -> Optional[TransferStatusResponse]:
+        """Apply changes to the stored status and publish it.
+
+        Transfers have a single writer (the process driving them), so a
+        read-modify-write is enough.
+
+        Returns:
+            Updated status, or None if the transfer is unknown
+        """
+        current = await self.get(transfer_id)
+        if current is None:
+            return None
+
+        changes: dict[str, Any] = {"updated_at": datetime.utcnow()}
+        if status is not None:
+            changes["status"] = status
+        if progress is not None:
+            changes["progress"] = progress
+        if message is not None:
+            changes["message"] = message
+        if error is not None:
+            changes["error"] = error
+
+        updated = current.model_copy(update=changes)
+        await self.save(updated)
+        return updated
+
+    def _dispatch(self, transfer_id: str, data: str) -> None:
+        """Hand an update to this pod's subscribers of the transfer."""
+        for queue in self._subscribers.get(transfer_id, ()):
+            if queue.full():
+                queue.get_nowait()  # only the latest state matters
+            queue.put_nowait(data)
+
+    async def _resync(self) -> None:
+        """Re-read the status of every locally streamed transfer (updates may have been missed)."""
+        for transfer_id in list(self._subscribers):
+            data = await self._redis.get(f"{KEY_PREFIX}{transfer_id}")
+            if data:
+                self._dispatch(transfer_id, data)
+
+    async def _listen(self) -> None:
+        """Relay published updates to local subscribers until cancelled."""
+        backoff = 1.0
+        reconnect = False
+        while True:
+            pubsub = self._redis.pubsub()
+            try:
+                await pubsub.psubscribe(f"{KEY_PREFIX}*")
+                self._subscribed.set()
+                backoff = 1.0
+                if reconnect:
+                    await self._resync()
+                reconnect = True
+                async for message in pubsub.listen():
+                    if message.get("type") != "pmessage":
+                        continue
+                    transfer_id = message["channel"][len(KEY_PREFIX):]
+                    self._dispatch(transfer_id, message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._subscribed.clear()
+                reconnect = True
+                logger.warning(f"Transfer progress subscription lost: {e}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.reconnect_max_seconds)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    async def _ensure_listener(self, timeout: float) -> None:
+        """Start the pod's subscription if needed and wait (up to ``timeout``) until it is active."""
+        if self._redis is None:
+            return
+        if self._listener is None or self._listener.done():
+            self._subscribed.clear()
+            self._listener = asyncio.create_task(self._listen())
+        try:
+            await asyncio.wait_for(self._subscribed.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Transfer progress subscription not ready, streaming on keepalive reads")
+
+    async def subscribe(
+        self,
+        transfer_id: str,
+        keepalive_seconds: float = 15.0,
+    ) -> AsyncIterator[Optional[TransferStatusResponse]]:
+        """Yield the current status, then every update until the transfer ends.
+
+        ``None`` is yielded when nothing happened for ``keepalive_seconds``
+        so callers can keep idle connections alive; the stored status is
+        re-read at that point in case a published update was missed.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.subscriber_buffer)
+        self._subscribers.setdefault(transfer_id, set()).add(queue)
+        try:
+            # Subscribed before reading, so no update between the two is lost
+            await self._ensure_listener(timeout=keepalive_seconds)
+            current = await self.get(transfer_id)
+            if current is None:
+                return
+            yield current
+            last_update = current.updated_at
+
+            while current.status not in TERMINAL_STATUSES:
+                try:
+                    data = await asyncio.wait_for(queue.get(), timeout=keepalive_seconds)
+                    update = TransferStatusResponse.model_validate_json(data)
+                except asyncio.TimeoutError:
+                    update = await self.get(transfer_id)
+                    if update is None or update.updated_at <= last_update:
+                        yield None
+                        continue
+
+                if update.updated_at <= last_update:
+                    continue  # older or already seen (e.g. re-read after a reconnect)
+                current, last_update = update, update.updated_at
+                yield current
+        finally:
+            subscribers = self._subscribers.get(transfer_id)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[transfer_id]
+
+    async def close(self) -> None:
+        """Stop the pod's subscription."""
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+
+
+# Global instance
+transfer_progress = TransferProgressStore(azure_redis)
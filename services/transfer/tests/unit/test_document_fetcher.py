@@ -0,0 +1,182 @@
+"""Unit tests for the parallel inbound-transfer document fetcher."""
+
+import asyncio
+import hashlib
+from unittest.mock import AsyncMock, MagicMock
+
+import httpx
+import pytest
+
+from app.document_fetcher import DocumentTooLargeError, TransferDocumentFetcher
+
+
+class FakeWriter:
+    """Records staged blocks like BlobBlockWriter."""
+
+    def __init__(self, document_id):
+        self.document_id = document_id
+        self.blocks = []
+        self.committed = None
+
+    def reset(self):
+        self.blocks = []
+
+    async def write(self, chunk):
+        self.blocks.append(len(chunk))
+
+    async def commit(self, metadata):
+        self.committed = metadata
+        return {"success": True}
+
+
+def make_fetcher(handler, **kwargs):
+    storage = MagicMock()
+    storage.writers = {}
+
+    async def open_document_writer(document_id, citizen_id):
+        storage.writers[document_id] = FakeWriter(document_id)
+        return storage.writers[document_id]
+
+    storage.open_document_writer = AsyncMock(side_effect=open_document_writer)
+    fetcher = TransferDocumentFetcher(storage=storage, **kwargs)
+    fetcher._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return fetcher, storage
+
+
+@pytest.mark.asyncio
+async def test_documents_are_fetched_in_parallel_and_returned_in_order():
+    """Total time tracks the slowest document, results keep request order."""
+    in_flight = 0
+    peak = 0
+
+    async def handler(request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.05)
+        in_flight -= 1
+        return httpx.Response(200, content=request.url.path.encode())
+
+    fetcher, storage = make_fetcher(handler, max_concurrency=4, per_host_limit=4)
+    urls = {f"doc{i}": [f"https://source.example/doc{i}"] for i in range(8)}
+
+    started = asyncio.get_running_loop().time()
+    results = await fetcher.fetch_and_store_all(123, urls)
+    elapsed = asyncio.get_running_loop().time() - started
+
+    assert [r["id"] for r in results] == [f"doc{i}" for i in range(8)]
+    assert results[3]["sha256"] == hashlib.sha256(b"/doc3").hexdigest()
+    assert peak == 4
+    assert elapsed < 0.05 * 8
+    assert storage.writers["doc3"].committed["sha256"] == results[3]["sha256"]
+
+
+@pytest.mark.asyncio
+async def test_per_host_limit_caps_requests_to_one_source():
+    """A single source host never sees more than per_host_limit concurrent GETs."""
+    in_flight = 0
+    peak = 0
+
+    async def handler(request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return httpx.Response(200, content=b"x")
+
+    fetcher, _ = make_fetcher(handler, max_concurrency=8, per_host_limit=2)
+    await fetcher.fetch_and_store_all(123, {f"d{i}": [f"https://one.example/{i}"] for i in range(6)})
+
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_urls_of_one_document_are_stored_one_at_a_time():
+    """URLs sharing a document_id (one blob name) never stage blocks concurrently."""
+    in_flight = {}
+    overlaps = []
+
+    async def handler(request):
+        document_id = request.url.path.split("/")[1]
+        in_flight[document_id] = in_flight.get(document_id, 0) + 1
+        if in_flight[document_id] > 1:
+            overlaps.append(document_id)
+        await asyncio.sleep(0.01)
+        in_flight[document_id] -= 1
+        return httpx.Response(200, content=request.url.path.encode())
+
+    fetcher, _ = make_fetcher(handler, max_concurrency=4, per_host_limit=4)
+    results = await fetcher.fetch_and_store_all(123, {
+        "a": ["https://s.example/a/1", "https://s.example/a/2", "https://s.example/a/3"],
+        "b": ["https://s.example/b/1"],
+    })
+
+    assert overlaps == []
+    assert [r["id"] for r in results] == ["a", "a", "a", "b"]
+    assert results[1]["sha256"] == hashlib.sha256(b"/a/2").hexdigest()
+
+
+@pytest.mark.asyncio
+async def test_failed_download_is_retried_per_document():
+    """A transient error only retries the affected document."""
+    calls: dict[str, int] = {}
+
+    def handler(request):
+        path = request.url.path
+        calls[path] = calls.get(path, 0) + 1
+        if path == "/flaky" and calls[path] == 1:
+            return httpx.Response(503)
+        return httpx.Response(200, content=b"ok")
+
+    fetcher, _ = make_fetcher(handler, retry_backoff_seconds=0)
+    results = await fetcher.fetch_and_store_all(
+        123, {"a": ["https://s.example/flaky"], "b": ["https://s.example/stable"]}
+    )
+
+    assert [r["size"] for r in results] == [2, 2]
+    assert calls == {"/flaky": 2, "/stable": 1}
+
+
+@pytest.mark.asyncio
+async def test_storage_failure_is_reported_not_raised():
+    """A document that cannot be stored is reported; the others still succeed."""
+    fetcher, storage = make_fetcher(lambda request: httpx.Response(200, content=b"data"))
+    writer = FakeWriter("b")
+    storage.open_document_writer.side_effect = [RuntimeError("blob down"), writer]
+
+    results = await fetcher.fetch_and_store_all(
+        123, {"a": ["https://s.example/a"], "b": ["https://s.example/b"]}
+    )
+
+    assert results[0]["storage_result"] == {"success": False, "error": "blob down"}
+    assert results[1]["storage_result"] == {"success": True}
+
+
+@pytest.mark.asyncio
+async def test_documents_stream_into_blocks_and_only_digest_is_kept():
+    """Chunks are hashed and staged as blocks; the result holds only digest and size."""
+    body = b"x" * 10
+
+    fetcher, storage = make_fetcher(lambda request: httpx.Response(200, content=body), chunk_size=4)
+    (result,) = await fetcher.fetch_and_store_all(123, {"a": ["https://s.example/a"]})
+
+    assert storage.writers["a"].blocks == [4, 4, 2]
+    assert result == {
+        "id": "a",
+        "sha256": hashlib.sha256(body).hexdigest(),
+        "size": 10,
+        "storage_result": {"success": True},
+    }
+    assert storage.writers["a"].committed["size"] == 10
+
+
+@pytest.mark.asyncio
+async def test_oversized_document_fails_transfer():
+    """Streaming stops as soon as a document passes the size limit."""
+    fetcher, _ = make_fetcher(
+        lambda request: httpx.Response(200, content=b"x" * 10), chunk_size=4, max_document_size=6
+    )
+
+    with pytest.raises(DocumentTooLargeError):
+        await fetcher.fetch_and_store_all(123, {"a": ["https://s.example/a"]})
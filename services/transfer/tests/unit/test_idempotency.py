@@ -0,0 +1,120 @@
+"""Unit tests for the response-replaying idempotency store used by /transferCitizen."""
+
+import asyncio
+
+import pytest
+
+from carpeta_common.idempotency import (
+    IdempotencyInProgress,
+    IdempotencyKeyReused,
+    IdempotencyStore,
+    IdempotentResponse,
+)
+
+
+class FakeRedis:
+    """Strings with SET NX semantics, shared by every store (replica)."""
+
+    def __init__(self):
+        self.values: dict[str, str] = {}
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        return True
+
+    async def eval(self, script, numkeys, key, token):
+        if token in self.values.get(key, ""):
+            del self.values[key]
+            return 1
+        return 0
+
+
+def make_store(redis, **kwargs):
+    async def factory():
+        return redis
+
+    return IdempotencyStore(namespace="test", client_factory=factory, poll_interval=0.01, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_duplicate_replays_stored_response_across_replicas():
+    redis = FakeRedis()
+    calls = []
+
+    async def handler():
+        calls.append(1)
+        return IdempotentResponse(201, {"message": "accepted"})
+
+    first = await make_store(redis).run("k1", handler)
+    second = await make_store(redis).run("k1", handler)
+
+    assert calls == [1]
+    assert not first.replayed
+    assert second.replayed
+    assert (second.status_code, second.body) == (201, {"message": "accepted"})
+
+
+@pytest.mark.asyncio
+async def test_duplicate_waits_for_in_progress_request():
+    redis = FakeRedis()
+    store_a, store_b = make_store(redis), make_store(redis)
+    release = asyncio.Event()
+
+    async def slow():
+        await release.wait()
+        return IdempotentResponse(201, {"n": 1})
+
+    original = asyncio.create_task(store_a.run("k1", slow))
+    await asyncio.sleep(0.01)
+
+    with pytest.raises(IdempotencyInProgress):
+        await store_b.begin("k1", wait_seconds=0)
+
+    duplicate = asyncio.create_task(store_b.begin("k1", wait_seconds=1))
+    release.set()
+
+    assert (await original).body == {"n": 1}
+    assert (await duplicate).replayed
+
+
+@pytest.mark.asyncio
+async def test_key_reused_for_different_request_is_rejected():
+    store = make_store(FakeRedis())
+    await store.begin("k1", fingerprint="a")
+    await store.complete("k1", 201, {}, fingerprint="a")
+
+    with pytest.raises(IdempotencyKeyReused):
+        await store.begin("k1", fingerprint="b")
+
+
+@pytest.mark.asyncio
+async def test_failed_request_releases_key_for_retry():
+    redis = FakeRedis()
+    store = make_store(redis)
+
+    async def failing():
+        raise RuntimeError("db down")
+
+    with pytest.raises(RuntimeError):
+        await store.run("k1", failing)
+    assert redis.values == {}
+
+    assert await store.begin("k1") is None
+
+
+@pytest.mark.asyncio
+async def test_local_tier_and_fallback_without_redis():
+    async def unavailable():
+        raise ConnectionError("redis down")
+
+    store = IdempotencyStore(namespace="test", client_factory=unavailable)
+    assert await store.begin("k1") is None
+    await store.complete("k1", 201, {"ok": True})
+
+    replay = await store.begin("k1")
+    assert replay.replayed and replay.body == {"ok": True}
@@ -0,0 +1,109 @@
+"""Unit tests for the DB-backed operator credential registry."""
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.models import RegisterOperatorRequest
+from app.operator_registry import (
+    OperatorAlreadyExists,
+    OperatorRegistry,
+    hash_client_secret,
+    verify_client_secret,
+)
+
+
+class FakeSession:
+    """Answers every SELECT with the registry's current row and records statements."""
+
+    def __init__(self, db):
+        self.db = db
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement):
+        self.db.statements.append(statement)
+        return MagicMock(first=MagicMock(return_value=self.db.row))
+
+    def add(self, operator):
+        self.db.added.append(operator)
+
+    async def commit(self):
+        pass
+
+
+def make_registry(row=None):
+    db = SimpleNamespace(row=row, statements=[], added=[])
+    registry = OperatorRegistry(session_factory=lambda: FakeSession(db), hash_iterations=1000)
+    return registry, db
+
+
+def credential_row(secret="s3cret", is_active=True):
+    return SimpleNamespace(
+        operator_id="op-b",
+        operator_name="Operator B",
+        client_id="client-b",
+        client_secret_hash=hash_client_secret(secret, iterations=1000),
+        is_active=is_active,
+    )
+
+
+def test_secret_hash_is_salted_and_verifiable():
+    first = hash_client_secret("s3cret", iterations=1000)
+    second = hash_client_secret("s3cret", iterations=1000)
+
+    assert first != second
+    assert "s3cret" not in first
+    assert verify_client_secret("s3cret", first)
+    assert not verify_client_secret("wrong", first)
+    assert not verify_client_secret("s3cret", "plaintext")
+
+
+@pytest.mark.asyncio
+async def test_authenticate_uses_cache_after_first_lookup():
+    registry, db = make_registry(credential_row())
+
+    assert (await registry.authenticate("client-b", "s3cret")).operator_id == "op-b"
+    assert await registry.authenticate("client-b", "wrong") is None
+    assert len(db.statements) == 1
+    assert "operators.client_id =" in str(db.statements[0])
+
+
+@pytest.mark.asyncio
+async def test_unknown_client_is_not_cached():
+    registry, db = make_registry(None)
+
+    assert await registry.authenticate("client-b", "s3cret") is None
+    db.row = credential_row()
+    assert await registry.authenticate("client-b", "s3cret") is not None
+
+
+@pytest.mark.asyncio
+async def test_register_stores_hash_and_invalidates_cache():
+    registry, db = make_registry(credential_row(is_active=False))
+    assert not (await registry.get_credential("client-b")).is_active
+
+    db.row = None
+    request = RegisterOperatorRequest(
+        operator_id="op-b",
+        operator_name="Operator B",
+        client_id="client-b",
+        client_secret="new-secret",
+        transfer_api_url="https://op-b.example/transfer",
+        confirm_api_url="https://op-b.example/confirm",
+    )
+    await registry.register(request)
+
+    stored = db.added[0]
+    assert stored.client_secret_hash != "new-secret"
+    assert verify_client_secret("new-secret", stored.client_secret_hash)
+    assert "client-b" not in registry._cache
+
+    db.row = SimpleNamespace(operator_id="op-b", client_id="client-b")
+    with pytest.raises(OperatorAlreadyExists):
+        await registry.register(request)
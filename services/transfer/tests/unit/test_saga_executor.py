@@ -0,0 +1,235 @@
+"""Unit tests for the durable saga executor."""
+
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.saga import TransferSaga
+from app.saga_executor import (
+    SAGA_COMPENSATED,
+    SAGA_COMPENSATING,
+    SAGA_COMPLETED,
+    SAGA_RUNNING,
+    SAGA_WAITING,
+    DurableSaga,
+    SagaExecutor,
+    SagaStepSpec,
+)
+
+
+class FakeSession:
+    """Records executed statements."""
+
+    def __init__(self, statements):
+        self.statements = statements
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def begin(self):
+        return self
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return MagicMock(rowcount=1, all=MagicMock(return_value=[]))
+
+
+class OrderSaga(DurableSaga):
+    """Reserve -> wait for payment -> ship."""
+
+    saga_type = "order"
+    steps = [
+        SagaStepSpec("reserve", "reserve", compensation="release", max_attempts=2),
+        SagaStepSpec("payment", "paid", wait_seconds=60),
+        SagaStepSpec("ship", "ship", timeout_seconds=0.05),
+    ]
+    calls: list = []
+    fail_reserve = False
+    ship_delay = 0.0
+
+    def __init__(self, order_id):
+        self.order_id = order_id
+
+    def to_context(self):
+        return {"order_id": self.order_id}
+
+    @classmethod
+    def from_context(cls, context):
+        return cls(context["order_id"])
+
+    def correlation_key(self):
+        return f"payment:{self.order_id}"
+
+    async def reserve(self):
+        OrderSaga.calls.append("reserve")
+        if OrderSaga.fail_reserve:
+            raise RuntimeError("stock service down")
+
+    async def release(self):
+        OrderSaga.calls.append("release")
+
+    async def paid(self, event):
+        OrderSaga.calls.append(("paid", event))
+
+    async def ship(self):
+        await asyncio.sleep(OrderSaga.ship_delay)
+        OrderSaga.calls.append("ship")
+
+    async def on_completed(self):
+        OrderSaga.calls.append("completed")
+
+    async def on_compensated(self, error):
+        OrderSaga.calls.append(("compensated", error))
+
+
+@pytest.fixture(autouse=True)
+def reset_order_saga():
+    OrderSaga.calls = []
+    OrderSaga.fail_reserve = False
+    OrderSaga.ship_delay = 0.0
+
+
+def make_executor():
+    statements = []
+    executor = SagaExecutor(
+        session_factory=lambda: FakeSession(statements),
+        owner="pod-a",
+        definitions=[OrderSaga],
+    )
+    return executor, statements
+
+
+def make_row(state=SAGA_RUNNING, step_index=0, attempts=0, event=None, compensations=()):
+    return SimpleNamespace(
+        id="saga-1",
+        saga_type="order",
+        state=state,
+        step_index=step_index,
+        attempts=attempts,
+        context=json.dumps({"order_id": 9}),
+        compensations=json.dumps(list(compensations)),
+        event=json.dumps(event) if event is not None else None,
+        error=None,
+    )
+
+
+def step_log(statements):
+    """(step, outcome) of every saga_step_log row written."""
+    rows = []
+    for stmt in statements:
+        if getattr(stmt, "table", None) is not None and stmt.table.name == "saga_step_log":
+            values = {column.key: value.value for column, value in stmt._values.items()}
+            rows.append((values["step"], values["outcome"]))
+    return rows
+
+
+def saga_updates(statements):
+    return [
+        {column.key: value.value for column, value in stmt._values.items() if hasattr(value, "value")}
+        for stmt in statements
+        if getattr(stmt, "table", None) is not None and stmt.table.name == "sagas" and hasattr(stmt, "_values")
+    ]
+
+
+@pytest.mark.asyncio
+async def test_claim_skips_locked_and_takes_due_sagas():
+    executor, statements = make_executor()
+    await executor.claim(10)
+
+    sql = str(statements[0].compile(dialect=postgresql.dialect()))
+    assert "FOR UPDATE SKIP LOCKED" in sql
+    assert "wake_at <=" in sql
+
+
+@pytest.mark.asyncio
+async def test_saga_parks_at_event_step_without_holding_a_coroutine():
+    """Completed steps are persisted; the wait step leaves only a waiting row."""
+    executor, statements = make_executor()
+    await executor.process(make_row())
+
+    assert OrderSaga.calls == ["reserve"]
+    assert step_log(statements) == [("reserve", "completed"), ("payment", "waiting")]
+    parked = saga_updates(statements)[-1]
+    assert parked["state"] == SAGA_WAITING
+    assert parked["locked_by"] is None
+    assert json.loads(saga_updates(statements)[0]["compensations"]) == ["reserve"]
+
+
+@pytest.mark.asyncio
+async def test_delivered_event_resumes_saga_to_completion():
+    executor, statements = make_executor()
+    await executor.process(make_row(step_index=1, event={"status": "paid"}, compensations=["reserve"]))
+
+    assert OrderSaga.calls == [("paid", {"status": "paid"}), "ship", "completed"]
+    assert step_log(statements)[-1] == ("saga", SAGA_COMPLETED)
+
+
+@pytest.mark.asyncio
+async def test_wait_deadline_compensates_completed_steps():
+    executor, statements = make_executor()
+    await executor.process(make_row(state=SAGA_WAITING, step_index=1, compensations=["reserve"]))
+
+    assert OrderSaga.calls == ["release", ("compensated", "No event within 60s")]
+    assert step_log(statements) == [
+        ("payment", "timed_out"),
+        ("reserve", "compensated"),
+        ("saga", SAGA_COMPENSATED),
+    ]
+    assert saga_updates(statements)[0]["state"] == SAGA_COMPENSATING
+
+
+@pytest.mark.asyncio
+async def test_failed_step_is_retried_then_compensated():
+    executor, statements = make_executor()
+    OrderSaga.fail_reserve = True
+
+    await executor.process(make_row())
+    retry = saga_updates(statements)[-1]
+    assert retry["attempts"] == 1
+    assert retry["locked_by"] is None
+    assert "release" not in OrderSaga.calls
+
+    await executor.process(make_row(attempts=1))
+    assert step_log(statements)[-1] == ("saga", SAGA_COMPENSATED)
+
+
+@pytest.mark.asyncio
+async def test_step_timeout_is_enforced():
+    executor, statements = make_executor()
+    OrderSaga.ship_delay = 1.0
+
+    await executor.process(make_row(step_index=2, attempts=2, event={}, compensations=["reserve"]))
+
+    assert "ship" not in OrderSaga.calls
+    assert ("ship", "failed") in step_log(statements)
+    assert "release" in OrderSaga.calls
+
+
+def test_transfer_saga_round_trips_its_context():
+    saga = TransferSaga(1, 123, "op-a", "op-b", "https://op-b.example/transfer")
+    saga.sas_urls = ["https://blob/doc?sig"]
+    restored = TransferSaga.from_context(json.loads(json.dumps(saga.to_context())))
+
+    assert restored.to_context() == saga.to_context()
+    assert restored.correlation_key() == "transfer-confirm:123"
+
+
+def test_saga_without_context_round_trip_cannot_be_instantiated():
+    """Forgetting from_context fails at construction, not when a saga is resumed."""
+
+    class Incomplete(DurableSaga):
+        saga_type = "incomplete"
+        steps = []
+
+        def to_context(self):
+            return {}
+
+    with pytest.raises(TypeError, match="from_context"):
+        Incomplete()
@@ -0,0 +1,101 @@
+"""Unit tests for keyset-paginated transfer history."""
+
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi import HTTPException, Response
+from sqlalchemy.dialects import postgresql
+
+from app.models import DBTransferStatus
+from app.routers.transfer import _decode_cursor, list_transfers
+
+
+class FakeSession:
+    """Returns the given rows and records executed statements."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.statements = []
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return MagicMock(all=MagicMock(return_value=self.rows[: statement._limit]))
+
+
+def make_rows(count):
+    start = datetime(2026, 10, 1)
+    return [
+        SimpleNamespace(
+            id=count - i,
+            citizen_id=123,
+            citizen_email="ana@example.com",
+            destination_operator_id="op-b",
+            status=DBTransferStatus.CONFIRMED,
+            document_ids=[f"doc-{i}"],
+            initiated_at=start - timedelta(hours=i),
+            confirmed_at=None,
+        )
+        for i in range(count)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_page_is_ordered_and_returns_next_cursor():
+    db = FakeSession(make_rows(3))
+    response = Response()
+
+    page = await list_transfers(citizen_id=123, response=response, limit=2, offset=0, cursor=None, db=db)
+
+    assert [t["id"] for t in page] == ["3", "2"]
+    assert page[0]["document_ids"] == ["doc-0"]
+    assert _decode_cursor(response.headers["X-Next-Cursor"]) == (datetime(2026, 9, 30, 23), 2)
+
+    sql = str(db.statements[0].compile(dialect=postgresql.dialect()))
+    assert "ORDER BY transfers.initiated_at DESC, transfers.id DESC" in sql
+
+
+@pytest.mark.asyncio
+async def test_cursor_continues_after_last_row():
+    response = Response()
+    await list_transfers(citizen_id=123, response=response, limit=1, offset=0, cursor=None, db=FakeSession(make_rows(2)))
+
+    db = FakeSession(make_rows(1))
+
+    page = await list_transfers(
+        citizen_id=123, response=Response(), limit=1, offset=0, cursor=response.headers["X-Next-Cursor"], db=db
+    )
+
+    sql = str(db.statements[0].compile(dialect=postgresql.dialect()))
+    assert "(transfers.initiated_at, transfers.id) < (" in sql
+    assert len(page) == 1
+
+    with pytest.raises(HTTPException):
+        _decode_cursor("not-a-cursor")
+
+
+@pytest.mark.asyncio
+async def test_unpaged_listing_returns_everything_in_legacy_shape():
+    db = FakeSession(make_rows(120))
+    response = Response()
+
+    page = await list_transfers(citizen_id=123, response=response, limit=None, offset=0, cursor=None, db=db)
+
+    assert len(page) == 120
+    assert "X-Next-Cursor" not in response.headers
+    assert page[0]["document_id"] == '["doc-0"]'
+
+
+@pytest.mark.asyncio
+async def test_offset_is_applied_and_not_combined_with_cursor():
+    db = FakeSession(make_rows(5))
+
+    await list_transfers(citizen_id=123, response=Response(), limit=2, offset=2, cursor=None, db=db)
+
+    sql = str(db.statements[0].compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+    assert "OFFSET 2" in sql
+
+    with pytest.raises(HTTPException) as error:
+        await list_transfers(citizen_id=123, response=Response(), limit=2, offset=2, cursor="x", db=db)
+    assert error.value.status_code == 400
@@ -0,0 +1,174 @@
+"""Unit tests for durable inbound transfer jobs."""
+
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app import transfer_jobs
+from app.transfer_jobs import JOB_DONE, JOB_FAILED, JOB_QUEUED, STAGE_CONFIRM, TransferJobWorker
+
+
+class FakeSession:
+    """Records executed statements; fenced job updates match ``rowcount`` rows."""
+
+    def __init__(self, statements, rowcount=1):
+        self.statements = statements
+        self.rowcount = rowcount
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def begin(self):
+        return self
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return MagicMock(rowcount=self.rowcount, all=MagicMock(return_value=[]))
+
+
+def make_worker(lease_held=True, **kwargs):
+    statements = []
+    fetcher = MagicMock()
+    fetcher.fetch_and_store_all = AsyncMock(
+        return_value=[{"id": "doc1", "sha256": "ab", "size": 2, "storage_result": {"success": True}}]
+    )
+    worker = TransferJobWorker(
+        session_factory=lambda: FakeSession(statements, rowcount=1 if lease_held else 0),
+        fetcher=fetcher,
+        owner="pod-a",
+        **kwargs,
+    )
+    return worker, fetcher, statements
+
+
+def make_job(stage="fetch", attempts=1):
+    return SimpleNamespace(
+        id=7,
+        transfer_id=42,
+        citizen_id=123,
+        stage=stage,
+        attempts=attempts,
+        payload=json.dumps({
+            "urlDocuments": {"doc1": ["https://source.example/doc1"]},
+            "confirmAPI": "https://source.example/confirm",
+        }),
+    )
+
+
+def job_values(statements):
+    """Values of every UPDATE on transfer_jobs, in order."""
+    return [
+        {column.key: value.value for column, value in stmt._values.items() if hasattr(value, "value")}
+        for stmt in statements
+        if getattr(stmt, "table", None) is not None and stmt.table.name == "transfer_jobs"
+    ]
+
+
+@pytest.mark.asyncio
+async def test_claim_skips_locked_jobs_and_reclaims_expired_leases():
+    """Workers on any pod claim disjoint jobs; jobs of a dead pod come back."""
+    worker, _, statements = make_worker()
+    await worker.claim(4)
+
+    sql = str(statements[0].compile(dialect=postgresql.dialect()))
+    assert "FOR UPDATE SKIP LOCKED" in sql
+    assert "locked_until <" in sql
+    assert "RETURNING" in sql
+
+
+@pytest.mark.asyncio
+async def test_job_stores_documents_then_confirms():
+    """A successful job stores the documents, moves to confirm and sends req_status=1."""
+    worker, fetcher, statements = make_worker()
+
+    with patch.object(transfer_jobs, "send_confirmation", AsyncMock()) as confirm, \
+            patch.object(transfer_jobs.azure_redis, "set_transfer_cache", AsyncMock()):
+        await worker.process(make_job())
+
+    fetcher.fetch_and_store_all.assert_awaited_once_with(123, {"doc1": ["https://source.example/doc1"]})
+    confirm.assert_awaited_once_with("https://source.example/confirm", 123, req_status=1)
+    values = job_values(statements)
+    assert values[0]["stage"] == STAGE_CONFIRM
+    assert values[-1]["status"] == JOB_DONE
+
+
+@pytest.mark.asyncio
+async def test_confirm_stage_does_not_download_again():
+    """A job retried after a failed confirmation only calls confirmAPI."""
+    worker, fetcher, _ = make_worker()
+
+    with patch.object(transfer_jobs, "send_confirmation", AsyncMock()) as confirm:
+        await worker.process(make_job(stage=STAGE_CONFIRM, attempts=2))
+
+    fetcher.fetch_and_store_all.assert_not_awaited()
+    confirm.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_transient_failure_is_requeued_with_backoff():
+    """Failures before the last attempt requeue the job without telling the source operator."""
+    worker, fetcher, statements = make_worker(max_attempts=3)
+    fetcher.fetch_and_store_all.side_effect = httpx.ConnectError("source down")
+
+    with patch.object(transfer_jobs, "send_confirmation", AsyncMock()) as confirm:
+        await worker.process(make_job(attempts=1))
+
+    confirm.assert_not_awaited()
+    values = job_values(statements)
+    assert values[-1]["status"] == JOB_QUEUED
+    assert values[-1]["locked_by"] is None
+
+
+@pytest.mark.asyncio
+async def test_last_failed_attempt_fails_transfer_and_sends_req_status_0():
+    """Once attempts are exhausted the transfer fails and the source keeps the citizen."""
+    worker, fetcher, statements = make_worker(max_attempts=3)
+    fetcher.fetch_and_store_all.side_effect = httpx.ConnectError("source down")
+
+    with patch.object(transfer_jobs, "send_confirmation", AsyncMock()) as confirm, \
+            patch.object(transfer_jobs.azure_servicebus, "send_transfer_notification", AsyncMock()):
+        await worker.process(make_job(attempts=3))
+
+    confirm.assert_awaited_once_with("https://source.example/confirm", 123, req_status=0)
+    assert job_values(statements)[-1]["status"] == JOB_FAILED
+    assert any(stmt.table.name == "transfers" for stmt in statements)
+
+
+@pytest.mark.asyncio
+async def test_lost_lease_stores_nothing_and_never_confirms():
+    """Once another worker reclaimed the job, this one neither records documents nor confirms."""
+    worker, _, statements = make_worker(lease_held=False)
+
+    with patch.object(transfer_jobs, "send_confirmation", AsyncMock()) as confirm, \
+            patch.object(transfer_jobs.azure_redis, "set_transfer_cache", AsyncMock()):
+        await worker.process(make_job())
+
+    confirm.assert_not_awaited()
+    assert not any(stmt.table.name == "transfers" for stmt in statements)
+
+    worker, _, statements = make_worker(lease_held=False, max_attempts=1)
+    with patch.object(transfer_jobs, "send_confirmation", AsyncMock()) as confirm:
+        await worker._retry_or_fail(make_job(), {"confirmAPI": "https://source.example/confirm"}, ValueError("x"))
+
+    confirm.assert_not_awaited()
+    assert not any(stmt.table.name == "transfers" for stmt in statements)
+
+
+@pytest.mark.asyncio
+async def test_lease_loss_cancels_processing():
+    """The heartbeat noticing a lost lease stops the job mid-download."""
+    worker, fetcher, _ = make_worker(lease_held=False, lease_seconds=0.03)
+    fetcher.fetch_and_store_all.side_effect = lambda *args: asyncio.sleep(10)
+
+    with patch.object(transfer_jobs, "send_confirmation", AsyncMock()) as confirm:
+        await asyncio.wait_for(worker.process(make_job()), timeout=1)
+
+    confirm.assert_not_awaited()
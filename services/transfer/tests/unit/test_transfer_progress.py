@@ -0,0 +1,217 @@
+"""Unit tests for shared transfer progress and server-pushed updates."""
+
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from app.models import TransferStatus, TransferStatusResponse
+from app.transfer_progress import TransferProgressStore
+
+
+class FakePubSub:
+    def __init__(self, redis):
+        self.redis = redis
+        self.queue: asyncio.Queue = asyncio.Queue()
+
+    async def psubscribe(self, pattern):
+        self.redis.pubsubs.append(self)
+        self.queue.put_nowait({"type": "psubscribe", "channel": pattern, "data": 1})
+
+    async def listen(self):
+        while True:
+            yield await self.queue.get()
+
+    async def aclose(self):
+        self.redis.pubsubs.remove(self)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def set(self, key, value, ex=None):
+        self.commands.append(lambda: self.redis.values.__setitem__(key, value))
+
+    def publish(self, channel, data):
+        self.commands.append(lambda: self.redis.publish(channel, data))
+
+    async def execute(self):
+        for command in self.commands:
+            command()
+
+
+class FakeRedis:
+    """Strings and pattern pub/sub shared by every store (replica)."""
+
+    def __init__(self):
+        self.values: dict[str, str] = {}
+        self.pubsubs: list[FakePubSub] = []
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    def pubsub(self):
+        return FakePubSub(self)
+
+    def publish(self, channel, data):
+        for pubsub in self.pubsubs:
+            pubsub.queue.put_nowait({"type": "pmessage", "channel": channel, "data": data})
+
+
+def new_status(transfer_id="t-1"):
+    now = datetime.utcnow()
+    return TransferStatusResponse(
+        transfer_id=transfer_id,
+        status=TransferStatus.PENDING,
+        progress=0,
+        message="Transfer initiated",
+        created_at=now,
+        updated_at=now,
+    )
+
+
+async def collect(store, transfer_id, received):
+    async for update in store.subscribe(transfer_id, keepalive_seconds=5):
+        received.append(update)
+
+
+@pytest.mark.asyncio
+async def test_local_store_persists_and_streams_until_terminal():
+    """Without Redis, updates are stored in memory and pushed to subscribers."""
+    store = TransferProgressStore(SimpleNamespace(is_available=False, client=None))
+    await store.save(new_status())
+
+    received = []
+    consumer = asyncio.create_task(collect(store, "t-1", received))
+    await asyncio.sleep(0)
+
+    await store.update("t-1", status=TransferStatus.IN_PROGRESS, progress=50)
+    await store.update("t-1", status=TransferStatus.COMPLETED, progress=100)
+    await asyncio.wait_for(consumer, timeout=1)
+
+    assert [u.progress for u in received] == [0, 50, 100]
+    assert (await store.get("t-1")).status == TransferStatus.COMPLETED
+    assert store._subscribers == {}
+
+
+@pytest.mark.asyncio
+async def test_update_on_one_replica_reaches_subscriber_on_another():
+    """Status and pushes work across replicas through Redis."""
+    redis = FakeRedis()
+    writer = TransferProgressStore(SimpleNamespace(is_available=True, client=redis))
+    reader = TransferProgressStore(SimpleNamespace(is_available=True, client=redis))
+    await writer.save(new_status())
+
+    received = []
+    consumer = asyncio.create_task(collect(reader, "t-1", received))
+    while not received:  # subscribed and read the current status
+        await asyncio.sleep(0)
+
+    await writer.update("t-1", status=TransferStatus.IN_PROGRESS, progress=25, message="Retrieving documents...")
+    await writer.update("t-1", status=TransferStatus.FAILED, error="destination down")
+    await asyncio.wait_for(consumer, timeout=1)
+    await reader.close()
+
+    assert [u.status for u in received] == [TransferStatus.PENDING, TransferStatus.IN_PROGRESS, TransferStatus.FAILED]
+    assert received[-1].error == "destination down"
+    assert len(redis.pubsubs) == 0
+
+
+@pytest.mark.asyncio
+async def test_unknown_transfer_is_not_updated():
+    store = TransferProgressStore(SimpleNamespace(is_available=False, client=None))
+
+    assert await store.update("missing", progress=10) is None
+    assert await store.get("missing") is None
+
+
+@pytest.mark.asyncio
+async def test_stream_reads_status_only_once_subscribed():
+    """An update published while the subscription is being set up is not lost."""
+    redis = FakeRedis()
+    writer = TransferProgressStore(SimpleNamespace(is_available=True, client=redis))
+    reader = TransferProgressStore(SimpleNamespace(is_available=True, client=redis))
+    await writer.save(new_status())
+
+    subscribed = FakePubSub.psubscribe
+
+    async def slow_psubscribe(pubsub, pattern):
+        # The transfer finishes before the subscription is in place
+        await writer.update("t-1", status=TransferStatus.COMPLETED, progress=100)
+        await subscribed(pubsub, pattern)
+
+    FakePubSub.psubscribe = slow_psubscribe
+    try:
+        received = []
+        await asyncio.wait_for(collect(reader, "t-1", received), timeout=1)
+    finally:
+        FakePubSub.psubscribe = subscribed
+        await reader.close()
+
+    assert [u.status for u in received] == [TransferStatus.COMPLETED]
+
+
+@pytest.mark.asyncio
+async def test_idle_stream_rereads_missed_update():
+    """A missed publish is picked up by the keepalive re-read."""
+    redis = FakeRedis()
+    store = TransferProgressStore(SimpleNamespace(is_available=True, client=redis))
+    await store.save(new_status())
+
+    received = []
+
+    async def consume():
+        async for update in store.subscribe("t-1", keepalive_seconds=0.05):
+            received.append(update)
+
+    consumer = asyncio.create_task(consume())
+    while not redis.pubsubs:
+        await asyncio.sleep(0)
+    await asyncio.sleep(0.01)
+
+    # Stored but never delivered (e.g. the subscription was reconnecting)
+    done = new_status().model_copy(update={"status": TransferStatus.COMPLETED, "progress": 100})
+    redis.values["transfer-progress:t-1"] = done.model_dump_json()
+    await asyncio.wait_for(consumer, timeout=1)
+    await store.close()
+
+    assert received[0].status == TransferStatus.PENDING
+    assert received[-1].status == TransferStatus.COMPLETED
+
+
+@pytest.mark.asyncio
+async def test_reconnected_subscription_rereads_streamed_transfers():
+    """Updates published while the subscription was down reach streams after it reconnects."""
+    redis = FakeRedis()
+    store = TransferProgressStore(SimpleNamespace(is_available=True, client=redis))
+    await store.save(new_status())
+
+    received = []
+    consumer = asyncio.create_task(collect(store, "t-1", received))
+    while not received:
+        await asyncio.sleep(0)
+
+    # Connection drops; the transfer completes before the subscription is back
+    [pubsub] = redis.pubsubs
+    redis.pubsubs.clear()
+    done = new_status().model_copy(update={"status": TransferStatus.COMPLETED, "progress": 100})
+    redis.values["transfer-progress:t-1"] = done.model_dump_json()
+    pubsub.queue.put_nowait(None)  # listen() fails on the malformed message
+    pubsub.aclose = lambda: asyncio.sleep(0)
+
+    await asyncio.wait_for(consumer, timeout=3)
+    await store.close()
+
+    assert [u.status for u in received] == [TransferStatus.PENDING, TransferStatus.COMPLETED]